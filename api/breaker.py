@@ -0,0 +1,245 @@
+# api/breaker.py
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+
+from data.migrations import is_current
+
+SHARED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS circuit_breaker (
+  name         TEXT PRIMARY KEY,
+  state        TEXT NOT NULL,        -- closed | open | half_open
+  failures     INTEGER NOT NULL,
+  open_until   REAL NOT NULL,
+  probe_until  REAL NOT NULL,        -- half_open: มี worker กำลังลองยิงอยู่ถึงเวลานี้
+  opened       INTEGER NOT NULL,     -- จำนวนครั้งที่เปิด (สะสม)
+  last_error   TEXT,
+  updated_at   REAL NOT NULL
+);
+"""
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(requests.RequestException):
+    """upstream ถูกตัดวงจรอยู่ — ไม่ได้ยิงจริง (ให้ผู้เรียก fallback ได้ทันที)"""
+
+
+class CircuitBreaker:
+    """ตัดวงจรเมื่อ upstream ล้ม/timeout ติดกัน failure_threshold ครั้ง
+
+    closed    → ยิงได้ปกติ นับ error ติดกัน
+    open      → ปฏิเสธทันทีจนครบ reset_timeout วินาที
+    half_open → ปล่อยให้ลองยิง (probe) ได้ทีละหนึ่งรีเควส สำเร็จ = closed, พัง = open อีกรอบ
+
+    ถ้าตั้ง shared_path สถานะอยู่ในตาราง SQLite → worker หนึ่งเจอ outage ทุก worker หยุดยิงด้วย
+    """
+
+    def __init__(
+        self,
+        name: str = "petfinder",
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        probe_timeout: float = 15.0,
+        shared_path: str | None = None,
+    ):
+        self.name = name
+        self.failure_threshold = max(int(failure_threshold), 1)
+        self.reset_timeout = float(reset_timeout)
+        self.probe_timeout = float(probe_timeout)
+        self.shared_path = os.path.abspath(shared_path) if shared_path else None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._mem = self._initial()
+        self.rejected = 0
+        if self.shared_path:
+            con = self._con()
+            if not is_current(con):
+                con.executescript(SHARED_SCHEMA)
+
+    @classmethod
+    def from_env(cls, shared_path: str | None = None):
+        return cls(
+            failure_threshold=int(os.getenv("PETFINDER_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("PETFINDER_BREAKER_RESET_SECS", "30")),
+            shared_path=shared_path,
+        )
+
+    # ---------- Public API ----------
+    def blocked(self) -> bool:
+        """allow() จะปฏิเสธแน่ ๆ ไหม (เช็คโดยไม่จองสิทธิ์ probe) — True นับเป็น rejected
+
+        ใช้ก่อนงานที่อาจรอ/ล้มก่อนยิงจริง (rate limit, งบเวลา) แล้วค่อย allow() ตอนจะยิง
+        → probe ที่จองไว้ได้ผลเสมอ ไม่ค้าง half-open จนครบ probe_timeout
+        """
+        now = time.time()
+        st = self._read()
+        if (st["state"] == OPEN and now < st["open_until"]) or (
+            st["state"] == HALF_OPEN and now < st["probe_until"]
+        ):
+            self._reject()
+            return True
+        return False
+
+    def allow(self) -> bool:
+        now = time.time()
+        st = self._read()
+        if st["state"] == CLOSED:
+            return True
+        if st["state"] == OPEN and now < st["open_until"]:
+            return self._reject()
+        if st["state"] == HALF_OPEN and now < st["probe_until"]:
+            return self._reject()  # มีคนลองอยู่แล้ว
+
+        # ครบเวลา open (หรือ probe ก่อนหน้าค้างเกิน probe_timeout) → ขอเป็นผู้ลองยิง
+        def claim(cur):
+            if cur["state"] == CLOSED:
+                return cur, True
+            if cur["state"] == OPEN and now < cur["open_until"]:
+                return cur, False
+            if cur["state"] == HALF_OPEN and now < cur["probe_until"]:
+                return cur, False
+            return dict(cur, state=HALF_OPEN, probe_until=now + self.probe_timeout), True
+
+        if self._update(claim):
+            return True
+        return self._reject()
+
+    def record_success(self):
+        st = self._read()
+        if st["state"] == CLOSED and st["failures"] == 0:
+            return  # ทางปกติ ไม่ต้องเขียน
+        self._update(lambda cur: (dict(cur, state=CLOSED, failures=0, probe_until=0.0), True))
+
+    def record_failure(self, error: str | None = None):
+        now = time.time()
+
+        def fail(cur):
+            failures = cur["failures"] + 1
+            if cur["state"] == HALF_OPEN or failures >= self.failure_threshold:
+                opened = cur["opened"] + (cur["state"] != OPEN)
+                return dict(
+                    cur,
+                    state=OPEN,
+                    failures=failures,
+                    open_until=now + self.reset_timeout,
+                    probe_until=0.0,
+                    opened=opened,
+                    last_error=error,
+                ), True
+            return dict(cur, failures=failures, last_error=error), True
+
+        self._update(fail)
+
+    def snapshot(self) -> dict:
+        st = self._read()
+        out = {k: v for k, v in st.items() if k != "updated_at"}
+        now = time.time()
+        out["retry_in"] = round(max(0.0, st["open_until"] - now), 3) if st["state"] == OPEN else 0
+        out["rejected"] = self.rejected
+        out["failure_threshold"] = self.failure_threshold
+        out["reset_timeout"] = self.reset_timeout
+        out["shared"] = bool(self.shared_path)
+        return out
+
+    # ---------- Internals ----------
+    @staticmethod
+    def _initial() -> dict:
+        return {
+            "state": CLOSED,
+            "failures": 0,
+            "open_until": 0.0,
+            "probe_until": 0.0,
+            "opened": 0,
+            "last_error": None,
+            "updated_at": 0.0,
+        }
+
+    def _reject(self) -> bool:
+        with self._lock:
+            self.rejected += 1
+        return False
+
+    def _read(self) -> dict:
+        if not self.shared_path:
+            with self._lock:
+                return dict(self._mem)
+        try:
+            row = (
+                self._con()
+                .execute(
+                    "SELECT state, failures, open_until, probe_until, opened, last_error,"
+                    " updated_at FROM circuit_breaker WHERE name = ?",
+                    (self.name,),
+                )
+                .fetchone()
+            )
+        except sqlite3.Error:
+            with self._lock:
+                return dict(self._mem)
+        if row is None:
+            return self._initial()
+        return dict(
+            zip(
+                (
+                    "state",
+                    "failures",
+                    "open_until",
+                    "probe_until",
+                    "opened",
+                    "last_error",
+                    "updated_at",
+                ),
+                row,
+                strict=True,
+            )
+        )
+
+    def _update(self, fn) -> bool:
+        """อ่าน-แก้-เขียนแบบ atomic (BEGIN IMMEDIATE ข้ามโปรเซส) fn(cur) → (new, result)"""
+        if not self.shared_path:
+            with self._lock:
+                self._mem, result = fn(dict(self._mem))
+            return result
+        con = self._con()
+        try:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                new, result = fn(self._read())
+                new["updated_at"] = time.time()
+                con.execute(
+                    "INSERT OR REPLACE INTO circuit_breaker (name, state, failures, open_until,"
+                    " probe_until, opened, last_error, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        self.name,
+                        new["state"],
+                        new["failures"],
+                        new["open_until"],
+                        new["probe_until"],
+                        new["opened"],
+                        new["last_error"],
+                        new["updated_at"],
+                    ),
+                )
+                con.execute("COMMIT")
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            # SQLite มีปัญหา → ใช้สถานะในโปรเซสแทน (ไม่ทำให้การค้นหาพัง)
+            print("[warn] breaker state write failed:", e)
+            with self._lock:
+                self._mem, result = fn(dict(self._mem))
+        return result
+
+    def _con(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.shared_path, timeout=5, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
@@ -0,0 +1,235 @@
+# api/cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from data.migrations import is_current
+
+SHARED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_cache (
+  key          TEXT PRIMARY KEY,
+  value        TEXT NOT NULL,
+  expires_at   REAL NOT NULL,
+  accessed_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_search_cache_accessed ON search_cache(accessed_at);
+"""
+
+
+class SearchCache:
+    """TTL + LRU cache ของผลค้นหา
+
+    ชั้นแรกเป็น dict ในโปรเซส (OrderedDict) ชั้นที่สอง (ถ้าตั้ง shared_path)
+    เป็นตาราง SQLite ที่ทุก gunicorn worker ใช้ร่วมกัน
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300,
+        maxsize: int = 256,
+        shared_path: str | None = None,
+        shared_maxsize: int | None = None,
+    ):
+        self.ttl = float(ttl)
+        self.maxsize = max(int(maxsize), 1)
+        self.shared_path = os.path.abspath(shared_path) if shared_path else None
+        self.shared_maxsize = int(shared_maxsize or self.maxsize * 8)
+        self._data: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "shared_hits": 0,
+            "sets": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "shared_errors": 0,
+        }
+        if self.shared_path:
+            self._init_shared()
+
+    @classmethod
+    def from_env(cls, shared_path: str | None = None):
+        """สร้างจาก env: PETFINDER_CACHE_TTL / _SIZE / _SHARED (0 = ปิดชั้น SQLite)"""
+        shared = os.getenv("PETFINDER_CACHE_SHARED", "1").lower() not in ("0", "false", "no")
+        return cls(
+            ttl=float(os.getenv("PETFINDER_CACHE_TTL", "300")),
+            maxsize=int(os.getenv("PETFINDER_CACHE_SIZE", "256")),
+            shared_path=(os.getenv("PETFINDER_CACHE_DB") or shared_path) if shared else None,
+        )
+
+    # ---------- Keys ----------
+    @staticmethod
+    def make_key(params: dict) -> str:
+        """key ที่ normalize แล้ว: ตัดค่าว่าง, ตัดช่องว่าง, ตัวพิมพ์เล็ก, เรียง key"""
+        norm = {}
+        for k, v in params.items():
+            if v is None or v == "":
+                continue
+            norm[k] = v.strip().lower() if isinstance(v, str) else v
+        return json.dumps(norm, sort_keys=True, separators=(",", ":"))
+
+    # ---------- Public API ----------
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return value
+                del self._data[key]
+                self._stats["expirations"] += 1
+
+        if self.shared_path:
+            row = self._shared_get(key, now)
+            if row is not None:
+                expires_at, value = row
+                with self._lock:
+                    self._put_local(key, value, expires_at)
+                    self._stats["hits"] += 1
+                    self._stats["shared_hits"] += 1
+                return value
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def expires_at(self, key: str) -> float | None:
+        """เวลาหมดอายุ (epoch) ของ entry ที่ยังใช้ได้ ไม่มี = None — ไม่นับเป็น hit/miss
+
+        ดูทั้งสองชั้นแล้วเอาค่าที่ใหม่กว่า (worker อื่นอาจเพิ่งเขียนชั้น SQLite ทับ)
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+        best = entry[0] if entry is not None and entry[0] > now else None
+        if self.shared_path:
+            try:
+                row = (
+                    self._shared()
+                    .execute(
+                        "SELECT expires_at FROM search_cache WHERE key = ? AND expires_at > ?",
+                        (key, now),
+                    )
+                    .fetchone()
+                )
+            except sqlite3.Error:
+                with self._lock:
+                    self._stats["shared_errors"] += 1
+                row = None
+            if row is not None and (best is None or row[0] > best):
+                best = row[0]
+        return best
+
+    def set(self, key: str, value: dict, ttl: float | None = None):
+        expires_at = time.time() + (self.ttl if ttl is None else float(ttl))
+        with self._lock:
+            self._put_local(key, value, expires_at)
+            self._stats["sets"] += 1
+        if self.shared_path:
+            self._shared_set(key, value, expires_at)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+        if self.shared_path:
+            try:
+                self._shared().execute("DELETE FROM search_cache")
+            except sqlite3.Error:
+                with self._lock:
+                    self._stats["shared_errors"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats)
+            out["size"] = len(self._data)
+        lookups = out["hits"] + out["misses"]
+        out["hit_rate"] = round(out["hits"] / lookups, 4) if lookups else 0.0
+        out["maxsize"] = self.maxsize
+        out["ttl"] = self.ttl
+        out["shared"] = bool(self.shared_path)
+        return out
+
+    def __len__(self):
+        return len(self._data)
+
+    # ---------- In-process layer ----------
+    def _put_local(self, key, value, expires_at):
+        # เรียกภายใต้ self._lock เท่านั้น
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    # ---------- Shared SQLite layer ----------
+    def _shared(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.shared_path, timeout=5, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def _init_shared(self):
+        db_dir = os.path.dirname(self.shared_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+        con = self._shared()
+        if not is_current(con):
+            con.executescript(SHARED_SCHEMA)
+
+    def _shared_get(self, key, now):
+        try:
+            con = self._shared()
+            row = con.execute(
+                "SELECT expires_at, value FROM search_cache WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                return None
+            con.execute("UPDATE search_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            return row[0], json.loads(row[1])
+        except (sqlite3.Error, ValueError):
+            with self._lock:
+                self._stats["shared_errors"] += 1
+            return None
+
+    def _shared_set(self, key, value, expires_at):
+        now = time.time()
+        try:
+            con = self._shared()
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                con.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, value, expires_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value, separators=(",", ":")), expires_at, now),
+                )
+                con.execute("DELETE FROM search_cache WHERE expires_at <= ?", (now,))
+                # LRU: ตัดแถวที่ถูกใช้ล่าสุดนานที่สุดเมื่อเกินขนาด
+                cur = con.execute(
+                    """DELETE FROM search_cache WHERE key IN (
+                         SELECT key FROM search_cache ORDER BY accessed_at
+                         LIMIT max(0, (SELECT count(*) FROM search_cache) - ?))""",
+                    (self.shared_maxsize,),
+                )
+                evicted = cur.rowcount
+                con.execute("COMMIT")
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            if evicted > 0:
+                with self._lock:
+                    self._stats["evictions"] += evicted
+        except sqlite3.Error:
+            with self._lock:
+                self._stats["shared_errors"] += 1
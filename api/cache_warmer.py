@@ -0,0 +1,354 @@
+# api/cache_warmer.py
+import atexit
+import os
+import random
+import sqlite3
+import threading
+import time
+import weakref
+
+from api.breaker import CircuitOpenError
+from api.rate_limit import RateLimited
+from data.metrics import METRICS
+from data.migrations import is_current
+
+SHARED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_warm_budget (
+  window_start  INTEGER PRIMARY KEY,   -- epoch วินาที ปัดลงตาม interval
+  budget        INTEGER NOT NULL,
+  used          INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS cache_warm_claims (
+  window_start  INTEGER NOT NULL,
+  key           TEXT NOT NULL,
+  PRIMARY KEY (window_start, key)
+) WITHOUT ROWID;
+"""
+
+# เก็บประวัติงบไว้ดูย้อนหลังกี่ช่วง
+KEEP_WINDOWS = 48
+
+
+class CacheWarmer:
+    """อุ่น cache ของค้นหายอดนิยม (หน้าแรก) ก่อน entry หมดอายุ
+
+    ทุก interval วินาที (± jitter) อ่านชุด filter ที่ถูกค้นบ่อยสุดจาก search_rollups
+    (db.top_searches) แล้วดึงใหม่เฉพาะตัวที่ cache เหลืออายุไม่ถึง refresh_ahead วินาที
+    จำนวนครั้งที่ยิง upstream ต่อช่วงถูกจำกัดด้วย budget — ถ้าตั้ง shared_path งบและ
+    การจองแต่ละ key อยู่ในตาราง SQLite → ทุก worker ใช้งบเดียวกันและไม่ดึงซ้ำกันในช่วงเดียว
+    """
+
+    def __init__(
+        self,
+        pf,
+        db,
+        interval: float = 60,
+        budget: int = 20,
+        top_n: int = 20,
+        span_hours: int = 24,
+        jitter: float = 0.2,
+        refresh_ahead: float | None = None,
+        per_page: int = 24,
+        default_location: str = "10001",
+        shared_path: str | None = None,
+    ):
+        self.pf = pf
+        self.db = db
+        pf.warmer = self  # pf รายงาน hit/miss ของ key ในแผนกลับมาที่ observe()
+        self.interval = max(float(interval), 1.0)
+        self.budget = max(int(budget), 0)
+        self.top_n = max(int(top_n), 1)
+        self.span_hours = max(int(span_hours), 1)
+        self.jitter = min(max(float(jitter), 0.0), 0.9)
+        # รอบถัดไปอาจมาช้าสุด interval * (1 + jitter) → ต้องดึงก่อนหมดอายุอย่างน้อยเท่านั้น
+        self.refresh_ahead = (
+            float(refresh_ahead)
+            if refresh_ahead is not None
+            else self.interval * (1 + self.jitter) + 5
+        )
+        self.per_page = int(per_page)
+        self.default_location = default_location
+        self.shared_path = os.path.abspath(shared_path) if shared_path else None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._mem_budget: dict[int, int] = {}
+        self._mem_claims: set[tuple[int, str]] = set()
+        self._warm_keys: frozenset[str] = frozenset()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._pid = os.getpid()
+        self._stats = {
+            "runs": 0,
+            "planned": 0,
+            "refreshed": 0,
+            "fresh": 0,
+            "claimed_elsewhere": 0,
+            "budget_exhausted": 0,
+            "errors": 0,
+            "warm_hits": 0,
+            "warm_misses": 0,
+            "last_run_ms": 0.0,
+            "last_run_at": None,
+        }
+        if self.shared_path:
+            con = self._con()
+            if not is_current(con):
+                con.executescript(SHARED_SCHEMA)
+        atexit.register(_stop_warmer, weakref.ref(self))
+
+    @classmethod
+    def from_env(cls, pf, db, shared_path: str | None = None):
+        """PETS_WARM_INTERVAL / _BUDGET (ครั้งต่อช่วง รวมทุก worker) / _TOP / _SPAN_HOURS /
+        _JITTER / _AHEAD / _PER_PAGE"""
+        ahead = os.getenv("PETS_WARM_AHEAD")
+        return cls(
+            pf,
+            db,
+            interval=float(os.getenv("PETS_WARM_INTERVAL", "60")),
+            budget=int(os.getenv("PETS_WARM_BUDGET", "20")),
+            top_n=int(os.getenv("PETS_WARM_TOP", "20")),
+            span_hours=int(os.getenv("PETS_WARM_SPAN_HOURS", "24")),
+            jitter=float(os.getenv("PETS_WARM_JITTER", "0.2")),
+            refresh_ahead=float(ahead) if ahead else None,
+            per_page=int(os.getenv("PETS_WARM_PER_PAGE", "24")),
+            shared_path=shared_path,
+        )
+
+    # ---------- Plan ----------
+    def plan(self) -> list[dict]:
+        """kwargs ของ pf.refresh() สำหรับหน้าแรกของค้นหายอดนิยม เรียงจากบ่อยสุด"""
+        out, seen = [], set()
+        for row in self.db.top_searches(n=self.top_n, bucket="hour", span=self.span_hours):
+            # ค่าเริ่มต้นเดียวกับ /api/search (location ว่าง = 10001)
+            kwargs = {
+                "animal_type": row["animal_type"],
+                "location": row["location"] or self.default_location,
+                "age": row["age"],
+                "breed": row["breed"],
+                "size": row["size"],
+                "gender": row["gender"],
+                "page": 1,
+                "per_page": self.per_page,
+            }
+            key = self.key_for(kwargs)
+            if key not in seen:
+                seen.add(key)
+                out.append(kwargs)
+        return out
+
+    def key_for(self, kwargs: dict) -> str:
+        params = self.pf._build_params(
+            kwargs["animal_type"],
+            kwargs["location"],
+            kwargs["age"],
+            kwargs["breed"],
+            kwargs["size"],
+            kwargs["gender"],
+            kwargs["page"],
+            kwargs["per_page"],
+        )
+        return self.pf.cache_key(params)
+
+    # ---------- Run ----------
+    def run_once(self) -> dict:
+        """หนึ่งรอบ: วางแผน → ข้ามตัวที่ยังสด → จองงบ → ดึงใหม่ คืนสรุปของรอบนี้"""
+        started = time.perf_counter()
+        result = {
+            "planned": 0,
+            "refreshed": 0,
+            "fresh": 0,
+            "claimed_elsewhere": 0,
+            "budget_exhausted": 0,
+            "errors": 0,
+        }
+        try:
+            plan = self.plan()
+        except Exception as e:
+            print("[warn] cache warm plan failed:", e)
+            plan = []
+            result["errors"] += 1
+        keys = [self.key_for(kwargs) for kwargs in plan]
+        self._warm_keys = frozenset(keys)
+        result["planned"] = len(plan)
+
+        now = time.time()
+        for kwargs, key in zip(plan, keys, strict=True):
+            expires_at = self.pf.cache.expires_at(key)
+            if expires_at is not None and expires_at - now > self.refresh_ahead:
+                result["fresh"] += 1
+                continue
+            status = self._claim(key, now)
+            if status == "budget":
+                # งบช่วงนี้หมด ตัวที่เหลือนิยมน้อยกว่า → รอช่วงหน้า
+                result["budget_exhausted"] += 1
+                METRICS.inc("cache_warm_refresh_total", status="budget_exhausted")
+                break
+            if status == "claimed":
+                result["claimed_elsewhere"] += 1
+                continue
+            try:
+                self.pf.refresh(**kwargs)
+            except (CircuitOpenError, RateLimited) as e:
+                # upstream กำลังมีปัญหา/เต็มโควตา → ไม่ไปเพิ่มภาระ
+                print(f"[warn] cache warm paused: {e}")
+                result["errors"] += 1
+                METRICS.inc("cache_warm_refresh_total", status="error")
+                break
+            except Exception as e:
+                print(f"[warn] cache warm refresh failed: {e}")
+                result["errors"] += 1
+                METRICS.inc("cache_warm_refresh_total", status="error")
+                continue
+            result["refreshed"] += 1
+            METRICS.inc("cache_warm_refresh_total", status="refreshed")
+
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+        with self._lock:
+            for name, n in result.items():
+                self._stats[name] += n
+            self._stats["runs"] += 1
+            self._stats["last_run_ms"] = elapsed_ms
+            self._stats["last_run_at"] = round(now, 3)
+        return result
+
+    def observe(self, key: str, hit: bool):
+        """เรียกจาก pf ทุกครั้งที่อ่าน cache → นับ hit rate ของค้นหาที่อยู่ในแผนอุ่น"""
+        if key not in self._warm_keys:
+            return
+        with self._lock:
+            self._stats["warm_hits" if hit else "warm_misses"] += 1
+        METRICS.inc("cache_warm_lookups_total", result="hit" if hit else "miss")
+
+    # ---------- Budget ----------
+    def _window(self, now: float) -> int:
+        return int(now // self.interval * self.interval)
+
+    def _claim(self, key: str, now: float) -> str:
+        """ok = ได้งบ 1 ครั้ง, budget = งบช่วงนี้หมด, claimed = worker อื่นจอง key นี้ไปแล้ว"""
+        window = self._window(now)
+        if not self.shared_path:
+            with self._lock:
+                if (window, key) in self._mem_claims:
+                    return "claimed"
+                if self._mem_budget.get(window, 0) >= self.budget:
+                    return "budget"
+                self._mem_budget[window] = self._mem_budget.get(window, 0) + 1
+                self._mem_claims.add((window, key))
+                for old in [w for w in self._mem_budget if w < window]:
+                    del self._mem_budget[old]
+                self._mem_claims = {c for c in self._mem_claims if c[0] >= window}
+            return "ok"
+        con = self._con()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            con.execute(
+                "INSERT OR IGNORE INTO cache_warm_budget (window_start, budget) VALUES (?, ?)",
+                (window, self.budget),
+            )
+            if con.execute(
+                "SELECT 1 FROM cache_warm_claims WHERE window_start = ? AND key = ?",
+                (window, key),
+            ).fetchone():
+                status = "claimed"
+            elif con.execute(
+                "UPDATE cache_warm_budget SET used = used + 1"
+                " WHERE window_start = ? AND used < budget",
+                (window,),
+            ).rowcount:
+                con.execute(
+                    "INSERT INTO cache_warm_claims (window_start, key) VALUES (?, ?)",
+                    (window, key),
+                )
+                status = "ok"
+            else:
+                status = "budget"
+            keep_from = window - KEEP_WINDOWS * int(self.interval)
+            con.execute("DELETE FROM cache_warm_claims WHERE window_start < ?", (window,))
+            con.execute("DELETE FROM cache_warm_budget WHERE window_start < ?", (keep_from,))
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        return status
+
+    def budget_usage(self, windows: int = 6) -> list[dict]:
+        """งบที่ใช้ไปต่อช่วงล่าสุด (รวมทุก worker ถ้าใช้ shared_path)"""
+        if not self.shared_path:
+            with self._lock:
+                rows = sorted(self._mem_budget.items(), reverse=True)[:windows]
+            return [{"window_start": w, "budget": self.budget, "used": u} for w, u in rows]
+        rows = (
+            self._con()
+            .execute(
+                "SELECT window_start, budget, used FROM cache_warm_budget"
+                " ORDER BY window_start DESC LIMIT ?",
+                (int(windows),),
+            )
+            .fetchall()
+        )
+        return [{"window_start": w, "budget": b, "used": u} for w, b, u in rows]
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats)
+        lookups = out["warm_hits"] + out["warm_misses"]
+        out["warm_hit_rate"] = round(out["warm_hits"] / lookups, 4) if lookups else 0.0
+        out["warm_keys"] = len(self._warm_keys)
+        out["interval"] = self.interval
+        out["budget"] = self.budget
+        out["refresh_ahead"] = self.refresh_ahead
+        out["running"] = bool(self._thread and self._thread.is_alive())
+        usage = self.budget_usage()
+        current = self._window(time.time())
+        out["budget_used"] = next((u["used"] for u in usage if u["window_start"] == current), 0)
+        out["budget_history"] = usage
+        return out
+
+    # ---------- Thread ----------
+    def start(self):
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if os.getpid() != self._pid:
+                # หลัง fork: thread ของโปรเซสแม่ไม่ตามมา ต้องเริ่มใหม่
+                self._pid = os.getpid()
+                self._thread = None
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="cache-warmer", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        if os.getpid() != self._pid:
+            return
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _run(self):
+        # เริ่มรอบแรกแบบสุ่มในช่วงแรก → worker ที่สตาร์ตพร้อมกันไม่ยิงพร้อมกัน
+        delay = random.uniform(0, self.interval * max(self.jitter, 0.1))
+        while not self._stop.wait(delay):
+            try:
+                self.run_once()
+            except Exception as e:
+                print("[warn] cache warm run failed:", e)
+                with self._lock:
+                    self._stats["errors"] += 1
+            delay = self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _con(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.shared_path, timeout=5, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+
+def _stop_warmer(ref):
+    warmer = ref()
+    if warmer is not None:
+        warmer.stop(timeout=1.0)
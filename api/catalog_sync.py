@@ -0,0 +1,156 @@
+# api/catalog_sync.py
+"""ดึงข้อมูลสัตว์จาก Petfinder มาเก็บใน catalog ในเครื่อง (ใช้ตอบ /api/search?source=mirror)
+
+รันจาก cron หรือเป็น process แยก:
+    python -m api.catalog_sync --locations 10001,90210 --types dog,cat
+    python -m api.catalog_sync --loop 900          # sync ทุก 15 นาที
+"""
+
+import argparse
+import os
+import time
+
+from dotenv import load_dotenv
+
+from api.petfinder import PetFinderAPI
+from data.catalog import CatalogStore
+
+# Petfinder คืนเฉพาะ adoptable ถ้าไม่ระบุ status → ขอสถานะปลายทางด้วยเพื่อลบออกจาก mirror
+SYNC_STATUSES = "adoptable,adopted,found"
+
+
+def _to_row(it: dict, location: str) -> dict:
+    row = PetFinderAPI._map_animal(it)
+    row["id"] = str(row["id"])
+    row["location"] = location
+    row["updated_at"] = it.get("status_changed_at") or it.get("published_at")
+    return row
+
+
+class CatalogSync:
+    def __init__(
+        self,
+        api: PetFinderAPI,
+        store: CatalogStore,
+        locations: list[str],
+        types: list[str],
+        per_page: int = 100,
+        max_pages: int = 50,
+        stale_after: float = 7 * 86400,
+    ):
+        self.api = api
+        self.store = store
+        self.locations = [loc.strip() for loc in locations if loc.strip()]
+        self.types = [t.strip().lower() for t in types if t.strip()]
+        self.per_page = per_page
+        self.max_pages = max_pages
+        self.stale_after = stale_after
+
+    @classmethod
+    def from_env(cls, api: PetFinderAPI, store: CatalogStore):
+        return cls(
+            api,
+            store,
+            locations=os.getenv("PETFINDER_MIRROR_LOCATIONS", "10001").split(","),
+            types=os.getenv("PETFINDER_MIRROR_TYPES", "dog,cat").split(","),
+        )
+
+    def sync_pair(self, location: str, animal_type: str, full: bool = False) -> dict:
+        """sync หนึ่งคู่ (location, type) — ถ้าไม่ full จะดึงเฉพาะที่ใหม่กว่า watermark
+
+        ขอทุกสถานะ (ไม่ใช่แค่ adoptable) เพื่อเห็นตัวที่ถูกรับเลี้ยง/เจอแล้วและลบออกจาก mirror
+        watermark ขยับเฉพาะเมื่อไล่ครบทุกหน้า — ถ้าติด max_pages รอบหน้าจะเริ่มจากจุดเดิม
+        """
+        watermark = None if full else self.store.get_watermark(location, animal_type)
+        newest = watermark
+        upserted = removed = pages = 0
+        complete = False
+
+        page = 1
+        while page <= self.max_pages:
+            params = self.api._build_params(
+                animal_type, location, None, None, None, None, page, self.per_page
+            )
+            params["sort"] = "recent"
+            params["status"] = SYNC_STATUSES
+            if watermark:
+                params["after"] = watermark
+            payload = self.api.fetch_raw(params)
+            pages += 1
+
+            rows, gone = [], []
+            for it in payload.get("animals", []):
+                if (it.get("status") or "adoptable") != "adoptable":
+                    gone.append(str(it.get("id")))
+                    continue
+                row = _to_row(it, location)
+                rows.append(row)
+                if row["updated_at"] and (newest is None or row["updated_at"] > newest):
+                    newest = row["updated_at"]
+            upserted += self.store.upsert(rows)
+            removed += self.store.delete(gone)
+
+            total_pages = int((payload.get("pagination") or {}).get("total_pages") or 1)
+            if page >= total_pages or not rows and not gone:
+                complete = True
+                break
+            page += 1
+
+        if complete:
+            self.store.set_watermark(location, animal_type, newest)
+        else:
+            print(
+                f"[warn] catalog sync {location}/{animal_type} stopped at max_pages="
+                f"{self.max_pages}; watermark not advanced"
+            )
+        return {
+            "location": location,
+            "animal_type": animal_type,
+            "pages": pages,
+            "upserted": upserted,
+            "removed": removed,
+            "complete": complete,
+        }
+
+    def sync_once(self, full: bool = False) -> list[dict]:
+        if self.api.mock_mode:
+            print("[catalog] skip sync: no Petfinder credentials (mock mode)")
+            return []
+        out = [self.sync_pair(loc, t, full=full) for loc in self.locations for t in self.types]
+        if full and all(s["complete"] for s in out):
+            # เฉพาะรอบเต็มที่ไล่ครบทุกหน้าเท่านั้นที่ทุกตัวถูก sync ซ้ำ จึงตัดตัวที่ค้างนานได้อย่างปลอดภัย
+            pruned = self.store.prune(time.time() - self.stale_after)
+            if pruned:
+                print(f"[catalog] pruned {pruned} stale animals")
+        return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Sync the local Petfinder catalog mirror")
+    ap.add_argument("--locations", help="comma separated, default PETFINDER_MIRROR_LOCATIONS")
+    ap.add_argument("--types", help="comma separated, default PETFINDER_MIRROR_TYPES")
+    ap.add_argument("--full", action="store_true", help="ignore watermarks and re-fetch all")
+    ap.add_argument("--loop", type=float, default=0, help="repeat every N seconds")
+    args = ap.parse_args(argv)
+
+    load_dotenv()  # CLI แยกจากแอป → โหลด .env เอง (PETFINDER_API_KEY, PETS_DB_PATH)
+    sync = CatalogSync.from_env(PetFinderAPI(), CatalogStore(os.getenv("PETS_DB_PATH")))
+    if args.locations:
+        sync.locations = [x.strip() for x in args.locations.split(",") if x.strip()]
+    if args.types:
+        sync.types = [x.strip().lower() for x in args.types.split(",") if x.strip()]
+
+    while True:
+        started = time.perf_counter()
+        for summary in sync.sync_once(full=args.full):
+            print("[catalog]", summary)
+        print(
+            f"[catalog] done in {time.perf_counter() - started:.2f}s ({sync.store.count()} animals)"
+        )
+        if not args.loop:
+            break
+        time.sleep(args.loop)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+# api/facets.py
+"""facet และการกรองต่อในเครื่อง บนชุดผลค้นหาที่ดึงมาครบทุกหน้าแล้ว
+
+ผู้ใช้มักค้นแคบลงด้วย age/size/gender/breed จากผลชุดเดิม → แทนที่จะยิง Petfinder ทุกครั้ง
+ดึงชุดฐาน (เช่น dog @ 10001) ครบทุกหน้าครั้งเดียวแล้วทำดัชนีแบบคอลัมน์:
+    ต่อ facet = ค่าที่พบ + bitmap ต่อค่า (int ของ Python, bit i = ตัวที่ i ในชุด)
+กรอง = OR bitmap ภายใน facet แล้ว AND ข้าม facet, นับ = int.bit_count()
+ชุดละ 10k ตัว → bitmap ละ ~1.3KB กรองและนับทุก facet ใช้ไม่ถึงมิลลิวินาที (benchmarks/bench_facets.py)
+
+ดัชนีอยู่ในโปรเซส (LRU + TTL เท่า cache ผลค้นหา) หน้าที่ใช้สร้างผ่าน SearchCache ที่แชร์ทุก worker
+worker อื่นจึงสร้างชุดเดียวกันได้โดยไม่ยิง upstream ซ้ำ
+
+ต่างจาก Petfinder: breed เทียบกับสายพันธุ์หลัก (breeds.primary) อย่างเดียว
+และ has_photo เป็น filter ที่มีเฉพาะในเครื่อง (upstream ไม่มี)
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from api.cache import SearchCache
+from api.petfinder import DEFAULT_PHOTO
+from api.singleflight import SingleFlight
+from data.metrics import METRICS
+
+FACETS = ("breed", "age", "size", "gender", "has_photo")
+# filter ที่ส่ง upstream ได้ — ชุดฐานกับคำค้นต้องตรงกันในตัวที่ไม่ใช่ facet (ชนิด/พื้นที่)
+FILTER_KEYS = ("animal_type", "location", "age", "breed", "size", "gender")
+# ค่าใน query ของ Petfinder ที่ payload เขียนอีกแบบ
+ALIASES = {"size": {"xlarge": "extra large"}}
+TRUE_VALUES = ("1", "true", "yes", "on")
+
+
+def _norm(value) -> str | None:
+    if value is None:
+        return None
+    value = str(value).strip().lower()
+    return value or None
+
+
+def _choices(facet: str, value) -> frozenset | None:
+    """ค่าที่ยอมรับของ facet (Petfinder รับหลายค่าคั่นด้วย comma) None = ไม่กรอง"""
+    value = _norm(value)
+    if value is None:
+        return None
+    if facet == "has_photo":
+        return frozenset(("true" if value in TRUE_VALUES else "false",))
+    alias = ALIASES.get(facet, {})
+    return frozenset(alias.get(v.strip(), v.strip()) for v in value.split(",") if v.strip())
+
+
+def _label(facet: str, item: dict) -> str | None:
+    if facet == "has_photo":
+        photo = item.get("photo_url")
+        return "true" if photo and photo != DEFAULT_PHOTO else "false"
+    value = item.get(facet)
+    if value is None:
+        return None
+    return str(value).strip() or None
+
+
+def _positions(mask: int, start: int, stop: int) -> list[int]:
+    """ตำแหน่งของ bit ที่ตั้งไว้ ลำดับที่ start..stop-1 (นับจาก bit 0)"""
+    bits = bin(mask)[:1:-1]  # bit 0 มาก่อน
+    out, pos, seen = [], -1, 0
+    while seen < stop:
+        pos = bits.find("1", pos + 1)
+        if pos < 0:
+            break
+        if seen >= start:
+            out.append(pos)
+        seen += 1
+    return out
+
+
+class FacetIndex:
+    """ดัชนีแบบคอลัมน์ของชุดผลหนึ่งชุด (items เรียงตามลำดับที่ upstream ส่งมา, ห้ามแก้ในที่)"""
+
+    def __init__(self, items: list, filters: dict, complete: bool = True, ttl: float = 300):
+        self.items = items
+        self.filters = {k: _norm(filters.get(k)) for k in FILTER_KEYS if _norm(filters.get(k))}
+        self.complete = complete
+        self.expires_at = time.time() + ttl
+        self.all = (1 << len(items)) - 1
+        # facet → {ค่าตัวพิมพ์เล็ก: (ค่าที่แสดง, bitmap)}
+        self.bitmaps: dict[str, dict[str, tuple[str, int]]] = {}
+        width = len(items) // 8 + 1
+        for facet in FACETS:
+            rows: dict[str, tuple[str, bytearray]] = {}
+            for i, item in enumerate(items):
+                label = _label(facet, item)
+                if label is None:
+                    continue
+                row = rows.get(label.lower())
+                if row is None:
+                    row = rows[label.lower()] = (label, bytearray(width))
+                row[1][i >> 3] |= 1 << (i & 7)
+            self.bitmaps[facet] = {
+                k: (label, int.from_bytes(bits, "little")) for k, (label, bits) in rows.items()
+            }
+
+    def __len__(self):
+        return len(self.items)
+
+    def covers(self, filters: dict) -> bool:
+        """True = ผลของ filters เป็นชุดย่อยของชุดนี้ (ตอบในเครื่องได้ครบ)"""
+        for key in FILTER_KEYS:
+            want, base = _norm(filters.get(key)), self.filters.get(key)
+            if base is None:
+                if want is not None and key not in FACETS:
+                    return False
+            elif want is None:
+                return False
+            elif key in FACETS:
+                if not _choices(key, want) <= _choices(key, base):
+                    return False
+            elif want != base:
+                return False
+        return True
+
+    def mask(self, filters: dict, skip: str | None = None) -> int:
+        mask = self.all
+        for facet in FACETS:
+            wanted = None if facet == skip else _choices(facet, filters.get(facet))
+            if wanted is None:
+                continue
+            table = self.bitmaps[facet]
+            hit = 0
+            for value in wanted:
+                entry = table.get(value)
+                if entry is not None:
+                    hit |= entry[1]
+            mask &= hit
+        return mask
+
+    def counts(self, filters: dict) -> dict:
+        """จำนวนต่อค่าของทุก facet แบบ disjunctive (facet หนึ่งนับโดยไม่ใช้ filter ของตัวเอง)
+
+        เลือก age=baby แล้วยังเห็นจำนวน young/adult สำหรับเลือกเพิ่มได้
+        """
+        out = {}
+        for facet in FACETS:
+            mask = self.mask(filters, skip=facet)
+            counts = [
+                (label, n)
+                for label, bits in self.bitmaps[facet].values()
+                if (n := (bits & mask).bit_count())
+            ]
+            # list ไม่ใช่ dict: jsonify เรียง key ตามตัวอักษร ลำดับมากไปน้อยจะหาย
+            out[facet] = [
+                {"value": label, "count": n}
+                for label, n in sorted(counts, key=lambda kv: (-kv[1], kv[0]))
+            ]
+        return out
+
+    def page(self, filters: dict, page: int = 1, per_page: int = 24) -> dict:
+        """หน้าหนึ่งของผลที่กรองแล้ว รูปเดียวกับ PetFinderAPI.search_animals(as_json=True)"""
+        page = max(int(page), 1)
+        per_page = max(int(per_page), 1)
+        mask = self.mask(filters)
+        total = mask.bit_count()
+        start = (page - 1) * per_page
+        items = [self.items[i] for i in _positions(mask, start, start + per_page)]
+        return {
+            "items": items,
+            "page": page,
+            "total_pages": max(1, math.ceil(total / per_page)),
+            "per_page": per_page,
+            "count": len(items),
+            "total_count": total,
+        }
+
+
+class FacetEngine:
+    """ดัชนี facet ของชุดผลล่าสุด (LRU + TTL) และการสร้างชุดจาก PetFinderAPI (single-flight)"""
+
+    def __init__(
+        self, ttl: float = 300, max_sets: int = 16, max_items: int = 10_000, per_page: int = 100
+    ):
+        self.ttl = float(ttl)
+        self.max_sets = max(int(max_sets), 1)
+        self.max_items = max(int(max_items), 1)
+        self.per_page = min(max(int(per_page), 1), 100)  # Petfinder ให้สูงสุด 100 ต่อหน้า
+        self.flight = SingleFlight()
+        self._sets: OrderedDict[str, FacetIndex] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "built": 0, "build_errors": 0, "truncated": 0}
+
+    @classmethod
+    def from_env(cls):
+        """PETS_FACET_TTL (ค่าเริ่มต้น = PETFINDER_CACHE_TTL) / _SETS / _MAX_ITEMS"""
+        return cls(
+            ttl=float(os.getenv("PETS_FACET_TTL") or os.getenv("PETFINDER_CACHE_TTL", "300")),
+            max_sets=int(os.getenv("PETS_FACET_SETS", "16")),
+            max_items=int(os.getenv("PETS_FACET_MAX_ITEMS", "10000")),
+        )
+
+    @staticmethod
+    def key(filters: dict) -> str:
+        return SearchCache.make_key({k: filters.get(k) for k in FILTER_KEYS})
+
+    # ---------- Public API ----------
+    def find(self, filters: dict) -> FacetIndex | None:
+        """ชุดที่ครบและครอบ filters ที่เล็กที่สุด (ไม่มี = None ต้องถาม upstream)"""
+        now = time.time()
+        best = None
+        with self._lock:
+            for key, index in list(self._sets.items()):
+                if index.expires_at <= now:
+                    del self._sets[key]
+                elif index.complete and index.covers(filters):
+                    if best is None or len(index) < len(best[1]):
+                        best = (key, index)
+            if best is None:
+                return None
+            self._sets.move_to_end(best[0])
+            self._stats["hits"] += 1
+        return best[1]
+
+    def ensure(self, pf, filters: dict) -> FacetIndex:
+        """ชุดที่ครอบ filters (สร้างถ้ายังไม่มี)
+
+        สร้างชุดฐาน (ชนิด + พื้นที่) ก่อน เพื่อให้กรองต่อและนับได้ทุก facet
+        ถ้าชุดฐานใหญ่เกิน max_items (ไม่ครบ) ค่อยสร้างชุดของ filters เต็มแทน
+        """
+        index = self.find(filters)
+        if index is not None:
+            return index
+        base = {k: filters.get(k) for k in FILTER_KEYS if k not in FACETS}
+        index = self._cached(base) or self.build(pf, base)
+        if index.complete or not any(_norm(filters.get(k)) for k in FILTER_KEYS if k in FACETS):
+            return index
+        return self._cached(filters) or self.build(pf, filters)
+
+    def build(self, pf, filters: dict) -> FacetIndex:
+        """ดึงทุกหน้าของ filters (ไม่เกิน max_items) แล้วทำดัชนี — error ของ upstream จะ raise ออกไป"""
+        key = self.key(filters)
+        return self.flight.do(key, lambda: self._build(pf, key, filters))
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats)
+            out["sets"] = [
+                {
+                    "filters": index.filters,
+                    "items": len(index),
+                    "complete": index.complete,
+                    "expires_in": round(index.expires_at - time.time(), 1),
+                }
+                for index in self._sets.values()
+            ]
+        out.update(ttl=self.ttl, max_sets=self.max_sets, max_items=self.max_items)
+        return out
+
+    # ---------- Internals ----------
+    def _cached(self, filters: dict) -> FacetIndex | None:
+        with self._lock:
+            index = self._sets.get(self.key(filters))
+        return index if index is not None and index.expires_at > time.time() else None
+
+    def _build(self, pf, key: str, filters: dict) -> FacetIndex:
+        started = time.perf_counter()
+        base = {k: filters.get(k) for k in FILTER_KEYS}
+        try:
+            # หน้าดิบแบบเดียวกับ iter_animals (ผ่าน cache + single-flight, mock = แคตตาล็อกสังเคราะห์)
+            stream = pf.iter_animals(per_page=self.per_page, **base)
+            first = stream.fetch_page(1)
+            total_pages = int(first.get("total_pages") or 1)
+            last = min(total_pages, max(math.ceil(self.max_items / self.per_page), 1))
+            pool = pf._pool()
+            rest = [pool.submit(stream.fetch_page, p) for p in range(2, last + 1)]
+            pages = [first] + [f.result() for f in rest]
+        except Exception:
+            with self._lock:
+                self._stats["build_errors"] += 1
+            raise
+        # หน้าอาจเลื่อนระหว่างดึง (มีตัวใหม่เข้า) → ตัดตัวซ้ำตาม id
+        items, seen = [], set()
+        for data in pages:
+            for item in data.get("items") or []:
+                if item.get("id") not in seen:
+                    seen.add(item.get("id"))
+                    items.append(item)
+        complete = last >= total_pages
+        index = FacetIndex(items, base, complete=complete, ttl=self.ttl)
+        with self._lock:
+            self._sets[key] = index
+            self._sets.move_to_end(key)
+            while len(self._sets) > self.max_sets:
+                self._sets.popitem(last=False)
+            self._stats["built"] += 1
+            self._stats["truncated"] += 0 if complete else 1
+        METRICS.observe("facet_build_seconds", time.perf_counter() - started)
+        return index
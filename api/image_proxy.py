@@ -0,0 +1,374 @@
+# api/image_proxy.py
+"""proxy รูปสัตว์: ดึงจากต้นทางครั้งเดียวแล้วเก็บบนดิสก์แบบ content-addressed
+
+  <root>/objects/ab/abcdef...      ไฟล์รูป ตั้งชื่อด้วย sha256 ของเนื้อไฟล์
+  <root>/objects/ab/abcdef...-w320 thumbnail กว้าง 320px (ถ้ามี Pillow)
+  <root>/index.db                  url → digest, ขนาด, เวลาใช้ล่าสุด (ใช้ทำ LRU)
+
+URL เดียวกันจากหลาย worker ได้ไฟล์เดียวกัน รูปที่เหมือนกันแต่ต่าง URL ก็เก็บครั้งเดียว
+"""
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import quote, urljoin, urlsplit
+
+import requests
+
+from api.singleflight import SingleFlight
+
+try:  # Pillow เป็น optional: ไม่มีก็เสิร์ฟรูปต้นฉบับแทน thumbnail
+    from PIL import Image
+except ImportError:  # pragma: no cover - ขึ้นกับเครื่อง
+    Image = None
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS image_urls (
+  url         TEXT PRIMARY KEY,
+  digest      TEXT NOT NULL,
+  fetched_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_image_urls_digest ON image_urls(digest);
+CREATE TABLE IF NOT EXISTS image_blobs (
+  name          TEXT PRIMARY KEY,      -- digest หรือ digest-w<width>
+  digest        TEXT NOT NULL,
+  content_type  TEXT NOT NULL,
+  size          INTEGER NOT NULL,
+  accessed_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_image_blobs_accessed ON image_blobs(accessed_at);
+CREATE INDEX IF NOT EXISTS idx_image_blobs_digest ON image_blobs(digest);
+"""
+
+DEFAULT_HOSTS = (
+    "dl5zpyw5k3jeb.cloudfront.net",  # CDN รูปของ Petfinder
+    "photos.petfinder.com",
+    "images.unsplash.com",  # DEFAULT_PHOTO / mock
+)
+CHUNK_SIZE = 64 * 1024
+# CDN บางตัว redirect ไป edge อื่น → ตามได้ไม่เกินเท่านี้ และทุกปลายทางต้องอยู่ใน allowed_hosts
+MAX_REDIRECTS = 3
+# อัปเดต accessed_at บ่อยสุดทุกกี่วินาทีต่อไฟล์ (กันเขียน index ทุกรีเควส)
+TOUCH_INTERVAL = 60
+
+
+class ImageFetchError(Exception):
+    pass
+
+
+class ImageProxy:
+    def __init__(
+        self,
+        root: str,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_image_bytes: int = 5 * 1024 * 1024,
+        allowed_hosts=DEFAULT_HOSTS,
+        thumb_widths=(320,),
+        timeout: float = 10,
+        session: requests.Session | None = None,
+    ):
+        self.root = os.path.abspath(root)
+        self.max_bytes = int(max_bytes)
+        self.max_image_bytes = int(max_image_bytes)
+        # ไม่ใช่ open proxy: ดึงได้เฉพาะ host ที่อนุญาต (กัน SSRF)
+        self.allowed_hosts = {h.strip().lower() for h in allowed_hosts if h.strip()}
+        self.thumb_widths = tuple(sorted({int(w) for w in thumb_widths if int(w) > 0}))
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.flight = SingleFlight()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "fetch_errors": 0, "evicted": 0, "thumbs": 0}
+        os.makedirs(os.path.join(self.root, "objects"), exist_ok=True)
+        self._index().executescript(INDEX_SCHEMA)
+
+    @classmethod
+    def from_env(cls, db_path: str):
+        """PETS_IMAGE_CACHE_DIR (ค่าเริ่มต้น images/ ข้าง pets.db), _MAX_MB, _HOSTS, _THUMBS"""
+        hosts = os.getenv("PETS_IMAGE_HOSTS")
+        thumbs = os.getenv("PETS_IMAGE_THUMBS", "320")
+        return cls(
+            root=os.getenv("PETS_IMAGE_CACHE_DIR")
+            or os.path.join(os.path.dirname(os.path.abspath(db_path)), "images"),
+            max_bytes=int(float(os.getenv("PETS_IMAGE_CACHE_MAX_MB", "256")) * 1024 * 1024),
+            allowed_hosts=hosts.split(",") if hosts else DEFAULT_HOSTS,
+            thumb_widths=[int(w) for w in thumbs.split(",") if w.strip()],
+        )
+
+    # ---------- URLs ----------
+    def allowed(self, url: str | None) -> bool:
+        if not url:
+            return False
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            return False
+        if parts.netloc.lower() in self.allowed_hosts:
+            return True  # รายการระบุ host:port ตรงตัว
+        try:
+            port = parts.port
+        except ValueError:
+            return False
+        # ระบุแค่ชื่อ host → ยอมเฉพาะพอร์ตมาตรฐานของ scheme (กันยิงพอร์ตอื่นบน host เดียวกัน)
+        default = 443 if parts.scheme == "https" else 80
+        return port in (None, default) and (parts.hostname or "").lower() in self.allowed_hosts
+
+    def proxied_url(self, url: str | None, width: int | None = None) -> str | None:
+        """URL ภายนอก → /api/img?u=... (ถ้า host ไม่อยู่ในรายการ คืน URL เดิม)"""
+        if not self.allowed(url):
+            return url
+        out = "/api/img?u=" + quote(url, safe="")
+        if width:
+            out += f"&w={int(width)}"
+        return out
+
+    # ---------- Public API ----------
+    def get(self, url: str, width: int | None = None) -> tuple[str, str, str]:
+        """คืน (path, content_type, etag) ของไฟล์บนดิสก์ ดึงจากต้นทางถ้ายังไม่มี"""
+        if not self.allowed(url):
+            raise ImageFetchError("host not allowed")
+        row = self._lookup(url)
+        if row is None:
+            self._count("misses")
+            # หลาย thread ขอ URL เดียวกันพร้อมกัน → ดาวน์โหลดครั้งเดียว
+            digest, content_type = self.flight.do(url, lambda: self._fetch(url))
+        else:
+            self._count("hits")
+            digest, content_type = row
+
+        width = self._snap_width(width)
+        if width and Image is not None:
+            thumb = self._thumbnail(digest, width)
+            if thumb is not None:
+                return thumb
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            # ไฟล์ถูกลบ (evict จาก worker อื่น/ลบมือ) → ล้าง index แล้วดึงใหม่
+            self._forget(digest)
+            digest, content_type = self.flight.do(url, lambda: self._fetch(url))
+            path = self._object_path(digest)
+        self._touch(digest)
+        return path, content_type, digest
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats)
+        count, total = (
+            self._index()
+            .execute("SELECT count(*), coalesce(sum(size), 0) FROM image_blobs")
+            .fetchone()
+        )
+        out.update(
+            files=count,
+            bytes=total,
+            max_bytes=self.max_bytes,
+            thumbnails=bool(Image is not None and self.thumb_widths),
+            thumb_widths=list(self.thumb_widths),
+        )
+        return out
+
+    # ---------- Fetch / store ----------
+    def _open(self, url: str) -> requests.Response:
+        """GET แบบตาม redirect เอง: requests ตามให้อัตโนมัติโดยไม่ดู allowed_hosts
+        → host ที่อนุญาตแต่ redirect ออกไปข้างนอกจะพา proxy ไปดึง/เก็บ URL อะไรก็ได้ (SSRF)
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            try:
+                r = self.session.get(url, stream=True, timeout=self.timeout, allow_redirects=False)
+            except requests.RequestException as e:
+                self._count("fetch_errors")
+                raise ImageFetchError(str(e)) from e
+            if not r.is_redirect:
+                return r
+            r.close()
+            url = urljoin(url, r.headers["Location"])
+            if not self.allowed(url):
+                self._count("fetch_errors")
+                raise ImageFetchError("redirect to a host that is not allowed")
+        self._count("fetch_errors")
+        raise ImageFetchError("too many redirects")
+
+    def _fetch(self, url: str) -> tuple[str, str]:
+        r = self._open(url)
+        with r:
+            content_type = (r.headers.get("Content-Type") or "").split(";")[0].strip()
+            if r.status_code != 200 or not content_type.startswith("image/"):
+                self._count("fetch_errors")
+                raise ImageFetchError(f"upstream {r.status_code} {content_type or '-'}")
+            # เขียนลงไฟล์ชั่วคราวพร้อมคำนวณ hash แล้วค่อย rename (atomic)
+            h = hashlib.sha256()
+            size = 0
+            fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    for chunk in r.iter_content(CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > self.max_image_bytes:
+                            self._count("fetch_errors")
+                            raise ImageFetchError("image too large")
+                        h.update(chunk)
+                        f.write(chunk)
+                digest = h.hexdigest()
+                path = self._object_path(digest)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp, path)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+                raise
+
+        now = time.time()
+        with self._tx() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO image_urls (url, digest, fetched_at) VALUES (?, ?, ?)",
+                (url, digest, now),
+            )
+            con.execute(
+                "INSERT OR REPLACE INTO image_blobs (name, digest, content_type, size, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (digest, digest, content_type, size, now),
+            )
+        # สร้าง thumbnail ไว้ล่วงหน้าตอนดึงครั้งแรก จะได้ไม่ต้องย่อตอนมีรีเควส
+        if Image is not None:
+            for w in self.thumb_widths:
+                self._thumbnail(digest, w)
+        self._evict(keep=digest)
+        return digest, content_type
+
+    def _thumbnail(self, digest: str, width: int):
+        name = f"{digest}-w{width}"
+        path = self._object_path(name)
+        con = self._index()
+        row = con.execute("SELECT content_type FROM image_blobs WHERE name = ?", (name,)).fetchone()
+        if row is not None and os.path.exists(path):
+            self._touch(name)
+            return path, row[0], name
+        try:
+            with Image.open(self._object_path(digest)) as im:
+                if im.width <= width:
+                    return None  # รูปเล็กกว่าอยู่แล้ว ใช้ต้นฉบับ
+                im.thumbnail((width, width * 4))
+                if im.mode not in ("RGB", "L"):
+                    im = im.convert("RGB")
+                fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        im.save(f, "JPEG", quality=82, optimize=True)
+                    os.replace(tmp, path)
+                except BaseException:
+                    os.unlink(tmp)
+                    raise
+        except (OSError, ValueError) as e:
+            print("[warn] thumbnail failed:", e)
+            return None
+        with self._tx() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO image_blobs (name, digest, content_type, size, accessed_at)"
+                " VALUES (?, ?, 'image/jpeg', ?, ?)",
+                (name, digest, os.path.getsize(path), time.time()),
+            )
+        self._count("thumbs")
+        return path, "image/jpeg", name
+
+    def _evict(self, keep: str | None = None):
+        """LRU ตามขนาดรวม: ลบรูปที่ใช้ล่าสุดนานที่สุด (พร้อม thumbnail ของมัน) จนไม่เกิน max_bytes
+
+        keep = digest ที่เพิ่งดึงมา ห้ามลบแม้จะใหญ่เกินเอง
+        """
+        with self._tx() as con:
+            total = con.execute("SELECT coalesce(sum(size), 0) FROM image_blobs").fetchone()[0]
+            victims = []
+            if total > self.max_bytes:
+                rows = con.execute(
+                    "SELECT digest, sum(size), max(accessed_at) AS last FROM image_blobs"
+                    " GROUP BY digest ORDER BY last"
+                )
+                for digest, size, _ in rows.fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    if digest != keep:
+                        victims.append(digest)
+                        total -= size
+            names = []
+            for digest in victims:
+                names += [
+                    n
+                    for (n,) in con.execute(
+                        "SELECT name FROM image_blobs WHERE digest = ?", (digest,)
+                    )
+                ]
+                con.execute("DELETE FROM image_blobs WHERE digest = ?", (digest,))
+                con.execute("DELETE FROM image_urls WHERE digest = ?", (digest,))
+        for name in names:
+            try:
+                os.unlink(self._object_path(name))
+            except FileNotFoundError:
+                pass
+        if victims:
+            self._count("evicted", len(victims))
+
+    # ---------- Index ----------
+    def _index(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(
+                os.path.join(self.root, "index.db"), timeout=5, isolation_level=None
+            )
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def _lookup(self, url: str):
+        return (
+            self._index()
+            .execute(
+                "SELECT u.digest, b.content_type FROM image_urls u"
+                " JOIN image_blobs b ON b.name = u.digest WHERE u.url = ?",
+                (url,),
+            )
+            .fetchone()
+        )
+
+    def _touch(self, name: str):
+        now = time.time()
+        self._index().execute(
+            "UPDATE image_blobs SET accessed_at = ? WHERE name = ? AND accessed_at < ?",
+            (now, name, now - TOUCH_INTERVAL),
+        )
+
+    @contextmanager
+    def _tx(self):
+        # BEGIN IMMEDIATE = ล็อกเขียนข้ามโปรเซส (หลาย worker ใช้ index เดียวกัน)
+        con = self._index()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            yield con
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("COMMIT")
+
+    def _forget(self, digest: str):
+        with self._tx() as con:
+            con.execute("DELETE FROM image_blobs WHERE digest = ?", (digest,))
+            con.execute("DELETE FROM image_urls WHERE digest = ?", (digest,))
+
+    def _object_path(self, name: str) -> str:
+        return os.path.join(self.root, "objects", name[:2], name)
+
+    def _snap_width(self, width):
+        # ยอมให้แค่ขนาดที่ตั้งไว้ (ปัดขึ้น) ไม่ให้ผู้ใช้สร้าง variant ได้ไม่จำกัด
+        if not width or not self.thumb_widths:
+            return None
+        for w in self.thumb_widths:
+            if int(width) <= w:
+                return w
+        return None
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._stats[name] += n
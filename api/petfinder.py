@@ -1,61 +1,203 @@
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from dotenv import load_dotenv
 import requests
+from requests.adapters import HTTPAdapter
 
+from api.breaker import CircuitBreaker, CircuitOpenError
+from api.cache import SearchCache
+from api.rate_limit import RateLimited, TokenBucket, parse_retry_after
+from api.singleflight import SingleFlight
+from api.stream import AnimalStream
+from api.synthetic import SyntheticCatalog
+from api.token_store import TokenStore
+from data.metrics import METRICS
 from models.pet import Pet
 
-load_dotenv()
+# รูปแบบของ items ที่เก็บใน cache (2 = dict รูปแบบ API: id/type/...)
+CACHE_FORMAT = 2
+DEFAULT_PHOTO = "https://images.unsplash.com/photo-1601758228041-f3b2795255f1?w=400"
 
 
 class PetFinderAPI:
     BASE_URL = "https://api.petfinder.com/v2"
 
-    def __init__(self, api_key=None, secret=None):
+    def __init__(
+        self,
+        api_key=None,
+        secret=None,
+        cache: SearchCache | None = None,
+        token_store: TokenStore | None = None,
+        pool_size: int | None = None,
+        catalog=None,
+        base_url: str | None = None,
+        breaker: CircuitBreaker | None = None,
+        limiter: TokenBucket | None = None,
+    ):
+        # PETFINDER_BASE_URL ชี้ไป stub server ได้ (benchmarks/stub_petfinder.py)
+        self.BASE_URL = (base_url or os.getenv("PETFINDER_BASE_URL") or self.BASE_URL).rstrip("/")
         self.api_key = api_key or os.getenv("PETFINDER_API_KEY")
         self.secret = secret or os.getenv("PETFINDER_API_SECRET")
         self.access_token = None
         # ถ้าไม่มีคีย์/ซีเคร็ต จะทำงานโหมด mock
         self.mock_mode = not (self.api_key and self.secret)
+        # cache ผลค้นหา (ไม่ส่งมา = cache ในโปรเซสอย่างเดียว)
+        self.cache = cache if cache is not None else SearchCache.from_env()
+        self.tokens = token_store if token_store is not None else TokenStore()
+        # catalog ในเครื่อง (data.catalog.CatalogStore) + โหมดค้นหา:
+        #   live = upstream อย่างเดียว, fallback = upstream แล้วค่อย mirror ถ้าพัง,
+        #   mirror = ตอบจาก catalog ในเครื่องเลย
+        self.catalog = catalog
+        # โหมด mock: แคตตาล็อกสังเคราะห์ (api.synthetic) แทน upstream
+        self._synthetic = None
+        self.search_mode = os.getenv("PETFINDER_SEARCH_MODE", "fallback").lower()
+        # ค้นหาเดียวกันที่มาพร้อมกัน → ยิง upstream ครั้งเดียว
+        self.flight = SingleFlight()
+        self.session = self._make_session(pool_size or int(os.getenv("PETFINDER_POOL_SIZE", "10")))
+        # thread pool สำหรับดึงหลายหน้าพร้อมกัน/prefetch (สร้างตอนใช้ครั้งแรก → ปลอดภัยกับ fork)
+        self.fetch_workers = int(os.getenv("PETFINDER_FETCH_WORKERS", "4"))
+        self.prefetch_enabled = os.getenv("PETFINDER_PREFETCH", "1").lower() not in (
+            "0",
+            "false",
+            "no",
+        )
+        self._executor: ThreadPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
+        self._prefetch_slots = threading.BoundedSemaphore(self.fetch_workers)
+        self.prefetched = 0
+        # api.cache_warmer.CacheWarmer (ถ้ามี) นับ hit/miss ของค้นหายอดนิยมที่อุ่นไว้
+        self.warmer = None
+        # กันล้มตาม upstream: ตัดวงจรเมื่อพังติดกัน + จำกัดอัตรายิงรวมทุก worker
+        self.breaker = breaker if breaker is not None else CircuitBreaker.from_env()
+        self.limiter = limiter if limiter is not None else TokenBucket.from_env()
+        # งบเวลาต่อหนึ่งหน้า (รวมรอ rate limit + ขอ token ใหม่ + retry 401) แทน timeout 10s ตายตัว
+        self.latency_budget = float(os.getenv("PETFINDER_LATENCY_BUDGET", "4"))
+        self.connect_timeout = float(os.getenv("PETFINDER_CONNECT_TIMEOUT", "2"))
+        self.max_rate_wait = float(os.getenv("PETFINDER_RATE_MAX_WAIT", "1"))
+        # 429 ที่ไม่มี Retry-After → พักเท่านี้วินาที
+        self.default_retry_after = float(os.getenv("PETFINDER_RETRY_AFTER_DEFAULT", "5"))
+
+    # ---------- HTTP ----------
+    @staticmethod
+    def _make_session(pool_size: int) -> requests.Session:
+        """Session เดียวต่อ instance → reuse TCP/TLS (keep-alive) ข้ามรีเควส"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max(int(pool_size), 1))
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(self.fetch_workers, 1), thread_name_prefix="petfinder"
+                )
+            return self._executor
+
+    def _call(self, endpoint: str, method: str, url: str, deadline: float | None = None, **kwargs):
+        """ยิง HTTP ผ่าน breaker → rate limiter → session แล้วบันทึก metrics
+
+        endpoint = token|animals, deadline = time.monotonic() ที่ต้องเสร็จก่อน (งบเวลา)
+        ไม่ผ่าน breaker/limiter จะ raise CircuitOpenError/RateLimited ทันทีโดยไม่ยิงจริง
+        สิทธิ์ probe ของ half-open จองหลังผ่าน limiter/งบเวลาแล้ว (allow) ทุกทางหลังจากนั้นบันทึกผลเสมอ
+        """
+        if self.breaker.blocked():
+            METRICS.inc("petfinder_responses_total", endpoint=endpoint, status="circuit_open")
+            raise CircuitOpenError(f"circuit open for {self.BASE_URL}")
+        if self.limiter is not None:
+            max_wait = self.max_rate_wait
+            if deadline is not None:
+                max_wait = min(max_wait, deadline - time.monotonic())
+            if not self.limiter.acquire(max_wait=max_wait):
+                METRICS.inc("petfinder_responses_total", endpoint=endpoint, status="rate_limited")
+                raise RateLimited("local rate limit for Petfinder reached")
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise requests.Timeout("Petfinder latency budget exhausted")
+            kwargs["timeout"] = (min(self.connect_timeout, remaining), remaining)
+        if not self.breaker.allow():
+            METRICS.inc("petfinder_responses_total", endpoint=endpoint, status="circuit_open")
+            raise CircuitOpenError(f"circuit open for {self.BASE_URL}")
+
+        started = time.perf_counter()
+        try:
+            resp = self.session.request(method, url, **kwargs)
+        except requests.RequestException as e:
+            timed_out = isinstance(e, requests.Timeout)
+            METRICS.inc(
+                "petfinder_responses_total",
+                endpoint=endpoint,
+                status="timeout" if timed_out else "error",
+            )
+            # ทุก error ของการยิง (รวม ChunkedEncodingError ฯลฯ) นับเป็นความล้มเหลว → probe ได้ผลเสมอ
+            self.breaker.record_failure(f"{type(e).__name__}: {e}"[:200])
+            raise
+        finally:
+            METRICS.observe(
+                "petfinder_request_duration_seconds",
+                time.perf_counter() - started,
+                endpoint=endpoint,
+            )
+        METRICS.inc("petfinder_responses_total", endpoint=endpoint, status=str(resp.status_code))
+        if resp.status_code >= 500:
+            self.breaker.record_failure(f"HTTP {resp.status_code}")
+        else:
+            # 4xx (รวม 429) = upstream ยังตอบได้ ไม่นับเป็นความล้มเหลวของวงจร
+            self.breaker.record_success()
+        if resp.status_code == 429 and self.limiter is not None:
+            wait = parse_retry_after(resp.headers.get("Retry-After"))
+            self.limiter.block_for(self.default_retry_after if wait is None else wait)
+        return resp
+
+    def upstream_state(self) -> dict:
+        return {
+            "breaker": self.breaker.snapshot(),
+            "rate_limit": self.limiter.stats() if self.limiter is not None else None,
+            "latency_budget": self.latency_budget,
+        }
 
     # ---------- OAuth ----------
-    def _get_token(self):
-        r = requests.post(
+    def _request_token(self):
+        r = self._call(
+            "token",
+            "POST",
             f"{self.BASE_URL}/oauth2/token",
             data={
                 "grant_type": "client_credentials",
                 "client_id": self.api_key,
                 "client_secret": self.secret,
             },
-            timeout=10,
+            timeout=(self.connect_timeout, self.latency_budget),
         )
         r.raise_for_status()
-        self.access_token = r.json()["access_token"]
+        body = r.json()
+        return body["access_token"], body.get("expires_in", 3600)
+
+    def _get_token(self, deadline: float | None = None):
+        # token เดิมใช้ไม่ได้แล้ว (เช่นโดน 401) → ทิ้งแล้วขอใหม่ผ่าน store
+        self.tokens.invalidate(self.api_key, self.access_token)
+        self.access_token = self.tokens.get(self.api_key, self._request_token, deadline=deadline)
 
-    def _auth_headers(self):
-        if not self.access_token:
-            self._get_token()
+    def _auth_headers(self, deadline: float | None = None):
+        self.access_token = self.tokens.get(self.api_key, self._request_token, deadline=deadline)
         return {"Authorization": f"Bearer {self.access_token}"}
 
     # ---------- Mock data ----------
-    def _mock_pets(self, animal_type: str | None):
-        pets = [
-            Pet(
-                1, "Buddy", "Dog", "Labrador Retriever", "Adult", "shelter@email.com",
-                "https://images.unsplash.com/photo-1552053831-71594a27632d?w=400"
-            ),
-            Pet(
-                2, "Luna", "Cat", "Domestic Shorthair", "Adult", "adopt@happytails.org",
-                "https://images.unsplash.com/photo-1533738363-b7f9aef128ce?w=400"
-            ),
-            Pet(
-                3, "Max", "Dog", "Poodle Mix", "Baby", "hello@sunshinerescue.org",
-                "https://images.unsplash.com/photo-1517849845537-4d257902454a?w=400"
-            ),
-        ]
-        if animal_type:
-            pets = [p for p in pets if p.pet_type.lower() == animal_type.lower()]
-        return pets
+    @property
+    def synthetic(self) -> SyntheticCatalog:
+        """แคตตาล็อกสังเคราะห์ของโหมด mock/fallback (สร้างตอนใช้ครั้งแรก)"""
+        if self._synthetic is None:
+            self._synthetic = SyntheticCatalog.from_env()
+        return self._synthetic
 
     # ---------- Public search ----------
     def search_animals(
@@ -69,112 +211,274 @@ class PetFinderAPI:
         page=1,
         per_page=24,
         as_dict: bool = False,
+        source: str | None = None,
+        text: str | None = None,
+        as_json: bool = False,
     ):
+        # as_json=True → เหมือน as_dict แต่ items เป็น dict รูปแบบ API อยู่แล้ว (ไม่สร้าง Pet)
+        # items ชุดนี้แชร์กับ cache ห้ามแก้ไขในที่ (ถ้าจะแก้ให้ copy ก่อน)
+        # text = ค้นหาข้อความเต็ม (FTS5) — Petfinder ไม่มี จึงตอบจาก mirror เสมอ
+        mode = "mirror" if text else (source or self.search_mode).lower()
+        filters = {
+            "animal_type": animal_type,
+            "location": location,
+            "age": age,
+            "breed": breed,
+            "size": size,
+            "gender": gender,
+            "page": page,
+            "per_page": per_page,
+        }
+        if mode == "mirror" and self.catalog is not None:
+            return self._to_result(self.catalog.search(text=text, **filters), as_dict, as_json)
+
         # โหมด mock (ไม่มีคีย์) — คืนผลให้สอดคล้องกันเสมอ
         if self.mock_mode:
-            pets = self._mock_pets(animal_type)
-            if as_dict:
-                return {
-                    "items": pets,
-                    "page": 1,
-                    "total_pages": 1,
-                    "per_page": len(pets),
-                    "count": len(pets),
-                }
-            return pets
+            return self._mock_result(filters, as_dict, as_json)
 
         try:
-            params = {"page": max(int(page), 1), "limit": min(int(per_page), 100)}
-            if animal_type:
-                params["type"] = animal_type
-            if location:
-                params["location"] = location
-            if age:
-                params["age"] = age
-            if breed:
-                params["breed"] = breed
-            if size:
-                params["size"] = size
-            if gender:
-                params["gender"] = gender
-
-            resp = requests.get(
+            params = self._build_params(
+                animal_type, location, age, breed, size, gender, page, per_page
+            )
+            return self._to_result(self._page_data(params), as_dict, as_json)
+
+        except Exception as e:
+            return self._fallback_result(e, mode, filters, as_dict, as_json)
+
+    def _fallback_result(self, error, mode: str, filters: dict, as_dict: bool, as_json: bool):
+        """upstream พัง → ตอบจาก mirror (ถ้ามีและไม่ใช่โหมด live) ไม่งั้น mock"""
+        if mode != "live" and self.catalog is not None:
+            try:
+                data = self.catalog.search(**filters)
+                if data["items"]:
+                    print(f"[Petfinder] fallback MIRROR (error={error})")
+                    METRICS.inc("petfinder_fallback_total", target="mirror")
+                    return self._to_result(data, as_dict, as_json)
+            except Exception as ce:
+                print(f"[Petfinder] mirror unavailable (error={ce})")
+        # ถ้า API พลาด ให้ fallback mock แต่ “คงรูปแบบ” ให้เหมือนกัน
+        print(f"[Petfinder] fallback MOCK (error={error})")
+        METRICS.inc("petfinder_fallback_total", target="mock")
+        return self._mock_result(filters, as_dict, as_json)
+
+    def iter_animals(
+        self,
+        animal_type="dog",
+        location="10001",
+        age=None,
+        breed=None,
+        size=None,
+        gender=None,
+        per_page=100,
+        cursor: str | None = None,
+        max_items: int | None = None,
+        read_ahead: int = 1,
+    ) -> AnimalStream:
+        """เดินทุกหน้าแบบ lazy (yield Pet) — ดู AnimalStream
+
+        ต่างจาก search_animals ตรงที่ error ระหว่างทางจะ raise ออกไป
+        ไม่ fallback เป็น mock กลางสตรีม
+        """
+        params = {
+            "animal_type": animal_type,
+            "location": location,
+            "age": age,
+            "breed": breed,
+            "size": size,
+            "gender": gender,
+            "per_page": per_page,
+        }
+        return AnimalStream(self, params, cursor=cursor, max_items=max_items, read_ahead=read_ahead)
+
+    # ---------- Multi-page ----------
+    def search_pages(self, params: dict | None = None, pages=range(1, 5)) -> list[dict]:
+        """ดึงหลายหน้าพร้อมกันด้วย thread pool (จำกัดที่ fetch_workers)
+
+        params = keyword ของ search_animals (ยกเว้น page) คืน list ของผลแบบ as_dict
+        (หรือ as_json ถ้าส่งมาใน params) เรียงตามลำดับ pages
+        """
+        kwargs = {k: v for k, v in (params or {}).items() if k not in ("page", "as_dict")}
+        pool = self._pool()
+        futures = [pool.submit(self.search_animals, page=p, as_dict=True, **kwargs) for p in pages]
+        return [f.result() for f in futures]
+
+    def prefetch_next(self, result: dict, **params) -> bool:
+        """ดึงหน้าถัดไปเข้า cache แบบ background หลังเสิร์ฟหน้าปัจจุบันแล้ว
+
+        ไม่รอผล; ถ้า slot เต็ม (prefetch ค้างเท่าจำนวน worker) จะข้ามไปเลย
+        """
+        if not self.prefetch_enabled or self.mock_mode or self.cache is None:
+            return False
+        next_page = int(result.get("page", 1)) + 1
+        if next_page > int(result.get("total_pages", 1)):
+            return False
+        if not self._prefetch_slots.acquire(blocking=False):
+            return False
+        params = {k: v for k, v in params.items() if k not in ("page", "as_dict", "as_json")}
+
+        def run():
+            try:
+                # ต้องการแค่ให้ข้อมูลเข้า cache จึงไม่ต้องสร้าง Pet
+                self.search_animals(page=next_page, as_json=True, **params)
+            finally:
+                self._prefetch_slots.release()
+
+        try:
+            self._pool().submit(run)
+        except RuntimeError:
+            self._prefetch_slots.release()
+            return False
+        self.prefetched += 1
+        return True
+
+    def refresh(
+        self,
+        animal_type="dog",
+        location="10001",
+        age=None,
+        breed=None,
+        size=None,
+        gender=None,
+        page=1,
+        per_page=24,
+    ) -> dict:
+        """ดึงหน้าใหม่จาก upstream แล้วเขียนทับ cache (ไม่อ่าน cache ก่อน) — error จะ raise ออกไป"""
+        params = self._build_params(animal_type, location, age, breed, size, gender, page, per_page)
+        key = self.cache_key(params)
+        return self.flight.do(key, lambda: self._fetch_and_store(key, params))
+
+    def cache_stats(self) -> dict | None:
+        return self.cache.stats() if self.cache is not None else None
+
+    def flight_stats(self) -> dict:
+        out = self.flight.stats()
+        out["prefetched"] = self.prefetched
+        return out
+
+    # ---------- Internals ----------
+    @staticmethod
+    def _build_params(animal_type, location, age, breed, size, gender, page, per_page):
+        params = {"page": max(int(page), 1), "limit": min(int(per_page), 100)}
+        if animal_type:
+            params["type"] = animal_type
+        if location:
+            params["location"] = location
+        if age:
+            params["age"] = age
+        if breed:
+            params["breed"] = breed
+        if size:
+            params["size"] = size
+        if gender:
+            params["gender"] = gender
+        return params
+
+    @staticmethod
+    def cache_key(params: dict) -> str:
+        # CACHE_FORMAT อยู่ใน key → เปลี่ยนรูปแบบ items แล้ว entry เก่าใน cache กลางจะไม่ถูกอ่าน
+        return f"v{CACHE_FORMAT}:{SearchCache.make_key(params)}"
+
+    def _page_data(self, params: dict) -> dict:
+        """หนึ่งหน้าผ่าน cache → single-flight → upstream (error จะ raise ออกไป)"""
+        key = self.cache_key(params)
+        data = self.cache.get(key) if self.cache is not None else None
+        if self.warmer is not None:
+            self.warmer.observe(key, data is not None)
+        if data is None:
+            data = self.flight.do(key, lambda: self._fetch_and_store(key, params))
+        return data
+
+    def _fetch_and_store(self, key: str, params: dict) -> dict:
+        # leader ของ single-flight: เขียน cache ก่อนปล่อยคนรอ
+        # คนที่มาหลังจากนี้จะเจอ cache แทนที่จะยิงซ้ำ
+        data = self._fetch_page(params)
+        if self.cache is not None:
+            self.cache.set(key, data)
+        return data
+
+    def _fetch_page(self, params: dict) -> dict:
+        """เรียก /animals หนึ่งหน้า คืน dict ที่ JSON-serializable (เก็บลง cache ได้)"""
+        payload = self.fetch_raw(params, deadline=time.monotonic() + self.latency_budget)
+
+        # Map เป็น field ของ Pet
+        items = [self._map_animal(it) for it in payload.get("animals", [])]
+
+        pg = payload.get("pagination", {})
+        return {
+            "items": items,
+            "page": pg.get("current_page", params["page"]),
+            "total_pages": pg.get("total_pages", 1),
+            "per_page": params["limit"],
+        }
+
+    def fetch_raw(self, params: dict, deadline: float | None = None) -> dict:
+        """GET /animals ตรง ๆ คืน payload ดิบของ Petfinder (ไม่ผ่าน cache)
+
+        deadline (time.monotonic) = งบเวลาของทั้งรีเควส ไม่ส่งมา = timeout 10s ต่อครั้งแบบเดิม
+        """
+        timing = {"deadline": deadline} if deadline is not None else {"timeout": 10}
+        resp = self._call(
+            "animals",
+            "GET",
+            f"{self.BASE_URL}/animals",
+            headers=self._auth_headers(deadline),
+            params=params,
+            **timing,
+        )
+        if resp.status_code == 401:
+            # token หมดอายุ → ขอใหม่
+            self._get_token(deadline)
+            resp = self._call(
+                "animals",
+                "GET",
                 f"{self.BASE_URL}/animals",
-                headers=self._auth_headers(),
+                headers=self._auth_headers(deadline),
                 params=params,
-                timeout=10,
+                **timing,
             )
-            if resp.status_code == 401:
-                # token หมดอายุ → ขอใหม่
-                self._get_token()
-                resp = requests.get(
-                    f"{self.BASE_URL}/animals",
-                    headers=self._auth_headers(),
-                    params=params,
-                    timeout=10,
-                )
-            resp.raise_for_status()
-            payload = resp.json()
-
-            # Map เป็น model ของเรา
-            animals = payload.get("animals", [])
-            pets = []
-            for it in animals:
-                photo = None
-                if it.get("photos"):
-                    p0 = it["photos"][0]
-                    photo = p0.get("medium") or p0.get("large")
-
-                contact = it.get("contact") or {}
-                email = contact.get("email") or "Contact shelter"
-                phone = contact.get("phone") or None
-
-                gender_v = it.get("gender") or None
-                size_v = it.get("size") or None
-                desc = it.get("description") or None
-                breed_primary = (it.get("breeds") or {}).get("primary") or "Mixed"
-
-                pets.append(
-                    Pet(
-                        pet_id=it.get("id"),
-                        name=it.get("name", "Unknown"),
-                        pet_type=it.get("type") or "Pet",
-                        breed=breed_primary,
-                        age=it.get("age", "Unknown"),
-                        contact=email,
-                        photo_url=photo
-                        or "https://images.unsplash.com/photo-1601758228041-f3b2795255f1?w=400",
-                        phone=phone,
-                        gender=gender_v,
-                        size=size_v,
-                        description=desc,
-                    )
-                )
+        resp.raise_for_status()
+        return resp.json()
 
-            pg = payload.get("pagination", {})
-            current_page = pg.get("current_page", params["page"])
-            total_pages = pg.get("total_pages", 1)
+    @staticmethod
+    def _map_animal(it: dict) -> dict:
+        """payload ของ Petfinder หนึ่งตัว → dict รูปแบบ API (ตรงกับ Pet.to_api_dict)
 
-            if as_dict:
-                return {
-                    "items": pets,
-                    "page": current_page,
-                    "total_pages": total_pages,
-                    "per_page": params["limit"],
-                    "count": len(pets),
-                }
-            return pets
+        เก็บลง cache ในรูปนี้เลย ทาง /api/search จึงส่งต่อได้โดยไม่ต้องแปลงซ้ำ
+        """
+        photo = None
+        if it.get("photos"):
+            p0 = it["photos"][0]
+            photo = p0.get("medium") or p0.get("large")
 
-        except Exception as e:
-            # ถ้า API พลาด ให้ fallback mock แต่ “คงรูปแบบ” ให้เหมือนกัน
-            print(f"[Petfinder] fallback MOCK (error={e})")
-            pets = self._mock_pets(animal_type)
-            if as_dict:
-                return {
-                    "items": pets,
-                    "page": 1,
-                    "total_pages": 1,
-                    "per_page": len(pets),
-                    "count": len(pets),
-                }
-            return pets
+        contact = it.get("contact") or {}
+        return {
+            "id": it.get("id"),
+            "name": it.get("name", "Unknown"),
+            "type": it.get("type") or "Pet",
+            "breed": (it.get("breeds") or {}).get("primary") or "Mixed",
+            "age": it.get("age", "Unknown"),
+            "contact": contact.get("email") or "Contact shelter",
+            "photo_url": photo or DEFAULT_PHOTO,
+            "phone": contact.get("phone") or None,
+            "gender": it.get("gender") or None,
+            "size": it.get("size") or None,
+            "description": it.get("description") or None,
+        }
+
+    @staticmethod
+    def _to_result(data: dict, as_dict: bool, as_json: bool = False):
+        items = data["items"]
+        if not as_json:
+            items = [Pet.from_api_dict(d) for d in items]
+        if as_dict or as_json:
+            return {
+                "items": items,
+                "page": data["page"],
+                "total_pages": data["total_pages"],
+                "per_page": data["per_page"],
+                "count": len(items),
+            }
+        return items
+
+    def _mock_result(self, filters: dict, as_dict: bool, as_json: bool = False):
+        return self._to_result(self.synthetic.search(**filters), as_dict, as_json)
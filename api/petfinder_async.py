@@ -0,0 +1,268 @@
+# api/petfinder_async.py
+"""PetFinderAPI แบบ asyncio (aiohttp) — สัญญาเดียวกับ search_animals(..., as_dict=True)
+
+ใช้ cache / token store / breaker / rate limiter / catalog ชุดเดียวกับ PetFinderAPI ที่ส่งเข้ามา
+ต่างกันแค่การยิง /animals ไม่บล็อก → หนึ่ง event loop มีรีเควสค้างกับ upstream ได้หลายร้อยตัว
+ต้องติดตั้ง requirements-async.txt ก่อน (aiohttp)
+
+หนึ่ง instance ผูกกับ event loop เดียว (ClientSession ของ aiohttp ข้าม loop ไม่ได้)
+"""
+
+import asyncio
+import os
+import time
+
+import requests
+
+from api.breaker import CircuitOpenError
+from api.petfinder import PetFinderAPI
+from api.rate_limit import RateLimited, parse_retry_after
+from data.metrics import METRICS
+
+try:
+    import aiohttp
+except ImportError:  # ไม่ได้ติดตั้ง requirements-async.txt
+    aiohttp = None
+
+
+async def _off_loop(owner, fn, *args):
+    """เรียก fn ของ cache/breaker โดยไม่บล็อก event loop
+
+    มี shared_path = อ่าน/เขียน SQLite (BEGIN IMMEDIATE รอ lock ได้ถึง 5 วินาที) → ทำใน thread
+    แบบในโปรเซสล้วนเป็นแค่ dict + lock → เรียกตรง ๆ ไม่เสียค่า to_thread
+    """
+    if getattr(owner, "shared_path", None):
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+
+class AsyncPetFinderAPI:
+    def __init__(self, sync: PetFinderAPI, max_connections: int | None = None):
+        if aiohttp is None:
+            raise RuntimeError(
+                "AsyncPetFinderAPI requires aiohttp (pip install -r requirements-async.txt)"
+            )
+        self.sync = sync
+        # จำนวน connection ค้างพร้อมกันสูงสุดต่อโปรเซส (เกินนี้ aiohttp ให้รอคิว)
+        self.max_connections = max_connections or int(
+            os.getenv("PETFINDER_ASYNC_CONNECTIONS", "200")
+        )
+        self._session: "aiohttp.ClientSession | None" = None
+        # single-flight แบบ asyncio: key → Future ของ leader
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.stats = {"leaders": 0, "coalesced": 0}
+
+    @property
+    def mock_mode(self) -> bool:
+        return self.sync.mock_mode
+
+    async def __aenter__(self) -> "AsyncPetFinderAPI":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _http(self) -> "aiohttp.ClientSession":
+        # สร้างตอนใช้ครั้งแรก (ต้องอยู่ใน loop ที่รันอยู่) แล้ว reuse keep-alive ตลอดอายุ loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections, limit_per_host=self.max_connections
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    # ---------- Public search ----------
+    async def search_animals(
+        self,
+        animal_type="dog",
+        location="10001",
+        age=None,
+        breed=None,
+        size=None,
+        gender=None,
+        page=1,
+        per_page=24,
+        as_dict: bool = False,
+        source: str | None = None,
+        text: str | None = None,
+        as_json: bool = False,
+    ):
+        """เหมือน PetFinderAPI.search_animals ทุกอย่าง (mirror / mock / fallback) แต่ await ได้"""
+        api = self.sync
+        mode = "mirror" if text else (source or api.search_mode).lower()
+        filters = {
+            "animal_type": animal_type,
+            "location": location,
+            "age": age,
+            "breed": breed,
+            "size": size,
+            "gender": gender,
+            "page": page,
+            "per_page": per_page,
+        }
+        if mode == "mirror" and api.catalog is not None:
+            data = await asyncio.to_thread(api.catalog.search, text=text, **filters)
+            return api._to_result(data, as_dict, as_json)
+
+        if api.mock_mode:
+            return api._mock_result(filters, as_dict, as_json)
+
+        try:
+            params = api._build_params(
+                animal_type, location, age, breed, size, gender, page, per_page
+            )
+            return api._to_result(await self._page_data(params), as_dict, as_json)
+        except Exception as e:
+            # fallback อ่าน SQLite (mirror) → ทำใน thread
+            return await asyncio.to_thread(api._fallback_result, e, mode, filters, as_dict, as_json)
+
+    async def search_pages(self, params: dict | None = None, pages=range(1, 5)) -> list[dict]:
+        """ดึงหลายหน้าพร้อมกันด้วย asyncio.gather (ไม่จำกัดด้วย fetch_workers แบบ thread pool)"""
+        kwargs = {k: v for k, v in (params or {}).items() if k not in ("page", "as_dict")}
+        return list(
+            await asyncio.gather(
+                *(self.search_animals(page=p, as_dict=True, **kwargs) for p in pages)
+            )
+        )
+
+    def flight_stats(self) -> dict:
+        return dict(self.stats, inflight=len(self._inflight))
+
+    # ---------- Internals ----------
+    async def _page_data(self, params: dict) -> dict:
+        """หนึ่งหน้าผ่าน cache → single-flight (ใน loop นี้) → upstream"""
+        api = self.sync
+        key = api.cache_key(params)
+        data = await _off_loop(api.cache, api.cache.get, key) if api.cache is not None else None
+        if api.warmer is not None:
+            api.warmer.observe(key, data is not None)
+        if data is not None:
+            return data
+
+        leader = self._inflight.get(key)
+        if leader is not None:
+            self.stats["coalesced"] += 1
+            # shield: คนรอถูก cancel ได้โดยไม่ยกเลิกงานของ leader
+            return await asyncio.shield(leader)
+
+        fut = asyncio.get_running_loop().create_future()
+        # ไม่มีใครรอ error ของ leader → กัน warning "exception was never retrieved"
+        fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = fut
+        self.stats["leaders"] += 1
+        try:
+            data = await self._fetch_page(params)
+            if api.cache is not None:
+                await _off_loop(api.cache, api.cache.set, key, data)
+            fut.set_result(data)
+            return data
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _fetch_page(self, params: dict) -> dict:
+        api = self.sync
+        payload = await self.fetch_raw(params, deadline=time.monotonic() + api.latency_budget)
+        items = [api._map_animal(it) for it in payload.get("animals", [])]
+        pg = payload.get("pagination", {})
+        return {
+            "items": items,
+            "page": pg.get("current_page", params["page"]),
+            "total_pages": pg.get("total_pages", 1),
+            "per_page": params["limit"],
+        }
+
+    async def fetch_raw(self, params: dict, deadline: float) -> dict:
+        """GET /animals (ไม่ผ่าน cache) — retry หนึ่งครั้งเมื่อ token หมดอายุ (401)"""
+        api = self.sync
+        url = f"{api.BASE_URL}/animals"
+        status, body, _ = await self._call(
+            "animals", url, deadline, headers=await self._auth_headers(deadline), params=params
+        )
+        if status == 401:
+            # ขอ token ใหม่ผ่าน TokenStore (sync, ล็อกข้าม worker) → ทำใน thread
+            await asyncio.to_thread(api._get_token, deadline)
+            status, body, _ = await self._call(
+                "animals", url, deadline, headers=await self._auth_headers(deadline), params=params
+            )
+        if status >= 400:
+            raise requests.HTTPError(f"{status} Error for url: {url}")
+        return body
+
+    async def _auth_headers(self, deadline: float | None = None) -> dict:
+        api = self.sync
+        token = await asyncio.to_thread(api.tokens.get, api.api_key, api._request_token, deadline)
+        api.access_token = token
+        return {"Authorization": f"Bearer {token}"}
+
+    async def _call(self, endpoint: str, url: str, deadline: float, **kwargs):
+        """GET ผ่าน breaker → rate limiter → aiohttp คืน (status, json body | None, headers)
+
+        error ของ aiohttp ถูกแปลงเป็น requests.Timeout / ConnectionError
+        → fallback และ breaker ทำงานเหมือนฝั่ง sync ทุกอย่าง
+        """
+        api = self.sync
+        # เหมือนฝั่ง sync: เช็คแบบไม่จอง → limiter/งบเวลา → จอง probe ตอนจะยิงจริง
+        if await _off_loop(api.breaker, api.breaker.blocked):
+            METRICS.inc("petfinder_responses_total", endpoint=endpoint, status="circuit_open")
+            raise CircuitOpenError(f"circuit open for {api.BASE_URL}")
+        if api.limiter is not None:
+            max_wait = min(api.max_rate_wait, deadline - time.monotonic())
+            if not await api.limiter.acquire_async(max_wait=max_wait):
+                METRICS.inc("petfinder_responses_total", endpoint=endpoint, status="rate_limited")
+                raise RateLimited("local rate limit for Petfinder reached")
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise requests.Timeout("Petfinder latency budget exhausted")
+        timeout = aiohttp.ClientTimeout(
+            total=remaining, sock_connect=min(api.connect_timeout, remaining)
+        )
+        if not await _off_loop(api.breaker, api.breaker.allow):
+            METRICS.inc("petfinder_responses_total", endpoint=endpoint, status="circuit_open")
+            raise CircuitOpenError(f"circuit open for {api.BASE_URL}")
+
+        started = time.perf_counter()
+        try:
+            async with self._http().get(url, timeout=timeout, **kwargs) as resp:
+                status, headers = resp.status, resp.headers
+                body = await resp.json(content_type=None) if status < 400 else None
+        except (asyncio.TimeoutError, aiohttp.ClientError, ValueError) as e:
+            # ValueError = body ไม่ใช่ JSON; ทุกแบบบันทึกความล้มเหลว → probe ที่จองไว้ได้ผลเสมอ
+            timed_out = isinstance(e, asyncio.TimeoutError)
+            METRICS.inc(
+                "petfinder_responses_total",
+                endpoint=endpoint,
+                status="timeout" if timed_out else "error",
+            )
+            await _off_loop(
+                api.breaker, api.breaker.record_failure, f"{type(e).__name__}: {e}"[:200]
+            )
+            if timed_out:
+                raise requests.Timeout(f"Petfinder timed out after {remaining:.2f}s") from e
+            raise requests.ConnectionError(str(e)) from e
+        finally:
+            METRICS.observe(
+                "petfinder_request_duration_seconds",
+                time.perf_counter() - started,
+                endpoint=endpoint,
+            )
+        METRICS.inc("petfinder_responses_total", endpoint=endpoint, status=str(status))
+        if status >= 500:
+            await _off_loop(api.breaker, api.breaker.record_failure, f"HTTP {status}")
+        else:
+            await _off_loop(api.breaker, api.breaker.record_success)
+        if status == 429 and api.limiter is not None:
+            wait = parse_retry_after(headers.get("Retry-After"))
+            await _off_loop(
+                api.limiter,
+                api.limiter.block_for,
+                api.default_retry_after if wait is None else wait,
+            )
+        return status, body, headers
@@ -0,0 +1,249 @@
+# api/rate_limit.py
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from data.migrations import is_current
+
+SHARED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limit (
+  name           TEXT PRIMARY KEY,
+  tokens         REAL NOT NULL,
+  updated_at     REAL NOT NULL,
+  blocked_until  REAL NOT NULL      -- จาก Retry-After ของ upstream
+);
+"""
+
+
+class RateLimited(requests.RequestException):
+    """ไม่มี token เหลือภายในเวลาที่รอได้ (หรือ upstream สั่งให้รอด้วย Retry-After)"""
+
+
+def parse_retry_after(value: str | None, now: float | None = None) -> float | None:
+    """Retry-After เป็นวินาที ("120") หรือ HTTP-date → จำนวนวินาทีที่ต้องรอ"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        ts = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, ts - (time.time() if now is None else now))
+
+
+class TokenBucket:
+    """token bucket: เติม rate token/วินาที สะสมได้ไม่เกิน burst
+
+    ถ้าตั้ง shared_path ถังอยู่ในตาราง SQLite → ทุก worker ใช้โควตาเดียวกัน
+    (อ่าน-เติม-หักใน BEGIN IMMEDIATE เดียว) แต่ไม่เขียนทุกครั้งที่ยิง: หักทีละ lease token
+    มาเก็บไว้ในโปรเซส ใช้ได้ภายใน lease_ttl วินาที (เหลือก็ทิ้ง ไม่คืน → ไม่มีทางเกิน rate รวม)
+    write lock ของ pets.db บนทางค้นหาจึงเหลือราว 1/lease ครั้งต่อรีเควส
+    """
+
+    def __init__(
+        self,
+        rate: float = 20.0,
+        burst: float = 40.0,
+        name: str = "petfinder",
+        shared_path: str | None = None,
+        lease: int | None = None,
+        lease_ttl: float = 1.0,
+    ):
+        self.rate = float(rate)
+        self.burst = max(float(burst), 1.0)
+        self.name = name
+        self.shared_path = os.path.abspath(shared_path) if shared_path else None
+        # ถังในโปรเซสหักตรง ๆ อยู่แล้ว (แค่ lock) → lease มีผลเฉพาะถังที่แชร์
+        if lease is None:
+            lease = max(int(self.rate // 4), 1)
+        self.lease = min(max(int(lease), 1), int(self.burst)) if self.shared_path else 1
+        self.lease_ttl = float(lease_ttl)
+        self._leased = 0
+        self._lease_until = 0.0
+        # blocked_until ล่าสุดที่เห็น → ระหว่างโดน Retry-After ไม่ต้องไปอ่านตารางทุกรีเควส
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._mem = {"tokens": self.burst, "updated_at": time.time(), "blocked_until": 0.0}
+        self._stats = {"granted": 0, "waited": 0, "denied": 0, "retry_after": 0, "leases": 0}
+        if self.shared_path:
+            con = self._con()
+            if not is_current(con):
+                con.executescript(SHARED_SCHEMA)
+
+    @classmethod
+    def from_env(cls, shared_path: str | None = None):
+        """PETFINDER_RATE_LIMIT (ครั้ง/วินาที รวมทุก worker, 0 = ไม่จำกัด) / _RATE_BURST / _RATE_LEASE"""
+        rate = float(os.getenv("PETFINDER_RATE_LIMIT", "20"))
+        if rate <= 0:
+            return None
+        lease = os.getenv("PETFINDER_RATE_LEASE")
+        return cls(
+            rate=rate,
+            burst=float(os.getenv("PETFINDER_RATE_BURST", str(rate * 2))),
+            shared_path=shared_path,
+            lease=int(lease) if lease else None,
+        )
+
+    # ---------- Public API ----------
+    def acquire(self, max_wait: float = 0.0) -> bool:
+        """หัก 1 token; ถ้าไม่พอรอได้ไม่เกิน max_wait วินาที คืน False ถ้ารอไม่ไหว"""
+        deadline = time.monotonic() + max(max_wait, 0.0)
+        waited = False
+        while True:
+            wait = self._take()
+            if wait == 0:
+                self._count("waited" if waited else "granted")
+                return True
+            if time.monotonic() + wait > deadline:
+                self._count("denied")
+                return False
+            waited = True
+            time.sleep(wait)
+
+    async def acquire_async(self, max_wait: float = 0.0) -> bool:
+        """acquire() สำหรับ asyncio: รอด้วย asyncio.sleep ไม่บล็อก event loop"""
+        deadline = time.monotonic() + max(max_wait, 0.0)
+        waited = False
+        while True:
+            # BEGIN IMMEDIATE อาจรอ lock ของ worker อื่น → ทำใน thread ไม่ให้ loop ค้าง
+            wait = await asyncio.to_thread(self._take) if self.shared_path else self._take()
+            if wait == 0:
+                self._count("waited" if waited else "granted")
+                return True
+            if time.monotonic() + wait > deadline:
+                self._count("denied")
+                return False
+            waited = True
+            await asyncio.sleep(wait)
+
+    def block_for(self, seconds: float):
+        """upstream ตอบ 429 + Retry-After → หยุดทุก worker ไว้ก่อน seconds วินาที"""
+        until = time.time() + max(float(seconds), 0.0)
+        self._count("retry_after")
+        with self._lock:
+            self._leased = 0  # token ที่ lease ไว้ห้ามใช้ระหว่างโดนสั่งให้รอ
+            self._blocked_until = max(self._blocked_until, until)
+
+        def block(cur):
+            cur["blocked_until"] = max(cur["blocked_until"], until)
+            cur["tokens"] = 0.0
+            return cur, None
+
+        self._update(block)
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats)
+        st = self._update(lambda cur: (self._refill(cur, time.time()), dict(cur)), write=False)
+        out["tokens"] = round(st["tokens"], 3)
+        out["blocked_for"] = round(max(0.0, st["blocked_until"] - time.time()), 3)
+        out["rate"] = self.rate
+        out["burst"] = self.burst
+        out["lease"] = self.lease
+        with self._lock:
+            out["leased"] = self._leased if time.time() < self._lease_until else 0
+        out["shared"] = bool(self.shared_path)
+        return out
+
+    # ---------- Internals ----------
+    def _refill(self, cur: dict, now: float) -> dict:
+        elapsed = max(0.0, now - cur["updated_at"])
+        cur["tokens"] = min(self.burst, cur["tokens"] + elapsed * self.rate)
+        cur["updated_at"] = now
+        return cur
+
+    def _take(self) -> float:
+        """คืน 0 ถ้าได้ token ไม่งั้นคืนเวลาที่ควรรอก่อนลองใหม่
+
+        ใช้ token ที่ lease ไว้ในโปรเซสก่อน หมดแล้ว (หรือเกิน lease_ttl) ค่อยหักจากถังกลาง
+        ครั้งละไม่เกิน lease ตัว (ได้เท่าที่ถังมี อย่างน้อย 1)
+        """
+        now = time.time()
+        with self._lock:
+            if self._blocked_until > now:
+                return self._blocked_until - now
+            if self._leased > 0 and now < self._lease_until:
+                self._leased -= 1
+                return 0.0
+            self._leased = 0
+
+        def take(cur):
+            if cur["blocked_until"] > now:
+                return cur, (cur["blocked_until"] - now, 0, cur["blocked_until"])
+            cur = self._refill(cur, now)
+            if cur["tokens"] >= 1:
+                n = min(self.lease, int(cur["tokens"]))
+                cur["tokens"] -= n
+                return cur, (0.0, n, 0.0)
+            return cur, ((1 - cur["tokens"]) / self.rate, 0, 0.0)
+
+        wait, n, blocked_until = self._update(take)
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, blocked_until)
+            if n:
+                self._stats["leases"] += 1
+            if n > 1:
+                self._leased += n - 1
+                self._lease_until = now + self.lease_ttl
+        return wait
+
+    def _update(self, fn, write: bool = True):
+        if not self.shared_path:
+            with self._lock:
+                new, result = fn(dict(self._mem))
+                if write:
+                    self._mem = new
+            return result
+        con = self._con()
+        try:
+            con.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            try:
+                row = con.execute(
+                    "SELECT tokens, updated_at, blocked_until FROM rate_limit WHERE name = ?",
+                    (self.name,),
+                ).fetchone()
+                cur = (
+                    {"tokens": row[0], "updated_at": row[1], "blocked_until": row[2]}
+                    if row
+                    else {"tokens": self.burst, "updated_at": time.time(), "blocked_until": 0.0}
+                )
+                new, result = fn(cur)
+                if write:
+                    con.execute(
+                        "INSERT OR REPLACE INTO rate_limit"
+                        " (name, tokens, updated_at, blocked_until) VALUES (?, ?, ?, ?)",
+                        (self.name, new["tokens"], new["updated_at"], new["blocked_until"]),
+                    )
+                con.execute("COMMIT")
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            # ฐานข้อมูลล็อกนาน/พัง → ใช้ถังในโปรเซสแทน ไม่บล็อกการค้นหา
+            print("[warn] rate limiter fell back to local bucket:", e)
+            with self._lock:
+                new, result = fn(dict(self._mem))
+                if write:
+                    self._mem = new
+        return result
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _con(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.shared_path, timeout=5, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
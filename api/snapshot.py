@@ -0,0 +1,202 @@
+# api/snapshot.py
+"""snapshot ผลค้นหาหลายพื้นที่/ชนิดลงไฟล์ NDJSON — ดึงขนานและทำต่อจาก checkpoint ได้
+
+    python main.py snapshot --locations 10001,90210 --types dog,cat --out /data/snapshots/today
+
+หนึ่งไฟล์ต่อคู่ (location, type): <out>/<location>_<type>.ndjson (ระหว่างทำชื่อ .part)
+หลายคู่ทำพร้อมกัน (workers) แต่ละคู่อ่านล่วงหน้า read_ahead หน้า (AnimalStream)
+ทุก checkpoint_every ตัว fsync ไฟล์แล้วบันทึก cursor ของ AnimalStream + ขนาดไฟล์ลง checkpoint.json
+รันซ้ำ (เช่น cron รอบถัดไปหลังรอบก่อนพัง) → ตัด .part กลับไปที่ขนาดตอน checkpoint แล้วดึงต่อจาก cursor
+คู่ที่เสร็จแล้วข้ามไป ไฟล์ lock กันสองรอบเขียนโฟลเดอร์เดียวกันพร้อมกัน
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from models.pet import to_api_dict
+
+try:
+    import fcntl
+except ImportError:  # Windows: ไม่มี flock → ไม่กันรันซ้อน
+    fcntl = None
+
+CHECKPOINT = "checkpoint.json"
+LOCK = ".lock"
+
+
+@contextmanager
+def locked(path: str):
+    """flock แบบไม่รอ: ได้ไม่ได้ = RuntimeError (อีกรอบยังทำโฟลเดอร์นี้อยู่)"""
+    with open(path, "a") as f:
+        if fcntl is not None:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise RuntimeError(f"{path} is held by another run") from None
+        yield
+
+
+def _file_name(location: str, animal_type: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "-", f"{location}_{animal_type}") + ".ndjson"
+
+
+class Snapshot:
+    def __init__(
+        self,
+        api,
+        out_dir: str,
+        locations: list[str],
+        types: list[str],
+        per_page: int = 100,
+        max_items: int | None = None,
+        workers: int = 4,
+        read_ahead: int = 2,
+        checkpoint_every: int = 500,
+        progress=None,
+    ):
+        self.api = api
+        self.out_dir = os.path.abspath(out_dir)
+        self.locations = [x.strip() for x in locations if x.strip()]
+        self.types = [x.strip().lower() for x in types if x.strip()]
+        self.per_page = min(max(int(per_page), 1), 100)
+        self.max_items = max_items
+        self.workers = max(int(workers), 1)
+        self.read_ahead = max(int(read_ahead), 0)
+        self.checkpoint_every = max(int(checkpoint_every), 1)
+        self.progress = progress
+        self._lock = threading.Lock()
+        self.state: dict = {}
+
+    @property
+    def checkpoint_path(self) -> str:
+        return os.path.join(self.out_dir, CHECKPOINT)
+
+    def run(self, fresh: bool = False) -> dict:
+        """ทำทุกคู่ (ต่อจาก checkpoint ถ้ามี) คืนสรุปต่อคู่ — คู่ที่ error มี "error" และทำต่อได้รอบหน้า"""
+        os.makedirs(self.out_dir, exist_ok=True)
+        with locked(os.path.join(self.out_dir, LOCK)):
+            self.state = self._load(fresh)
+            pairs = [(loc, t) for loc in self.locations for t in self.types]
+            # ทุกคู่ดึงหน้าผ่าน thread pool ของ api → ขยายให้พอกับ workers × (read_ahead + 1)
+            self.api.fetch_workers = max(
+                self.api.fetch_workers, self.workers * (self.read_ahead + 1)
+            )
+            with ThreadPoolExecutor(self.workers, thread_name_prefix="snapshot") as pool:
+                results = list(pool.map(lambda pair: self._run_pair(*pair), pairs))
+            with self._lock:
+                if all(e.get("done") for e in self.state["pairs"].values()):
+                    self.state["finished_at"] = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+                self._save()
+        return {"out": self.out_dir, "pairs": results}
+
+    # ---------- Checkpoint ----------
+    def _load(self, fresh: bool) -> dict:
+        state = None
+        if not fresh and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("per_page") != self.per_page:
+                # cursor = "page:offset" ผูกกับ per_page เดิม → ใช้ต่อไม่ได้
+                print(f"[warn] {self.checkpoint_path}: per_page changed, starting over")
+                state = None
+        if state is None:
+            state = {
+                "per_page": self.per_page,
+                "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "pairs": {},
+            }
+            for loc in self.locations:
+                for t in self.types:
+                    part = os.path.join(self.out_dir, _file_name(loc, t) + ".part")
+                    if os.path.exists(part):
+                        os.remove(part)
+        state.pop("finished_at", None)
+        return state
+
+    def _save(self):
+        # เรียกภายใต้ self._lock: เขียนไฟล์ชั่วคราวแล้ว rename → checkpoint ไม่ขาดครึ่งแม้เครื่องดับ
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=1, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.checkpoint_path)
+
+    # ---------- One pair ----------
+    def _run_pair(self, location: str, animal_type: str) -> dict:
+        key = f"{location}/{animal_type}"
+        name = _file_name(location, animal_type)
+        path = os.path.join(self.out_dir, name)
+        part = path + ".part"
+        with self._lock:
+            entry = self.state["pairs"].setdefault(
+                key, {"file": name, "cursor": None, "bytes": 0, "items": 0, "done": False}
+            )
+            if entry["done"] and os.path.exists(path):
+                return {"pair": key, "items": entry["items"], "skipped": True}
+            if entry["bytes"] and not os.path.exists(part):
+                entry.update(cursor=None, bytes=0, items=0)  # ไฟล์หาย → เริ่มคู่นี้ใหม่
+            entry.update(done=False)
+            entry.pop("error", None)
+        started = time.perf_counter()
+        resumed_from = entry["items"]
+        remaining = None if self.max_items is None else max(self.max_items - entry["items"], 0)
+        stream = self.api.iter_animals(
+            animal_type=animal_type,
+            location=location,
+            per_page=self.per_page,
+            cursor=entry["cursor"],
+            max_items=remaining,
+            read_ahead=self.read_ahead,
+        )
+        dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+        error = None
+        with open(part, "a+b") as f:
+            f.truncate(entry["bytes"])  # ทิ้งส่วนที่เขียนหลัง checkpoint ล่าสุด
+            f.seek(0, os.SEEK_END)
+            buf: list[str] = []
+            try:
+                for pet in stream:
+                    buf.append(dumps(to_api_dict(pet)) + "\n")
+                    if len(buf) >= self.checkpoint_every:
+                        self._flush(f, buf, entry, stream.cursor)
+                        buf = []
+            except Exception as e:
+                # ตัวที่ yield มาแล้วอยู่ก่อน cursor → เขียนเก็บไว้ได้ รอบหน้าดึงต่อจากตรงนั้น
+                error = e
+            self._flush(f, buf, entry, stream.cursor)
+        if error is None:
+            os.replace(part, path)
+            with self._lock:
+                entry["done"] = True
+                self._save()
+        out = {
+            "pair": key,
+            "items": entry["items"],
+            "fetched": entry["items"] - resumed_from,
+            "resumed_from": resumed_from,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        if error is not None:
+            print(f"[warn] snapshot {key} stopped at {entry['cursor']}: {error}")
+            out["error"] = str(error)
+            with self._lock:
+                entry["error"] = str(error)
+                self._save()
+        return out
+
+    def _flush(self, f, buf: list[str], entry: dict, cursor: str | None):
+        data = "".join(buf).encode("utf-8")
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())  # ข้อมูลถึงดิสก์ก่อน checkpoint จะอ้างถึง
+        with self._lock:
+            entry.update(cursor=cursor, bytes=f.tell(), items=entry["items"] + len(buf))
+            self._save()
+        if self.progress is not None:
+            self.progress.add(items=len(buf), nbytes=len(data))
@@ -0,0 +1,92 @@
+# api/stream.py
+from collections import deque
+
+from models.pet import Pet
+
+
+class AnimalStream:
+    """เดินผลค้นหาทุกหน้าตาม pagination.total_pages แล้ว yield Pet ทีละตัว
+
+    - เก็บในหน่วยความจำแค่หน้าปัจจุบัน + read_ahead หน้าที่กำลังโหลดล่วงหน้า
+    - cursor = "page:offset" ของตัวถัดไปที่ยังไม่ได้ yield (None = ครบแล้ว)
+      ส่งกลับเข้า iter_animals(cursor=...) เพื่อทำต่อจากจุดเดิมได้
+    - max_items จำกัดจำนวนตัวที่ yield ในรอบนี้
+    """
+
+    def __init__(
+        self,
+        api,
+        params: dict,
+        cursor: str | None = None,
+        max_items: int | None = None,
+        read_ahead: int = 1,
+    ):
+        self.api = api
+        self.params = dict(params)
+        self.page, self.offset = self.parse_cursor(cursor)
+        self.max_items = max_items
+        self.read_ahead = max(int(read_ahead), 0)
+        self.total_pages = None
+        self.yielded = 0
+        self.exhausted = False
+
+    @staticmethod
+    def parse_cursor(cursor: str | None) -> tuple[int, int]:
+        if not cursor:
+            return 1, 0
+        page, _, offset = str(cursor).partition(":")
+        return max(int(page), 1), max(int(offset or 0), 0)
+
+    @property
+    def cursor(self) -> str | None:
+        if self.exhausted:
+            return None
+        return f"{self.page}:{self.offset}"
+
+    def __iter__(self):
+        pending = deque()
+        next_submit = self.page
+
+        def fill():
+            nonlocal next_submit
+            # หน้าปัจจุบัน + อ่านล่วงหน้า read_ahead หน้า (ไม่เกิน total_pages ถ้ารู้แล้ว)
+            while len(pending) <= self.read_ahead:
+                if self.total_pages is not None and next_submit > self.total_pages:
+                    break
+                pending.append(self.api._pool().submit(self.fetch_page, next_submit))
+                next_submit += 1
+
+        while True:
+            if self.max_items is not None and self.yielded >= self.max_items:
+                return
+            fill()
+            if not pending:
+                self.exhausted = True
+                return
+            data = pending.popleft().result()
+            self.total_pages = int(data.get("total_pages") or 1)
+            items = data.get("items") or []
+
+            while self.offset < len(items):
+                if self.max_items is not None and self.yielded >= self.max_items:
+                    return
+                pet = Pet.from_api_dict(items[self.offset])
+                self.offset += 1
+                self.yielded += 1
+                yield pet
+
+            self.page += 1
+            self.offset = 0
+            if not items or self.page > self.total_pages:
+                self.exhausted = True
+                return
+
+    def _params(self, page: int) -> dict:
+        return self.api._build_params(page=page, **self.params)
+
+    def fetch_page(self, page: int) -> dict:
+        """หนึ่งหน้าดิบ (items เป็น dict รูปแบบ API) — error ของ upstream จะ raise ออกไป"""
+        # โหมด mock: หน้าจากแคตตาล็อกสังเคราะห์ (pagination เดียวกับ upstream)
+        if self.api.mock_mode:
+            return self.api.synthetic.search(page=page, **self.params)
+        return self.api._page_data(self._params(page))
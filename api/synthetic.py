@@ -0,0 +1,406 @@
+# api/synthetic.py
+"""แคตตาล็อกสัตว์สังเคราะห์สำหรับโหมด mock — กำหนดด้วย seed, ขนาดเท่าไรก็ได้ ไม่สร้างทั้งก้อน
+
+คุณสมบัติของสัตว์คือ "หลัก" ของ combo c ในฐานผสม (ชนิด, สายพันธุ์, อายุ, ขนาด, เพศ, พื้นที่)
+แต่ละหลักชี้ไปที่ช่องในตาราง (ช่องซ้ำ = ถ่วงน้ำหนัก เช่นหมามากกว่านก) ที่สลับลำดับตาม seed
+แคตตาล็อก total ตัว = full บล็อกที่มีครบทุก combo (id = บล็อก · combos + c + 1 เริ่มที่ 1 แบบ Petfinder)
++ บล็อกสุดท้ายที่มีแค่ rest combo ซึ่งสุ่มเลือกตาม seed (สัดส่วนจึงไม่เอียงแม้ total < combos)
+
+filter หนึ่งชุด = เซตช่องที่ยอมรับของแต่ละหลัก → ในบล็อกเต็มนับได้ทันทีและหา "ตัวที่ k ที่ตรง"
+ได้ใน O(จำนวนหลัก) ส่วนบล็อกสุดท้ายกรองครั้งเดียวต่อ filter (cache แบบ LRU)
+จึงสร้างหนึ่งหน้าใน O(per_page) ไม่ว่าแคตตาล็อกจะมีร้อยหรือหลายล้านตัว
+ลำดับผลถูกสลับด้วย permutation แบบ Feistel (seed + filter) → หน้าไม่เรียงเป็นแพทเทิร์นซ้ำ ๆ
+"""
+
+import hashlib
+import os
+import random
+import threading
+from collections import OrderedDict
+
+_MASK64 = (1 << 64) - 1
+
+BREEDS = {
+    "Dog": (
+        "Labrador Retriever",
+        "German Shepherd Dog",
+        "Golden Retriever",
+        "Beagle",
+        "Pit Bull Terrier",
+        "Chihuahua",
+        "Poodle",
+        "Mixed Breed",
+    ),
+    "Cat": (
+        "Domestic Shorthair",
+        "Domestic Longhair",
+        "Siamese",
+        "Maine Coon",
+        "Tabby",
+        "Russian Blue",
+        "Bengal",
+        "Calico",
+    ),
+    "Rabbit": (
+        "Lop Eared",
+        "Lionhead",
+        "Dutch",
+        "Rex",
+        "Netherland Dwarf",
+        "Flemish Giant",
+        "Mini Rex",
+        "Angora Rabbit",
+    ),
+    "Bird": (
+        "Parakeet",
+        "Cockatiel",
+        "Lovebird",
+        "Canary",
+        "Finch",
+        "Conure",
+        "Cockatoo",
+        "African Grey",
+    ),
+}
+# ช่องซ้ำ = น้ำหนัก (ไม่ใช่แค่ค่าที่เป็นไปได้)
+TYPE_SLOTS = ("Dog",) * 5 + ("Cat",) * 3 + ("Rabbit", "Bird")
+AGE_SLOTS = ("Baby", "Young", "Young", "Adult", "Adult", "Adult", "Senior")
+SIZE_SLOTS = ("Small", "Small", "Medium", "Medium", "Medium", "Large", "Large", "Extra Large")
+GENDER_SLOTS = ("Male", "Female")
+LOCATIONS = (
+    "10001",
+    "90210",
+    "60601",
+    "94103",
+    "73301",
+    "98101",
+    "33101",
+    "02108",
+    "80202",
+    "30301",
+)
+
+NAMES = (
+    "Buddy",
+    "Luna",
+    "Max",
+    "Bella",
+    "Charlie",
+    "Lucy",
+    "Cooper",
+    "Daisy",
+    "Milo",
+    "Lola",
+    "Rocky",
+    "Sadie",
+    "Bear",
+    "Molly",
+    "Tucker",
+    "Bailey",
+    "Oliver",
+    "Stella",
+    "Leo",
+    "Zoe",
+    "Duke",
+    "Chloe",
+    "Jack",
+    "Penny",
+    "Toby",
+    "Rosie",
+    "Finn",
+    "Nala",
+    "Oscar",
+    "Ruby",
+    "Louie",
+    "Coco",
+    "Teddy",
+    "Gracie",
+    "Winston",
+    "Maggie",
+    "Loki",
+    "Pepper",
+    "Ziggy",
+    "Olive",
+    "Scout",
+    "Willow",
+    "Gus",
+    "Hazel",
+    "Murphy",
+    "Ivy",
+    "Bentley",
+    "Mochi",
+    "Simba",
+    "Honey",
+)
+TRAITS = (
+    "Friendly",
+    "Shy at first",
+    "Playful",
+    "Calm",
+    "Curious",
+    "Gentle",
+    "Energetic",
+    "Affectionate",
+    "Independent",
+    "Cuddly",
+)
+HABITS = (
+    "loves long walks",
+    "is house trained",
+    "gets along with kids",
+    "enjoys quiet evenings",
+    "is great with other pets",
+    "knows basic commands",
+    "likes to play fetch",
+    "is looking for a patient family",
+)
+PHOTOS = {
+    "Dog": (
+        "https://images.unsplash.com/photo-1552053831-71594a27632d?w=400",
+        "https://images.unsplash.com/photo-1517849845537-4d257902454a?w=400",
+    ),
+    "Cat": ("https://images.unsplash.com/photo-1533738363-b7f9aef128ce?w=400",),
+}
+DEFAULT_PHOTO = "https://images.unsplash.com/photo-1601758228041-f3b2795255f1?w=400"
+MAX_PER_PAGE = 100
+
+
+def _mix(x: int) -> int:
+    """splitmix64 finalizer: จำนวนเต็ม → 64 บิตที่กระจายดี (เร็วกว่า hashlib มากต่อสัตว์หนึ่งตัว)"""
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+def _permute(k: int, m: int, key: int) -> int:
+    """bijection บน [0, m) (Feistel 4 รอบ + cycle walking) — ตำแหน่ง k → ลำดับที่ของผลที่ตรง"""
+    if m <= 2:
+        return k
+    half = ((m - 1).bit_length() + 1) // 2
+    mask = (1 << half) - 1
+    x = k
+    while True:
+        left, right = x >> half, x & mask
+        for rnd in range(4):
+            left, right = right, left ^ (_mix(key ^ (right << 8) ^ rnd) & mask)
+        x = (left << half) | right
+        if x < m:
+            return x
+
+
+class _Plan:
+    """ผลของ filter หนึ่งชุด: เซตช่องต่อหลัก + จำนวนที่ตรง"""
+
+    __slots__ = ("allowed", "per_block", "full", "partial", "count", "key")
+
+    def __init__(self, allowed: list[list[int]], full: int, partial: list[int], key: int):
+        self.allowed = allowed
+        self.per_block = 1
+        for values in allowed:
+            self.per_block *= len(values)
+        self.full = full * self.per_block  # จำนวนที่ตรงในบล็อกเต็มทั้งหมด
+        self.partial = partial  # combo ที่ตรงในบล็อกสุดท้าย (เรียงแล้ว)
+        self.count = self.full + len(partial)
+        self.key = key
+
+
+class SyntheticCatalog:
+    def __init__(self, total: int = 10_000, seed: int = 1, locations=LOCATIONS):
+        self.total = max(int(total), 0)
+        self.seed = int(seed)
+        rng = random.Random(self.seed)
+        # สลับช่องตาม seed → seed ต่างกันได้แคตตาล็อกต่างกัน (แต่สัดส่วนเท่าเดิม)
+        self.types = _shuffled(rng, TYPE_SLOTS)
+        self.breed_slots = len(next(iter(BREEDS.values())))
+        self.breeds = {t: _shuffled(rng, b) for t, b in BREEDS.items()}
+        self.ages = _shuffled(rng, AGE_SLOTS)
+        self.sizes = _shuffled(rng, SIZE_SLOTS)
+        self.genders = _shuffled(rng, GENDER_SLOTS)
+        self.locations = tuple(locations)
+        self.radices = [
+            len(self.types),
+            self.breed_slots,
+            len(self.ages),
+            len(self.sizes),
+            len(self.genders),
+            len(self.locations),
+        ]
+        self.combos = 1
+        for radix in self.radices:
+            self.combos *= radix
+        self.full, self.rest = divmod(self.total, self.combos)
+        self._partial: list[tuple[int, ...]] | None = None
+        self._plans: OrderedDict[tuple, _Plan] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """PETFINDER_MOCK_TOTAL (จำนวนสัตว์) / PETFINDER_MOCK_SEED"""
+        return cls(
+            total=int(os.getenv("PETFINDER_MOCK_TOTAL", "10000")),
+            seed=int(os.getenv("PETFINDER_MOCK_SEED", "1")),
+        )
+
+    # ---------- Public API ----------
+    def search(
+        self,
+        animal_type=None,
+        location=None,
+        age=None,
+        breed=None,
+        size=None,
+        gender=None,
+        page=1,
+        per_page=24,
+        **_ignored,
+    ) -> dict:
+        """หน้าเดียวในรูปเดียวกับ PetFinderAPI._fetch_page (items เป็น dict รูปแบบ API)"""
+        page = max(int(page), 1)
+        per_page = min(max(int(per_page), 1), MAX_PER_PAGE)
+        plan = self._plan(animal_type, location, age, breed, size, gender)
+        start = (page - 1) * per_page
+        stop = min(start + per_page, plan.count)
+        items = [
+            self.animal(self._kth(plan, _permute(k, plan.count, plan.key)) + 1)
+            for k in range(start, stop)
+        ]
+        return {
+            "items": items,
+            "page": page,
+            "total_pages": max(1, -(-plan.count // per_page)),
+            "per_page": per_page,
+            "total_count": plan.count,
+        }
+
+    def count(self, **filters) -> int:
+        return self._plan(
+            *(filters.get(k) for k in ("animal_type", "location", "age", "breed", "size", "gender"))
+        ).count
+
+    def animal(self, i: int) -> dict:
+        """สัตว์ id = i (≥ 1) ในรูป dict แบบ API (ค่าเดิมเสมอสำหรับ seed + i เดียวกัน)
+
+        id 0 ไม่มี: controller ถือว่า id ที่ falsy = ไม่ได้ส่งมา เหมือน Petfinder ที่ id เป็นบวกเสมอ
+        """
+        n = i - 1  # ลำดับในแคตตาล็อก (บล็อก · combos + c)
+        t, b, a, s, g, loc = self._digits(n % self.combos)
+        kind = self.types[t]
+        h = _mix(self.seed * 0x100000001B3 ^ n)
+        name = NAMES[h % len(NAMES)]
+        photos = PHOTOS.get(kind)
+        location = self.locations[loc]
+        return {
+            "id": i,
+            "name": name,
+            "type": kind,
+            "breed": self.breeds[kind][b],
+            "age": self.ages[a],
+            "contact": f"adopt{loc:02d}-{(h >> 8) % 20:02d}@shelters.example.org",
+            "photo_url": photos[(h >> 16) % len(photos)] if photos else DEFAULT_PHOTO,
+            "phone": f"555-{(h >> 24) % 10000:04d}",
+            "gender": self.genders[g],
+            "size": self.sizes[s],
+            "description": (
+                f"{TRAITS[(h >> 32) % len(TRAITS)]} {self.ages[a].lower()} "
+                f"{self.breeds[kind][b]} near {location} who "
+                f"{HABITS[(h >> 40) % len(HABITS)]}."
+            ),
+        }
+
+    # ---------- Internals ----------
+    def _digits(self, c: int) -> tuple[int, ...]:
+        out = []
+        for radix in reversed(self.radices):
+            c, d = divmod(c, radix)
+            out.append(d)
+        return tuple(reversed(out))
+
+    def _partial_block(self) -> list[tuple[int, ...]]:
+        """(combo, หลัก...) ของบล็อกสุดท้าย เรียงตาม combo — สร้างครั้งเดียว O(rest)"""
+        if self._partial is None:
+            rng = random.Random(_mix(self.seed ^ 0x5EED))
+            combos = sorted(rng.sample(range(self.combos), self.rest))
+            self._partial = [(c, *self._digits(c)) for c in combos]
+        return self._partial
+
+    def _plan(self, animal_type, location, age, breed, size, gender) -> _Plan:
+        key = tuple(
+            str(v).strip().lower() if v not in (None, "") else None
+            for v in (animal_type, location, age, breed, size, gender)
+        )
+        # type/age/size/gender รับหลายค่าคั่น comma แบบ Petfinder ("adult,senior") → เรียงให้ key ตรงกัน
+        key = tuple(_values(v) if j in (0, 2, 4, 5) else v for j, v in enumerate(key))
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                return plan
+            partial = self._partial_block()
+        animal_type, location, age, breed, size, gender = key
+        types = _slots(self.types, animal_type)
+        breeds = list(range(self.breed_slots))
+        if breed is not None:
+            owner = [
+                (t, bs.index(n)) for t, bs in self.breeds.items() for n in bs if n.lower() == breed
+            ]
+            # ชื่อสายพันธุ์ไม่ซ้ำข้ามชนิด → ล็อกทั้งชนิดและช่องสายพันธุ์
+            types = [j for j in types if owner and self.types[j] == owner[0][0]]
+            breeds = [owner[0][1]] if owner else []
+        if location is not None and location not in self.locations:
+            # รหัสที่ไม่มีในรายการ → ผูกกับศูนย์หนึ่งแห่งแบบคงที่ (มีผลเสมอเหมือน API จริงที่ค้นตามระยะ)
+            digest = hashlib.blake2b(location.encode(), digest_size=4).digest()
+            location = self.locations[int.from_bytes(digest, "big") % len(self.locations)]
+        allowed = [
+            types,
+            breeds,
+            _slots(self.ages, age),
+            _slots(self.sizes, size),
+            _slots(self.genders, gender),
+            _slots(self.locations, location),
+        ]
+        # เช็คเฉพาะหลักที่ถูกจำกัด
+        checks = [(j + 1, frozenset(v)) for j, v in enumerate(allowed) if len(v) < self.radices[j]]
+        matched = [row[0] for row in partial if all(row[j] in ok for j, ok in checks)]
+        # hash() ของ str สุ่มต่อโปรเซส → ใช้ blake2b ให้ทุก worker ได้ลำดับเดียวกัน
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=8).digest()
+        plan = _Plan(allowed, self.full, matched, _mix(self.seed ^ int.from_bytes(digest, "big")))
+        with self._lock:
+            self._plans[key] = plan
+            while len(self._plans) > 256:
+                self._plans.popitem(last=False)
+        return plan
+
+    def _kth(self, plan: _Plan, k: int) -> int:
+        """ลำดับในแคตตาล็อก (id - 1) ของตัวที่ k (นับจาก 0 เรียงตาม id) ในบรรดาตัวที่ตรง filter"""
+        if k >= plan.full:
+            return self.full * self.combos + plan.partial[k - plan.full]
+        block, k = divmod(k, plan.per_block)
+        # ลำดับที่ k ในผลคูณของเซตช่อง (หลักท้ายเปลี่ยนเร็วสุด) → combo
+        digits = []
+        for values in reversed(plan.allowed):
+            k, idx = divmod(k, len(values))
+            digits.append(values[idx])
+        c = 0
+        for radix, d in zip(self.radices, reversed(digits), strict=True):
+            c = c * radix + d
+        return block * self.combos + c
+
+
+def _values(value: str | None) -> str | None:
+    parts = sorted({p.strip() for p in value.split(",") if p.strip()}) if value else []
+    return ",".join(parts) or None
+
+
+def _slots(table, wanted: str | None) -> list[int]:
+    """ช่องของค่าที่ต้องการ (หลายค่าคั่น comma = union)"""
+    if wanted is None:
+        return list(range(len(table)))
+    wanted = set(wanted.split(","))
+    return [j for j, v in enumerate(table) if v.lower() in wanted]
+
+
+def _shuffled(rng: random.Random, values) -> tuple:
+    out = list(values)
+    rng.shuffle(out)
+    return tuple(out)
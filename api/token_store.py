@@ -0,0 +1,162 @@
+# api/token_store.py
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+
+from data.migrations import is_current
+
+SHARED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS oauth_token (
+  client_id    TEXT PRIMARY KEY,
+  token        TEXT NOT NULL,
+  expires_at   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS oauth_token_refresh (
+  client_id    TEXT PRIMARY KEY,
+  until        REAL NOT NULL        -- worker ที่จองไว้กำลังขอ token ถึงเวลานี้
+);
+"""
+
+
+class TokenStore:
+    """เก็บ OAuth token พร้อมเวลาหมดอายุ และรีเฟรชล่วงหน้า (refresh_skew วินาที)
+
+    - ในโปรเซส: มี lock ให้ refresh ได้ทีละคน คนอื่นรอแล้วใช้ token ใหม่ร่วมกัน
+    - ข้าม worker (ถ้าตั้ง shared_path): จองสิทธิ์ refresh ในตาราง oauth_token_refresh
+      (transaction สั้น ๆ) แล้วค่อยขอ token นอก transaction worker อื่นรออ่านจาก oauth_token
+      → ไม่ถือ write lock ของไฟล์ระหว่างยิง HTTP (breaker/rate limit/metrics ในไฟล์เดียวกันเขียนได้)
+    """
+
+    def __init__(
+        self,
+        shared_path: str | None = None,
+        refresh_skew: float = 60,
+        claim_timeout: float = 30,
+    ):
+        self.shared_path = os.path.abspath(shared_path) if shared_path else None
+        self.refresh_skew = float(refresh_skew)
+        # worker ที่จองไว้ค้าง/ตายเกินเท่านี้วินาที → คนอื่นขอเองได้
+        self.claim_timeout = float(claim_timeout)
+        self._tokens: dict[str, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.refreshes = 0
+        if self.shared_path:
+            con = self._shared()
+            if not is_current(con):
+                con.executescript(SHARED_SCHEMA)
+
+    def get(self, client_id: str, fetch, deadline: float | None = None) -> str:
+        """คืน token ที่ยังใช้ได้ ถ้าใกล้หมดอายุเรียก fetch() -> (token, expires_in)
+
+        deadline = time.monotonic() ของผู้เรียก: ถ้าต้องรอ worker อื่นขอ token จนเลยเวลานี้
+        จะ raise requests.Timeout แทนการรอต่อ
+        """
+        token = self._fresh_local(client_id)
+        if token:
+            return token
+        with self._lock:
+            token = self._fresh_local(client_id)
+            if token:
+                return token
+            if self.shared_path:
+                token, expires_at = self._refresh_shared(client_id, fetch, deadline)
+            else:
+                token, expires_at = self._call_fetch(fetch)
+            self._tokens[client_id] = (token, expires_at)
+            return token
+
+    def invalidate(self, client_id: str, token: str | None = None):
+        """ทิ้ง token (เช่นโดน 401) — ถ้าส่ง token มา จะลบเฉพาะเมื่อยังเป็นตัวเดิม"""
+        with self._lock:
+            cur = self._tokens.get(client_id)
+            if cur and (token is None or cur[0] == token):
+                del self._tokens[client_id]
+        if self.shared_path:
+            sql = "DELETE FROM oauth_token WHERE client_id = ?"
+            args = (client_id,)
+            if token is not None:
+                sql += " AND token = ?"
+                args = (client_id, token)
+            try:
+                self._shared().execute(sql, args)
+            except sqlite3.Error:
+                pass
+
+    # ---------- Internals ----------
+    def _fresh_local(self, client_id):
+        cur = self._tokens.get(client_id)
+        if cur and cur[1] - self.refresh_skew > time.time():
+            return cur[0]
+        return None
+
+    def _call_fetch(self, fetch):
+        token, expires_in = fetch()
+        self.refreshes += 1
+        return token, time.time() + float(expires_in or 3600)
+
+    def _shared(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.shared_path, timeout=5, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            self._local.con = con
+        return con
+
+    def _read_shared(self, con, client_id):
+        row = con.execute(
+            "SELECT token, expires_at FROM oauth_token WHERE client_id = ?", (client_id,)
+        ).fetchone()
+        if row and row[1] - self.refresh_skew > time.time():
+            return row[0], row[1]
+        return None
+
+    def _claim(self, con, client_id) -> bool:
+        """จองสิทธิ์ขอ token (ถ้ายังไม่มีใครจองหรือคนจองค้างเกิน claim_timeout)
+
+        ดู oauth_token ซ้ำใน transaction เดียวกัน: คนจองก่อนหน้าอาจเพิ่งเขียน token แล้วปล่อยสิทธิ์
+        หลังเราอ่านครั้งแรก → ได้ token แล้วไม่ต้องจอง (คืน False ให้วนไปอ่าน)
+        """
+        now = time.time()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            row = con.execute(
+                "SELECT until FROM oauth_token_refresh WHERE client_id = ?", (client_id,)
+            ).fetchone()
+            claimed = (row is None or row[0] <= now) and not self._read_shared(con, client_id)
+            if claimed:
+                con.execute(
+                    "INSERT OR REPLACE INTO oauth_token_refresh (client_id, until) VALUES (?, ?)",
+                    (client_id, now + self.claim_timeout),
+                )
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        return claimed
+
+    def _refresh_shared(self, client_id, fetch, deadline=None):
+        con = self._shared()
+        while True:
+            row = self._read_shared(con, client_id)
+            if row:
+                return row
+            if self._claim(con, client_id):
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                raise requests.Timeout("Petfinder latency budget exhausted waiting for token")
+            time.sleep(0.05)  # อีก worker กำลังขอ → รออ่านผลของมัน
+        try:
+            # ขอ token นอก transaction: fetch ยิง HTTP ผ่าน breaker/limiter ที่ต้องเขียนไฟล์เดียวกัน
+            row = self._call_fetch(fetch)
+            con.execute(
+                "INSERT OR REPLACE INTO oauth_token (client_id, token, expires_at)"
+                " VALUES (?, ?, ?)",
+                (client_id, row[0], row[1]),
+            )
+        finally:
+            con.execute("DELETE FROM oauth_token_refresh WHERE client_id = ?", (client_id,))
+        return row
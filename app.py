@@ -1,18 +1,38 @@
-from flask import Flask
-from controllers.app_controller import bp as app_bp
 from dotenv import load_dotenv
 
+# โหลด .env ครั้งเดียวที่ entrypoint ก่อน import โมดูลที่อ่าน env ตอน import (PETS_BULK_MAX ฯลฯ)
 load_dotenv()
 
-def create_app():
+from flask import Flask  # noqa: E402
+
+from controllers import assets, compression  # noqa: E402
+from controllers.app_controller import TimedJSONProvider  # noqa: E402
+from controllers.app_controller import bp as app_bp  # noqa: E402
+from controllers.services import Services  # noqa: E402
+
+
+def create_app(config: dict | None = None):
+    """สร้างแอปโดยไม่แตะ SQLite/Petfinder — บริการถูกสร้างตอนรีเควสแรกของแต่ละ worker
+
+    ใช้กับ gunicorn --preload ได้: โปรเซสแม่ import แค่โค้ด ไม่มี connection/thread ติดไปตอน fork
+    config["PETS_DB_PATH"] ชี้ฐานข้อมูลของแอปนี้ (ไม่ส่ง = env PETS_DB_PATH / ./pets.db)
+    """
     app = Flask(__name__, static_folder="static", template_folder="templates")
+    app.config.update(config or {})
+    app.json = TimedJSONProvider(app)
+    app.extensions["pets"] = Services(db_path=app.config.get("PETS_DB_PATH"))
     app.register_blueprint(app_bp)
+    # /static/... (ชื่อเดิม) ยัง revalidate ทุกครั้ง; template ใช้ asset_url() → /assets/ แบบ immutable
     app.config["SEND_FILE_MAX_AGE_DEFAULT"] = 0
+    assets.init_app(app)
+    compression.init_app(app)
     return app
 
+
 app = create_app()
 
 if __name__ == "__main__":
     import os
+
     port = int(os.getenv("PORT", "5000"))
     app.run(host="0.0.0.0", port=port)
@@ -0,0 +1,172 @@
+"""ASGI entrypoint: ค้นหาแบบ asyncio + ส่วนที่เหลือเป็นแอป Flask เดิม
+
+/api/search, /api/search/pages (และ /api/async/...) ตอบด้วย coroutine ใน controller
+ผ่าน AsyncPetFinderAPI ตัวเดียวต่อโปรเซส → หนึ่ง worker มีรีเควสค้างกับ Petfinder ได้หลายร้อยตัว
+/api/favorites/events (SSE) รันบน loop เหมือนกัน ไม่ถือ thread ต่อสตรีม
+path อื่นส่งต่อให้ Flask ผ่าน asgiref.wsgi.WsgiToAsgi (รันใน thread pool)
+
+    pip install -r requirements-async.txt
+    gunicorn -w 3 -k uvicorn.workers.UvicornWorker -b 0.0.0.0:8000 asgi:app
+"""
+
+import asyncio
+import json
+import time
+from urllib.parse import parse_qsl
+
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.datastructures import MultiDict
+
+from api.petfinder_async import AsyncPetFinderAPI
+from app import app as flask_app
+from controllers import compression, events
+from controllers.app_controller import search_async, search_pages_async
+from data.metrics import METRICS
+
+ROUTES = {
+    "/api/search": search_async,
+    "/api/search/pages": search_pages_async,
+    "/api/async/search": search_async,
+    "/api/async/search/pages": search_pages_async,
+}
+
+
+class AsyncSearchApp:
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.client: AsyncPetFinderAPI | None = None
+        self.watch: events.VersionWatch | None = None
+
+    def _client(self) -> AsyncPetFinderAPI:
+        # pf ของ services ถูกสร้างตอนนี้ (หลัง fork) ไม่ใช่ตอน import asgi.py
+        if self.client is None:
+            self.client = AsyncPetFinderAPI(self.flask_app.extensions["pets"].pf)
+        return self.client
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if (
+            scope["type"] == "http"
+            and scope["path"] == "/api/favorites/events"
+            and scope["method"] == "GET"
+        ):
+            return await self._events(scope, receive, send)
+        handler = ROUTES.get(scope.get("path")) if scope["type"] == "http" else None
+        if handler is None or scope["method"] not in ("GET", "HEAD"):
+            return await self.wsgi(scope, receive, send)
+        return await self._search(handler, scope, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # สร้างหลัง fork ของ gunicorn → session/connector อยู่ใน loop ของ worker นี้
+                self._client()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.client is not None:
+                    await self.client.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _events(self, scope, receive, send):
+        """SSE ของ favorites (ดู controllers/events.py) จบเมื่อ client ตัดหรือครบ MAX_SECS"""
+        db = self.flask_app.extensions["pets"].db
+        if self.watch is None:
+            self.watch = events.VersionWatch(db)
+        request_headers = dict(scope.get("headers") or [])
+        q = dict(parse_qsl(scope.get("query_string", b"").decode("latin-1")))
+        since = events.parse_since(
+            request_headers.get(b"last-event-id", b"").decode("latin-1") or q.get("since")
+        )
+        if since is None:
+            since = await asyncio.to_thread(db.favorite_changes_version)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream; charset=utf-8"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ],
+            }
+        )
+
+        async def pump():
+            async for chunk in events.stream_async(db, since, self.watch):
+                await send(
+                    {"type": "http.response.body", "body": chunk.encode("utf-8"), "more_body": True}
+                )
+            await send({"type": "http.response.body", "body": b""})
+
+        async def disconnected():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        tasks = [asyncio.create_task(pump()), asyncio.create_task(disconnected())]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+        for task in done:
+            if task.exception() is not None:
+                print("[warn] favorites event stream failed:", task.exception())
+        METRICS.inc("http_requests_total", route="/api/favorites/events", method="GET", status=200)
+
+    async def _search(self, handler, scope, send):
+        route, method = scope["path"], scope["method"]
+        started = time.perf_counter()
+        q = MultiDict(
+            parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)
+        )
+        try:
+            # coroutine ใน controller ใช้ services() ของแอป → ต้องมี app context
+            with self.flask_app.app_context():
+                payload = await handler(self._client(), q)
+            encode_started = time.perf_counter()
+            # ค่าเดียวกับ DefaultJSONProvider ของ Flask → bytes ตรงกับ jsonify
+            body = json.dumps(payload, sort_keys=True).encode("utf-8")
+            METRICS.observe(
+                "json_encode_seconds", time.perf_counter() - encode_started, route=route
+            )
+            status = 200
+        except ValueError as e:  # page/per_page ไม่ใช่ตัวเลข
+            body = json.dumps({"error": str(e)}).encode("utf-8")
+            status = 400
+        request_headers = dict(scope.get("headers") or [])
+        headers = [(b"content-type", b"application/json"), (b"vary", b"Accept-Encoding")]
+        if status == 200:
+            # ETag/304 + gzip/br แบบเดียวกับ controllers.compression ฝั่ง Flask
+            etag = f'W/"{compression.body_etag(body)}"'
+            headers += [(b"etag", etag.encode()), (b"cache-control", b"no-cache")]
+            if_none_match = request_headers.get(b"if-none-match", b"").decode("latin-1")
+            if etag[2:] in if_none_match:  # เทียบแบบ weak: มีหรือไม่มี W/ ก็ได้
+                status, body = 304, b""
+        encoding = compression.negotiate(
+            request_headers.get(b"accept-encoding", b"").decode("latin-1")
+        )
+        if (
+            compression.ENABLED
+            and status != 304
+            and encoding
+            and len(body) >= compression.MIN_BYTES
+        ):
+            body = compression.compress(body, encoding)
+            headers.append((b"content-encoding", encoding.encode()))
+        headers.append((b"content-length", str(len(body)).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": b"" if method == "HEAD" else body})
+        METRICS.observe(
+            "http_request_duration_seconds",
+            time.perf_counter() - started,
+            route=route,
+            method=method,
+        )
+        METRICS.inc("http_requests_total", route=route, method=method, status=status)
+
+
+app = AsyncSearchApp(flask_app)
@@ -0,0 +1,59 @@
+# benchmarks/_common.py
+"""ของที่ทุก benchmark ใช้ร่วมกัน: percentile และการบันทึกผลเป็น JSON"""
+
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import time
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def percentiles(samples: list[float], points=(50, 95, 99)) -> dict:
+    """nearest-rank percentile (ms) ของ latency ที่วัดเป็นวินาที"""
+    if not samples:
+        return {f"p{p}": None for p in points}
+    ordered = sorted(samples)
+    out = {}
+    for p in points:
+        idx = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered))) - 1))
+        out[f"p{p}"] = round(ordered[idx] * 1000, 3)
+    return out
+
+
+def environment() -> dict:
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+            cwd=os.path.dirname(RESULTS_DIR),
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        rev = None
+    return {
+        "git_rev": rev or None,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def save_results(name: str, results: dict, out: str | None = None) -> str:
+    """เขียน {"name", "started_at", "env", "results"} ลง benchmarks/results/<name>-<เวลา>.json"""
+    path = out or os.path.join(RESULTS_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    doc = {
+        "name": name,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "env": environment(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2, ensure_ascii=False)
+    print(f"[bench] saved {path}")
+    return path
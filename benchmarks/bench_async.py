@@ -0,0 +1,119 @@
+# benchmarks/bench_async.py
+"""เทียบ PetFinderAPI (sync, thread) กับ AsyncPetFinderAPI (asyncio) ที่ concurrency สูง
+
+ยิง stub Petfinder ที่หน่วง --latency วินาที เป็นรอบ ๆ (wave) รอบละ c การค้นหาที่ไม่ซ้ำกัน
+(cache miss ทุกครั้ง) วัด latency จากต้นรอบถึงตอนได้ผล → รวมเวลาต่อคิวด้วย
+  - sync_w<N> : thread N ตัว = gunicorn sync N worker (ค่าเริ่มต้น -w 3)
+  - sync_t<c> : thread เท่ากับ c (เพดานของโมเดล thread ในโปรเซสเดียว)
+  - async     : asyncio.gather บน event loop เดียว
+
+    python -m benchmarks.bench_async                         # c = 10,50,200
+    python -m benchmarks.bench_async --levels 100,500 --latency 0.3 --rounds 3
+
+ระดับ HTTP ทั้งแอป: รัน asgi:app ด้วย uvicorn worker แล้วใช้ benchmarks.load --target
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._common import percentiles, save_results
+from benchmarks.stub_petfinder import StubPetfinder
+
+
+def _summary(mode: str, concurrency: int, latencies: list[float], elapsed: float) -> dict:
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        **percentiles(latencies),
+    }
+
+
+def run_sync(pf, concurrency: int, threads: int, rounds: int, tag: str) -> dict:
+    latencies: list[float] = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        for r in range(rounds):
+            wave = time.perf_counter()
+
+            def one(i, r=r, wave=wave):
+                pf.search_animals(location=f"{tag}-{r}-{i}", as_dict=True)
+                return time.perf_counter() - wave
+
+            latencies.extend(pool.map(one, range(concurrency)))
+    return _summary(f"sync_{tag}", concurrency, latencies, time.perf_counter() - started)
+
+
+async def _run_async(client, concurrency: int, rounds: int) -> dict:
+    latencies: list[float] = []
+    started = time.perf_counter()
+    for r in range(rounds):
+        wave = time.perf_counter()
+
+        async def one(i, r=r, wave=wave):
+            await client.search_animals(location=f"async-{r}-{i}", as_dict=True)
+            return time.perf_counter() - wave
+
+        latencies.extend(await asyncio.gather(*(one(i) for i in range(concurrency))))
+    return _summary("async", concurrency, latencies, time.perf_counter() - started)
+
+
+def run_async(pf, concurrency: int, rounds: int) -> dict:
+    from api.petfinder_async import AsyncPetFinderAPI
+
+    async def main():
+        async with AsyncPetFinderAPI(pf, max_connections=max(concurrency, 1)) as client:
+            return await _run_async(client, concurrency, rounds)
+
+    return asyncio.run(main())
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="sync vs asyncio Petfinder client benchmark")
+    ap.add_argument("--levels", default="10,50,200", help="concurrent searches per wave")
+    ap.add_argument("--rounds", type=int, default=5, help="waves per level")
+    ap.add_argument("--workers", type=int, default=3, help="threads for the sync_w mode")
+    ap.add_argument("--latency", type=float, default=0.1, help="stub /animals latency")
+    ap.add_argument("--jitter", type=float, default=0.02)
+    ap.add_argument("--out", help="result JSON path (default benchmarks/results/)")
+    args = ap.parse_args(argv)
+
+    # rate limit/cache แบบ shared ไม่ใช่สิ่งที่วัด → ปิดไว้ (key ไม่ซ้ำกันอยู่แล้ว)
+    os.environ.setdefault("PETFINDER_RATE_LIMIT", "0")
+    from api.cache import SearchCache
+    from api.petfinder import PetFinderAPI
+
+    runs = []
+    with StubPetfinder(latency=args.latency, jitter=args.jitter) as stub:
+        for level in [int(x) for x in args.levels.split(",") if x.strip()]:
+            pf = PetFinderAPI(
+                "bench", "bench", cache=SearchCache(), base_url=stub.base_url, pool_size=level
+            )
+            pf.latency_budget = max(pf.latency_budget, 60.0)  # วัดคิว ไม่ใช่ fallback
+            rows = [
+                run_sync(pf, level, min(args.workers, level), args.rounds, f"w{args.workers}"),
+                run_sync(pf, level, level, args.rounds, f"t{level}"),
+                run_async(pf, level, args.rounds),
+            ]
+            pf.close()
+            for row in rows:
+                print(
+                    f"[async] {row['mode']:<10} c={level:<4} {row['rps']:>8} req/s  "
+                    f"p50={row['p50']}ms p95={row['p95']}ms p99={row['p99']}ms"
+                )
+            runs.extend(rows)
+        upstream = dict(stub.counts)
+
+    config = {k: v for k, v in vars(args).items() if k != "out"}
+    config["upstream_calls"] = upstream
+    save_results("async", {"config": config, "runs": runs}, args.out)
+    return runs
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# benchmarks/bench_facets.py
+"""facet index บนชุดผล 10k ตัว: เวลาสร้าง, นับ facet, กรองต่อหนึ่งหน้า
+
+  bitmap = api.facets.FacetIndex (OR/AND ของ int + bit_count)
+  scan   = วนทุกตัวใน list แล้วเทียบค่าทีละ field (สิ่งที่ต้องทำถ้าไม่มีดัชนี)
+
+ชุดผลมาจากแคตตาล็อกสังเคราะห์ (api.synthetic) จึงไม่ต้องมีคีย์ Petfinder
+ทางเดิม (ไม่มีดัชนี) คือยิง upstream ใหม่ทุกครั้งที่กรองต่อ — ดู round trip จริงได้จาก benchmarks.load
+
+    python -m benchmarks.bench_facets
+    python -m benchmarks.bench_facets --items 50000 --repeat 500
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections import Counter
+
+from api.facets import FACETS, FacetIndex, _choices, _label
+from api.synthetic import SyntheticCatalog
+from benchmarks._common import percentiles, save_results
+
+QUERIES = (
+    {},
+    {"age": "baby"},
+    {"age": "baby,young", "size": "small"},
+    {"gender": "female", "size": "medium,large", "has_photo": "1"},
+    {"breed": "beagle", "age": "adult"},
+)
+
+
+def fetch_items(total: int, seed: int) -> list[dict]:
+    catalog = SyntheticCatalog(total=total, seed=seed)
+    items, page = [], 1
+    while True:
+        data = catalog.search(page=page, per_page=100)
+        items += data["items"]
+        if page >= data["total_pages"]:
+            return items
+        page += 1
+
+
+def _wanted(filters: dict, skip: str | None = None) -> list[tuple[str, frozenset]]:
+    return [(f, c) for f in FACETS if f != skip and (c := _choices(f, filters.get(f)))]
+
+
+def _match(item: dict, wanted) -> bool:
+    return all((_label(facet, item) or "").lower() in ok for facet, ok in wanted)
+
+
+def scan_counts(items: list[dict], filters: dict) -> dict:
+    out = {}
+    for facet in FACETS:
+        wanted = _wanted(filters, skip=facet)
+        counts = Counter(_label(facet, it) for it in items if _match(it, wanted))
+        counts.pop(None, None)
+        out[facet] = counts
+    return out
+
+
+def scan_page(items: list[dict], filters: dict, page: int, per_page: int) -> list[dict]:
+    wanted = _wanted(filters)
+    hits = [it for it in items if _match(it, wanted)]
+    return hits[(page - 1) * per_page : page * per_page]
+
+
+def _time(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="facet index benchmark")
+    ap.add_argument("--items", type=int, default=10_000, help="animals in the result set")
+    ap.add_argument("--repeat", type=int, default=200, help="samples per measurement")
+    ap.add_argument("--per-page", type=int, default=24)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out", help="result JSON path (default benchmarks/results/)")
+    args = ap.parse_args(argv)
+
+    items = fetch_items(args.items, args.seed)
+    build = _time(lambda: FacetIndex(items, {}), max(args.repeat // 20, 3))
+    index = FacetIndex(items, {})
+    bitmap_bytes = sum(
+        (bits.bit_length() + 7) // 8 + sys.getsizeof(0)
+        for table in index.bitmaps.values()
+        for _, bits in table.values()
+    )
+    rng = random.Random(args.seed)
+
+    def _page(filters):
+        total = index.mask(filters).bit_count()
+        return rng.randint(1, max(1, -(-total // args.per_page)))
+
+    queries = []
+    for filters in QUERIES:
+        # ทั้งสองทางต้องได้ผลเดียวกันก่อนจับเวลา
+        page = _page(filters)
+        local = index.page(filters, page, args.per_page)["items"]
+        assert local == scan_page(items, filters, page, args.per_page)
+        row = {"filters": filters, "matches": index.mask(filters).bit_count()}
+        for name, fn in (
+            ("bitmap_counts", lambda f=filters: index.counts(f)),
+            ("scan_counts", lambda f=filters: scan_counts(items, f)),
+            ("bitmap_page", lambda f=filters, p=page: index.page(f, p, args.per_page)),
+            ("scan_page", lambda f=filters, p=page: scan_page(items, f, p, args.per_page)),
+        ):
+            repeat = args.repeat if name.startswith("bitmap") else max(args.repeat // 10, 3)
+            row[name] = percentiles(_time(fn, repeat))
+        queries.append(row)
+        print(
+            f"[facets] {str(filters):<58} matches={row['matches']:>6}  "
+            f"counts p50 bitmap={row['bitmap_counts']['p50']}ms scan={row['scan_counts']['p50']}ms"
+            f"  page p50 bitmap={row['bitmap_page']['p50']}ms scan={row['scan_page']['p50']}ms"
+        )
+    summary = {
+        "items": len(items),
+        "build": percentiles(build),
+        "bitmap_bytes": bitmap_bytes,
+        "queries": queries,
+    }
+    print(
+        f"[facets] build p50={summary['build']['p50']}ms for {len(items)} items, "
+        f"bitmaps {bitmap_bytes / 1024:.1f} KiB"
+    )
+    save_results(
+        "facets",
+        {"config": {k: v for k, v in vars(args).items() if k != "out"}, **summary},
+        args.out,
+    )
+    return summary
+
+
+if __name__ == "__main__":
+    main()
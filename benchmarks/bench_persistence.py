@@ -0,0 +1,148 @@
+# benchmarks/bench_persistence.py
+"""micro-benchmark ของ PersistenceManager ที่ขนาดตาราง 10k / 100k / 1M แถว
+
+แต่ละขนาดใช้ไฟล์ฐานข้อมูลใหม่ในโฟลเดอร์ชั่วคราว วัด:
+  - insert แบบ bulk (favorites + search_history) เป็น rows/s
+  - อ่านหน้าแรก / เดิน cursor ลึก / table_version / top_searches เป็น p50/p95/p99
+  - export สตรีมทั้งตาราง, ลบ bulk, compact ประวัติ
+
+    python -m benchmarks.bench_persistence                     # 10k,100k,1M
+    python -m benchmarks.bench_persistence --sizes 10000 --repeat 50
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks._common import percentiles, save_results
+from data.export import csv_chunks
+from data.persistence import FAVORITE_COLUMNS, PersistenceManager
+from models.pet import Pet
+
+BATCH = 5000
+# list_favorites() โหลดทั้งตารางเข้าหน่วยความจำ → วัดเฉพาะขนาดที่ไม่ใหญ่เกิน
+FULL_LIST_MAX_ROWS = 100_000
+
+
+def _timings(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return {
+        "repeat": repeat,
+        "mean_ms": round(sum(samples) / repeat * 1000, 3),
+        **percentiles(samples),
+    }
+
+
+def _throughput(rows: int, seconds: float) -> dict:
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_s": round(rows / seconds, 1) if seconds else None,
+    }
+
+
+def _fill_favorites(pm: PersistenceManager, n: int) -> float:
+    started = time.perf_counter()
+    for start in range(0, n, BATCH):
+        pm.add_favorites_many(
+            [
+                Pet(f"fav-{i}", f"Pet {i}", "Dog", "Mixed", "Young", "a@b.c", description="x" * 80)
+                for i in range(start, min(start + BATCH, n))
+            ]
+        )
+    return time.perf_counter() - started
+
+
+def _fill_history(pm: PersistenceManager, n: int) -> float:
+    # กระจาย created_at ย้อนหลัง 60 วัน ให้ rollup/compaction มีงานทำจริง
+    now = datetime.now(timezone.utc)
+    types = ("dog", "cat", "rabbit")
+    started = time.perf_counter()
+    for start in range(0, n, BATCH):
+        pm.add_search_history_many(
+            [
+                {
+                    "animal_type": types[i % 3],
+                    "location": f"{10000 + i % 40}",
+                    "per_page": 24,
+                    "page": 1 + i % 5,
+                    "created_at": (now - timedelta(days=60 * i / max(n, 1))).strftime(
+                        "%Y-%m-%d %H:%M:%S"
+                    ),
+                }
+                for i in range(start, min(start + BATCH, n))
+            ]
+        )
+    return time.perf_counter() - started
+
+
+def bench_size(n: int, repeat: int, workdir: str) -> dict:
+    path = os.path.join(workdir, f"bench-{n}.db")
+    pm = PersistenceManager(db_path=path)
+    out: dict = {"rows": n}
+    print(f"[persist] {n:,} rows: filling ...")
+
+    out["insert_favorites"] = _throughput(n, _fill_favorites(pm, n))
+    out["insert_history"] = _throughput(n, _fill_history(pm, n))
+
+    out["favorites_first_page"] = _timings(lambda: pm.list_favorites_page(50), repeat)
+
+    _, deep_cursor = pm.list_favorites_page(50)
+    for _ in range(19):  # เริ่มจากหน้า 21 → วัดว่า keyset ไม่ช้าลงตามความลึก
+        _, deep_cursor = pm.list_favorites_page(50, deep_cursor)
+    out["favorites_deep_page"] = _timings(lambda: pm.list_favorites_page(50, deep_cursor), repeat)
+    out["table_version"] = _timings(lambda: pm.table_version("favorites"), repeat)
+    out["history_first_page"] = _timings(lambda: pm.list_search_history_page(50), repeat)
+    out["top_searches"] = _timings(lambda: pm.top_searches(10, "day", 30), repeat)
+
+    if n <= FULL_LIST_MAX_ROWS:
+        out["list_favorites_full"] = _timings(pm.list_favorites, max(1, repeat // 10))
+
+    started = time.perf_counter()
+    size = sum(len(c) for c in csv_chunks(FAVORITE_COLUMNS, pm.iter_favorite_chunks()))
+    out["export_csv_stream"] = {**_throughput(n, time.perf_counter() - started), "bytes": size}
+
+    ids = [f"fav-{i}" for i in range(0, n, max(1, n // 1000))][:1000]
+    started = time.perf_counter()
+    pm.delete_favorites_many(ids)
+    out["delete_favorites_1000"] = _throughput(len(ids), time.perf_counter() - started)
+
+    started = time.perf_counter()
+    deleted = pm.compact_search_history(max_age_days=30, pause=0)
+    out["compact_history_30d"] = _throughput(deleted, time.perf_counter() - started)
+
+    out["db_bytes"] = os.path.getsize(path)
+    pm.close()
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="PersistenceManager micro-benchmarks")
+    ap.add_argument("--sizes", default="10000,100000,1000000")
+    ap.add_argument("--repeat", type=int, default=200, help="samples per read benchmark")
+    ap.add_argument("--out", help="result JSON path (default benchmarks/results/)")
+    args = ap.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in [int(x) for x in args.sizes.split(",") if x.strip()]:
+            row = bench_size(n, args.repeat, workdir)
+            print(
+                f"[persist] {n:,} rows: insert {row['insert_favorites']['rows_per_s']:,} rows/s, "
+                f"first page p99={row['favorites_first_page']['p99']}ms, "
+                f"deep page p99={row['favorites_deep_page']['p99']}ms, "
+                f"export {row['export_csv_stream']['rows_per_s']:,} rows/s"
+            )
+            results.append(row)
+    save_results("persistence", {"config": vars(args), "sizes": results}, args.out)
+    return results
+
+
+if __name__ == "__main__":
+    main()
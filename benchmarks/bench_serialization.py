@@ -0,0 +1,100 @@
+# benchmarks/bench_serialization.py
+"""เทียบต้นทุนการ serialize หน้า /api/search (100 ตัวต่อหน้า)
+
+before = dict ใน cache → Pet(**d) → asdict/getattr ทีละ field (ทางเดิม)
+after  = ส่ง dict รูปแบบ API จาก cache ต่อเลย (as_json) / Pet.to_api_dict
+
+  python -m benchmarks.bench_serialization --pages 200
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+from dataclasses import asdict
+
+from api.petfinder import PetFinderAPI
+from benchmarks._common import save_results
+from models.pet import Pet, to_api_dict
+
+
+def _raw_animal(i: int) -> dict:
+    return {
+        "id": i,
+        "name": f"Pet {i}",
+        "type": "Dog",
+        "breeds": {"primary": "Labrador"},
+        "age": "Young",
+        "gender": "Female",
+        "size": "Medium",
+        "contact": {"email": "a@b.c", "phone": "555-0100"},
+        "photos": [{"medium": f"https://example.org/{i}.jpg"}],
+        "description": "Friendly " * 20,
+    }
+
+
+def _legacy_item(p: Pet) -> dict:
+    # เหมือน _pet_to_dict เดิมใน controller
+    return {
+        "id": p.pet_id,
+        "name": p.name,
+        "type": p.pet_type,
+        "breed": p.breed,
+        "age": p.age,
+        "contact": p.contact,
+        "photo_url": p.photo_url,
+        "phone": getattr(p, "phone", None),
+        "gender": getattr(p, "gender", None),
+        "size": getattr(p, "size", None),
+        "description": getattr(p, "description", None),
+    }
+
+
+def before(page):
+    legacy = [asdict(Pet.from_api_dict(d)) for d in page]  # รูปที่ cache เคยเก็บ
+    pets = [Pet(**d) for d in legacy]
+    return [_legacy_item(p) for p in pets]
+
+
+def after_cached(page):
+    return [to_api_dict(d) for d in page]
+
+
+def after_pets(page):
+    return [Pet.from_api_dict(d).to_api_dict() for d in page]
+
+
+def _measure(fn, page, pages: int) -> dict:
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    fn(page)
+    tracemalloc.start()
+    started = time.perf_counter()
+    for _ in range(pages):
+        encode(fn(page))
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    n = pages * len(page)
+    return {"us_per_item": round(elapsed / n * 1e6, 3), "peak_kib": round(peak / 1024, 1)}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--pages", type=int, default=200)
+    ap.add_argument("--per-page", type=int, default=100)
+    ap.add_argument("--out", help="result JSON path (default benchmarks/results/)")
+    args = ap.parse_args(argv)
+
+    page = [PetFinderAPI._map_animal(_raw_animal(i)) for i in range(args.per_page)]
+    results = {
+        "before": _measure(before, page, args.pages),
+        "after_cached": _measure(after_cached, page, args.pages),
+        "after_pets": _measure(after_pets, page, args.pages),
+    }
+    print(json.dumps(results, indent=2))
+    save_results("serialization", {"config": vars(args), **results}, args.out)
+    return results
+
+
+if __name__ == "__main__":
+    main()
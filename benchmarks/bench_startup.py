@@ -0,0 +1,152 @@
+# benchmarks/bench_startup.py
+"""เวลาสตาร์ตของ worker: import app, รีเควสแรก (สร้างบริการ + migration) และ DDL ที่ถูกข้าม
+
+แต่ละรอบเป็นโปรเซสใหม่ (เหมือน gunicorn worker ที่ไม่ใช้ --preload) วัดกับฐานข้อมูล 3 สภาพ:
+  - fresh   : ยังไม่มีไฟล์ → migrate v0 → ล่าสุด
+  - current : migrate แล้ว → อ่าน user_version อย่างเดียว
+  - legacy  : favorites แบบเก่า (id INTEGER + pet_id) N แถว → สร้างตารางใหม่แล้วคัดลอก
+
+eager_services_ms = เวลาสร้าง db/pf/history/images ทั้งหมดทันที (สิ่งที่เคยเกิดตอน import controller)
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeat 10 --legacy-rows 100000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks._common import percentiles, save_results
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LEGACY_SCHEMA = """
+CREATE TABLE favorites (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  pet_id TEXT UNIQUE,
+  name TEXT NOT NULL,
+  type TEXT, breed TEXT, age TEXT, contact TEXT, photo_url TEXT,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE search_history (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  animal_type TEXT, location TEXT, age TEXT, size TEXT, breed TEXT, gender TEXT,
+  per_page INTEGER, page INTEGER, created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+def probe(db_path: str, eager: bool) -> dict:
+    """รันในโปรเซสลูก: import → create_app → รีเควสแรก/สอง"""
+    out = {}
+    started = time.perf_counter()
+    from app import create_app
+
+    out["import_ms"] = (time.perf_counter() - started) * 1000
+    t = time.perf_counter()
+    app = create_app({"PETS_DB_PATH": db_path})
+    out["create_app_ms"] = (time.perf_counter() - t) * 1000
+    svc = app.extensions["pets"]
+    if eager:
+        t = time.perf_counter()
+        svc.db, svc.pf, svc.history, svc.images  # noqa: B018
+        out["eager_services_ms"] = (time.perf_counter() - t) * 1000
+    client = app.test_client()
+    for name in ("first_request_ms", "second_request_ms"):
+        t = time.perf_counter()
+        assert client.get("/api/favorites?limit=10").status_code == 200
+        out[name] = (time.perf_counter() - t) * 1000
+    out["total_ms"] = (time.perf_counter() - started) * 1000
+    svc.close()
+    return out
+
+
+def _run_probe(db_path: str, eager: bool = False) -> dict:
+    env = dict(
+        os.environ,
+        PETS_DB_PATH=db_path,
+        PETS_IMAGE_CACHE_DIR=db_path + "-images",
+        PETFINDER_API_KEY="",
+        PETFINDER_API_SECRET="",
+    )
+    cmd = [sys.executable, "-m", "benchmarks.bench_startup", "--probe", db_path]
+    if eager:
+        cmd.append("--eager")
+    res = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(res.stdout.strip().splitlines()[-1])
+
+
+def make_legacy(path: str, rows: int):
+    con = sqlite3.connect(path)
+    con.executescript(LEGACY_SCHEMA)
+    con.executemany(
+        "INSERT INTO favorites (pet_id, name, type) VALUES (?, ?, ?)",
+        ((f"legacy-{i}", f"Pet {i}", "Dog") for i in range(rows)),
+    )
+    con.commit()
+    con.close()
+
+
+def _summarize(samples: list[dict]) -> dict:
+    out = {}
+    for key in samples[0]:
+        values = [s[key] / 1000 for s in samples]
+        out[key] = {"mean_ms": round(sum(values) / len(values) * 1000, 2), **percentiles(values)}
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="worker startup benchmark")
+    ap.add_argument("--repeat", type=int, default=5, help="fresh processes per scenario")
+    ap.add_argument("--legacy-rows", type=int, default=50_000)
+    ap.add_argument("--out", help="result JSON path (default benchmarks/results/)")
+    ap.add_argument("--probe", help=argparse.SUPPRESS)
+    ap.add_argument("--eager", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.probe:
+        print(json.dumps(probe(args.probe, args.eager)))
+        return None
+
+    scenarios = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        legacy_seed = os.path.join(workdir, "legacy-seed.db")
+        make_legacy(legacy_seed, args.legacy_rows)
+        current = os.path.join(workdir, "current.db")
+        _run_probe(current)  # migrate ครั้งแรก
+
+        runs = {"fresh": [], "current": [], "current_eager": [], "legacy": []}
+        for i in range(args.repeat):
+            runs["fresh"].append(_run_probe(os.path.join(workdir, f"fresh-{i}.db")))
+            runs["current"].append(_run_probe(current))
+            runs["current_eager"].append(_run_probe(current, eager=True))
+            legacy = os.path.join(workdir, f"legacy-{i}.db")
+            shutil.copy(legacy_seed, legacy)
+            runs["legacy"].append(_run_probe(legacy))
+        for name, samples in runs.items():
+            scenarios[name] = _summarize(samples)
+            s = scenarios[name]
+            print(
+                f"[startup] {name:<14} import p50={s['import_ms']['p50']}ms  "
+                f"first request p50={s['first_request_ms']['p50']}ms  "
+                f"second p50={s['second_request_ms']['p50']}ms"
+                + (
+                    f"  eager services p50={s['eager_services_ms']['p50']}ms"
+                    if "eager_services_ms" in s
+                    else ""
+                )
+            )
+
+    config = {k: v for k, v in vars(args).items() if k not in ("out", "probe", "eager")}
+    save_results("startup", {"config": config, "scenarios": scenarios}, args.out)
+    return scenarios
+
+
+if __name__ == "__main__":
+    main()
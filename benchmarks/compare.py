@@ -0,0 +1,53 @@
+# benchmarks/compare.py
+"""เทียบผล benchmark สองไฟล์ (JSON จาก benchmarks/results/) ทีละตัวเลข
+
+python -m benchmarks.compare benchmarks/results/load-A.json benchmarks/results/load-B.json
+"""
+
+import argparse
+import json
+
+
+def flatten(node, prefix="") -> dict:
+    """แปลงผลซ้อนกันเป็น key แบน เช่น runs[search, c=4].p99 → runs.search.c4.p99"""
+    out = {}
+    if isinstance(node, dict):
+        for k, v in node.items():
+            out.update(flatten(v, f"{prefix}{k}."))
+    elif isinstance(node, list):
+        for i, v in enumerate(node):
+            label = str(i)
+            if isinstance(v, dict):
+                if "scenario" in v:
+                    label = f"{v['scenario']}.c{v.get('concurrency')}"
+                elif "rows" in v:
+                    label = f"{v['rows']}rows"
+            out.update(flatten(v, f"{prefix}{label}."))
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        out[prefix.rstrip(".")] = node
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Compare two benchmark result files")
+    ap.add_argument("before")
+    ap.add_argument("after")
+    ap.add_argument("--min-change", type=float, default=5.0, help="only show changes >= N %%")
+    args = ap.parse_args(argv)
+
+    with open(args.before) as f:
+        before = flatten(json.load(f)["results"])
+    with open(args.after) as f:
+        after = flatten(json.load(f)["results"])
+
+    for key in sorted(before.keys() & after.keys()):
+        if key.startswith("config."):
+            continue
+        a, b = before[key], after[key]
+        change = (b - a) / a * 100 if a else 0.0
+        if abs(change) >= args.min_change:
+            print(f"{key:<60} {a:>12} → {b:<12} {change:+.1f}%")
+
+
+if __name__ == "__main__":
+    main()
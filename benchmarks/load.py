@@ -0,0 +1,180 @@
+# benchmarks/load.py
+"""ยิงโหลดผ่าน HTTP ที่ระดับ concurrency ต่าง ๆ แล้วรายงาน throughput + p50/p95/p99
+
+ค่าเริ่มต้น: เปิด stub Petfinder + แอป Flask (werkzeug แบบ threaded) ในโปรเซสนี้
+โดยใช้ฐานข้อมูลชั่วคราว แล้วยิง /api/search, /api/favorites และ export.csv
+
+    python -m benchmarks.load --levels 1,4,16 --duration 5
+    python -m benchmarks.load --latency 0.08 --error-rate 0.02 --scenarios search
+
+ยิงเซิร์ฟเวอร์ที่รันอยู่แล้ว (เช่น gunicorn ที่ชี้ PETFINDER_BASE_URL ไปที่ stub):
+    python -m benchmarks.stub_petfinder --port 8765 --latency 0.05 &
+    PETFINDER_BASE_URL=http://127.0.0.1:8765/v2 PETFINDER_API_KEY=x PETFINDER_API_SECRET=y \\
+        gunicorn -w 3 -b 127.0.0.1:8000 app:app &
+    python -m benchmarks.load --target http://127.0.0.1:8000
+"""
+
+import argparse
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks._common import percentiles, save_results
+from benchmarks.stub_petfinder import TYPES, StubPetfinder
+
+SCENARIOS = ("search", "favorites", "export")
+
+
+def _search(session, base, rng, pages):
+    animal_type = rng.choice(TYPES).lower()
+    page = rng.randint(1, pages)
+    return session.get(
+        f"{base}/api/search",
+        params={"animal_type": animal_type, "page": page, "per_page": 24},
+        timeout=30,
+    )
+
+
+def _favorites(session, base, rng, pages):
+    return session.get(f"{base}/api/favorites", params={"limit": 50}, timeout=30)
+
+
+def _export(session, base, rng, pages):
+    r = session.get(f"{base}/api/favorites/export.csv", stream=True, timeout=60)
+    for _ in r.iter_content(64 * 1024):  # อ่านจนจบ = วัดทั้งสตรีม
+        pass
+    return r
+
+
+CALLS = {"search": _search, "favorites": _favorites, "export": _export}
+
+
+def run_level(base: str, scenario: str, concurrency: int, duration: float, pages: int) -> dict:
+    call = CALLS[scenario]
+    deadline = time.perf_counter() + duration
+    lock = threading.Lock()
+    latencies: list[float] = []
+    errors = 0
+
+    def worker(seed):
+        nonlocal errors
+        rng = random.Random(seed)
+        local, failed = [], 0
+        with requests.Session() as session:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    ok = call(session, base, rng, pages).status_code < 400
+                except requests.RequestException:
+                    ok = False
+                local.append(time.perf_counter() - started)
+                failed += not ok
+        with lock:
+            latencies.extend(local)
+            errors += failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        **percentiles(latencies),
+    }
+
+
+def seed_favorites(base: str, count: int, batch: int = 1000):
+    with requests.Session() as session:
+        for start in range(0, count, batch):
+            items = [
+                {"id": f"bench-{i}", "name": f"Bench {i}", "type": TYPES[i % 3]}
+                for i in range(start, min(start + batch, count))
+            ]
+            r = session.post(f"{base}/api/favorites/bulk", json={"items": items}, timeout=60)
+            r.raise_for_status()
+
+
+def start_local_app(stub: StubPetfinder, workdir: str, cache_ttl: str | None):
+    """ตั้ง env ก่อน import app (บริการอ่าน env ตอนรีเควสแรก) แล้วเปิด werkzeug"""
+    os.environ.update(
+        PETS_DB_PATH=os.path.join(workdir, "pets.db"),
+        PETS_IMAGE_CACHE_DIR=os.path.join(workdir, "images"),
+        PETFINDER_BASE_URL=stub.base_url,
+        PETFINDER_API_KEY="bench",
+        PETFINDER_API_SECRET="bench",
+    )
+    if cache_ttl is not None:
+        os.environ["PETFINDER_CACHE_TTL"] = cache_ttl
+    from werkzeug.serving import make_server
+
+    from app import app
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)  # ไม่ log ทุกรีเควส
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="HTTP load benchmark for the Flask app")
+    ap.add_argument("--target", help="base URL of a running app (default: start one here)")
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS))
+    ap.add_argument("--levels", default="1,4,16,32", help="comma separated concurrency levels")
+    ap.add_argument("--duration", type=float, default=5.0, help="seconds per level")
+    ap.add_argument("--pages", type=int, default=10, help="search pages to spread over")
+    ap.add_argument("--favorites", type=int, default=5000, help="rows to seed before runs")
+    ap.add_argument("--latency", type=float, default=0.05, help="stub /animals latency")
+    ap.add_argument("--jitter", type=float, default=0.02)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--cache-ttl", help="PETFINDER_CACHE_TTL for the local app (0 = no cache)")
+    ap.add_argument("--out", help="result JSON path (default benchmarks/results/)")
+    args = ap.parse_args(argv)
+
+    stub = server = None
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.target:
+            base = args.target.rstrip("/")
+        else:
+            stub = StubPetfinder(
+                latency=args.latency, jitter=args.jitter, error_rate=args.error_rate
+            ).start()
+            server, base = start_local_app(stub, workdir, args.cache_ttl)
+        try:
+            if args.favorites:
+                seed_favorites(base, args.favorites)
+            runs = []
+            for scenario in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+                for level in [int(x) for x in args.levels.split(",") if x.strip()]:
+                    row = run_level(base, scenario, level, args.duration, args.pages)
+                    print(
+                        f"[load] {scenario:<9} c={level:<3} {row['rps']:>8} req/s  "
+                        f"p50={row['p50']}ms p95={row['p95']}ms p99={row['p99']}ms "
+                        f"errors={row['errors']}"
+                    )
+                    runs.append(row)
+        finally:
+            if server is not None:
+                server.shutdown()
+            if stub is not None:
+                stub.stop()
+
+    config = {k: v for k, v in vars(args).items() if k != "out"}
+    if stub is not None:
+        config["upstream_calls"] = dict(stub.counts)
+    save_results("load", {"config": config, "runs": runs}, args.out)
+    return runs
+
+
+if __name__ == "__main__":
+    main()
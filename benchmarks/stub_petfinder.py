@@ -0,0 +1,213 @@
+# benchmarks/stub_petfinder.py
+"""Petfinder ปลอมสำหรับ benchmark/เทสต์: /v2/oauth2/token และ /v2/animals
+
+ปรับได้: latency (วินาที) + jitter, จำนวนสัตว์ทั้งหมด, limit สูงสุดต่อหน้า, อัตรา error
+
+    python -m benchmarks.stub_petfinder --port 8765 --latency 0.05 --error-rate 0.01
+    PETFINDER_BASE_URL=http://127.0.0.1:8765/v2 PETFINDER_API_KEY=x PETFINDER_API_SECRET=y ...
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+TYPES = ("Dog", "Cat", "Rabbit")
+AGES = ("Baby", "Young", "Adult", "Senior")
+SIZES = ("Small", "Medium", "Large")
+
+
+def fake_animal(i: int) -> dict:
+    return {
+        "id": i,
+        "name": f"Stub {i}",
+        "type": TYPES[i % len(TYPES)],
+        "breeds": {"primary": "Mixed"},
+        "age": AGES[i % len(AGES)],
+        "gender": "Female" if i % 2 else "Male",
+        "size": SIZES[i % len(SIZES)],
+        "status": "adoptable",
+        "contact": {"email": f"shelter{i % 50}@example.org", "phone": "555-0100"},
+        "photos": [{"medium": f"https://photos.petfinder.com/stub/{i}.jpg"}],
+        "description": "Friendly and house trained. " * 4,
+        "published_at": "2024-01-01T00:00:00+0000",
+    }
+
+
+class _Server(ThreadingHTTPServer):
+    # backlog เริ่มต้น (5) ทำให้ connection ที่มาพร้อมกันหลายร้อยตัวโดนทิ้งแล้วรอ SYN retry
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+class StubPetfinder:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        total: int = 1000,
+        max_limit: int = 100,
+        error_rate: float = 0.0,
+        seed: int = 1,
+        throttle_rate: float = 0.0,
+        retry_after: str = "1",
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.total = total
+        self.max_limit = max_limit
+        self.error_rate = error_rate
+        # สัดส่วนรีเควสที่ตอบ 429 + Retry-After (จำลองโดน rate limit)
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.counts = {"token": 0, "animals": 0, "errors": 0, "throttled": 0}
+        self._server = _Server((host, port), self._handler())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v2"
+
+    def start(self) -> "StubPetfinder":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---------- Behaviour ----------
+    def _count(self, name: str):
+        with self._rng_lock:
+            self.counts[name] += 1
+
+    def _outcome(self) -> int:
+        """หน่วงตาม latency แล้วคืน status ที่จะตอบ (200 | 429 | 500)"""
+        with self._rng_lock:
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0)
+            roll = self._rng.random()
+        if delay > 0:
+            time.sleep(delay)
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 500
+        return 200
+
+    def animals_page(self, query: dict) -> dict:
+        limit = min(int(query.get("limit", 20)), self.max_limit)
+        page = max(int(query.get("page", 1)), 1)
+        wanted = (query.get("type") or "").lower()
+        ids = range(1, self.total + 1)
+        if wanted:
+            # type ของตัวที่ i คือ TYPES[i % 3] → ยังเป็น range (slice ได้ O(1))
+            k = [t.lower() for t in TYPES].index(wanted) if wanted in map(str.lower, TYPES) else -1
+            ids = range(k or len(TYPES), self.total + 1, len(TYPES)) if k >= 0 else range(0)
+        total_pages = max(1, -(-len(ids) // limit))
+        chunk = ids[(page - 1) * limit : page * limit]
+        return {
+            "animals": [fake_animal(i) for i in chunk],
+            "pagination": {
+                "count_per_page": limit,
+                "total_count": len(ids),
+                "current_page": page,
+                "total_pages": total_pages,
+            },
+        }
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive ให้ pool ของ requests ใช้ซ้ำได้
+
+            def _send(self, status: int, body: dict, headers=()):
+                raw = json.dumps(body).encode()
+                self.send_response(status)
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self.rfile.read(length)
+                if urlsplit(self.path).path != "/v2/oauth2/token":
+                    return self._send(404, {"error": "not found"})
+                stub._count("token")
+                self._send(
+                    200, {"token_type": "Bearer", "expires_in": 3600, "access_token": "stub-token"}
+                )
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                if parts.path != "/v2/animals":
+                    return self._send(404, {"error": "not found"})
+                if self.headers.get("Authorization") != "Bearer stub-token":
+                    return self._send(401, {"error": "unauthorized"})
+                stub._count("animals")
+                status = stub._outcome()
+                if status == 429:
+                    stub._count("throttled")
+                    return self._send(
+                        429, {"error": "rate limited"}, [("Retry-After", stub.retry_after)]
+                    )
+                if status == 500:
+                    stub._count("errors")
+                    return self._send(500, {"error": "injected failure"})
+                query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+                self._send(200, stub.animals_page(query))
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run a stub Petfinder API")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency", type=float, default=0.0, help="seconds per /animals call")
+    ap.add_argument("--jitter", type=float, default=0.0, help="extra random 0..N seconds")
+    ap.add_argument("--total", type=int, default=1000, help="animals in the fake catalog")
+    ap.add_argument("--max-limit", type=int, default=100)
+    ap.add_argument("--error-rate", type=float, default=0.0, help="0..1 share of HTTP 500")
+    ap.add_argument("--throttle-rate", type=float, default=0.0, help="0..1 share of HTTP 429")
+    args = ap.parse_args(argv)
+    stub = StubPetfinder(
+        args.host,
+        args.port,
+        args.latency,
+        args.jitter,
+        args.total,
+        args.max_limit,
+        args.error_rate,
+        throttle_rate=args.throttle_rate,
+    )
+    print(f"[stub] Petfinder on {stub.base_url}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
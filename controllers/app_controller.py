@@ -1,26 +1,206 @@
-from flask import Blueprint, Response, jsonify, redirect, render_template, request
+import asyncio
+import importlib.util
+import json
+import os
+import time
 
-from api.petfinder import PetFinderAPI
-from data.persistance import PersistenceManager
-from models.pet import Pet
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    g,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    send_file,
+    stream_with_context,
+)
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.local import LocalProxy
+
+from api.image_proxy import ImageFetchError
+from controllers import events
+from controllers.services import Services
+from data.export import csv_chunks, gzip_chunks, ndjson_chunks
+from data.metrics import METRICS
+from data.persistance import FAVORITE_COLUMNS
+from models.pet import Pet, to_api_dict
 
 bp = Blueprint("app_controller", __name__)
-db = PersistenceManager()
-pf = PetFinderAPI()
+
+
+def services() -> Services:
+    """บริการของแอปปัจจุบัน (สร้างใน create_app แต่ละตัวถูกสร้างจริงตอนใช้ครั้งแรก)"""
+    return current_app.extensions["pets"]
+
+
+# db/pf ชี้ไปที่ services() ของแอปที่กำลังตอบรีเควส → import โมดูลนี้ไม่เปิด SQLite/HTTP ใด ๆ
+db = LocalProxy(lambda: services().db)
+pf = LocalProxy(lambda: services().pf)
+IMAGE_MAX_AGE = 365 * 86400
+# view แบบ async ของ Flask ต้องใช้ asgiref, client async ต้องใช้ aiohttp (requirements-async.txt)
+# เช็คแค่ว่าติดตั้งไว้ ไม่ import จริง (aiohttp ใช้เวลา import ~100ms ทุก worker แม้ไม่ได้ใช้)
+ASYNC_AVAILABLE = all(importlib.util.find_spec(m) is not None for m in ("aiohttp", "asgiref"))
+
+
+# ---------- Metrics ----------
+class TimedJSONProvider(DefaultJSONProvider):
+    """jsonify ปกติ แต่จับเวลา encode แยกจากเวลาทั้งรีเควส (json_encode_seconds)"""
+
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            METRICS.observe(
+                "json_encode_seconds", time.perf_counter() - started, route=_route_label()
+            )
+
+
+def _route_label() -> str:
+    # ใช้ rule (/api/favorites/<pet_id>) ไม่ใช่ path จริง → จำนวน series คงที่
+    rule = request.url_rule if request else None
+    return rule.rule if rule is not None else "unmatched"
+
+
+@bp.before_request
+def _start_timer():
+    g.started_at = time.perf_counter()
+
+
+@bp.after_request
+def _record_request(resp):
+    started = g.pop("started_at", None)
+    if started is not None:
+        route = _route_label()
+        # สำหรับ response แบบสตรีม นับถึงตอนส่ง header (ไม่รวมเวลาสตรีม body)
+        METRICS.observe(
+            "http_request_duration_seconds",
+            time.perf_counter() - started,
+            route=route,
+            method=request.method,
+        )
+        METRICS.inc(
+            "http_requests_total", route=route, method=request.method, status=resp.status_code
+        )
+    return resp
+
+
+@bp.get("/metrics")
+def metrics():
+    """Prometheus text format (รวมทุก worker)"""
+    services().db  # noqa: B018 — METRICS ผูกกับ pets.db ตอนสร้าง db
+    return Response(METRICS.render(), mimetype="text/plain; version=0.0.4")
+
 
 # ---------- Pages ----------
 @bp.get("/")
 def index():
     return render_template("index.html")
 
+
 @bp.get("/favorites")
 def favorites_page():
     return render_template("favorites.html")
 
+
 # ---------- API: Favorites ----------
+def _versioned_json(table: str, build):
+    """ETag จากตัวนับเวอร์ชันของตาราง → ตอบ 304 ได้โดยไม่ต้องรัน query หลัก"""
+    tag = f"{table}-{db.table_version(table)}"
+    # เทียบแบบ weak (RFC 9110): compression ทำ ETag เป็น W/"..." เมื่อส่ง gzip/br
+    if request.if_none_match.contains_weak(tag):
+        # mimetype เดียวกับ 200 → compression ปฏิบัติกับ 304 แบบเดียวกัน (ETag/Vary)
+        resp = Response(status=304, mimetype="application/json")
+    else:
+        try:
+            resp = jsonify(build())
+        except ValueError as e:
+            return jsonify({"ok": False, "error": str(e)}), 400
+    resp.set_etag(tag)
+    resp.headers["Cache-Control"] = "no-cache"  # เก็บได้ แต่ต้อง revalidate ทุกครั้ง
+    return resp
+
+
 @bp.get("/api/favorites")
 def api_list_favorites():
-    return jsonify(db.list_favorites())
+    q = request.args
+    # อ่านก่อน query รายการ → client ฟังต่อจาก version นี้ได้โดยไม่พลาดสิ่งที่เปลี่ยนระหว่างโหลด
+    changes_version = db.favorite_changes_version()
+
+    def build():
+        # มี ?limit หรือ ?cursor → keyset {"items", "next_cursor"} ไม่มี → list ทั้งหมด (แบบเดิม)
+        if "limit" not in q and "cursor" not in q:
+            return db.list_favorites()
+        limit = min(max(int(q.get("limit", 50)), 1), 500)
+        rows, next_cursor = db.list_favorites_page(limit, q.get("cursor") or None)
+        return {"items": rows, "next_cursor": next_cursor}
+
+    resp = _versioned_json("favorites", build)
+    if isinstance(resp, Response):
+        resp.headers["X-Favorites-Version"] = str(changes_version)
+        if events.sse_supported(request.environ):
+            # หน้าเว็บเปิด EventSource เฉพาะเมื่อเห็น header นี้ ไม่งั้น poll /changes
+            resp.headers["X-Favorites-Events"] = "sse"
+    return resp
+
+
+@bp.get("/api/favorites/changes")
+def api_favorite_changes():
+    """ส่วนต่างตั้งแต่ ?since=<version> (รวบเหลือรายการล่าสุดต่อ id) — ดู db.favorite_changes"""
+    q = request.args
+    since = events.parse_since(q.get("since", "0"))
+    if since is None:
+        return jsonify({"ok": False, "error": "since must be an integer"}), 400
+    limit = min(max(int(q.get("limit", 500)), 1), 1000)
+    return _versioned_json("favorites", lambda: db.favorite_changes(since, limit))
+
+
+@bp.get("/api/favorites/events")
+def api_favorite_events():
+    """SSE ของ upsert/delete (ดู controllers/events.py) ไม่ส่ง since = เริ่มจากตอนนี้"""
+    if not events.sse_supported(request.environ):
+        # sync worker: สตรีมจะถือทั้ง worker → 204 (EventSource หยุดต่อใหม่) ให้ poll /changes
+        return Response(status=204, headers={"Cache-Control": "no-store"})
+    since = events.parse_since(request.headers.get("Last-Event-ID") or request.args.get("since"))
+    if since is None:
+        since = db.favorite_changes_version()
+    if not events.SLOTS.acquire():
+        resp = jsonify({"ok": False, "error": "too many event streams, poll /changes"})
+        resp.status_code = 503
+        resp.headers["Retry-After"] = "30"
+        return resp
+    manager = db._get_current_object()
+
+    def generate():
+        try:
+            yield from events.stream(manager, since)
+        finally:
+            events.SLOTS.release()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _pet_from_payload(payload: dict) -> Pet:
+    return Pet(
+        pet_id=str(payload.get("id")),
+        name=str(payload.get("name")),
+        pet_type=payload.get("type"),
+        breed=payload.get("breed"),
+        age=payload.get("age"),
+        contact=payload.get("contact"),
+        photo_url=payload.get("photo_url"),
+        phone=payload.get("phone"),
+        gender=payload.get("gender"),
+        size=payload.get("size"),
+        description=payload.get("description"),
+    )
+
 
 @bp.post("/api/favorites")
 def api_add_favorite():
@@ -29,64 +209,251 @@ def api_add_favorite():
         if not payload.get("id") or not payload.get("name"):
             return jsonify({"ok": False, "error": "id and name required"}), 400
 
-        pet = Pet(
-            pet_id=str(payload.get("id")),
-            name=str(payload.get("name")),
-            pet_type=payload.get("type"),
-            breed=payload.get("breed"),
-            age=payload.get("age"),
-            contact=payload.get("contact"),
-            photo_url=payload.get("photo_url"),
-            phone=payload.get("phone"),
-            gender=payload.get("gender"),
-            size=payload.get("size"),
-            description=payload.get("description"),
-        )
+        pet = _pet_from_payload(payload)
         db.add_favorite(pet)
         return jsonify({"ok": True, "id": pet.pet_id})
     except Exception as e:
         import traceback
+
         traceback.print_exc()
         return jsonify({"ok": False, "error": str(e)}), 500
 
+
+# ---------- API: Favorites (bulk) ----------
+BULK_MAX_ITEMS = int(os.getenv("PETS_BULK_MAX", "1000"))
+
+
+def _bulk_list(payload, key):
+    items = payload.get(key) if isinstance(payload, dict) else payload
+    if not isinstance(items, list):
+        return None, (jsonify({"ok": False, "error": f"{key} must be a list"}), 400)
+    if len(items) > BULK_MAX_ITEMS:
+        return None, (
+            jsonify({"ok": False, "error": f"batch too large (max {BULK_MAX_ITEMS})"}),
+            413,
+        )
+    return items, None
+
+
+@bp.post("/api/favorites/bulk")
+def api_bulk_add_favorites():
+    """{"items": [pet, ...], "on_conflict": "replace"|"ignore"} → ผลรายตัว"""
+    payload = request.get_json(silent=True, force=True) or {}
+    items, err = _bulk_list(payload, "items")
+    if err:
+        return err
+    on_conflict = payload.get("on_conflict", "replace") if isinstance(payload, dict) else "replace"
+    if on_conflict not in ("replace", "ignore"):
+        return jsonify({"ok": False, "error": "on_conflict must be replace or ignore"}), 400
+
+    pets = []
+    for it in items:
+        # ของที่ไม่ใช่ object หรือไม่มี id/name → ส่ง None ให้ manager ตีเป็น invalid
+        ok = isinstance(it, dict) and it.get("id") and it.get("name")
+        pets.append(_pet_from_payload(it) if ok else None)
+    results = db.add_favorites_many(pets, on_conflict=on_conflict)
+    counts = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    return jsonify({"ok": True, "counts": counts, "results": results})
+
+
+@bp.post("/api/favorites/bulk-delete")
+def api_bulk_delete_favorites():
+    """{"ids": [...]} → ลบใน transaction เดียว"""
+    payload = request.get_json(silent=True, force=True) or {}
+    ids, err = _bulk_list(payload, "ids")
+    if err:
+        return err
+    results = db.delete_favorites_many(ids)
+    deleted = sum(1 for r in results if r["status"] == "deleted")
+    return jsonify({"ok": True, "deleted": deleted, "results": results})
+
+
 @bp.get("/api/_diag/schema")
 def api_diag_schema():
     with db._conn() as con:
         rows = con.execute("PRAGMA table_info(favorites)").fetchall()
     return jsonify([dict(r) for r in rows])
 
+
+@bp.get("/api/_diag/cache")
+def api_diag_cache():
+    return jsonify(pf.cache_stats() or {})
+
+
+@bp.get("/api/_diag/catalog")
+def api_diag_catalog():
+    return jsonify(pf.catalog.stats() if pf.catalog is not None else {})
+
+
+@bp.get("/api/_diag/history")
+def api_diag_history():
+    history = services().history
+    if history is not None:
+        return jsonify(history.stats())
+    return jsonify({"async": False, "retention": services().retention.stats()})
+
+
+@bp.get("/api/_diag/warmer")
+def api_diag_warmer():
+    """ตัวอุ่น cache: warm hit rate ของ worker นี้ + งบ upstream ที่ใช้ต่อช่วง (รวมทุก worker)"""
+    warmer = _start_warmer()
+    return jsonify(warmer.stats() if warmer is not None else {"enabled": False})
+
+
+@bp.get("/api/_diag/facets")
+def api_diag_facets():
+    facets = services().facets
+    return jsonify(facets.stats() if facets is not None else {"enabled": False})
+
+
+@bp.get("/api/_diag/images")
+def api_diag_images():
+    images = services().images
+    return jsonify(images.stats() if images is not None else {"enabled": False})
+
+
+@bp.get("/api/_diag/upstream")
+def api_diag_upstream():
+    return jsonify({"singleflight": pf.flight_stats(), **pf.upstream_state()})
+
+
+@bp.get("/api/_diag/breaker")
+def api_diag_breaker():
+    """สถานะ circuit breaker + rate limiter ของ Petfinder (รวมทุก worker)"""
+    return jsonify(pf.upstream_state())
+
+
 @bp.delete("/api/favorites/<pet_id>")
 def api_delete_favorite(pet_id):
     db.delete_favorite(pet_id)
     return jsonify({"ok": True})
 
-@bp.get("/api/favorites/export.csv")
-def api_export_csv():
-    csv_bytes = db.export_csv_bytes()
+
+EXPORT_FORMATS = {
+    # fmt: (encoder, mimetype)
+    "csv": (csv_chunks, "text/csv; charset=utf-8"),
+    "ndjson": (ndjson_chunks, "application/x-ndjson; charset=utf-8"),
+}
+
+
+def _export_response(fmt: str):
+    """สตรีม favorites ทีละ chunk; ?gzip=1 บีบอัดระหว่างส่งเป็นไฟล์ .gz"""
+    encoder, mimetype = EXPORT_FORMATS[fmt]
+    chunk_size = min(max(int(request.args.get("chunk", 1000)), 1), 10_000)
+    body = encoder(FAVORITE_COLUMNS, db.iter_favorite_chunks(chunk_size))
+    filename = f"favorites.{fmt}"
+    if request.args.get("gzip", "").lower() in ("1", "true", "yes"):
+        body = gzip_chunks(body)
+        filename += ".gz"
+        mimetype = "application/gzip"
     return Response(
-        csv_bytes,
-        mimetype="text/csv; charset=utf-8",
-        headers={"Content-Disposition": 'attachment; filename="favorites.csv"'},
+        body,
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
+
+@bp.get("/api/favorites/export.csv")
+def api_export_csv():
+    return _export_response("csv")
+
+
+@bp.get("/api/favorites/export.ndjson")
+def api_export_ndjson():
+    return _export_response("ndjson")
+
+
 # ---------- API: Search (ตัวจริง + บันทึกประวัติ) ----------
-@bp.get("/api/search")
-def api_search_paged():
-    q = request.args
+MAX_BATCH_PAGES = 10
+MAX_STREAM_ITEMS = 100_000
 
-    # ขอผล “แบบ dict” โดยตรง (ปกติ)
-    result = pf.search_animals(
-        animal_type=q.get("animal_type") or q.get("type") or None,
-        location=q.get("location", "10001"),
-        age=q.get("age"),
-        breed=q.get("breed"),
-        size=q.get("size"),
-        gender=q.get("gender"),
-        page=int(q.get("page", 1)),
-        per_page=int(q.get("per_page", 24)),
-        as_dict=True,  # << สำคัญ
-    )
 
+def record_history(params: dict):
+    history = services().history
+    if history is not None:
+        history.submit(params)
+    else:
+        db.add_search_history(params)
+        services().retention.maybe_compact(background=True)
+
+
+def _start_warmer():
+    # ค้นหาแรกของ worker เริ่มตัวอุ่น cache ค้นหายอดนิยม (สร้างครั้งเดียว; mock mode = ไม่เริ่ม)
+    return services().warmer
+
+
+def _search_kwargs(q) -> dict:
+    return {
+        "animal_type": q.get("animal_type") or q.get("type") or None,
+        "location": q.get("location", "10001"),
+        "age": q.get("age"),
+        "breed": q.get("breed"),
+        "size": q.get("size"),
+        "gender": q.get("gender"),
+        "per_page": int(q.get("per_page", 24)),
+        "source": q.get("source") or None,
+        "text": q.get("q") or None,
+    }
+
+
+def _history_params(q) -> dict:
+    return {
+        "animal_type": q.get("animal_type") or q.get("type"),
+        "location": q.get("location"),
+        "age": q.get("age"),
+        "size": q.get("size"),
+        "breed": q.get("breed"),
+        "gender": q.get("gender"),
+        "per_page": q.get("per_page", 24),
+        "page": q.get("page", 1),
+    }
+
+
+def _flag(value) -> bool:
+    return str(value or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _facet_search(q, kwargs, page: int):
+    """(ผลแบบ as_json หรือ None, ดัชนี facet หรือ None) — ผลไม่ใช่ None = ตอบในเครื่อง ไม่ยิง upstream
+
+    ?facets=1 หรือ has_photo → สร้างดัชนีของชุดฐานถ้ายังไม่มี (ดึงทุกหน้าครั้งเดียว)
+    นอกนั้นใช้ดัชนีที่มีอยู่แล้วเท่านั้น: คำค้นที่แคบลงจากชุดเดิม (age/size/gender/breed) ตอบจากดัชนี
+    """
+    engine = services().facets
+    if engine is None or kwargs["text"] or (kwargs["source"] or "").lower() == "mirror":
+        return None, None
+    filters = dict(kwargs, has_photo=q.get("has_photo"))
+    try:
+        if _flag(q.get("facets")) or filters["has_photo"]:
+            index = engine.ensure(pf._get_current_object(), filters)
+        else:
+            index = engine.find(filters)
+    except Exception as e:
+        print("[warn] facet index unavailable:", e)
+        METRICS.inc("facet_searches_total", outcome="error")
+        return None, None
+    if index is None or not index.complete:
+        return None, index
+    METRICS.inc("facet_searches_total", outcome="local")
+    return index.page(filters, page, kwargs["per_page"]), index
+
+
+def _add_facets(payload: dict, q, kwargs, index) -> dict:
+    if index is not None and _flag(q.get("facets")):
+        payload["facets"] = index.counts(dict(kwargs, has_photo=q.get("has_photo")))
+        # False = ชุดฐานใหญ่เกิน PETS_FACET_MAX_ITEMS → นับจากส่วนที่ดึงมาเท่านั้น
+        payload["facets_complete"] = index.complete
+    return payload
+
+
+def _pet_to_dict(p) -> dict:
+    # Pet → dict ผ่าน attrgetter; ถ้าเป็น dict รูปแบบ API อยู่แล้ว (จาก cache) ส่งต่อเลย
+    return to_api_dict(p)
+
+
+def _page_payload(result) -> dict:
     # เผื่อบางเครื่องมี lib เก่าคืน list (กันล้ม)
     if isinstance(result, list):
         items = result
@@ -101,60 +468,210 @@ def api_search_paged():
         per_page = result.get("per_page", 24)
         count = result.get("count", len(items))
 
+    items = [_pet_to_dict(p) for p in items]
+    images = services().images
+    if images is not None:
+        # dict จาก cache ถูกแชร์ระหว่างรีเควส → copy ก่อนแก้ photo_url
+        # การ์ดผลค้นหาใช้ thumbnail ขนาดเล็กสุดที่ตั้งไว้ (ไม่มี Pillow ก็ได้ต้นฉบับเหมือนเดิม)
+        width = images.thumb_widths[0] if images.thumb_widths else None
+        items = [dict(it, photo_url=images.proxied_url(it.get("photo_url"), width)) for it in items]
+    return {
+        "items": items,
+        "page": page,
+        "total_pages": total_pages,
+        "per_page": per_page,
+        "count": count,
+    }
+
+
+@bp.get("/api/search")
+def api_search_paged():
+    q = request.args
+    kwargs = _search_kwargs(q)
+    page = int(q.get("page", 1))
+
+    # กรองต่อจากชุดผลที่ดึงครบแล้วได้ → ตอบจาก facet index ในเครื่อง
+    local, index = _facet_search(q, kwargs, page)
+    # ขอผล “แบบ dict” โดยตรง (ปกติ)
+    # as_json: items เป็น dict รูปแบบ API จาก cache โดยตรง ไม่สร้าง Pet แล้วแปลงกลับ
+    result = local if local is not None else pf.search_animals(page=page, as_json=True, **kwargs)
+
     # เก็บประวัติการค้นหา แต่ถ้าพลาดไม่ให้รีเควสล้ม
     try:
-        db.add_search_history({
-            "animal_type": q.get("animal_type") or q.get("type"),
-            "location": q.get("location"),
-            "age": q.get("age"),
-            "size": q.get("size"),
-            "breed": q.get("breed"),
-            "gender": q.get("gender"),
-            "per_page": q.get("per_page", 24),
-            "page": q.get("page", 1),
-        })
+        record_history(_history_params(q))
     except Exception as e:
         print("[warn] history write failed:", e)
+    _start_warmer()
+
+    # อุ่นหน้าถัดไปไว้ใน cache ระหว่างผู้ใช้ดูหน้านี้ (infinite scroll)
+    if isinstance(result, dict) and local is None:
+        pf.prefetch_next(result, **kwargs)
+
+    return jsonify(_add_facets(_page_payload(result), q, kwargs, index))
+
+
+@bp.get("/api/search/pages")
+def api_search_pages():
+    """ดึงหลายหน้าพร้อมกัน: ?page=1&pages=4 → หน้า 1..4 ในรีเควสเดียว"""
+    q = request.args
+    first = max(int(q.get("page", 1)), 1)
+    count = min(max(int(q.get("pages", 4)), 1), MAX_BATCH_PAGES)
+    results = pf.search_pages(
+        dict(_search_kwargs(q), as_json=True), pages=range(first, first + count)
+    )
+    return jsonify({"pages": [_page_payload(r) for r in results]})
+
+
+# ---------- API: Search (async) ----------
+# เวอร์ชัน asyncio ของสอง endpoint ข้างบน (ต้องมี requirements-async.txt)
+# asgi.py เรียก coroutine ชุดนี้ด้วย client ตัวเดียวตลอดโปรเซส → รีเควสค้างพร้อมกันได้หลายร้อย
+# ส่วน view ของ Flask ด้านล่างรันใน loop ใหม่ทุกรีเควส (asgiref) จึงสร้าง client ต่อรีเควส
+# client = api.petfinder_async.AsyncPetFinderAPI
+async def search_async(client, q) -> dict:
+    kwargs = _search_kwargs(q)
+    page = int(q.get("page", 1))
+    # สร้างดัชนี facet (ถ้าต้องสร้าง) บล็อกด้วย thread pool → ทำนอก loop
+    local, index = await asyncio.to_thread(_facet_search, q, kwargs, page)
+    if local is not None:
+        result = local
+    else:
+        result = await client.search_animals(page=page, as_json=True, **kwargs)
+    history = services().history
+    try:
+        if history is not None:
+            history.submit(_history_params(q))  # แค่เข้าคิว ไม่บล็อก loop
+        else:
+            await asyncio.to_thread(db.add_search_history, _history_params(q))
+    except Exception as e:
+        print("[warn] history write failed:", e)
+    _start_warmer()
+    if isinstance(result, dict) and local is None:
+        # prefetch ใช้ thread pool ของ pf อยู่แล้ว → submit แล้วกลับทันที
+        pf.prefetch_next(result, **kwargs)
+    return _add_facets(_page_payload(result), q, kwargs, index)
+
+
+async def search_pages_async(client, q) -> dict:
+    first = max(int(q.get("page", 1)), 1)
+    count = min(max(int(q.get("pages", 4)), 1), MAX_BATCH_PAGES)
+    results = await client.search_pages(
+        dict(_search_kwargs(q), as_json=True), pages=range(first, first + count)
+    )
+    return {"pages": [_page_payload(r) for r in results]}
+
+
+if ASYNC_AVAILABLE:
+
+    @bp.get("/api/async/search")
+    async def api_search_async():
+        from api.petfinder_async import AsyncPetFinderAPI
+
+        async with AsyncPetFinderAPI(pf._get_current_object()) as client:
+            return jsonify(await search_async(client, request.args))
+
+    @bp.get("/api/async/search/pages")
+    async def api_search_pages_async():
+        from api.petfinder_async import AsyncPetFinderAPI
+
+        async with AsyncPetFinderAPI(pf._get_current_object()) as client:
+            return jsonify(await search_pages_async(client, request.args))
+
+
+@bp.get("/api/search/stream")
+def api_search_stream():
+    """NDJSON: หนึ่งบรรทัดต่อหนึ่งตัว บรรทัดสุดท้ายคือ {"_meta": {"cursor", "count"}}
+
+    ส่ง ?cursor=<ค่าจาก _meta> เพื่อดึงต่อจากจุดเดิม (cursor = null คือครบแล้ว)
+    """
+    q = request.args
+    kwargs = _search_kwargs(q)
+    kwargs["per_page"] = int(q.get("per_page", 100))
+    kwargs.pop("source", None)  # สตรีมเดิน upstream เสมอ
+    kwargs.pop("text", None)
+    max_items = min(int(q.get("max_items", 1000)), MAX_STREAM_ITEMS)
+    stream = pf.iter_animals(cursor=q.get("cursor") or None, max_items=max_items, **kwargs)
+
+    def generate():
+        for pet in stream:
+            yield json.dumps(_pet_to_dict(pet), ensure_ascii=False) + "\n"
+        meta = {"cursor": stream.cursor, "count": stream.yielded}
+        yield json.dumps({"_meta": meta}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+# ---------- API: Images ----------
+@bp.get("/api/img")
+def api_image():
+    """เสิร์ฟรูปจาก disk cache (sendfile) ?u=<url ต้นทาง>&w=<ความกว้าง thumbnail>"""
+    url = request.args.get("u", "")
+    images = services().images
+    if images is None or not images.allowed(url):
+        return jsonify({"ok": False, "error": "image host not allowed"}), 400
+    try:
+        path, content_type, etag = images.get(url, request.args.get("w", type=int))
+    except ImageFetchError as e:
+        # ดึงไม่ได้ → ให้เบราว์เซอร์ไปโหลดจากต้นทางเองแทนการแสดงรูปเสีย
+        print("[warn] image proxy:", e)
+        return redirect(url, code=302)
+    # URL รูปของ Petfinder มี ?bust= เปลี่ยนเมื่อรูปเปลี่ยน → เนื้อหาของ URL หนึ่งไม่เปลี่ยน cache ได้นาน
+    resp = send_file(
+        path, mimetype=content_type, etag=etag, max_age=IMAGE_MAX_AGE, conditional=True
+    )
+    resp.cache_control.public = True
+    resp.cache_control.immutable = True
+    return resp
 
-    def to_dict(p: Pet):
-        return {
-            "id": p.pet_id,
-            "name": p.name,
-            "type": p.pet_type,
-            "breed": p.breed,
-            "age": p.age,
-            "contact": p.contact,
-            "photo_url": p.photo_url,
-            "phone": getattr(p, "phone", None),
-            "gender": getattr(p, "gender", None),
-            "size": getattr(p, "size", None),
-            "description": getattr(p, "description", None),
-        }
-
-    return jsonify({
-        "items": [to_dict(p) for p in items],
-        "page": page,
-        "total_pages": total_pages,
-        "per_page": per_page,
-        "count": count,
-    })
 
 # ---------- Legacy redirect ----------
 @bp.get("/search")
 def api_search_legacy():
     return redirect(f"/api/search?{request.query_string.decode('utf-8')}", code=302)
 
+
 # ---------- Search History APIs ----------
 @bp.get("/api/history")
 def api_history():
-    limit = int(request.args.get("limit", 50))
-    return jsonify(db.list_search_history(limit))
+    history = services().history
+    if history is not None:
+        history.flush()  # ให้เห็นการค้นหาล่าสุดที่ยังค้างในคิว
+    q = request.args
+    limit = min(max(int(q.get("limit", 50)), 1), 500)
+
+    def build():
+        # ?paged=1 หรือมี ?cursor → แบบ keyset {"items", "next_cursor"}
+        if "cursor" in q or q.get("paged"):
+            rows, next_cursor = db.list_search_history_page(limit, q.get("cursor") or None)
+            return {"items": rows, "next_cursor": next_cursor}
+        return db.list_search_history(limit)
+
+    return _versioned_json("search_history", build)
+
+
+@bp.get("/api/history/top")
+def api_history_top():
+    """ค้นหายอดนิยมจากตาราง rollup: ?n=10&bucket=day|hour&span=7"""
+    q = request.args
+    try:
+        rows = db.top_searches(
+            n=min(int(q.get("n", 10)), 100),
+            bucket=q.get("bucket", "day"),
+            span=int(q.get("span", 7)),
+        )
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+    return jsonify(rows)
+
 
 @bp.delete("/api/history")
 def api_history_clear():
+    history = services().history
+    if history is not None:
+        history.flush()
     db.clear_search_history()
     return jsonify({"ok": True})
 
+
 # ---------- Health ----------
 @bp.get("/health")
 def health():
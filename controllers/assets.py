@@ -0,0 +1,127 @@
+# controllers/assets.py
+"""fingerprint ไฟล์ใน static/ ด้วย hash ของเนื้อหา → cache ได้ 1 ปีแบบ immutable
+
+    {{ asset_url('css/style.css') }}  →  /assets/css/style.3f9a0c1b2d4e.css
+
+ไฟล์เปลี่ยน = ชื่อเปลี่ยน เบราว์เซอร์จึงไม่ต้อง revalidate ทุกครั้งแบบ /static (max-age=0)
+ทุกไฟล์ถูกอ่าน + บีบอัด gzip/br ไว้ในหน่วยความจำตอนสตาร์ต (static มีไม่กี่ไฟล์)
+app.debug = True → สแกนใหม่เมื่อไฟล์ถูกแก้ ไม่ต้องรีสตาร์ต
+"""
+
+import hashlib
+import mimetypes
+import os
+import threading
+from dataclasses import dataclass, field
+
+from flask import Response, abort, current_app, request
+
+from controllers.compression import MIN_BYTES, brotli, compress, negotiate
+
+ASSET_MAX_AGE = 365 * 86400
+
+
+@dataclass(slots=True)
+class Asset:
+    path: str  # ชื่อจริงใน static/ เช่น css/style.css
+    name: str  # ชื่อที่มี hash เช่น css/style.3f9a0c1b2d4e.css
+    digest: str
+    mimetype: str
+    body: bytes
+    mtime: float
+    encoded: dict[str, bytes] = field(default_factory=dict)
+
+
+class AssetManifest:
+    def __init__(self, root: str, prefix: str = "/assets", hash_len: int = 12):
+        self.root = os.path.abspath(root)
+        self.prefix = prefix.rstrip("/")
+        self.hash_len = hash_len
+        self._lock = threading.Lock()
+        self._by_path: dict[str, Asset] = {}
+        self._by_name: dict[str, Asset] = {}
+        self.scan()
+
+    # ---------- Public API ----------
+    def scan(self):
+        by_path, by_name = {}, {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for fn in filenames:
+                if fn.startswith("."):
+                    continue
+                full = os.path.join(dirpath, fn)
+                rel = os.path.relpath(full, self.root).replace(os.sep, "/")
+                asset = self._load(rel, full)
+                by_path[rel] = asset
+                by_name[asset.name] = asset
+        with self._lock:
+            self._by_path, self._by_name = by_path, by_name
+
+    def url(self, path: str, reload: bool = False) -> str:
+        """URL แบบ fingerprint ของไฟล์ (ไม่มีในรายการ → /static/<path> ธรรมดา)"""
+        path = path.lstrip("/")
+        asset = self._by_path.get(path)
+        if reload and (asset is None or self._changed(asset)):
+            self.scan()
+            asset = self._by_path.get(path)
+        if asset is None:
+            return f"/static/{path}"
+        return f"{self.prefix}/{asset.name}"
+
+    def lookup(self, name: str) -> Asset | None:
+        return self._by_name.get(name)
+
+    def manifest(self) -> dict:
+        return {a.path: f"{self.prefix}/{a.name}" for a in self._by_path.values()}
+
+    # ---------- Internals ----------
+    def _load(self, rel: str, full: str) -> Asset:
+        with open(full, "rb") as f:
+            body = f.read()
+        digest = hashlib.sha256(body).hexdigest()[: self.hash_len]
+        stem, ext = os.path.splitext(rel)
+        mimetype = mimetypes.guess_type(rel)[0] or "application/octet-stream"
+        asset = Asset(rel, f"{stem}.{digest}{ext}", digest, mimetype, body, os.path.getmtime(full))
+        if len(body) >= MIN_BYTES and (
+            mimetype.startswith("text/")
+            or mimetype in ("application/javascript", "application/json", "image/svg+xml")
+        ):
+            for encoding in ("gzip", "br") if brotli is not None else ("gzip",):
+                asset.encoded[encoding] = compress(body, encoding)
+        return asset
+
+    def _changed(self, asset: Asset) -> bool:
+        try:
+            return os.path.getmtime(os.path.join(self.root, asset.path)) != asset.mtime
+        except OSError:
+            return True
+
+
+def serve(manifest: AssetManifest, name: str):
+    asset = manifest.lookup(name)
+    if asset is None:
+        abort(404)
+    encoding = negotiate(request.headers.get("Accept-Encoding"))
+    body = asset.encoded.get(encoding) if encoding else None
+    resp = Response(body if body is not None else asset.body, mimetype=asset.mimetype)
+    if body is not None:
+        resp.headers["Content-Encoding"] = encoding
+    # ETag แยกตาม representation (เนื้อหาเดียวกันแต่ bytes ต่างกันเมื่อบีบอัด)
+    resp.set_etag(asset.digest + (f"-{encoding}" if body is not None else ""))
+    resp.vary.add("Accept-Encoding")
+    resp.headers["Cache-Control"] = f"public, max-age={ASSET_MAX_AGE}, immutable"
+    return resp.make_conditional(request)
+
+
+def init_app(app) -> AssetManifest:
+    """สแกน app.static_folder, เพิ่ม route /assets/<name> และ asset_url() ให้ template"""
+    manifest = AssetManifest(app.static_folder)
+    app.extensions["assets"] = manifest
+    app.add_url_rule(f"{manifest.prefix}/<path:name>", "assets", lambda name: serve(manifest, name))
+
+    @app.template_global()
+    def asset_url(path: str) -> str:
+        return manifest.url(path, reload=current_app.debug)
+
+    return manifest
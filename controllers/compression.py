@@ -0,0 +1,145 @@
+# controllers/compression.py
+"""บีบอัด response (br/gzip ตาม Accept-Encoding) + ETag จากเนื้อหาของ JSON API
+
+ติดตั้งที่ระดับแอปด้วย init_app(app) → ครอบทุก route รวม template HTML
+brotli เป็น optional (pip install brotli) ไม่มีก็ใช้ gzip อย่างเดียว
+
+    PETS_COMPRESS=0               ปิดการบีบอัด
+    PETS_COMPRESS_MIN_BYTES=512   body เล็กกว่านี้ส่งดิบ (header ของ gzip ไม่คุ้ม)
+    PETS_GZIP_LEVEL=6 / PETS_BROTLI_QUALITY=5
+"""
+
+import gzip
+import hashlib
+import os
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # ไม่ได้ติดตั้ง brotli → gzip อย่างเดียว
+    brotli = None
+
+COMPRESSIBLE = frozenset(
+    {
+        "application/json",
+        "application/javascript",
+        "application/x-ndjson",
+        "image/svg+xml",
+        "text/css",
+        "text/html",
+        "text/javascript",
+        "text/plain",
+    }
+)
+
+ENABLED = os.getenv("PETS_COMPRESS", "1").lower() not in ("0", "false", "no")
+MIN_BYTES = int(os.getenv("PETS_COMPRESS_MIN_BYTES", "512"))
+GZIP_LEVEL = int(os.getenv("PETS_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("PETS_BROTLI_QUALITY", "5"))
+
+
+def negotiate(accept_encoding: str | None) -> str | None:
+    """เลือก encoding จาก Accept-Encoding: br (ถ้ามี lib) > gzip > ไม่บีบอัด"""
+    if not accept_encoding:
+        return None
+    offered = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        offered[name.strip().lower()] = q
+    for name in ("br", "gzip"):
+        if name == "br" and brotli is None:
+            continue
+        if offered.get(name, offered.get("*", 0.0)) > 0:
+            return name
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    # mtime=0 → bytes เดิมทุกครั้งสำหรับ body เดิม (cache/ETag ของ proxy คงที่)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def body_etag(body: bytes) -> str:
+    """ETag จากเนื้อหา (ก่อนบีบอัด) — ใช้แบบ weak ได้ทุก encoding"""
+    return hashlib.blake2b(body, digest_size=12).hexdigest()
+
+
+def _api_etag(resp):
+    # เฉพาะ JSON ของ /api/* ที่ยังไม่มี ETag (_versioned_json ตั้งจากเวอร์ชันตารางเองแล้ว)
+    if (
+        request.method not in ("GET", "HEAD")
+        or resp.status_code != 200
+        or resp.mimetype != "application/json"
+        or resp.is_streamed
+        or "ETag" in resp.headers
+        or not request.path.startswith("/api/")
+    ):
+        return resp
+    resp.set_etag(body_etag(resp.get_data()), weak=True)
+    if "Cache-Control" not in resp.headers:
+        resp.headers["Cache-Control"] = "no-cache"
+    # If-None-Match ตรง → 304 ไม่มี body
+    return resp.make_conditional(request)
+
+
+def _weaken_etag(resp):
+    """ETag แบบ strong (เช่น favorites-N ของ _versioned_json) → weak
+
+    bytes ของ gzip/br/ดิบต่างกัน → ใช้ strong validator ตัวเดียวกันไม่ได้
+    (cache และ Range request ถือว่า strong ETag เท่ากัน = bytes เท่ากัน)
+    handler ที่ตั้ง Vary: Accept-Encoding เอง (assets) ทำ ETag แยกต่อ encoding ไว้แล้ว → ไม่แตะ
+    """
+    tag, weak = resp.get_etag()
+    if tag and not weak and "Accept-Encoding" not in resp.vary:
+        resp.set_etag(tag, weak=True)
+
+
+def _compress(resp):
+    if "Content-Encoding" in resp.headers:
+        return resp
+    if resp.mimetype not in COMPRESSIBLE:
+        return resp
+    encoding = negotiate(request.headers.get("Accept-Encoding"))
+    if resp.status_code == 304:
+        # ต้องตอบ ETag เดียวกับ 200 ที่ client เก็บไว้ (ซึ่งถูกทำเป็น weak ตอนบีบอัด)
+        if encoding is not None:
+            _weaken_etag(resp)
+        resp.vary.add("Accept-Encoding")
+        return resp
+    if (
+        resp.status_code < 200
+        or resp.status_code == 204
+        or resp.is_streamed
+        or resp.direct_passthrough
+    ):
+        resp.vary.add("Accept-Encoding")
+        return resp
+    if encoding is not None:
+        # ก่อนเช็คขนาด: 200 ที่เล็กเกินบีบกับ 304 ของ client เดียวกันได้ ETag รูปเดียวกัน
+        _weaken_etag(resp)
+    # representation ขึ้นกับ Accept-Encoding แม้รอบนี้จะส่งดิบ (cache กลางต้องแยกเก็บ)
+    resp.vary.add("Accept-Encoding")
+    if encoding is None:
+        return resp
+    body = resp.get_data()
+    if len(body) < MIN_BYTES:
+        return resp
+    resp.set_data(compress(body, encoding))
+    resp.headers["Content-Encoding"] = encoding
+    return resp
+
+
+def init_app(app):
+    @app.after_request
+    def optimize_response(resp):
+        resp = _api_etag(resp)
+        return _compress(resp) if ENABLED else resp
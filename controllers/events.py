@@ -0,0 +1,173 @@
+# controllers/events.py
+"""Server-Sent Events ของ favorites: ส่ง upsert/delete ตามที่เกิดใน change log
+
+    GET /api/favorites/events?since=<version>   (หรือ header Last-Event-ID ตอน reconnect)
+
+หนึ่ง event ต่อการเปลี่ยนแปลง: id = version, event = upsert | delete | reset
+ข้อมูลมาจาก db.favorite_changes() (ตาราง favorite_changes) จึงเห็นการเปลี่ยนจากทุก worker
+ตรวจ version ล่าสุดทุก POLL_SECS (lookup แถวเดียว) แล้วค่อยอ่านส่วนต่างเมื่อมีของใหม่
+
+สตรีมหนึ่งตัวถือ thread หนึ่งตัวจนจบ → เปิดให้เฉพาะ server ที่มีหลาย thread ต่อโปรเซส
+(gunicorn -k gthread, dev server; ดู sse_supported) จำกัดจำนวนต่อโปรเซส (MAX_STREAMS)
+และตัดทุก MAX_SECS (EventSource ต่อใหม่เองพร้อม Last-Event-ID)
+worker แบบ sync (ค่าเริ่มต้นของ Dockerfile) มี thread เดียว: สตรีมตัวเดียวก็ถือทั้ง worker
+→ ตอบ 204 แล้วหน้าเว็บ poll /api/favorites/changes แทน โหมด ASGI ใช้ stream_async
+ซึ่งไม่ถือ thread ระหว่างรอ
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+
+POLL_SECS = float(os.getenv("PETS_SSE_POLL_SECS", "0.5"))
+HEARTBEAT_SECS = float(os.getenv("PETS_SSE_HEARTBEAT_SECS", "15"))
+MAX_SECS = float(os.getenv("PETS_SSE_MAX_SECS", "300"))
+MAX_STREAMS = int(os.getenv("PETS_SSE_MAX_STREAMS", "8"))
+RETRY_MS = 3000
+
+
+class StreamSlots:
+    """นับสตรีมที่เปิดอยู่ในโปรเซสนี้ (เต็ม = ตอบ 503 ให้ client ไปใช้ ?since= แทน)"""
+
+    def __init__(self, limit: int):
+        self.limit = max(int(limit), 0)
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        with self._lock:
+            if self.active >= self.limit:
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.active = max(self.active - 1, 0)
+
+
+SLOTS = StreamSlots(MAX_STREAMS)
+
+
+def sse_supported(environ) -> bool:
+    """WSGI server นี้รับสตรีมยาว ๆ ได้ไหม (ไม่ทำให้ทั้ง worker ค้าง)
+
+    wsgi.multithread = True: gthread / dev server / asgiref.WsgiToAsgi (โหมด ASGI ที่ asgi.py
+    รับ /api/favorites/events เองบน event loop) ส่วน gunicorn sync worker = False
+    """
+    return bool(environ.get("wsgi.multithread"))
+
+
+def parse_since(value) -> int | None:
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def frame(event: str, data, event_id: int | None = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, separators=(",", ":"), default=str))
+    return "\n".join(lines) + "\n\n"
+
+
+def _frames(delta: dict) -> list[str]:
+    if delta["reset"]:
+        return [frame("reset", {"version": delta["version"]}, delta["version"])]
+    return [frame(c["op"], c, c["version"]) for c in delta["changes"]]
+
+
+def stream(db, since: int, max_secs: float = MAX_SECS, poll: float = POLL_SECS):
+    """generator ของ SSE (ใช้กับ Flask Response) จบเองเมื่อครบ max_secs"""
+    yield f"retry: {RETRY_MS}\n\n"
+    deadline = time.monotonic() + max_secs
+    last_sent = time.monotonic()
+    while time.monotonic() < deadline:
+        if db.favorite_changes_version() != since:
+            delta = db.favorite_changes(since)
+            since = delta["version"]
+            out = _frames(delta)
+            if out:
+                last_sent = time.monotonic()
+                yield "".join(out)
+            if delta["more"]:
+                continue
+        if time.monotonic() - last_sent >= HEARTBEAT_SECS:
+            # comment กัน proxy ตัดการเชื่อมต่อที่เงียบนาน
+            last_sent = time.monotonic()
+            yield ": keep-alive\n\n"
+        time.sleep(poll)
+
+
+class VersionWatch:
+    """ตัวเดียวต่อ event loop: poll version ครั้งเดียวแล้วปลุกทุกสตรีมที่รออยู่
+
+    สตรีม N ตัวในโหมด ASGI จึงอ่าน SQLite 1 ครั้งต่อ POLL_SECS ไม่ใช่ N ครั้ง
+    task หยุดเองเมื่อไม่มีสตรีมเหลือ
+    """
+
+    def __init__(self, db, poll: float = POLL_SECS):
+        self.db = db
+        self.poll = poll
+        self.version: int | None = None
+        self.listeners = 0
+        self._changed = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    async def wait(self, known: int, timeout: float) -> int:
+        """รอจน version ต่างจาก known (หรือหมด timeout) แล้วคืน version ล่าสุดที่เห็น"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        if self.version is None or self.version == known:
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return known if self.version is None else self.version
+
+    async def _run(self):
+        while self.listeners > 0:
+            try:
+                version = await asyncio.to_thread(self.db.favorite_changes_version)
+            except Exception as e:
+                print("[warn] favorites version poll failed:", e)
+                version = self.version
+            if version != self.version:
+                self.version = version
+                # ปลุกทุกคนที่รอ event ตัวเดิม แล้วให้รอบหน้ารอตัวใหม่
+                self._changed.set()
+                self._changed = asyncio.Event()
+            await asyncio.sleep(self.poll)
+
+
+async def stream_async(db, since: int, watch: VersionWatch, max_secs: float = MAX_SECS):
+    """เหมือน stream() แต่รอผ่าน VersionWatch และอ่านส่วนต่างใน thread pool"""
+    yield f"retry: {RETRY_MS}\n\n"
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_secs
+    last_sent = loop.time()
+    watch.listeners += 1
+    try:
+        while loop.time() < deadline:
+            timeout = min(last_sent + HEARTBEAT_SECS, deadline) - loop.time()
+            if await watch.wait(since, max(timeout, 0)) == since:
+                if loop.time() - last_sent >= HEARTBEAT_SECS:
+                    last_sent = loop.time()
+                    yield ": keep-alive\n\n"
+                continue
+            while True:
+                delta = await asyncio.to_thread(db.favorite_changes, since)
+                since = delta["version"]
+                out = _frames(delta)
+                if out:
+                    last_sent = loop.time()
+                    yield "".join(out)
+                if not delta["more"]:
+                    break
+    finally:
+        watch.listeners -= 1
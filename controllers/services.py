@@ -0,0 +1,138 @@
+# controllers/services.py
+import os
+import threading
+
+from api.breaker import CircuitBreaker
+from api.cache import SearchCache
+from api.cache_warmer import CacheWarmer
+from api.facets import FacetEngine
+from api.image_proxy import ImageProxy
+from api.petfinder import PetFinderAPI
+from api.rate_limit import TokenBucket
+from api.token_store import TokenStore
+from data.catalog import CatalogStore
+from data.history_writer import HistoryRetention, HistoryWriter
+from data.metrics import METRICS
+from data.persistence import DB_PATH, PersistenceManager
+
+_MISSING = object()
+
+
+def _enabled(name: str) -> bool:
+    return os.getenv(name, "1").lower() not in ("0", "false", "no")
+
+
+class Services:
+    """บริการของแอปหนึ่งตัว (db / history / pf / images) สร้างตอนใช้ครั้งแรก ไม่ใช่ตอน import
+
+    import app / create_app / gunicorn --preload จึงไม่เปิด SQLite ไม่รัน migration ไม่สร้าง thread
+    worker ที่ fork ออกมาสร้างของตัวเองตอนรับรีเควสแรก (ไม่มี connection/lock ติดมาจากโปรเซสแม่)
+    """
+
+    def __init__(self, db_path: str | None = None):
+        self.db_path = os.path.abspath(db_path or os.getenv("PETS_DB_PATH") or DB_PATH)
+        self._lock = threading.RLock()
+        self._built: dict[str, object] = {}
+
+    def _get(self, name: str, factory):
+        obj = self._built.get(name, _MISSING)
+        if obj is _MISSING:
+            with self._lock:
+                obj = self._built.get(name, _MISSING)
+                if obj is _MISSING:
+                    obj = self._built[name] = factory()
+        return obj
+
+    @property
+    def built(self) -> list[str]:
+        return sorted(self._built)
+
+    # ---------- Services ----------
+    @property
+    def db(self) -> PersistenceManager:
+        return self._get("db", self._make_db)
+
+    @property
+    def history(self) -> HistoryWriter | None:
+        # ประวัติการค้นหาเขียนแบบ background เป็นชุด (PETS_HISTORY_ASYNC=0 = เขียนตรงเหมือนเดิม)
+        return self._get(
+            "history",
+            lambda: HistoryWriter.from_env(self.db) if _enabled("PETS_HISTORY_ASYNC") else None,
+        )
+
+    @property
+    def retention(self) -> HistoryRetention:
+        # โหมด async ใช้รอบของ writer; เขียนตรงไม่มี thread → รีเควสเป็นตัวกระตุ้นแทน
+        return self._get(
+            "retention",
+            lambda: (
+                self.history.retention
+                if self.history is not None
+                else HistoryRetention.from_env(self.db)
+            ),
+        )
+
+    @property
+    def pf(self) -> PetFinderAPI:
+        return self._get("pf", self._make_pf)
+
+    @property
+    def warmer(self) -> CacheWarmer | None:
+        # อุ่น cache ค้นหายอดนิยมจากประวัติ (PETS_CACHE_WARM=0 = ปิด)
+        return self._get("warmer", self._make_warmer)
+
+    @property
+    def facets(self) -> FacetEngine | None:
+        # facet + กรองต่อในเครื่องบนชุดผลที่ดึงครบแล้ว (PETS_FACETS=0 = ปิด)
+        return self._get(
+            "facets", lambda: FacetEngine.from_env() if _enabled("PETS_FACETS") else None
+        )
+
+    @property
+    def images(self) -> ImageProxy | None:
+        # proxy รูป: /api/search ชี้ photo_url มาที่ /api/img (PETS_IMAGE_PROXY=0 = ปิด)
+        return self._get(
+            "images",
+            lambda: ImageProxy.from_env(self.db_path) if _enabled("PETS_IMAGE_PROXY") else None,
+        )
+
+    def close(self):
+        with self._lock:
+            built, self._built = self._built, {}
+        if built.get("warmer") is not None:
+            built["warmer"].stop()
+        if built.get("history") is not None:
+            built["history"].stop()  # เขียนคิวที่ค้างลง db ก่อนปิด
+        for name in ("pf", "db"):
+            if built.get(name) is not None:
+                built[name].close()
+
+    # ---------- Factories ----------
+    def _make_db(self) -> PersistenceManager:
+        # PersistenceManager รัน migration (PRAGMA user_version) ก่อน → ตารางของทุกส่วนพร้อมใช้
+        db = PersistenceManager(db_path=self.db_path)
+        # metrics ของทุก worker รวมกันในตาราง metrics ของ pets.db (ดู /metrics)
+        METRICS.configure(
+            shared_path=self.db_path,
+            flush_interval=float(os.getenv("PETS_METRICS_FLUSH_SECS", "5")),
+        )
+        return db
+
+    def _make_pf(self) -> PetFinderAPI:
+        self.db  # noqa: B018 — migrate ก่อนส่วนอื่นแตะไฟล์เดียวกัน
+        # cache ผลค้นหา/OAuth token/สถานะวงจร/ถัง rate limit ใช้ตารางใน pets.db → ทุก worker แชร์กัน
+        return PetFinderAPI(
+            cache=SearchCache.from_env(shared_path=self.db_path),
+            token_store=TokenStore(shared_path=self.db_path),
+            catalog=CatalogStore(self.db_path),
+            breaker=CircuitBreaker.from_env(shared_path=self.db_path),
+            limiter=TokenBucket.from_env(shared_path=self.db_path),
+        )
+
+    def _make_warmer(self) -> CacheWarmer | None:
+        pf = self.pf
+        if not _enabled("PETS_CACHE_WARM") or pf.mock_mode or pf.cache is None:
+            return None
+        warmer = CacheWarmer.from_env(pf, self.db, shared_path=self.db_path)
+        warmer.start()
+        return warmer
@@ -1 +1,2 @@
+from .catalog import CatalogStore  # noqa: F401
 from .persistence import PersistenceManager  # noqa: F401
@@ -0,0 +1,256 @@
+# data/bulk.py
+"""นำเข้า/ส่งออก favorites แบบสตรีมสำหรับงาน bulk (python main.py import / export)
+
+นำเข้า: อ่านไฟล์ทีละบรรทัด → ก้อนละ batch_size แถว → หนึ่ง transaction ต่อก้อน (executemany)
+ระหว่างที่ SQLite เขียนก้อนหนึ่ง thread หลักแปลงก้อนถัดไปต่อ (คิวยาว 2 ก้อน → หน่วยความจำคงที่)
+ส่งออก: iter_favorite_chunks + ตัวเข้ารหัสใน data.export เขียนลงไฟล์ชั่วคราวแล้วค่อย rename
+→ cron ที่ถูกตัดกลางทางไม่ทิ้งไฟล์ครึ่ง ๆ ไว้
+"""
+
+import csv
+import gzip
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+from .export import csv_chunks, gzip_chunks, ndjson_chunks
+from .persistence import FAVORITE_COLUMNS
+
+FORMATS = ("csv", "ndjson")
+MAX_REPORTED_ERRORS = 20
+
+
+class Progress:
+    """ความคืบหน้า + อัตราต่อวินาทีลง stderr ทุก every วินาที
+
+    พิมพ์เป็นบรรทัดปกติ (ไม่ใช้ \\r) → log ของ cron/docker อ่านได้
+    """
+
+    def __init__(self, label: str, every: float = 2.0, stream=None, quiet: bool = False):
+        self.label = label
+        self.every = float(every)
+        self.stream = stream or sys.stderr
+        self.quiet = quiet
+        self.items = 0
+        self.bytes = 0
+        self.counts: dict[str, int] = {}
+        self.started = time.perf_counter()
+        self._last = self.started
+        self._lock = threading.Lock()
+
+    def add(self, items: int = 0, nbytes: int = 0, **counts):
+        with self._lock:
+            self.items += items
+            self.bytes += nbytes
+            for k, v in counts.items():
+                self.counts[k] = self.counts.get(k, 0) + v
+            now = time.perf_counter()
+            if self.quiet or now - self._last < self.every:
+                return
+            self._last = now
+            line = self._line(now)
+        print(line, file=self.stream, flush=True)
+
+    def summary(self) -> dict:
+        with self._lock:
+            elapsed = time.perf_counter() - self.started
+            out = {"items": self.items, **self.counts, "bytes": self.bytes}
+        out["seconds"] = round(elapsed, 3)
+        out["items_per_sec"] = round(self.items / elapsed, 1) if elapsed > 0 else None
+        out["mb_per_sec"] = round(self.bytes / elapsed / 1e6, 2) if elapsed > 0 else None
+        return out
+
+    def _line(self, now: float) -> str:
+        elapsed = max(now - self.started, 1e-9)
+        extra = "".join(f" {k}={v}" for k, v in self.counts.items())
+        return (
+            f"[{self.label}] {self.items} items ({self.items / elapsed:,.0f}/s)"
+            f" {self.bytes / 1e6:.1f} MB{extra} {elapsed:.1f}s"
+        )
+
+
+# ---------- Input ----------
+def detect_format(path: str, fmt: str | None = None) -> str:
+    """csv / ndjson จาก --format หรือนามสกุลไฟล์ (.csv, .ndjson, .jsonl และแบบ .gz)"""
+    if fmt and fmt != "auto":
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown format {fmt!r}")
+        return fmt
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    raise ValueError(f"cannot tell the format of {path!r}; pass --format csv|ndjson")
+
+
+def open_text(path: str):
+    """'-' = stdin, *.gz = gzip (newline='' ให้ csv จัดการบรรทัดในช่องเอง)"""
+    if path == "-":
+        return open(sys.stdin.fileno(), encoding="utf-8", newline="", closefd=False)
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+class _Counted:
+    """ห่อไฟล์ข้อความ นับจำนวนตัวอักษรที่อ่านไปแล้ว (ใช้คำนวณ MB/s ของการนำเข้า)"""
+
+    def __init__(self, f):
+        self.f = f
+        self.chars = 0
+
+    def __iter__(self):
+        for line in self.f:
+            self.chars += len(line)
+            yield line
+
+
+def read_records(f, fmt: str):
+    """yield (เลขบรรทัด, dict หรือ None ถ้าอ่านไม่ได้)"""
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        for rec in reader:
+            yield reader.line_num, rec
+        return
+    for lineno, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            rec = None
+        yield lineno, rec if isinstance(rec, dict) else None
+
+
+def to_row(rec: dict | None) -> tuple | None:
+    """record (คีย์ตาม FAVORITE_COLUMNS = รูปแบบเดียวกับไฟล์ export และ /api/favorites) → tuple
+
+    ค่าว่างเป็น None, ไม่มี id หรือ name = None (ข้ามแถว)
+    """
+    if rec is None:
+        return None
+    row = []
+    for col in FAVORITE_COLUMNS:
+        v = rec.get(col)
+        if isinstance(v, str):
+            v = v.strip() or None
+        elif v is not None and not isinstance(v, (int, float)):
+            v = json.dumps(v, ensure_ascii=False)
+        row.append(v)
+    if row[0] is None or row[1] is None:
+        return None
+    row[0] = str(row[0])
+    return tuple(row)
+
+
+# ---------- Import / export ----------
+def import_favorites(
+    db,
+    path: str,
+    fmt: str | None = None,
+    batch_size: int = 5000,
+    on_conflict: str = "replace",
+    progress: Progress | None = None,
+) -> dict:
+    """นำเข้า favorites จาก CSV/NDJSON ทีละก้อน คืนสรุป (created/updated/skipped/invalid + อัตรา)"""
+    fmt = detect_format(path, fmt)
+    progress = progress or Progress("import", quiet=True)
+    batch_size = max(int(batch_size), 1)
+    errors: list[str] = []
+    pending: queue.Queue = queue.Queue(maxsize=2)
+    failure: list[BaseException] = []
+
+    def writer():
+        # connection ของ db เป็นต่อ thread → thread นี้เขียนอย่างเดียว
+        while (item := pending.get()) is not None:
+            rows, invalid, nbytes = item
+            if failure:
+                continue  # เขียนพังแล้ว: ระบายคิวจนเจอ None เพื่อไม่ให้ thread หลักค้าง
+            try:
+                counts = db.import_favorite_rows(rows, on_conflict=on_conflict)
+            except BaseException as e:
+                failure.append(e)
+                continue
+            progress.add(items=len(rows) + invalid, nbytes=nbytes, invalid=invalid, **counts)
+
+    thread = threading.Thread(target=writer, name="bulk-import", daemon=True)
+    thread.start()
+    try:
+        with open_text(path) as f:
+            source = _Counted(f)
+            rows, invalid, sent = [], 0, 0
+            for lineno, rec in read_records(source, fmt):
+                row = to_row(rec)
+                if row is None:
+                    invalid += 1
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append(f"line {lineno}: unreadable or missing id/name")
+                    continue
+                rows.append(row)
+                if len(rows) >= batch_size:
+                    pending.put((rows, invalid, source.chars - sent))
+                    rows, invalid, sent = [], 0, source.chars
+                    if failure:
+                        break
+            if rows or invalid:
+                pending.put((rows, invalid, source.chars - sent))
+    finally:
+        pending.put(None)
+        thread.join()
+    if failure:
+        raise failure[0]
+    out = progress.summary()
+    out["errors"] = errors
+    return out
+
+
+def export_favorites(
+    db,
+    path: str,
+    fmt: str | None = None,
+    compress: bool | None = None,
+    chunk_size: int = 5000,
+    progress: Progress | None = None,
+) -> dict:
+    """ส่งออก favorites ทั้งหมดแบบสตรีม ('-' = stdout) ไฟล์ .gz = gzip อัตโนมัติ"""
+    fmt = detect_format(path, fmt) if path != "-" else (fmt or "csv")
+    compress = path.endswith(".gz") if compress is None else compress
+    progress = progress or Progress("export", quiet=True)
+
+    def counted():
+        for chunk in db.iter_favorite_chunks(chunk_size):
+            progress.add(items=len(chunk))
+            yield chunk
+
+    encode = csv_chunks if fmt == "csv" else ndjson_chunks
+    chunks = encode(FAVORITE_COLUMNS, counted())
+    if compress:
+        chunks = gzip_chunks(chunks)
+
+    if path == "-":
+        out = sys.stdout.buffer
+        for data in chunks:
+            out.write(data)
+            progress.add(nbytes=len(data))
+        out.flush()
+        return progress.summary()
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp-{os.getpid()}"
+    try:
+        with open(tmp, "wb") as out:
+            for data in chunks:
+                out.write(data)
+                progress.add(nbytes=len(data))
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return progress.summary()
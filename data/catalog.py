@@ -0,0 +1,227 @@
+# data/catalog.py
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from .migrations import is_current
+from .persistence import DB_PATH
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalog_animals (
+  id           TEXT PRIMARY KEY,
+  name         TEXT,
+  type         TEXT COLLATE NOCASE,
+  breed        TEXT COLLATE NOCASE,
+  age          TEXT COLLATE NOCASE,
+  size         TEXT COLLATE NOCASE,
+  gender       TEXT COLLATE NOCASE,
+  contact      TEXT,
+  phone        TEXT,
+  photo_url    TEXT,
+  description  TEXT,
+  location     TEXT COLLATE NOCASE,
+  updated_at   TEXT,
+  synced_at    REAL
+);
+CREATE INDEX IF NOT EXISTS idx_catalog_loc_type ON catalog_animals(location, type, updated_at);
+CREATE INDEX IF NOT EXISTS idx_catalog_type ON catalog_animals(type);
+CREATE INDEX IF NOT EXISTS idx_catalog_age ON catalog_animals(age);
+CREATE INDEX IF NOT EXISTS idx_catalog_size ON catalog_animals(size);
+CREATE INDEX IF NOT EXISTS idx_catalog_gender ON catalog_animals(gender);
+CREATE INDEX IF NOT EXISTS idx_catalog_breed ON catalog_animals(breed);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS catalog_fts USING fts5(
+  name, breed, description,
+  content='catalog_animals', content_rowid='rowid'
+);
+
+CREATE TRIGGER IF NOT EXISTS catalog_ai AFTER INSERT ON catalog_animals BEGIN
+  INSERT INTO catalog_fts(rowid, name, breed, description)
+  VALUES (new.rowid, new.name, new.breed, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS catalog_ad AFTER DELETE ON catalog_animals BEGIN
+  INSERT INTO catalog_fts(catalog_fts, rowid, name, breed, description)
+  VALUES ('delete', old.rowid, old.name, old.breed, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS catalog_au AFTER UPDATE ON catalog_animals BEGIN
+  INSERT INTO catalog_fts(catalog_fts, rowid, name, breed, description)
+  VALUES ('delete', old.rowid, old.name, old.breed, old.description);
+  INSERT INTO catalog_fts(rowid, name, breed, description)
+  VALUES (new.rowid, new.name, new.breed, new.description);
+END;
+
+CREATE TABLE IF NOT EXISTS catalog_sync_state (
+  location     TEXT NOT NULL,
+  animal_type  TEXT NOT NULL,
+  watermark    TEXT,
+  last_sync    REAL,
+  PRIMARY KEY (location, animal_type)
+);
+"""
+
+# คอลัมน์ชื่อตรงกับ key ของ API (รูปเดียวกับ items ใน cache ของ PetFinderAPI)
+_PET_COLUMNS = "id, name, type, breed, age, contact, photo_url, phone, gender, size, description"
+
+
+class CatalogStore:
+    """สำเนาข้อมูลสัตว์จาก Petfinder ใน SQLite (ไฟล์เดียวกับ pets.db)
+
+    มี index รอง type/age/size/gender/breed และ FTS5 บน name/breed/description
+    search() คืนรูปเดียวกับหน้าผลค้นหาของ PetFinderAPI
+    """
+
+    def __init__(self, db_path: str | None = None):
+        self.db_path = os.path.abspath(db_path or DB_PATH)
+        self._local = threading.local()
+        con = self._conn()
+        # pets.db ที่ migrate แล้วมีตารางครบ (data/migrations.py) ไม่ต้องรัน DDL ซ้ำ
+        if not is_current(con):
+            con.executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            con.row_factory = sqlite3.Row
+            con.execute("PRAGMA journal_mode=WAL")
+            self._local.con = con
+        return con
+
+    # ---------- Write (sync) ----------
+    def upsert(self, rows: list[dict]) -> int:
+        """rows = dict ที่มี key ตามคอลัมน์ของ catalog_animals"""
+        if not rows:
+            return 0
+        now = time.time()
+        con = self._conn()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            # ใช้ UPSERT (ไม่ใช่ REPLACE) เพื่อให้ trigger UPDATE ของ FTS ทำงาน
+            con.executemany(
+                """INSERT INTO catalog_animals
+                (id, name, type, breed, age, size, gender, contact, phone, photo_url,
+                 description, location, updated_at, synced_at)
+                VALUES (:id, :name, :type, :breed, :age, :size, :gender, :contact, :phone,
+                        :photo_url, :description, :location, :updated_at, :synced_at)
+                ON CONFLICT(id) DO UPDATE SET
+                  name=excluded.name, type=excluded.type, breed=excluded.breed,
+                  age=excluded.age, size=excluded.size, gender=excluded.gender,
+                  contact=excluded.contact, phone=excluded.phone,
+                  photo_url=excluded.photo_url, description=excluded.description,
+                  location=excluded.location, updated_at=excluded.updated_at,
+                  synced_at=excluded.synced_at""",
+                [{**r, "synced_at": now} for r in rows],
+            )
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def delete(self, ids: list[str]) -> int:
+        if not ids:
+            return 0
+        con = self._conn()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            con.executemany("DELETE FROM catalog_animals WHERE id = ?", [(str(i),) for i in ids])
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        return len(ids)
+
+    def prune(self, synced_before: float) -> int:
+        """ลบตัวที่ไม่ถูกเห็นใน sync เต็มรอบตั้งแต่ synced_before (น่าจะถูกรับเลี้ยงไปแล้ว)"""
+        cur = self._conn().execute(
+            "DELETE FROM catalog_animals WHERE synced_at < ?", (synced_before,)
+        )
+        return cur.rowcount
+
+    def get_watermark(self, location: str, animal_type: str) -> str | None:
+        row = (
+            self._conn()
+            .execute(
+                "SELECT watermark FROM catalog_sync_state WHERE location = ? AND animal_type = ?",
+                (location, animal_type),
+            )
+            .fetchone()
+        )
+        return row["watermark"] if row else None
+
+    def set_watermark(self, location: str, animal_type: str, watermark: str | None):
+        self._conn().execute(
+            """INSERT INTO catalog_sync_state (location, animal_type, watermark, last_sync)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(location, animal_type) DO UPDATE SET
+              watermark = coalesce(excluded.watermark, watermark),
+              last_sync = excluded.last_sync""",
+            (location, animal_type, watermark, time.time()),
+        )
+
+    # ---------- Read ----------
+    def count(self) -> int:
+        return self._conn().execute("SELECT count(*) FROM catalog_animals").fetchone()[0]
+
+    def search(
+        self,
+        animal_type=None,
+        location=None,
+        age=None,
+        breed=None,
+        size=None,
+        gender=None,
+        page=1,
+        per_page=24,
+        text: str | None = None,
+    ) -> dict:
+        page = max(int(page), 1)
+        per_page = min(max(int(per_page), 1), 100)
+        where, args = [], []
+        for col, val in (
+            ("type", animal_type),
+            ("location", location),
+            ("age", age),
+            ("breed", breed),
+            ("size", size),
+            ("gender", gender),
+        ):
+            if val:
+                where.append(f"a.{col} = ?")
+                args.append(str(val).strip())
+        src = "catalog_animals a"
+        if text:
+            src += " JOIN catalog_fts f ON f.rowid = a.rowid"
+            where.append("catalog_fts MATCH ?")
+            args.append(_fts_query(text))
+        sql_where = (" WHERE " + " AND ".join(where)) if where else ""
+
+        con = self._conn()
+        total = con.execute(f"SELECT count(*) FROM {src}{sql_where}", args).fetchone()[0]
+        cols = ", ".join("a." + c.strip() for c in _PET_COLUMNS.split(","))
+        rows = con.execute(
+            f"SELECT {cols} FROM {src}{sql_where}"
+            " ORDER BY a.updated_at DESC, a.id LIMIT ? OFFSET ?",
+            [*args, per_page, (page - 1) * per_page],
+        ).fetchall()
+        return {
+            "items": [dict(r) for r in rows],
+            "page": page,
+            "total_pages": max(math.ceil(total / per_page), 1),
+            "per_page": per_page,
+        }
+
+    def stats(self) -> dict:
+        con = self._conn()
+        rows = con.execute(
+            "SELECT location, animal_type, watermark, last_sync FROM catalog_sync_state"
+        ).fetchall()
+        return {"animals": self.count(), "sync_state": [dict(r) for r in rows]}
+
+
+def _fts_query(text: str) -> str:
+    # ครอบแต่ละคำด้วย "..." กัน syntax ของ FTS5 (เช่น -, :, *) จาก input ผู้ใช้
+    terms = [t.replace('"', "") for t in str(text).split()]
+    return " ".join(f'"{t}"' for t in terms if t)
@@ -0,0 +1,48 @@
+# data/export.py
+"""ตัวเข้ารหัสแบบสตรีม: รับ chunk ของแถว (list ของ tuple) แล้ว yield bytes ทีละก้อน
+
+ใช้คู่กับ PersistenceManager.iter_favorite_chunks() เพื่อให้ export ใช้หน่วยความจำคงที่
+และเริ่มส่งข้อมูลได้ทันที
+"""
+
+import csv
+import io
+import json
+import zlib
+from collections.abc import Iterable, Iterator
+
+
+def csv_chunks(columns, row_chunks: Iterable[list]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(columns)
+    for chunk in row_chunks:
+        w.writerows(chunk)
+        yield _drain(buf)
+    tail = _drain(buf)
+    if tail:
+        yield tail
+
+
+def ndjson_chunks(columns, row_chunks: Iterable[list]) -> Iterator[bytes]:
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    for chunk in row_chunks:
+        lines = (dumps(dict(zip(columns, row, strict=True))) + "\n" for row in chunk)
+        yield "".join(lines).encode("utf-8")
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """บีบอัด gzip ระหว่างสตรีม (wbits=31 = header/trailer แบบ gzip)"""
+    comp = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        out = comp.compress(chunk)
+        if out:
+            yield out
+    yield comp.flush()
+
+
+def _drain(buf: io.StringIO) -> bytes:
+    data = buf.getvalue()
+    buf.seek(0)
+    buf.truncate()
+    return data.encode("utf-8")
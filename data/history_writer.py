@@ -0,0 +1,249 @@
+# data/history_writer.py
+import atexit
+import os
+import queue
+import threading
+import time
+import weakref
+from datetime import datetime, timezone
+
+OVERFLOW_POLICIES = ("drop_new", "drop_oldest", "block")
+
+
+class HistoryRetention:
+    """รอบ compaction ของ search_history (db.compact_search_history) ทุก interval วินาที
+
+    ใช้ได้ทั้งโหมด async (thread ของ HistoryWriter เรียก) และโหมดเขียนตรง (PETS_HISTORY_ASYNC=0)
+    ที่ไม่มี thread เบื้องหลัง → maybe_compact(background=True) จากรีเควสแล้วรันใน thread สั้น ๆ
+    """
+
+    def __init__(self, db, interval: float = 3600, max_rows: int | None = None):
+        self.db = db
+        self.interval = float(interval)
+        self.max_rows = max_rows
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats = {"compacted": 0, "errors": 0, "runs": 0}
+
+    @classmethod
+    def from_env(cls, db):
+        return cls(
+            db,
+            interval=float(os.getenv("PETS_HISTORY_COMPACT_SECS", "3600")),
+            max_rows=int(os.getenv("PETS_HISTORY_MAX_ROWS", "0")) or None,
+        )
+
+    def maybe_compact(self, background: bool = False) -> bool:
+        """ถึงรอบแล้วรัน compaction (คนเดียวต่อรอบ) คืน True ถ้ารอบนี้ถูกเริ่ม"""
+        if self.interval <= 0:
+            return False
+        with self._lock:
+            if time.monotonic() - self._last < self.interval:
+                return False
+            self._last = time.monotonic()
+        if background:
+            threading.Thread(target=self.compact, name="history-compact", daemon=True).start()
+        else:
+            self.compact()
+        return True
+
+    def compact(self) -> int:
+        try:
+            deleted = self.db.compact_search_history(max_rows=self.max_rows)
+        except Exception as e:
+            print("[warn] history compaction failed:", e)
+            self._count("errors")
+            return 0
+        self._count("runs")
+        self._count("compacted", deleted)
+        return deleted
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, interval=self.interval)
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self._stats[name] += n
+
+
+class HistoryWriter:
+    """เขียน search_history แบบ background เป็นชุด (group commit)
+
+    submit() แค่ใส่คิวแล้วกลับทันที thread เบื้องหลังจะ flush เป็น executemany
+    ใน transaction เดียวเมื่อครบ batch_size หรือทุก flush_interval วินาที
+    คิวมีขนาดจำกัด (max_queue) เมื่อเต็มทำตาม overflow:
+      drop_new = ทิ้งรายการใหม่, drop_oldest = ทิ้งรายการเก่าสุด, block = รอจนมีที่
+    """
+
+    def __init__(
+        self,
+        db,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        max_queue: int = 10_000,
+        overflow: str = "drop_new",
+        retention_interval: float = 3600,
+        retention: HistoryRetention | None = None,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}")
+        self.db = db
+        self.batch_size = max(int(batch_size), 1)
+        self.flush_interval = float(flush_interval)
+        self.overflow = overflow
+        # รัน db.compact_search_history() จาก thread เดียวกันทุก retention_interval วินาที
+        self.retention = retention or HistoryRetention(db, interval=retention_interval)
+        self._queue: queue.Queue = queue.Queue(maxsize=max(int(max_queue), 1))
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._thread_lock = threading.Lock()
+        self._pid = os.getpid()
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "batches": 0,
+            "errors": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+        }
+        atexit.register(_stop_writer, weakref.ref(self))
+
+    @classmethod
+    def from_env(cls, db):
+        return cls(
+            db,
+            batch_size=int(os.getenv("PETS_HISTORY_BATCH", "200")),
+            flush_interval=float(os.getenv("PETS_HISTORY_FLUSH_SECS", "1.0")),
+            max_queue=int(os.getenv("PETS_HISTORY_QUEUE", "10000")),
+            overflow=os.getenv("PETS_HISTORY_OVERFLOW", "drop_new"),
+            retention=HistoryRetention.from_env(db),
+        )
+
+    # ---------- Producer ----------
+    def submit(self, params: dict) -> bool:
+        """ใส่คิว คืน False ถ้าถูกทิ้งเพราะคิวเต็ม"""
+        self._ensure_thread()
+        record = dict(params)
+        # เวลาที่ค้นหาจริง ไม่ใช่เวลาที่ flush
+        record.setdefault("created_at", datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"))
+        try:
+            if self.overflow == "block":
+                self._queue.put(record)
+            else:
+                self._queue.put_nowait(record)
+        except queue.Full:
+            if self.overflow == "drop_oldest":
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+                try:
+                    self._queue.put_nowait(record)
+                except queue.Full:
+                    self._count("dropped")
+                    return False
+                self._count("dropped")
+            else:
+                self._count("dropped")
+                return False
+        self._count("enqueued")
+        if self._queue.qsize() >= self.batch_size:
+            self._wake.set()
+        return True
+
+    # ---------- Consumer ----------
+    def flush(self) -> int:
+        """เขียนทุกอย่างที่ค้างในคิวตอนนี้ (เรียกจาก thread ไหนก็ได้)"""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = []
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    return written
+                started = time.perf_counter()
+                try:
+                    written += self.db.add_search_history_many(batch)
+                except Exception as e:
+                    print("[warn] history batch write failed:", e)
+                    self._count("errors")
+                    self._count("dropped", len(batch))
+                    continue
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                with self._thread_lock:
+                    self._stats["written"] += len(batch)
+                    self._stats["batches"] += 1
+                    self._stats["last_flush_ms"] = round(elapsed_ms, 3)
+                    self._stats["total_flush_ms"] += elapsed_ms
+                    self._stats["max_flush_ms"] = round(
+                        max(self._stats["max_flush_ms"], elapsed_ms), 3
+                    )
+
+    def stop(self, timeout: float = 5.0):
+        """หยุด thread แล้ว flush ที่เหลือ (เรียกตอน worker shutdown ผ่าน atexit)"""
+        if os.getpid() != self._pid:
+            return
+        self._stop.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._thread_lock:
+            out = dict(self._stats)
+        total_ms = out.pop("total_flush_ms")
+        out["avg_flush_ms"] = round(total_ms / out["batches"], 3) if out["batches"] else 0.0
+        out["queue_depth"] = self._queue.qsize()
+        out["queue_max"] = self._queue.maxsize
+        out["running"] = bool(self._thread and self._thread.is_alive())
+        retention = self.retention.stats()
+        out["compacted"] = retention["compacted"]
+        out["errors"] += retention["errors"]
+        return out
+
+    # ---------- Internals ----------
+    def _count(self, name, n=1):
+        with self._thread_lock:
+            self._stats[name] += n
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._thread_lock:
+            if os.getpid() != self._pid:
+                # หลัง fork: thread ของโปรเซสแม่ไม่ตามมา ต้องเริ่มใหม่
+                self._pid = os.getpid()
+                self._thread = None
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="history-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            self.retention.maybe_compact()
+
+    def compact(self) -> int:
+        return self.retention.compact()
+
+
+def _stop_writer(ref):
+    writer = ref()
+    if writer is not None:
+        writer.stop()
@@ -0,0 +1,255 @@
+# data/metrics.py
+"""ตัวนับ/histogram แบบ Prometheus ที่รวมค่าข้ามทุก gunicorn worker
+
+แต่ละโปรเซสสะสม "ส่วนต่าง" ไว้ในหน่วยความจำ แล้ว flush ลงตาราง metrics ใน pets.db
+(value = value + ส่วนต่าง) ทุก flush_interval วินาทีและทุกครั้งที่มีคน scrape /metrics
+ตัวเลขในตารางจึงเป็นผลรวมของทุก worker และไม่หายเมื่อ worker ถูก restart
+"""
+
+import atexit
+import functools
+import os
+import re
+import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+from .migrations import is_current
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (
+  name    TEXT NOT NULL,
+  labels  TEXT NOT NULL,          -- 'k="v",k2="v2"' (เรียงตาม key แล้ว)
+  value   REAL NOT NULL,
+  PRIMARY KEY (name, labels)
+) WITHOUT ROWID;
+"""
+
+# วินาที: ครอบตั้งแต่ query SQLite (~100µs) จนถึง upstream ที่ช้า (10s timeout)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _fmt_labels(labels: dict) -> str:
+    return ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in sorted(labels.items())
+    )
+
+
+def _fmt_value(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+class Metrics:
+    def __init__(self, shared_path: str | None = None, flush_interval: float = 5.0):
+        self.shared_path = os.path.abspath(shared_path) if shared_path else None
+        self.flush_interval = float(flush_interval)
+        # family → (type, help, buckets)
+        self._families: dict[str, tuple[str, str, tuple]] = {}
+        # (sample name, labels str) → ส่วนต่างที่ยังไม่ได้ flush (หรือค่าสะสม ถ้าไม่มี shared_path)
+        self._pending: dict[tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._thread: threading.Thread | None = None
+        self._pid = os.getpid()
+        atexit.register(_flush_metrics, weakref.ref(self))
+
+    def configure(self, shared_path: str | None = None, flush_interval: float | None = None):
+        """ผูกกับไฟล์ SQLite กลาง (เรียกครั้งเดียวตอนสร้าง controller)"""
+        if flush_interval is not None:
+            self.flush_interval = float(flush_interval)
+        self.shared_path = os.path.abspath(shared_path) if shared_path else None
+        self._local = threading.local()
+        if self.shared_path:
+            con = self._con()
+            if not is_current(con):
+                con.executescript(SCHEMA)
+
+    # ---------- Declaration ----------
+    def counter(self, name: str, help_text: str):
+        self._families[name] = ("counter", help_text, ())
+
+    def histogram(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS):
+        self._families[name] = ("histogram", help_text, tuple(sorted(buckets)))
+
+    # ---------- Recording ----------
+    def inc(self, name: str, n: float = 1, **labels):
+        key = (name, _fmt_labels(labels))
+        with self._lock:
+            self._pending[key] = self._pending.get(key, 0) + n
+        self._ensure_thread()
+
+    def observe(self, name: str, seconds: float, **labels):
+        buckets = self._families[name][2]
+        base = dict(labels)
+        # ใส่ทุก bucket (รวมที่ได้ 0) ให้ histogram_quantile มีครบทุกขั้น
+        updates = [
+            ((f"{name}_bucket", _fmt_labels({**base, "le": _fmt_value(le)})), seconds <= le)
+            for le in buckets
+        ]
+        updates.append(((f"{name}_bucket", _fmt_labels({**base, "le": "+Inf"})), True))
+        plain = _fmt_labels(base)
+        with self._lock:
+            pending = self._pending
+            for key, hit in updates:
+                pending[key] = pending.get(key, 0) + hit
+            pending[(f"{name}_count", plain)] = pending.get((f"{name}_count", plain), 0) + 1
+            pending[(f"{name}_sum", plain)] = pending.get((f"{name}_sum", plain), 0) + seconds
+        self._ensure_thread()
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    # ---------- Shared storage ----------
+    def flush(self) -> int:
+        """เขียนส่วนต่างลง SQLite (ไม่มี shared_path = ไม่ทำอะไร ค่าอยู่ในโปรเซส)"""
+        if not self.shared_path:
+            return 0
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            con = self._con()
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                con.executemany(
+                    "INSERT INTO metrics (name, labels, value) VALUES (?, ?, ?)"
+                    " ON CONFLICT(name, labels) DO UPDATE SET value = value + excluded.value",
+                    [(n, lab, v) for (n, lab), v in pending.items()],
+                )
+                con.execute("COMMIT")
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            # ใส่คืนไว้รอบหน้า ไม่ให้ตัวเลขหาย
+            print("[warn] metrics flush failed:", e)
+            with self._lock:
+                for key, v in pending.items():
+                    self._pending[key] = self._pending.get(key, 0) + v
+            return 0
+        return len(pending)
+
+    def samples(self) -> dict[tuple[str, str], float]:
+        if not self.shared_path:
+            with self._lock:
+                return dict(self._pending)
+        self.flush()
+        rows = self._con().execute("SELECT name, labels, value FROM metrics")
+        return {(n, lab): v for n, lab, v in rows}
+
+    def reset(self):
+        with self._lock:
+            self._pending = {}
+        if self.shared_path:
+            self._con().execute("DELETE FROM metrics")
+
+    # ---------- Exposition ----------
+    def render(self) -> str:
+        """Prometheus text format 0.0.4"""
+        by_family: dict[str, list] = {}
+        for (sample, labels), value in self.samples().items():
+            family = sample
+            for suffix in ("_bucket", "_count", "_sum"):
+                base = sample[: -len(suffix)]
+                if sample.endswith(suffix) and self._families.get(base, ("",))[0] == "histogram":
+                    family = base
+                    break
+            by_family.setdefault(family, []).append((sample, labels, value))
+
+        lines = []
+        for family in sorted(by_family):
+            kind, help_text, _ = self._families.get(family, ("untyped", "", ()))
+            if help_text:
+                lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} {kind}")
+            for sample, labels, value in sorted(by_family[family], key=_sample_order):
+                body = f"{sample}{{{labels}}}" if labels else sample
+                lines.append(f"{body} {_fmt_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    # ---------- Internals ----------
+    def _con(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.shared_path, timeout=5, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def _ensure_thread(self):
+        if not self.shared_path or self.flush_interval <= 0:
+            return
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # หลัง fork: ส่วนต่างที่ติดมาเป็นของโปรเซสแม่ ไม่นับซ้ำ
+                self._pid = os.getpid()
+                self._pending = {}
+                self._thread = None
+                self._local = threading.local()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="metrics-flush", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+_LE = re.compile(r',?le="([^"]*)"')
+
+
+def _sample_order(item):
+    # จัดกลุ่มตามชื่อ + labels (ไม่นับ le) แล้วเรียง bucket ตาม le เป็นตัวเลข (+Inf ท้ายสุด)
+    sample, labels, _ = item
+    m = _LE.search(labels)
+    if m is None:
+        return sample, labels, 0.0
+    return sample, _LE.sub("", labels, count=1), float(m.group(1).replace("+Inf", "inf"))
+
+
+def _flush_metrics(ref):
+    m = ref()
+    if m is not None and m._pid == os.getpid():
+        m.flush()
+
+
+METRICS = Metrics()
+
+METRICS.histogram("http_request_duration_seconds", "Flask route latency")
+METRICS.counter("http_requests_total", "Flask responses by route and status")
+METRICS.histogram("json_encode_seconds", "Time spent encoding JSON responses")
+METRICS.histogram("petfinder_request_duration_seconds", "Petfinder upstream call latency")
+METRICS.counter("petfinder_responses_total", "Petfinder upstream responses by status")
+METRICS.counter("petfinder_fallback_total", "Searches served from a fallback (mirror/mock)")
+METRICS.histogram("sqlite_call_duration_seconds", "PersistenceManager method latency")
+METRICS.counter("cache_warm_refresh_total", "Cache warmer refreshes by outcome")
+METRICS.counter("cache_warm_lookups_total", "Searches for warmed queries by cache result")
+METRICS.counter("facet_searches_total", "Searches answered from a local facet index by outcome")
+METRICS.histogram("facet_build_seconds", "Time to fetch and index a full result set")
+
+
+def timed(family: str, **labels):
+    """decorator: จับเวลาทุกการเรียกลง histogram family"""
+
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with METRICS.timer(family, **labels):
+                return fn(*args, **kwargs)
+
+        return inner
+
+    return wrap
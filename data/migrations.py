@@ -0,0 +1,430 @@
+# data/migrations.py
+"""migration ของ pets.db ตาม PRAGMA user_version
+
+MIGRATIONS[i] ย้าย DB จากเวอร์ชัน i → i+1 (เพิ่มได้แค่ต่อท้าย ห้ามแก้/สลับของเดิม)
+ทุกขั้นต้อง idempotent (CREATE ... IF NOT EXISTS / เช็คคอลัมน์ก่อน ALTER) เพราะไฟล์ที่สร้างก่อนมีระบบนี้
+มีตารางบางส่วนอยู่แล้วทั้งที่ user_version = 0
+
+DB ที่เป็นเวอร์ชันล่าสุดแล้ว: อ่าน user_version (header ของไฟล์) ครั้งเดียวแล้วจบ ไม่รัน DDL
+ที่เหลือรันใน BEGIN IMMEDIATE เดียว → worker หลายตัวสตาร์ตพร้อมกันมีคน migrate แค่ตัวเดียว
+และถ้าพังกลางทางไฟล์จะกลับไปเวอร์ชันเดิมทั้งก้อน
+
+    python -m data.migrations [path]      # migrate แล้วพิมพ์เวอร์ชัน
+"""
+
+import os
+import sqlite3
+import sys
+import time
+
+FAVORITE_EXTRA_COLUMNS = ("phone", "gender", "size", "description")
+
+
+def statements(script: str) -> list[str]:
+    """แยกสคริปต์เป็นทีละคำสั่ง (executescript จะ COMMIT transaction ที่เปิดอยู่ให้เอง)"""
+    out, buf = [], ""
+    for line in script.splitlines(keepends=True):
+        buf += line
+        if sqlite3.complete_statement(buf):
+            if buf.strip():
+                out.append(buf.strip())
+            buf = ""
+    if buf.strip():
+        out.append(buf.strip())
+    return out
+
+
+def apply_script(con: sqlite3.Connection, script: str):
+    for stmt in statements(script):
+        con.execute(stmt)
+
+
+def columns(con: sqlite3.Connection, table: str) -> list[str]:
+    return [r[1] for r in con.execute(f"PRAGMA table_info({table})")]
+
+
+# ---------- Steps ----------
+# DDL ของแต่ละขั้นเป็นข้อความตายตัว ณ ตอนที่ขั้นนั้นถูกเพิ่ม (ไม่ import SCHEMA ของโมดูลที่ใช้งานจริง)
+# แก้ schema ปัจจุบันภายหลัง → ขั้นเก่ายังสร้างเวอร์ชันเดิม แล้วเพิ่มขั้นใหม่ต่อท้ายเพื่อย้ายต่อ
+_V1_FAVORITE_COLUMNS = (
+    "id",
+    "name",
+    "type",
+    "breed",
+    "age",
+    "contact",
+    "photo_url",
+    "phone",
+    "gender",
+    "size",
+    "description",
+    "created_at",
+)
+
+_V1_CORE = """
+CREATE TABLE IF NOT EXISTS favorites (
+  id           TEXT PRIMARY KEY,
+  name         TEXT,
+  type         TEXT,
+  breed        TEXT,
+  age          TEXT,
+  contact      TEXT,
+  photo_url    TEXT,
+  phone        TEXT,
+  gender       TEXT,
+  size         TEXT,
+  description  TEXT,
+  created_at   DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_favorites_created ON favorites(created_at, id);
+
+CREATE TABLE IF NOT EXISTS search_history (
+  id           INTEGER PRIMARY KEY AUTOINCREMENT,
+  animal_type  TEXT,
+  location     TEXT,
+  age          TEXT,
+  size         TEXT,
+  breed        TEXT,
+  gender       TEXT,
+  per_page     INTEGER,
+  page         INTEGER,
+  created_at   DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+-- created_at เก็บเป็น 'YYYY-MM-DD HH:MM:SS' เรียงแบบข้อความได้ตรงกับเวลา → ใช้ index ได้
+CREATE INDEX IF NOT EXISTS idx_search_history_created ON search_history(created_at, id);
+
+-- จำนวนการค้นหาต่อชุดพารามิเตอร์ ต่อชั่วโมง/วัน (ค่าว่างเก็บเป็น '' ไม่ใช่ NULL เพื่อให้ PK ชนกันได้)
+CREATE TABLE IF NOT EXISTS search_rollups (
+  bucket        TEXT NOT NULL,
+  bucket_start  TEXT NOT NULL,
+  animal_type   TEXT NOT NULL DEFAULT '',
+  location      TEXT NOT NULL DEFAULT '',
+  age           TEXT NOT NULL DEFAULT '',
+  size          TEXT NOT NULL DEFAULT '',
+  gender        TEXT NOT NULL DEFAULT '',
+  breed         TEXT NOT NULL DEFAULT '',
+  count         INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (bucket, bucket_start, animal_type, location, age, size, gender, breed)
+);
+
+CREATE TRIGGER IF NOT EXISTS search_history_rollup AFTER INSERT ON search_history BEGIN
+  INSERT INTO search_rollups
+    (bucket, bucket_start, animal_type, location, age, size, gender, breed, count)
+  VALUES
+    ('hour', strftime('%Y-%m-%d %H:00:00', coalesce(new.created_at, CURRENT_TIMESTAMP)),
+     coalesce(lower(new.animal_type), ''), coalesce(new.location, ''),
+     coalesce(lower(new.age), ''), coalesce(lower(new.size), ''),
+     coalesce(lower(new.gender), ''), coalesce(lower(new.breed), ''), 1),
+    ('day', date(coalesce(new.created_at, CURRENT_TIMESTAMP)),
+     coalesce(lower(new.animal_type), ''), coalesce(new.location, ''),
+     coalesce(lower(new.age), ''), coalesce(lower(new.size), ''),
+     coalesce(lower(new.gender), ''), coalesce(lower(new.breed), ''), 1)
+  ON CONFLICT DO UPDATE SET count = count + 1;
+END;
+"""
+
+_V1_TABLE_VERSIONS = """
+CREATE TABLE IF NOT EXISTS table_versions (
+  name     TEXT PRIMARY KEY,
+  version  INTEGER NOT NULL
+);
+
+INSERT OR IGNORE INTO table_versions (name, version)
+VALUES ('favorites', CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER));
+CREATE TRIGGER IF NOT EXISTS favorites_version_ai AFTER INSERT ON favorites BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE name = 'favorites';
+END;
+CREATE TRIGGER IF NOT EXISTS favorites_version_au AFTER UPDATE ON favorites BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE name = 'favorites';
+END;
+CREATE TRIGGER IF NOT EXISTS favorites_version_ad AFTER DELETE ON favorites BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE name = 'favorites';
+END;
+
+INSERT OR IGNORE INTO table_versions (name, version)
+VALUES ('search_history', CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER));
+CREATE TRIGGER IF NOT EXISTS search_history_version_ai AFTER INSERT ON search_history BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE name = 'search_history';
+END;
+CREATE TRIGGER IF NOT EXISTS search_history_version_au AFTER UPDATE ON search_history BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE name = 'search_history';
+END;
+CREATE TRIGGER IF NOT EXISTS search_history_version_ad AFTER DELETE ON search_history BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE name = 'search_history';
+END;
+"""
+
+_V1_ROLLUP_BACKFILL = """
+INSERT INTO search_rollups
+  (bucket, bucket_start, animal_type, location, age, size, gender, breed, count)
+SELECT b.bucket,
+       CASE b.bucket WHEN 'hour' THEN strftime('%Y-%m-%d %H:00:00', h.created_at)
+                     ELSE date(h.created_at) END,
+       coalesce(lower(h.animal_type), ''), coalesce(h.location, ''),
+       coalesce(lower(h.age), ''), coalesce(lower(h.size), ''),
+       coalesce(lower(h.gender), ''), coalesce(lower(h.breed), ''), count(*)
+FROM search_history h, (SELECT 'hour' AS bucket UNION ALL SELECT 'day') b
+WHERE h.created_at IS NOT NULL
+GROUP BY 1, 2, 3, 4, 5, 6, 7, 8
+ON CONFLICT DO UPDATE SET count = excluded.count
+"""
+
+
+def _upgrade_legacy_favorites(con):
+    """favorites รุ่นก่อน: id INTEGER autoincrement + pet_id TEXT UNIQUE และ/หรือไม่มีคอลัมน์ใหม่"""
+    cols = columns(con, "favorites")
+    if not cols:
+        return  # DB ใหม่ → _V1_CORE สร้างให้
+    if "pet_id" in cols:
+        # id ที่ API ใช้คือ pet_id → สร้างตารางแบบ v1 แล้วคัดลอก (ALTER เปลี่ยน PK ไม่ได้)
+        con.execute("ALTER TABLE favorites RENAME TO favorites_legacy")
+        apply_script(con, _V1_CORE)
+        select = ", ".join(
+            "coalesce(pet_id, CAST(id AS TEXT))" if c == "id" else (c if c in cols else "NULL")
+            for c in _V1_FAVORITE_COLUMNS
+        )
+        con.execute(
+            f"INSERT OR IGNORE INTO favorites ({', '.join(_V1_FAVORITE_COLUMNS)})"
+            f" SELECT {select} FROM favorites_legacy ORDER BY id"
+        )
+        con.execute("DROP TABLE favorites_legacy")
+        return
+    for col in FAVORITE_EXTRA_COLUMNS:
+        if col not in cols:
+            con.execute(f"ALTER TABLE favorites ADD COLUMN {col} TEXT")
+
+
+def _v1_core(con):
+    """favorites / search_history / rollup / ตัวนับเวอร์ชันตาราง (ETag)"""
+    _upgrade_legacy_favorites(con)
+    apply_script(con, _V1_CORE)
+    apply_script(con, _V1_TABLE_VERSIONS)
+    # DB เก่าที่มีประวัติอยู่แล้วแต่เพิ่งได้ตาราง rollup → สรุปย้อนหลังครั้งเดียว
+    if con.execute("SELECT 1 FROM search_rollups LIMIT 1").fetchone() is None:
+        con.execute(_V1_ROLLUP_BACKFILL)
+
+
+_V2_SHARED_STATE = """
+CREATE TABLE IF NOT EXISTS search_cache (
+  key          TEXT PRIMARY KEY,
+  value        TEXT NOT NULL,
+  expires_at   REAL NOT NULL,
+  accessed_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_search_cache_accessed ON search_cache(accessed_at);
+CREATE TABLE IF NOT EXISTS oauth_token (
+  client_id    TEXT PRIMARY KEY,
+  token        TEXT NOT NULL,
+  expires_at   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS oauth_token_refresh (
+  client_id    TEXT PRIMARY KEY,
+  until        REAL NOT NULL        -- worker ที่จองไว้กำลังขอ token ถึงเวลานี้
+);
+CREATE TABLE IF NOT EXISTS circuit_breaker (
+  name         TEXT PRIMARY KEY,
+  state        TEXT NOT NULL,        -- closed | open | half_open
+  failures     INTEGER NOT NULL,
+  open_until   REAL NOT NULL,
+  probe_until  REAL NOT NULL,        -- half_open: มี worker กำลังลองยิงอยู่ถึงเวลานี้
+  opened       INTEGER NOT NULL,     -- จำนวนครั้งที่เปิด (สะสม)
+  last_error   TEXT,
+  updated_at   REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rate_limit (
+  name           TEXT PRIMARY KEY,
+  tokens         REAL NOT NULL,
+  updated_at     REAL NOT NULL,
+  blocked_until  REAL NOT NULL      -- จาก Retry-After ของ upstream
+);
+CREATE TABLE IF NOT EXISTS metrics (
+  name    TEXT NOT NULL,
+  labels  TEXT NOT NULL,          -- 'k="v",k2="v2"' (เรียงตาม key แล้ว)
+  value   REAL NOT NULL,
+  PRIMARY KEY (name, labels)
+) WITHOUT ROWID;
+"""
+
+
+def _v2_shared_state(con):
+    """ตารางที่ทุก worker แชร์: cache ผลค้นหา, OAuth token, breaker, rate limit, metrics"""
+    apply_script(con, _V2_SHARED_STATE)
+
+
+_V3_CATALOG = """
+CREATE TABLE IF NOT EXISTS catalog_animals (
+  id           TEXT PRIMARY KEY,
+  name         TEXT,
+  type         TEXT COLLATE NOCASE,
+  breed        TEXT COLLATE NOCASE,
+  age          TEXT COLLATE NOCASE,
+  size         TEXT COLLATE NOCASE,
+  gender       TEXT COLLATE NOCASE,
+  contact      TEXT,
+  phone        TEXT,
+  photo_url    TEXT,
+  description  TEXT,
+  location     TEXT COLLATE NOCASE,
+  updated_at   TEXT,
+  synced_at    REAL
+);
+CREATE INDEX IF NOT EXISTS idx_catalog_loc_type ON catalog_animals(location, type, updated_at);
+CREATE INDEX IF NOT EXISTS idx_catalog_type ON catalog_animals(type);
+CREATE INDEX IF NOT EXISTS idx_catalog_age ON catalog_animals(age);
+CREATE INDEX IF NOT EXISTS idx_catalog_size ON catalog_animals(size);
+CREATE INDEX IF NOT EXISTS idx_catalog_gender ON catalog_animals(gender);
+CREATE INDEX IF NOT EXISTS idx_catalog_breed ON catalog_animals(breed);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS catalog_fts USING fts5(
+  name, breed, description,
+  content='catalog_animals', content_rowid='rowid'
+);
+
+CREATE TRIGGER IF NOT EXISTS catalog_ai AFTER INSERT ON catalog_animals BEGIN
+  INSERT INTO catalog_fts(rowid, name, breed, description)
+  VALUES (new.rowid, new.name, new.breed, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS catalog_ad AFTER DELETE ON catalog_animals BEGIN
+  INSERT INTO catalog_fts(catalog_fts, rowid, name, breed, description)
+  VALUES ('delete', old.rowid, old.name, old.breed, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS catalog_au AFTER UPDATE ON catalog_animals BEGIN
+  INSERT INTO catalog_fts(catalog_fts, rowid, name, breed, description)
+  VALUES ('delete', old.rowid, old.name, old.breed, old.description);
+  INSERT INTO catalog_fts(rowid, name, breed, description)
+  VALUES (new.rowid, new.name, new.breed, new.description);
+END;
+
+CREATE TABLE IF NOT EXISTS catalog_sync_state (
+  location     TEXT NOT NULL,
+  animal_type  TEXT NOT NULL,
+  watermark    TEXT,
+  last_sync    REAL,
+  PRIMARY KEY (location, animal_type)
+);
+"""
+
+
+def _v3_catalog(con):
+    """catalog mirror + FTS5"""
+    apply_script(con, _V3_CATALOG)
+
+
+_V4_CACHE_WARMING = """
+CREATE TABLE IF NOT EXISTS cache_warm_budget (
+  window_start  INTEGER PRIMARY KEY,   -- epoch วินาที ปัดลงตาม interval
+  budget        INTEGER NOT NULL,
+  used          INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS cache_warm_claims (
+  window_start  INTEGER NOT NULL,
+  key           TEXT NOT NULL,
+  PRIMARY KEY (window_start, key)
+) WITHOUT ROWID;
+"""
+
+
+def _v4_cache_warming(con):
+    """งบ upstream ของตัวอุ่น cache ค้นหายอดนิยม (รวมทุก worker)"""
+    apply_script(con, _V4_CACHE_WARMING)
+
+
+_V5_FAVORITE_CHANGES = """
+CREATE TABLE IF NOT EXISTS favorite_changes (
+  version     INTEGER PRIMARY KEY AUTOINCREMENT,
+  op          TEXT NOT NULL,      -- upsert | delete
+  id          TEXT NOT NULL,
+  changed_at  DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_favorite_changes_id ON favorite_changes(id, version);
+CREATE TRIGGER IF NOT EXISTS favorites_changes_ai AFTER INSERT ON favorites BEGIN
+  INSERT INTO favorite_changes (op, id) VALUES ('upsert', new.id);
+END;
+CREATE TRIGGER IF NOT EXISTS favorites_changes_au AFTER UPDATE ON favorites BEGIN
+  INSERT INTO favorite_changes (op, id)
+  SELECT 'delete', old.id WHERE old.id IS NOT new.id;
+  INSERT INTO favorite_changes (op, id) VALUES ('upsert', new.id);
+END;
+CREATE TRIGGER IF NOT EXISTS favorites_changes_ad AFTER DELETE ON favorites BEGIN
+  INSERT INTO favorite_changes (op, id) VALUES ('delete', old.id);
+END;
+-- เก็บแค่ 10000 รายการล่าสุด client ที่ตามหลังเกินนี้ได้ reset แล้วโหลดใหม่
+CREATE TRIGGER IF NOT EXISTS favorite_changes_prune AFTER INSERT ON favorite_changes BEGIN
+  DELETE FROM favorite_changes WHERE version <= new.version - 10000;
+END;
+"""
+
+_V5_CHANGES_BACKFILL = """
+INSERT INTO favorite_changes (op, id)
+SELECT 'upsert', id FROM favorites ORDER BY created_at, id
+"""
+
+
+def _v5_favorite_changes(con):
+    """change log ของ favorites (ส่วนต่าง ?since= และ SSE)"""
+    apply_script(con, _V5_FAVORITE_CHANGES)
+    con.execute(_V5_CHANGES_BACKFILL)
+
+
+MIGRATIONS = (
+    ("core tables", _v1_core),
+    ("shared worker state", _v2_shared_state),
+    ("catalog mirror", _v3_catalog),
+    ("cache warming budget", _v4_cache_warming),
+    ("favorites change log", _v5_favorite_changes),
+)
+LATEST = len(MIGRATIONS)
+
+
+# ---------- Engine ----------
+def schema_version(con: sqlite3.Connection) -> int:
+    return con.execute("PRAGMA user_version").fetchone()[0]
+
+
+def is_current(con: sqlite3.Connection) -> bool:
+    """True = ตารางทุกส่วนมีครบแล้ว (ส่วนที่สร้างตารางเองข้าม DDL ได้)"""
+    return schema_version(con) >= LATEST
+
+
+def migrate(con: sqlite3.Connection, target: int = LATEST) -> tuple[int, int]:
+    """con ต้องเป็น autocommit (isolation_level=None) คืน (เวอร์ชันเดิม, เวอร์ชันใหม่)"""
+    before = schema_version(con)
+    if before >= target:
+        return before, before
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        before = schema_version(con)  # อีก worker อาจ migrate ไปแล้วระหว่างรอ lock
+        for version in range(before, target):
+            MIGRATIONS[version][1](con)
+            # user_version อยู่ใน header ของไฟล์ → เปลี่ยนพร้อม transaction (rollback ได้)
+            con.execute(f"PRAGMA user_version = {version + 1}")
+        con.execute("COMMIT")
+    except BaseException:
+        con.execute("ROLLBACK")
+        raise
+    return before, max(before, target)
+
+
+def migrate_path(path: str, target: int = LATEST) -> tuple[int, int]:
+    con = sqlite3.connect(path, timeout=30, isolation_level=None)
+    try:
+        if schema_version(con) >= target:
+            return target, target
+        con.execute("PRAGMA journal_mode=WAL")  # ตั้งนอก transaction เท่านั้น
+        started = time.perf_counter()
+        before, after = migrate(con, target)
+        if after != before:
+            print(
+                f"[migrate] {path}: v{before} → v{after} "
+                f"({(time.perf_counter() - started) * 1000:.1f} ms)"
+            )
+        return before, after
+    finally:
+        con.close()
+
+
+if __name__ == "__main__":
+    from .persistence import DB_PATH
+
+    target_path = os.path.abspath(sys.argv[1] if len(sys.argv) > 1 else DB_PATH)
+    print(migrate_path(target_path))
@@ -1,10 +1,18 @@
 # data/persistance.py
-import csv
-import io
+import atexit
+import base64
+import json
 import os
 import sqlite3
+import threading
+import time
+import weakref
 from contextlib import contextmanager
 
+from .export import csv_chunks
+from .metrics import timed
+from .migrations import migrate_path
+
 # อ่าน env แล้วทำเป็น absolute path
 _env_path = os.getenv("PETS_DB_PATH")
 if not _env_path:
@@ -12,9 +20,37 @@ if not _env_path:
     _env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "pets.db")
 DB_PATH = os.path.abspath(_env_path)
 
-SCHEMA = """
-PRAGMA journal_mode=WAL;
+# ตั้งครั้งเดียวต่อ connection (connection อยู่ยาวต่อ thread ไม่ได้เปิดใหม่ทุกครั้งแล้ว)
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-8000",  # ~8 MB
+    "PRAGMA mmap_size=67108864",  # 64 MB
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+)
+STATEMENT_CACHE_SIZE = 256
+
+# db_path ที่รัน SCHEMA ไปแล้วในโปรเซสนี้ (สร้าง manager ซ้ำไม่ต้องรัน DDL ใหม่)
+_initialized_paths: set[str] = set()
+_init_lock = threading.Lock()
 
+FAVORITE_COLUMNS = (
+    "id",
+    "name",
+    "type",
+    "breed",
+    "age",
+    "contact",
+    "photo_url",
+    "phone",
+    "gender",
+    "size",
+    "description",
+    "created_at",
+)
+
+SCHEMA = """
 CREATE TABLE IF NOT EXISTS favorites (
   id           TEXT PRIMARY KEY,
   name         TEXT,
@@ -29,6 +65,7 @@ CREATE TABLE IF NOT EXISTS favorites (
   description  TEXT,
   created_at   DATETIME DEFAULT CURRENT_TIMESTAMP
 );
+CREATE INDEX IF NOT EXISTS idx_favorites_created ON favorites(created_at, id);
 
 CREATE TABLE IF NOT EXISTS search_history (
   id           INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -42,15 +79,156 @@ CREATE TABLE IF NOT EXISTS search_history (
   page         INTEGER,
   created_at   DATETIME DEFAULT CURRENT_TIMESTAMP
 );
+-- created_at เก็บเป็น 'YYYY-MM-DD HH:MM:SS' เรียงแบบข้อความได้ตรงกับเวลา → ใช้ index ได้
+CREATE INDEX IF NOT EXISTS idx_search_history_created ON search_history(created_at, id);
+
+-- จำนวนการค้นหาต่อชุดพารามิเตอร์ ต่อชั่วโมง/วัน (ค่าว่างเก็บเป็น '' ไม่ใช่ NULL เพื่อให้ PK ชนกันได้)
+CREATE TABLE IF NOT EXISTS search_rollups (
+  bucket        TEXT NOT NULL,
+  bucket_start  TEXT NOT NULL,
+  animal_type   TEXT NOT NULL DEFAULT '',
+  location      TEXT NOT NULL DEFAULT '',
+  age           TEXT NOT NULL DEFAULT '',
+  size          TEXT NOT NULL DEFAULT '',
+  gender        TEXT NOT NULL DEFAULT '',
+  breed         TEXT NOT NULL DEFAULT '',
+  count         INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (bucket, bucket_start, animal_type, location, age, size, gender, breed)
+);
+
+CREATE TRIGGER IF NOT EXISTS search_history_rollup AFTER INSERT ON search_history BEGIN
+  INSERT INTO search_rollups
+    (bucket, bucket_start, animal_type, location, age, size, gender, breed, count)
+  VALUES
+    ('hour', strftime('%Y-%m-%d %H:00:00', coalesce(new.created_at, CURRENT_TIMESTAMP)),
+     coalesce(lower(new.animal_type), ''), coalesce(new.location, ''),
+     coalesce(lower(new.age), ''), coalesce(lower(new.size), ''),
+     coalesce(lower(new.gender), ''), coalesce(lower(new.breed), ''), 1),
+    ('day', date(coalesce(new.created_at, CURRENT_TIMESTAMP)),
+     coalesce(lower(new.animal_type), ''), coalesce(new.location, ''),
+     coalesce(lower(new.age), ''), coalesce(lower(new.size), ''),
+     coalesce(lower(new.gender), ''), coalesce(lower(new.breed), ''), 1)
+  ON CONFLICT DO UPDATE SET count = count + 1;
+END;
+"""
+
+# ตัวนับเวอร์ชันต่อตาราง (ใช้ทำ ETag) — เพิ่มทุกครั้งที่แถวเปลี่ยนผ่าน trigger
+# ค่าเริ่มต้นเป็นเวลา ms ตอนสร้าง กัน ETag ซ้ำเมื่อสร้าง DB ใหม่ทับไฟล์เดิม
+VERSIONED_TABLES = ("favorites", "search_history")
+VERSION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS table_versions (
+  name     TEXT PRIMARY KEY,
+  version  INTEGER NOT NULL
+);
+""" + "".join(
+    f"""
+INSERT OR IGNORE INTO table_versions (name, version)
+VALUES ('{t}', CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER));
+CREATE TRIGGER IF NOT EXISTS {t}_version_ai AFTER INSERT ON {t} BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE name = '{t}';
+END;
+CREATE TRIGGER IF NOT EXISTS {t}_version_au AFTER UPDATE ON {t} BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE name = '{t}';
+END;
+CREATE TRIGGER IF NOT EXISTS {t}_version_ad AFTER DELETE ON {t} BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE name = '{t}';
+END;
+"""
+    for t in VERSIONED_TABLES
+)
+
+# บันทึกการเปลี่ยนแปลงของ favorites (version เพิ่มขึ้นเรื่อย ๆ ไม่ใช้ซ้ำแม้แถวถูกตัด)
+# → client ขอเฉพาะส่วนต่าง ?since=<version> หรือฟัง SSE แทนการโหลดทั้งรายการใหม่
+# INSERT OR REPLACE ไม่ยิง trigger DELETE (recursive_triggers ปิด) → ได้ upsert แถวเดียว
+FAVORITE_CHANGES_KEEP = 10_000
+CHANGES_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS favorite_changes (
+  version     INTEGER PRIMARY KEY AUTOINCREMENT,
+  op          TEXT NOT NULL,      -- upsert | delete
+  id          TEXT NOT NULL,
+  changed_at  DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_favorite_changes_id ON favorite_changes(id, version);
+CREATE TRIGGER IF NOT EXISTS favorites_changes_ai AFTER INSERT ON favorites BEGIN
+  INSERT INTO favorite_changes (op, id) VALUES ('upsert', new.id);
+END;
+CREATE TRIGGER IF NOT EXISTS favorites_changes_au AFTER UPDATE ON favorites BEGIN
+  INSERT INTO favorite_changes (op, id)
+  SELECT 'delete', old.id WHERE old.id IS NOT new.id;
+  INSERT INTO favorite_changes (op, id) VALUES ('upsert', new.id);
+END;
+CREATE TRIGGER IF NOT EXISTS favorites_changes_ad AFTER DELETE ON favorites BEGIN
+  INSERT INTO favorite_changes (op, id) VALUES ('delete', old.id);
+END;
+-- เก็บแค่ {FAVORITE_CHANGES_KEEP} รายการล่าสุด client ที่ตามหลังเกินนี้ได้ reset แล้วโหลดใหม่
+CREATE TRIGGER IF NOT EXISTS favorite_changes_prune AFTER INSERT ON favorite_changes BEGIN
+  DELETE FROM favorite_changes WHERE version <= new.version - {FAVORITE_CHANGES_KEEP};
+END;
+"""
+# favorites ที่มีอยู่ก่อนมีตารางนี้ → เป็น upsert ชุดแรก (client ที่เริ่มจาก since=0 ได้ครบ)
+CHANGES_BACKFILL = """
+INSERT INTO favorite_changes (op, id)
+SELECT 'upsert', id FROM favorites ORDER BY created_at, id
 """
 
+ROLLUP_BACKFILL = """
+INSERT INTO search_rollups
+  (bucket, bucket_start, animal_type, location, age, size, gender, breed, count)
+SELECT b.bucket,
+       CASE b.bucket WHEN 'hour' THEN strftime('%Y-%m-%d %H:00:00', h.created_at)
+                     ELSE date(h.created_at) END,
+       coalesce(lower(h.animal_type), ''), coalesce(h.location, ''),
+       coalesce(lower(h.age), ''), coalesce(lower(h.size), ''),
+       coalesce(lower(h.gender), ''), coalesce(lower(h.breed), ''), count(*)
+FROM search_history h, (SELECT 'hour' AS bucket UNION ALL SELECT 'day') b
+WHERE h.created_at IS NOT NULL
+GROUP BY 1, 2, 3, 4, 5, 6, 7, 8
+ON CONFLICT DO UPDATE SET count = excluded.count
+"""
+
+# retention ของประวัติดิบและ rollup (วัน)
+HISTORY_RETENTION_DAYS = int(os.getenv("PETS_HISTORY_RETENTION_DAYS", "90"))
+ROLLUP_RETENTION_DAYS = {"hour": 14, "day": 400}
+
+
+def encode_cursor(created_at, row_id) -> str:
+    raw = json.dumps([created_at, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """คืน (created_at, id) — cursor เสียจะ raise ValueError"""
+    try:
+        pad = "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor + pad))
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+    return created_at, row_id
+
+
+def _timed(fn):
+    # เวลาต่อ method → sqlite_call_duration_seconds{method="..."} ใน /metrics
+    return timed("sqlite_call_duration_seconds", method=fn.__name__)(fn)
+
+
+def _close_manager(ref):
+    manager = ref()
+    if manager is not None:
+        manager.close()
+
 
 class PersistenceManager:
     def __init__(self, db_path: str | None = None, db_name: str | None = None):
         chosen = db_name or db_path or DB_PATH
         self.db_path = os.path.abspath(chosen)
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._registry_lock = threading.Lock()
+        # thread ident -> (thread, connection) ไว้ปิดทั้งหมดตอน shutdown
+        self._connections: dict[int, tuple[threading.Thread, sqlite3.Connection]] = {}
         self._ensure_db_dir()
         self._init_db()
+        atexit.register(_close_manager, weakref.ref(self))
 
     def _ensure_db_dir(self):
         db_dir = os.path.dirname(self.db_path)
@@ -59,125 +237,478 @@ class PersistenceManager:
 
     @contextmanager
     def _conn(self):
-        con = sqlite3.connect(self.db_path, check_same_thread=False)
-        con.row_factory = sqlite3.Row
+        """connection ของ thread นี้ (เปิดครั้งเดียวแล้วใช้ซ้ำ) commit เมื่อจบ block"""
+        con = self._thread_conn()
         try:
             yield con
             con.commit()
-        finally:
-            con.close()
+        except BaseException:
+            con.rollback()
+            raise
+
+    def _thread_conn(self) -> sqlite3.Connection:
+        if os.getpid() != self._pid:
+            # หลัง fork (gunicorn --preload): ห้ามใช้ connection ของโปรเซสแม่
+            self._pid = os.getpid()
+            self._local = threading.local()
+            self._connections = {}
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = self._open()
+            self._local.con = con
+            with self._registry_lock:
+                self._reap_dead_threads()
+                self._connections[threading.get_ident()] = (threading.current_thread(), con)
+        return con
+
+    def _open(self) -> sqlite3.Connection:
+        con = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        con.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            con.execute(pragma)
+        return con
+
+    def _reap_dead_threads(self):
+        # เรียกภายใต้ _registry_lock: ปิด connection ของ thread ที่จบไปแล้ว
+        for ident, (thread, con) in list(self._connections.items()):
+            if not thread.is_alive():
+                del self._connections[ident]
+                try:
+                    con.close()
+                except sqlite3.Error:
+                    pass
+
+    def close(self):
+        """ปิดทุก connection ของ manager นี้ (เรียกอัตโนมัติตอนโปรเซสจบผ่าน atexit)"""
+        if os.getpid() != self._pid:
+            return
+        with self._registry_lock:
+            conns = [con for _, con in self._connections.values()]
+            self._connections = {}
+        self._local = threading.local()
+        for con in conns:
+            try:
+                con.close()
+            except sqlite3.Error:
+                pass
 
     def _init_db(self):
-        with self._conn() as con:
-            con.executescript(SCHEMA)
+        with _init_lock:
+            if self.db_path in _initialized_paths and os.path.exists(self.db_path):
+                return
+            # ไฟล์ที่เป็นเวอร์ชันล่าสุดแล้ว = อ่าน PRAGMA user_version ครั้งเดียว ไม่รัน DDL
+            migrate_path(self.db_path)
+            _initialized_paths.add(self.db_path)
 
     # ---------- Favorites ----------
+    _FAVORITE_INSERT = """INSERT OR REPLACE INTO favorites
+        (id, name, type, breed, age, contact, photo_url, phone, gender, size, description)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+    @staticmethod
+    def _favorite_row(pet) -> tuple:
+        return (
+            str(pet.pet_id),
+            pet.name,
+            pet.pet_type,
+            pet.breed,
+            pet.age,
+            pet.contact,
+            pet.photo_url,
+            getattr(pet, "phone", None),
+            getattr(pet, "gender", None),
+            getattr(pet, "size", None),
+            getattr(pet, "description", None),
+        )
+
+    @_timed
     def add_favorite(self, pet):
         with self._conn() as con:
-            con.execute(
-                """INSERT OR REPLACE INTO favorites
-                (id, name, type, breed, age, contact, photo_url, phone, gender, size, description)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    str(pet.pet_id),
-                    pet.name,
-                    pet.pet_type,
-                    pet.breed,
-                    pet.age,
-                    pet.contact,
-                    pet.photo_url,
-                    getattr(pet, "phone", None),
-                    getattr(pet, "gender", None),
-                    getattr(pet, "size", None),
-                    getattr(pet, "description", None),
-                ),
+            con.execute(self._FAVORITE_INSERT, self._favorite_row(pet))
+
+    @_timed
+    def add_favorites_many(self, pets: list, on_conflict: str = "replace") -> list[dict]:
+        """เพิ่ม/อัปเดตหลายตัวใน transaction เดียว (executemany) คืนผลรายตัว
+
+        on_conflict: "replace" = เขียนทับตัวที่มีอยู่ (upsert), "ignore" = ข้ามตัวที่มีอยู่
+        status ต่อรายการ: created | updated | skipped | duplicate | invalid
+        """
+        if on_conflict not in ("replace", "ignore"):
+            raise ValueError("on_conflict must be 'replace' or 'ignore'")
+        results: list[dict] = []
+        valid: dict[str, tuple] = {}
+        for i, pet in enumerate(pets):
+            pid = getattr(pet, "pet_id", None)
+            if pid is None or str(pid).strip() == "" or not getattr(pet, "name", None):
+                results.append(
+                    {"index": i, "id": pid, "status": "invalid", "error": "id and name required"}
+                )
+                continue
+            pid = str(pid)
+            if pid in valid:
+                results.append({"index": i, "id": pid, "status": "duplicate"})
+                continue
+            valid[pid] = self._favorite_row(pet)
+            results.append({"index": i, "id": pid, "status": None})
+
+        insert = self._FAVORITE_INSERT
+        if on_conflict == "ignore":
+            insert = insert.replace("OR REPLACE", "OR IGNORE", 1)
+        with self._conn() as con:
+            # จองสิทธิ์เขียนก่อน SELECT → ไม่มีใครแทรกระหว่างดู id ที่มีอยู่กับ INSERT
+            con.execute("BEGIN IMMEDIATE")
+            existing = self._existing_favorite_ids(con, list(valid))
+            rows = [
+                row for pid, row in valid.items() if on_conflict == "replace" or pid not in existing
+            ]
+            if rows:
+                con.executemany(insert, rows)
+
+        for r in results:
+            if r["status"] is None:
+                if r["id"] not in existing:
+                    r["status"] = "created"
+                else:
+                    r["status"] = "updated" if on_conflict == "replace" else "skipped"
+        return results
+
+    @_timed
+    def delete_favorites_many(self, pet_ids: list) -> list[dict]:
+        """ลบหลายตัวใน transaction เดียว คืน status ต่อ id: deleted | not_found"""
+        ids = list(dict.fromkeys(str(i) for i in pet_ids))
+        with self._conn() as con:
+            con.execute("BEGIN IMMEDIATE")
+            existing = self._existing_favorite_ids(con, ids)
+            con.executemany(
+                "DELETE FROM favorites WHERE id = ?", [(i,) for i in ids if i in existing]
             )
+        return [{"id": i, "status": "deleted" if i in existing else "not_found"} for i in ids]
 
+    _FAVORITE_IMPORT = """INSERT {verb} INTO favorites
+        (id, name, type, breed, age, contact, photo_url, phone, gender, size, description,
+         created_at)
+        VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?9, ?10, ?11, coalesce(?12, CURRENT_TIMESTAMP))"""
+    _FAVORITE_UPSERT = (
+        _FAVORITE_IMPORT.format(verb="")
+        + """
+        ON CONFLICT(id) DO UPDATE SET
+          name = excluded.name, type = excluded.type, breed = excluded.breed,
+          age = excluded.age, contact = excluded.contact, photo_url = excluded.photo_url,
+          phone = excluded.phone, gender = excluded.gender, size = excluded.size,
+          description = excluded.description, created_at = coalesce(?12, favorites.created_at)"""
+    )
+
+    @_timed
+    def import_favorite_rows(self, rows: list[tuple], on_conflict: str = "replace") -> dict:
+        """นำเข้าแถว (tuple ตาม FAVORITE_COLUMNS) ใน transaction เดียว สำหรับงาน bulk (main.py import)
+
+        ไม่สร้าง Pet/ผลรายตัวเหมือน add_favorites_many คืนแค่จำนวน created/updated/skipped
+        created_at ที่มากับแถวถูกเก็บไว้ (None = ตอนนี้) → export แล้ว import กลับได้ลำดับเดิม
+        """
+        if on_conflict not in ("replace", "ignore"):
+            raise ValueError("on_conflict must be 'replace' or 'ignore'")
+        if not rows:
+            return {"created": 0, "updated": 0, "skipped": 0}
+        if on_conflict == "replace":
+            sql = self._FAVORITE_UPSERT
+        else:
+            sql = self._FAVORITE_IMPORT.format(verb="OR IGNORE")
+        ids = {r[0] for r in rows}
+        with self._conn() as con:
+            existing = self._existing_favorite_ids(con, list(ids))
+            con.executemany(sql, rows)
+        created = len(ids - existing)
+        other = len(rows) - created
+        return {
+            "created": created,
+            "updated": other if on_conflict == "replace" else 0,
+            "skipped": other if on_conflict == "ignore" else 0,
+        }
+
+    @staticmethod
+    def _existing_favorite_ids(con, ids: list[str], chunk: int = 500) -> set[str]:
+        # แบ่งก้อนไม่ให้เกินจำนวน ? สูงสุดที่ SQLite รับได้
+        found: set[str] = set()
+        for start in range(0, len(ids), chunk):
+            part = ids[start : start + chunk]
+            marks = ",".join("?" * len(part))
+            found.update(
+                r[0] for r in con.execute(f"SELECT id FROM favorites WHERE id IN ({marks})", part)
+            )
+        return found
+
+    @_timed
     def list_favorites(self):
         with self._conn() as con:
             rows = con.execute(
-                "SELECT * FROM favorites ORDER BY datetime(created_at) DESC"
+                "SELECT * FROM favorites ORDER BY created_at DESC, id DESC"
             ).fetchall()
         return [dict(r) for r in rows]
 
+    @_timed
+    def list_favorites_page(self, limit: int = 50, cursor: str | None = None):
+        """keyset pagination (ใหม่สุดก่อน) คืน (rows, next_cursor) — next_cursor None = หมดแล้ว"""
+        return self._keyset_page("favorites", limit, cursor)
+
+    @_timed
     def delete_favorite(self, pet_id: str):
         with self._conn() as con:
             con.execute("DELETE FROM favorites WHERE id = ?", (str(pet_id),))
 
+    # ---------- Favorites change log ----------
+    @_timed
+    def favorite_changes_version(self) -> int:
+        """version ล่าสุดของ change log (lookup แถวเดียวใน sqlite_sequence) 0 = ยังไม่มี"""
+        with self._conn() as con:
+            row = con.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = 'favorite_changes'"
+            ).fetchone()
+        return int(row[0]) if row else 0
+
+    @_timed
+    def favorite_changes(self, since: int, limit: int = 500) -> dict:
+        """การเปลี่ยนแปลงหลัง since รวบเหลือรายการล่าสุดต่อ id เรียงตาม version
+
+        คืน {"version", "changes", "more", "reset"}: ขอรอบถัดไปด้วย since=version
+        change = {"version", "op": upsert|delete, "id", "item": แถวปัจจุบัน|None}
+        reset = True → since เก่ากว่าส่วนที่เก็บไว้ (หรือมาจาก DB อื่น) ต้องโหลดทั้งรายการใหม่
+        """
+        since, limit = int(since), max(int(limit), 1)
+        with self._conn() as con:
+            # อ่าน version ก่อน แล้วจำกัด query ไม่เกินนั้น → ไม่ข้ามรายการที่เขียนระหว่างอ่าน
+            row = con.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = 'favorite_changes'"
+            ).fetchone()
+            latest = int(row[0]) if row else 0
+            oldest = con.execute("SELECT min(version) FROM favorite_changes").fetchone()[0]
+            floor = oldest - 1 if oldest is not None else latest
+            if since < floor or since > latest:
+                return {"version": latest, "changes": [], "more": False, "reset": True}
+            rows = con.execute(
+                """SELECT c.version AS change_version, c.id AS change_id, f.*
+                FROM favorite_changes c LEFT JOIN favorites f ON f.id = c.id
+                WHERE c.version > ? AND c.version <= ?
+                  AND NOT EXISTS (SELECT 1 FROM favorite_changes n
+                                  WHERE n.id = c.id AND n.version > c.version)
+                ORDER BY c.version LIMIT ?""",
+                (since, latest, limit + 1),
+            ).fetchall()
+        more = len(rows) > limit
+        changes = []
+        for r in rows[:limit]:
+            item = {k: r[k] for k in FAVORITE_COLUMNS} if r["id"] is not None else None
+            changes.append(
+                {
+                    "version": r["change_version"],
+                    "op": "upsert" if item is not None else "delete",
+                    "id": r["change_id"],
+                    "item": item,
+                }
+            )
+        version = changes[-1]["version"] if more else latest
+        return {"version": version, "changes": changes, "more": more, "reset": False}
+
+    def iter_favorite_chunks(self, chunk_size: int = 1000):
+        """yield favorites เป็นก้อนละ chunk_size แถว (tuple ตาม FAVORITE_COLUMNS)
+
+        ใช้ connection แยก (อ่านอย่างเดียว) ตลอดการสตรีม → ได้ snapshot เดียวจาก WAL
+        และไม่ไปค้าง transaction ของ connection หลักใน thread นี้
+        """
+        con = self._open()
+        try:
+            con.row_factory = None
+            con.execute("PRAGMA query_only=ON")
+            cur = con.execute(
+                f"SELECT {', '.join(FAVORITE_COLUMNS)} FROM favorites"
+                " ORDER BY created_at DESC, id DESC"
+            )
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            con.close()
+
+    @_timed
     def export_csv_bytes(self) -> bytes:
-        rows = self.list_favorites()
-        if not rows:
-            header = [
-                "id",
-                "name",
-                "type",
-                "breed",
-                "age",
-                "contact",
-                "photo_url",
-                "phone",
-                "gender",
-                "size",
-                "description",
-                "created_at",
-            ]
-            buf = io.StringIO()
-            csv.writer(buf).writerow(header)
-            return buf.getvalue().encode("utf-8")
-
-        header = list(rows[0].keys())
-        buf = io.StringIO()
-        w = csv.DictWriter(buf, fieldnames=header)
-        w.writeheader()
-        for r in rows:
-            w.writerow(r)
-        return buf.getvalue().encode("utf-8")
+        return b"".join(csv_chunks(FAVORITE_COLUMNS, self.iter_favorite_chunks()))
 
     # ---------- Search History ----------
+    _HISTORY_INSERT = """INSERT INTO search_history
+        (animal_type, location, age, size, breed, gender, per_page, page, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, coalesce(?, CURRENT_TIMESTAMP))"""
+
+    @staticmethod
+    def _history_row(params: dict) -> tuple:
+        return (
+            params.get("animal_type"),
+            params.get("location"),
+            params.get("age"),
+            params.get("size"),
+            params.get("breed"),
+            params.get("gender"),
+            int(params.get("per_page", 0) or 0),
+            int(params.get("page", 1) or 1),
+            params.get("created_at"),
+        )
+
+    @_timed
     def add_search_history(self, params: dict):
         with self._conn() as con:
-            con.execute(
-                """INSERT INTO search_history
-                (animal_type, location, age, size, breed, gender, per_page, page)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    params.get("animal_type"),
-                    params.get("location"),
-                    params.get("age"),
-                    params.get("size"),
-                    params.get("breed"),
-                    params.get("gender"),
-                    int(params.get("per_page", 0) or 0),
-                    int(params.get("page", 1) or 1),
-                ),
-            )
+            con.execute(self._HISTORY_INSERT, self._history_row(params))
+
+    @_timed
+    def add_search_history_many(self, records: list[dict]) -> int:
+        """insert หลายแถวใน transaction เดียว (ใช้โดย HistoryWriter)"""
+        if not records:
+            return 0
+        rows = [self._history_row(r) for r in records]
+        with self._conn() as con:
+            con.executemany(self._HISTORY_INSERT, rows)
+        return len(rows)
 
+    @_timed
     def list_search_history(self, limit: int = 50):
         with self._conn() as con:
             rows = con.execute(
-                "SELECT * FROM search_history ORDER BY datetime(created_at) DESC LIMIT ?",
+                "SELECT * FROM search_history ORDER BY created_at DESC, id DESC LIMIT ?",
                 (limit,),
             ).fetchall()
         return [dict(r) for r in rows]
 
+    @_timed
+    def list_search_history_page(self, limit: int = 50, cursor: str | None = None):
+        return self._keyset_page("search_history", limit, cursor)
+
+    def _keyset_page(self, table: str, limit: int, cursor: str | None):
+        # ตาราง/คอลัมน์มาจากโค้ดเท่านั้น (ไม่ใช่ input ผู้ใช้) ใช้ index (created_at, id)
+        limit = max(int(limit), 1)
+        sql = f"SELECT * FROM {table}"
+        args: list = []
+        if cursor:
+            sql += " WHERE (created_at, id) < (?, ?)"
+            args.extend(decode_cursor(cursor))
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        args.append(limit + 1)
+        with self._conn() as con:
+            rows = [dict(r) for r in con.execute(sql, args).fetchall()]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+        return rows, next_cursor
+
+    @_timed
+    def table_version(self, table: str) -> int:
+        """อ่านตัวนับเวอร์ชัน (lookup แถวเดียว) — ใช้ทำ ETag โดยไม่ต้อง query ข้อมูลจริง"""
+        with self._conn() as con:
+            row = con.execute(
+                "SELECT version FROM table_versions WHERE name = ?", (table,)
+            ).fetchone()
+        return row["version"] if row else 0
+
+    @_timed
     def clear_search_history(self):
         with self._conn() as con:
             con.execute("DELETE FROM search_history")
+            con.execute("DELETE FROM search_rollups")
+
+    @_timed
+    def top_searches(self, n: int = 10, bucket: str = "day", span: int = 7):
+        """ชุดค้นหายอดนิยมจาก rollup (ไม่สแกนประวัติดิบ)
+
+        bucket = 'hour' | 'day', span = จำนวน bucket ย้อนหลังรวมปัจจุบัน
+        """
+        if bucket not in ROLLUP_RETENTION_DAYS:
+            raise ValueError("bucket must be 'hour' or 'day'")
+        unit = "hours" if bucket == "hour" else "days"
+        fmt = "%Y-%m-%d %H:00:00" if bucket == "hour" else "%Y-%m-%d"
+        with self._conn() as con:
+            rows = con.execute(
+                f"""SELECT animal_type, location, age, size, gender, breed,
+                       sum(count) AS count
+                FROM search_rollups
+                WHERE bucket = ? AND bucket_start >= strftime('{fmt}', 'now', ?)
+                GROUP BY animal_type, location, age, size, gender, breed
+                ORDER BY count DESC
+                LIMIT ?""",
+                (bucket, f"-{max(int(span), 1) - 1} {unit}", int(n)),
+            ).fetchall()
+        return [{k: (r[k] or None) if k != "count" else r[k] for k in r.keys()} for r in rows]
+
+    @_timed
+    def compact_search_history(
+        self,
+        max_age_days: int | None = None,
+        max_rows: int | None = None,
+        chunk_size: int = 500,
+        pause: float = 0.01,
+    ) -> int:
+        """ลบประวัติดิบที่เก่ากว่า max_age_days (และเกิน max_rows) ทีละ chunk
+
+        แต่ละ chunk เป็น transaction สั้น ๆ แยกกัน แล้วพักเล็กน้อยให้ writer อื่นได้ lock
+        rollup ไม่ถูกลดค่า — เก็บสรุปไว้ต่อ แล้วตัด rollup เก่าตาม ROLLUP_RETENTION_DAYS
+        """
+        days = HISTORY_RETENTION_DAYS if max_age_days is None else int(max_age_days)
+        deleted = 0
+        conditions = []
+        if days > 0:
+            conditions.append(("created_at < datetime('now', ?)", (f"-{days} days",)))
+        if max_rows:
+            with self._conn() as con:
+                row = con.execute(
+                    "SELECT created_at, id FROM search_history ORDER BY created_at DESC, id DESC"
+                    " LIMIT 1 OFFSET ?",
+                    (int(max_rows),),
+                ).fetchone()
+            if row is not None:
+                # created_at ละเอียดแค่วินาที (writer flush ทั้งก้อนด้วยเวลาเดียวกัน)
+                # → ตัดตามลำดับ (created_at, id) เดียวกับที่ใช้นับ ไม่ลบแถวที่เวลาเท่ากันแต่อยู่ใน max_rows
+                conditions.append(("(created_at, id) <= (?, ?)", (row["created_at"], row["id"])))
+
+        for where, args in conditions:
+            while True:
+                with self._conn() as con:
+                    cur = con.execute(
+                        f"""DELETE FROM search_history WHERE id IN (
+                              SELECT id FROM search_history WHERE {where}
+                              ORDER BY created_at, id LIMIT ?)""",
+                        (*args, int(chunk_size)),
+                    )
+                deleted += cur.rowcount
+                if cur.rowcount < chunk_size:
+                    break
+                time.sleep(pause)
+
+        with self._conn() as con:
+            for bucket, keep_days in ROLLUP_RETENTION_DAYS.items():
+                con.execute(
+                    "DELETE FROM search_rollups WHERE bucket = ?"
+                    " AND bucket_start < datetime('now', ?)",
+                    (bucket, f"-{keep_days} days"),
+                )
+        return deleted
 
     # ---------- Compatibility alias for legacy tests ----------
     # ต้องคืน list ของ tuple โดยให้ index 2 = name ตามที่เทสต์คาด
+    @_timed
     def get_favorites(self):
         with self._conn() as con:
             rows = con.execute(
-                "SELECT * FROM favorites ORDER BY datetime(created_at) DESC"
+                "SELECT * FROM favorites ORDER BY created_at DESC, id DESC"
             ).fetchall()
         out = []
         for r in rows:
             out.append(
                 (
-                    r["id"],         # 0
-                    r["type"],       # 1
-                    r["name"],       # 2  <-- เทสต์เช็คตรงนี้
+                    r["id"],  # 0
+                    r["type"],  # 1
+                    r["name"],  # 2  <-- เทสต์เช็คตรงนี้
                     r["breed"],
                     r["age"],
                     r["contact"],
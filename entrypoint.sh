@@ -6,5 +6,15 @@ mkdir -p /data
 # กำหนดสิทธิ์ให้ appuser ทุกครั้งที่คอนเทนเนอร์เริ่ม
 chown -R appuser:appuser /data
 
+# APP_MODE=asgi → uvicorn worker (ต้อง build ด้วย WITH_ASYNC=1)
+if [ "${APP_MODE:-wsgi}" = "asgi" ]; then
+  CMD='gunicorn --preload -w 3 -k uvicorn.workers.UvicornWorker -b 0.0.0.0:8000 asgi:app'
+else
+  CMD='gunicorn --preload -w 3 -b 0.0.0.0:8000 app:app'
+fi
+
+# migrate pets.db ครั้งเดียวก่อนเปิด worker (worker เจอ user_version ล่าสุดแล้วข้าม DDL)
+su -s /bin/sh -c 'python -m data.migrations' appuser
+
 # รัน gunicorn ภายใต้ user ปกติ
-exec su -s /bin/sh -c 'gunicorn -w 3 -b 0.0.0.0:8000 app:app' appuser
+exec su -s /bin/sh -c "$CMD" appuser
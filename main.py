@@ -1,52 +1,169 @@
-from controllers.app_controller import AppController
-
-
-def main():
-    app = AppController()  # token=None → mock data
-
-    while True:
-        print("\n🐾 Pet Adoption Explorer 🐾")
-        print("1. Search Pets")
-        print("2. View Favorites")
-        print("3. Export Favorites")
-        print("4. Exit")
-        choice = input("Choose an option: ")
-
-        if choice == "1":
-            animal_type = input("Enter animal type (dog/cat): ")
-            location = input("Enter location: ")
-            pets = app.search_pets(animal_type, location)
-
-            for idx, pet in enumerate(pets, 1):
-                print(f"{idx}. {pet} - Contact: {pet.contact}")
-
-            pick = input("Enter number to save as favorite (or press Enter to skip): ")
-            if pick.isdigit() and 1 <= int(pick) <= len(pets):
-                app.save_favorite(pets[int(pick) - 1])
-                print("✅ Saved to favorites!")
-
-        elif choice == "2":
-            favorites = app.view_favorites()
-            if not favorites:
-                print("No favorites yet.")
-            else:
-                for fav in favorites:
-                    print(
-                        f"ID: {fav[1]} - {fav[2]} ({fav[3]}, {fav[4]}, {fav[5]}) Contact: {fav[6]}"
-                    )
-                delete_id = input("Enter pet_id to delete (or press Enter to skip): ")
-                if delete_id:
-                    app.delete_favorite(delete_id)
-                    print("❌ Favorite deleted.")
-
-        elif choice == "3":
-            app.export_favorites()
-            print("📁 Favorites exported to favorites.json")
-
-        elif choice == "4":
-            print("Bye!")
-            break
+# main.py
+"""CLI สำหรับงาน bulk (ใช้จาก cron ได้: ไม่ถามอะไร, สรุปเป็น JSON บรรทัดเดียวทาง stdout, exit code)
+
+    python main.py import favorites.csv                 # CSV/NDJSON (.gz ได้, - = stdin)
+    python main.py export -o /data/backup/favorites.ndjson.gz
+    python main.py snapshot --locations 10001,90210 --types dog,cat --out /data/snapshots/today
+
+ความคืบหน้า + อัตราต่อวินาทีพิมพ์ลง stderr ทุก --progress-every วินาที (--quiet = ปิด)
+exit code: 0 = สำเร็จ, 1 = มีแถวที่นำเข้าไม่ได้ / snapshot บางคู่ยังไม่เสร็จ (รันซ้ำเพื่อทำต่อ), 2 = ใช้ผิด
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from dotenv import load_dotenv
+
+from data.bulk import FORMATS, Progress, export_favorites, import_favorites
+from data.persistence import DB_PATH, PersistenceManager
+
+
+def _split(value: str | None) -> list[str]:
+    return [x.strip() for x in (value or "").split(",") if x.strip()]
+
+
+def _db(args):
+    # PersistenceManager migrate pets.db ก่อน → ตารางของทุกส่วนพร้อมใช้
+    return PersistenceManager(db_path=args.db)
+
+
+def _petfinder(db_path: str):
+    """PetFinderAPI ที่ใช้ token/breaker/rate limit ร่วมกับเว็บผ่าน pets.db
+
+    cache ผลค้นหาอยู่ในโปรเซสเท่านั้น → snapshot หลายพันหน้าไม่ไล่ cache ที่เว็บใช้อยู่ออก
+    """
+    from api.breaker import CircuitBreaker
+    from api.cache import SearchCache
+    from api.petfinder import PetFinderAPI
+    from api.rate_limit import TokenBucket
+    from api.token_store import TokenStore
+
+    return PetFinderAPI(
+        cache=SearchCache(ttl=0, maxsize=1),
+        token_store=TokenStore(shared_path=db_path),
+        breaker=CircuitBreaker.from_env(shared_path=db_path),
+        limiter=TokenBucket.from_env(shared_path=db_path),
+    )
+
+
+# ---------- Commands ----------
+def cmd_import(args, progress: Progress) -> int:
+    db = _db(args)
+    summary = import_favorites(
+        db,
+        args.path,
+        fmt=args.format,
+        batch_size=args.batch_size,
+        on_conflict=args.on_conflict,
+        progress=progress,
+    )
+    for error in summary["errors"]:
+        print(f"[import] skipped {error}", file=sys.stderr)
+    print(json.dumps({"command": "import", **summary}))
+    return 1 if summary.get("invalid") else 0
+
+
+def cmd_export(args, progress: Progress) -> int:
+    db = _db(args)
+    summary = export_favorites(
+        db,
+        args.output,
+        fmt=args.format,
+        compress=True if args.gzip else None,
+        chunk_size=args.batch_size,
+        progress=progress,
+    )
+    # stdout เป็นข้อมูลอยู่แล้ว → สรุปไป stderr แทน
+    print(
+        json.dumps({"command": "export", **summary}),
+        file=sys.stderr if args.output == "-" else sys.stdout,
+    )
+    return 0
+
+
+def cmd_snapshot(args, progress: Progress) -> int:
+    from api.snapshot import Snapshot
+
+    db = _db(args)
+    api = _petfinder(db.db_path)
+    if api.mock_mode:
+        print(
+            "[warn] no Petfinder credentials: snapshot reads the synthetic mock catalog",
+            file=sys.stderr,
+        )
+    snapshot = Snapshot(
+        api,
+        args.out,
+        locations=_split(args.locations or os.getenv("PETFINDER_MIRROR_LOCATIONS", "10001")),
+        types=_split(args.types or os.getenv("PETFINDER_MIRROR_TYPES", "dog,cat")),
+        per_page=args.per_page,
+        max_items=args.max_items,
+        workers=args.workers,
+        read_ahead=args.read_ahead,
+        checkpoint_every=args.checkpoint_every,
+        progress=progress,
+    )
+    try:
+        result = snapshot.run(fresh=args.fresh)
+    finally:
+        api.close()
+    print(json.dumps({"command": "snapshot", **progress.summary(), **result}))
+    return 1 if any("error" in p for p in result["pairs"]) else 0
+
+
+# ---------- CLI ----------
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description="Pet Adoption Explorer bulk tools")
+    ap.add_argument("--db", help="SQLite path (default PETS_DB_PATH)")
+    ap.add_argument("--progress-every", type=float, default=2.0, metavar="SECS")
+    ap.add_argument("--quiet", action="store_true", help="no progress lines on stderr")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import", help="stream favorites from CSV/NDJSON into pets.db")
+    p.add_argument("path", help="file (.csv/.ndjson/.jsonl, optionally .gz) or - for stdin")
+    p.add_argument("--format", choices=("auto",) + FORMATS, default="auto")
+    p.add_argument("--batch-size", type=int, default=5000, help="rows per transaction")
+    p.add_argument("--on-conflict", choices=("replace", "ignore"), default="replace")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("export", help="stream all favorites to CSV/NDJSON")
+    p.add_argument("-o", "--output", default="-", help="file (.gz = gzip) or - for stdout")
+    p.add_argument("--format", choices=FORMATS, help="default: from the file name, csv for -")
+    p.add_argument("--gzip", action="store_true", help="compress even without .gz")
+    p.add_argument("--batch-size", type=int, default=5000, help="rows per read")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("snapshot", help="save search results for many locations/types")
+    p.add_argument("--out", required=True, help="output directory (holds checkpoint.json)")
+    p.add_argument("--locations", help="comma separated, default PETFINDER_MIRROR_LOCATIONS")
+    p.add_argument("--types", help="comma separated, default PETFINDER_MIRROR_TYPES")
+    p.add_argument("--per-page", type=int, default=100)
+    p.add_argument("--max-items", type=int, help="per location/type pair")
+    p.add_argument("--workers", type=int, default=4, help="pairs fetched in parallel")
+    p.add_argument("--read-ahead", type=int, default=2, help="pages prefetched per pair")
+    p.add_argument("--checkpoint-every", type=int, default=500, help="animals per checkpoint")
+    p.add_argument("--fresh", action="store_true", help="ignore an existing checkpoint")
+    p.set_defaults(func=cmd_snapshot)
+    return ap
+
+
+def main(argv=None) -> int:
+    load_dotenv()  # CLI แยกจากแอป → โหลด .env เอง (PETFINDER_API_KEY, PETS_DB_PATH)
+    args = build_parser().parse_args(argv)
+    args.db = os.path.abspath(args.db or os.getenv("PETS_DB_PATH") or DB_PATH)
+    progress = Progress(args.command, every=args.progress_every, quiet=args.quiet)
+    try:
+        return args.func(args, progress)
+    except BrokenPipeError:
+        # export ... | head: ปลายทางปิดก่อน → เงียบไว้ ไม่ให้ Python พิมพ์ error ตอนปิด stdout
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"[error] {args.command}: {e}", file=sys.stderr)
+        return 1
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,9 +1,26 @@
 # models/pet.py
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass, fields
+from operator import attrgetter
 from typing import Optional
 
+# key ใน JSON ของ API → ชื่อ attribute ของ Pet (เรียงตามลำดับที่ส่งออก)
+API_FIELDS = (
+    ("id", "pet_id"),
+    ("name", "name"),
+    ("type", "pet_type"),
+    ("breed", "breed"),
+    ("age", "age"),
+    ("contact", "contact"),
+    ("photo_url", "photo_url"),
+    ("phone", "phone"),
+    ("gender", "gender"),
+    ("size", "size"),
+    ("description", "description"),
+)
+API_KEYS = tuple(k for k, _ in API_FIELDS)
 
-@dataclass
+
+@dataclass(slots=True)
 class Pet:
     pet_id: str
     name: str
@@ -18,9 +35,44 @@ class Pet:
     description: Optional[str] = None
 
     def to_dict(self):
-        return asdict(self)
+        # ทุก field เป็นค่า scalar → ไม่ต้อง deep copy แบบ asdict
+        return dict(zip(FIELD_NAMES, _get_fields(self), strict=True))
+
+    def to_api_dict(self):
+        """รูปแบบเดียวกับที่ endpoint ส่งออก (id/type แทน pet_id/pet_type)"""
+        return to_api_dict(self)
+
+    @classmethod
+    def from_api_dict(cls, d: dict):
+        get = d.get
+        return cls(
+            get("id"),
+            get("name"),
+            get("type"),
+            get("breed"),
+            get("age"),
+            get("contact"),
+            get("photo_url"),
+            get("phone"),
+            get("gender"),
+            get("size"),
+            get("description"),
+        )
 
     def __str__(self):
         b = self.breed or "Mixed"
         a = self.age or "Unknown"
         return f"{self.name} ({b}, {a})"
+
+
+# getter ที่คอมไพล์ไว้ครั้งเดียว (attrgetter ทำงานในระดับ C ดึงทุก field ในครั้งเดียว)
+FIELD_NAMES = tuple(f.name for f in fields(Pet))
+_get_fields = attrgetter(*FIELD_NAMES)
+_get_api_values = attrgetter(*(attr for _, attr in API_FIELDS))
+
+
+def to_api_dict(item) -> dict:
+    """serializer กลางของทุก endpoint: รับ Pet หรือ dict รูปแบบ API อยู่แล้ว"""
+    if isinstance(item, dict):
+        return item
+    return dict(zip(API_KEYS, _get_api_values(item), strict=True))
@@ -16,27 +16,49 @@ function setupFilters(){
   });
 }
 
+const FAVORITES_PAGE_SIZE = 60;
+const CHANGES_POLL_MS = 15000;
+let favorites = [];
+// version ของ change log ที่รายการในหน้านี้ตามทันแล้ว (จาก header X-Favorites-Version)
+let favoritesVersion = null;
+// server บอกผ่าน X-Favorites-Events: sse ว่าเปิดสตรีมได้โดยไม่ถือทั้ง worker (ไม่งั้น poll)
+let favoritesEvents = false;
+let favoritesFeed = null;
+let changesTimer = null;
+
+// โหลดทีละหน้า (keyset cursor) แล้วเรนเดอร์ต่อท้ายทันที ไม่ต้องรอทั้งรายการ
+// เบราว์เซอร์ส่ง If-None-Match ให้เอง → ถ้ารายการไม่เปลี่ยนได้ 304 แทบไม่มีต้นทุน
 async function loadFavorites(){
   const listEl = document.getElementById('favorites-list');
-  const emptyEl = document.getElementById('empty-favorites');
   const loading = document.getElementById('loading');
   try{
     loading?.classList.remove('hidden');
-    const res = await fetch('/api/favorites');
-    const data = await res.json();
-    loading?.classList.add('hidden');
+    stopChanges();
+    favorites = [];
+    favoritesVersion = null;
+    listEl.innerHTML = '';
+    let cursor = null;
+    do{
+      const q = new URLSearchParams({ limit: String(FAVORITES_PAGE_SIZE) });
+      if(cursor) q.set('cursor', cursor);
+      const res = await fetch(`/api/favorites?${q.toString()}`);
+      if(!res.ok) throw new Error(res.status);
+      if(favoritesVersion === null){
+        const version = parseInt(res.headers.get('X-Favorites-Version'), 10);
+        favoritesVersion = Number.isNaN(version) ? null : version;
+        favoritesEvents = res.headers.get('X-Favorites-Events') === 'sse';
+      }
+      const data = await res.json();
+      const items = data.items || [];
+      favorites.push(...items);
+      appendFavorites(items);
+      loading?.classList.add('hidden');
+      cursor = data.next_cursor;
+    }while(cursor);
 
-    if(Array.isArray(data) && data.length){
-      renderFavorites(data);
-      emptyEl?.classList.add('hidden');
-      listEl?.classList.remove('hidden');
-      updateStats(data);
-    }else{
-      listEl.innerHTML = '';
-      emptyEl?.classList.remove('hidden');
-      listEl?.classList.add('hidden');
-      updateStats([]);
-    }
+    updateEmptyState();
+    updateStats(favorites);
+    watchChanges();
   }catch(e){
     console.error(e);
     loading?.classList.add('hidden');
@@ -44,10 +66,90 @@ async function loadFavorites(){
   }
 }
 
+function updateEmptyState(){
+  const listEl = document.getElementById('favorites-list');
+  const emptyEl = document.getElementById('empty-favorites');
+  emptyEl?.classList.toggle('hidden', favorites.length > 0);
+  listEl?.classList.toggle('hidden', favorites.length === 0);
+}
+
+// ---------- Change feed ----------
+// หลังโหลดครั้งแรก รับแค่ส่วนต่าง (?since= ทุก CHANGES_POLL_MS หรือ SSE ถ้า server รองรับ)
+// แล้วแก้การ์ดทีละใบ ไม่โหลดทั้งรายการใหม่
+function watchChanges(){
+  if(favoritesVersion === null) return;
+  if(!favoritesEvents || !('EventSource' in window)){
+    changesTimer = setTimeout(pollChanges, CHANGES_POLL_MS);
+    return;
+  }
+  favoritesFeed = new EventSource(`/api/favorites/events?since=${favoritesVersion}`);
+  const onChange = e => applyChange(JSON.parse(e.data));
+  favoritesFeed.addEventListener('upsert', onChange);
+  favoritesFeed.addEventListener('delete', onChange);
+  favoritesFeed.addEventListener('reset', () => loadFavorites());
+  favoritesFeed.onerror = () => {
+    // CONNECTING = เบราว์เซอร์ต่อใหม่เอง (ส่ง Last-Event-ID ให้); CLOSED = เช่นได้ 204/503 → poll แทน
+    if(favoritesFeed?.readyState === EventSource.CLOSED){
+      favoritesFeed = null;
+      changesTimer = setTimeout(pollChanges, CHANGES_POLL_MS);
+    }
+  };
+}
+
+function stopChanges(){
+  favoritesFeed?.close();
+  favoritesFeed = null;
+  clearTimeout(changesTimer);
+}
+
+async function pollChanges(){
+  try{
+    let more = true;
+    while(more){
+      const res = await fetch(`/api/favorites/changes?since=${favoritesVersion}`);
+      if(!res.ok) throw new Error(res.status);
+      const delta = await res.json();
+      if(delta.reset) return loadFavorites();
+      delta.changes.forEach(applyChange);
+      favoritesVersion = delta.version;
+      more = delta.more;
+    }
+  }catch(e){
+    console.error(e);
+  }
+  changesTimer = setTimeout(pollChanges, CHANGES_POLL_MS);
+}
+
+function applyChange(change){
+  const id = String(change.id);
+  favorites = favorites.filter(p => String(p.id) !== id);
+  document.querySelectorAll('#favorites-list .pet-card').forEach(c => {
+    if(c.dataset.petId === id) c.remove();
+  });
+  if(change.op === 'upsert' && change.item){
+    // upsert = แถวใหม่ล่าสุด (created_at ใหม่) → อยู่บนสุดเหมือนลำดับของ /api/favorites
+    favorites.unshift(change.item);
+    const card = createFavoriteCard(change.item);
+    document.getElementById('favorites-list')?.prepend(card);
+    const active = document.querySelector('.filter-btn.active')?.getAttribute('data-filter');
+    if(active) filterFavorites(active);
+  }
+  favoritesVersion = Math.max(favoritesVersion ?? 0, change.version);
+  updateEmptyState();
+  updateStats(favorites);
+}
+
 function renderFavorites(pets){
   const listEl = document.getElementById('favorites-list');
   listEl.innerHTML = '';
-  pets.forEach(p => listEl.appendChild(createFavoriteCard(p)));
+  appendFavorites(pets);
+}
+
+function appendFavorites(pets){
+  const listEl = document.getElementById('favorites-list');
+  const frag = document.createDocumentFragment();
+  pets.forEach(p => frag.appendChild(createFavoriteCard(p)));
+  listEl.appendChild(frag);
 }
 
 function createFavoriteCard(pet){
@@ -71,6 +173,7 @@ function createFavoriteCard(pet){
       </div>
     </div>
   `;
+  card.dataset.petId = pet.id;
   card.querySelector('.btn-remove').addEventListener('click', ()=> removeFavorite(pet.id, pet.name));
   return card;
 }
@@ -81,7 +184,13 @@ async function removeFavorite(petId, name){
     const res = await fetch(`/api/favorites/${encodeURIComponent(petId)}`, { method: 'DELETE' });
     if(!res.ok) throw new Error('delete failed');
     showMessage('Removed from favorites','info');
-    loadFavorites();
+    // ลบการ์ดในหน้าเลย ไม่ต้องโหลดทั้งรายการใหม่
+    favorites = favorites.filter(p => String(p.id) !== String(petId));
+    document.querySelectorAll('#favorites-list .pet-card').forEach(c => {
+      if(c.dataset.petId === String(petId)) c.remove();
+    });
+    updateEmptyState();
+    updateStats(favorites);
   }catch(e){
     console.error(e);
     showMessage('Error removing favorite','error');
@@ -0,0 +1,27 @@
+from api.petfinder import PetFinderAPI
+from api.token_store import TokenStore
+from benchmarks._common import percentiles
+from benchmarks.compare import flatten
+from benchmarks.stub_petfinder import StubPetfinder
+
+
+def test_petfinder_client_against_stub(tmp_path):
+    with StubPetfinder(total=50) as stub:
+        api = PetFinderAPI(
+            "key",
+            "secret",
+            base_url=stub.base_url,
+            token_store=TokenStore(shared_path=str(tmp_path / "t.db")),
+        )
+        res = api.search_animals("cat", "10001", per_page=5, page=2, as_json=True)
+        assert res["page"] == 2 and res["total_pages"] == 4
+        assert [it["type"] for it in res["items"]] == ["Cat"] * 5
+        assert stub.counts == {"token": 1, "animals": 1, "errors": 0, "throttled": 0}
+        api.close()
+
+
+def test_percentiles_and_flatten():
+    p = percentiles([i / 1000 for i in range(1, 101)])
+    assert p == {"p50": 50.0, "p95": 95.0, "p99": 99.0}
+    flat = flatten({"runs": [{"scenario": "search", "concurrency": 4, "p99": 3.1}]})
+    assert flat["runs.search.c4.p99"] == 3.1
@@ -0,0 +1,120 @@
+import time
+
+import pytest
+
+from api.breaker import CircuitBreaker
+from api.petfinder import PetFinderAPI
+from api.rate_limit import RateLimited, TokenBucket, parse_retry_after
+from api.token_store import TokenStore
+from benchmarks.stub_petfinder import StubPetfinder
+
+
+def test_breaker_opens_probes_and_closes(tmp_path):
+    path = str(tmp_path / "b.db")
+    a = CircuitBreaker(failure_threshold=2, reset_timeout=0.05, shared_path=path)
+    b = CircuitBreaker(failure_threshold=2, reset_timeout=0.05, shared_path=path)  # worker อื่น
+    a.record_failure("boom")
+    assert b.allow()
+    a.record_failure("boom")
+    assert not b.allow() and b.snapshot()["state"] == "open"
+
+    time.sleep(0.06)
+    assert b.allow()  # b ได้เป็นผู้ลอง (half-open)
+    assert not a.allow()  # ระหว่าง probe คนอื่นยังถูกปฏิเสธ
+    b.record_failure("still down")
+    assert a.snapshot()["state"] == "open" and a.snapshot()["opened"] == 2
+
+    time.sleep(0.06)
+    assert a.allow()
+    a.record_success()
+    assert b.snapshot()["state"] == "closed" and b.allow()
+
+
+def test_token_bucket_and_retry_after(tmp_path):
+    bucket = TokenBucket(rate=1, burst=2, shared_path=str(tmp_path / "r.db"))
+    assert bucket.acquire() and bucket.acquire()
+    assert not bucket.acquire(max_wait=0)
+    bucket.block_for(30)
+    assert not bucket.acquire(max_wait=1)
+    assert bucket.stats()["blocked_for"] > 29
+
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now=1445412470) == 10
+    assert parse_retry_after("soon") is None
+
+
+def test_shared_bucket_leases_tokens_in_batches(tmp_path):
+    path = str(tmp_path / "r.db")
+    # rate ต่ำมาก → แทบไม่เติมระหว่างเทสต์ นับโควตาได้ตรง ๆ
+    a = TokenBucket(rate=0.01, burst=30, shared_path=path, lease=10)
+    b = TokenBucket(rate=0.01, burst=30, shared_path=path, lease=10)
+    assert all(a.acquire() for _ in range(10))
+    assert a.stats()["leases"] == 1  # 10 รีเควส = เขียนถังกลางครั้งเดียว
+    assert b.stats()["tokens"] == 20
+
+    granted = 0
+    while (a if granted % 2 else b).acquire():
+        granted += 1
+    assert granted == 20  # สองโปรเซสรวมกันไม่เกินโควตาของถังกลาง
+
+    c = TokenBucket(rate=100, burst=100, shared_path=str(tmp_path / "c.db"), lease=10)
+    assert c.acquire() and c.stats()["leased"] == 9
+    c.block_for(30)
+    assert c.stats()["leased"] == 0 and not c.acquire()
+
+
+def _api(tmp_path, stub, **kw):
+    return PetFinderAPI(
+        "key",
+        "secret",
+        base_url=stub.base_url,
+        token_store=TokenStore(shared_path=str(tmp_path / "t.db")),
+        breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60),
+        limiter=TokenBucket(rate=100, burst=100),
+        **kw,
+    )
+
+
+def test_slow_upstream_trips_breaker_and_fails_fast(tmp_path, monkeypatch):
+    monkeypatch.setenv("PETFINDER_LATENCY_BUDGET", "0.2")
+    with StubPetfinder(latency=1.0) as stub:
+        api = _api(tmp_path, stub)
+        api.cache.ttl = 0
+        for page in (1, 2):
+            started = time.monotonic()
+            res = api.search_animals("dog", page=page, as_json=True, source="live")
+            assert time.monotonic() - started < 0.9  # ตัดที่งบเวลา ไม่รอ upstream
+            assert res["items"]  # mock
+        assert api.breaker.snapshot()["state"] == "open"
+        calls = stub.counts["animals"]
+        api.search_animals("dog", page=3, as_json=True, source="live")
+        assert stub.counts["animals"] == calls  # วงจรเปิด → ไม่ยิงเลย
+        api.close()
+
+
+def test_429_blocks_limiter_without_opening_breaker(tmp_path):
+    with StubPetfinder(throttle_rate=1.0, retry_after="30") as stub:
+        api = _api(tmp_path, stub)
+        api.search_animals("dog", as_json=True, source="live")
+        assert api.limiter.stats()["blocked_for"] > 25
+        assert api.breaker.snapshot()["state"] == "closed"
+        calls = stub.counts["animals"]
+        api.search_animals("dog", page=2, as_json=True, source="live")
+        assert stub.counts["animals"] == calls
+        api.close()
+
+
+def test_rate_limited_call_does_not_strand_half_open_probe(tmp_path):
+    with StubPetfinder() as stub:
+        api = _api(tmp_path, stub)
+        api.breaker.reset_timeout = 0.05
+        api.breaker.record_failure("boom")
+        api.breaker.record_failure("boom")
+        time.sleep(0.06)
+        api.limiter.block_for(30)
+        with pytest.raises(RateLimited):
+            api._call("animals", "GET", f"{stub.base_url}/v2/animals", deadline=None)
+        # ไม่ได้ยิงจริง → ต้องไม่จอง probe ไว้ คนถัดไปยังลองได้ทันที
+        assert api.breaker.snapshot()["state"] == "open"
+        assert api.breaker.allow()
+        api.close()
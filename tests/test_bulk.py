@@ -0,0 +1,95 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from api.cache import SearchCache
+from api.petfinder import PetFinderAPI
+from api.snapshot import Snapshot, locked
+from api.stream import AnimalStream
+from data.persistence import PersistenceManager
+from main import main
+
+
+def _summary(capsys) -> dict:
+    # บรรทัดสุดท้ายของ stdout = สรุป JSON (ก่อนหน้าอาจมีข้อความ migrate ของ pets.db ใหม่)
+    return json.loads(capsys.readouterr().out.splitlines()[-1])
+
+
+def test_import_export_round_trip(tmp_path, capsys):
+    src = tmp_path / "in.ndjson"
+    src.write_text(
+        '{"id": "1", "name": "Buddy", "type": "Dog", "created_at": "2020-01-01 00:00:00"}\n'
+        "not json\n"
+        '{"id": "2", "name": "Milo", "type": "Cat"}\n'
+        '{"id": "3"}\n',
+        encoding="utf-8",
+    )
+    db_path = str(tmp_path / "pets.db")
+    assert main(["--db", db_path, "--quiet", "import", str(src), "--batch-size", "1"]) == 1
+    summary = _summary(capsys)
+    assert (summary["created"], summary["invalid"]) == (2, 2)
+    assert summary["errors"] == [
+        "line 2: unreadable or missing id/name",
+        "line 4: unreadable or missing id/name",
+    ]
+
+    out = tmp_path / "fav.csv.gz"
+    assert main(["--db", db_path, "--quiet", "export", "-o", str(out)]) == 0
+    assert _summary(capsys)["items"] == 2
+    with gzip.open(out, "rt", encoding="utf-8") as f:
+        assert f.readline().startswith("id,name,type")
+
+    # import กลับเข้าอีกฐาน: created_at เดิมยังอยู่, import ซ้ำ = updated / skipped
+    other = str(tmp_path / "other.db")
+    assert main(["--db", other, "--quiet", "import", str(out)]) == 0
+    capsys.readouterr()
+    assert main(["--db", other, "--quiet", "import", str(out), "--on-conflict", "ignore"]) == 0
+    assert _summary(capsys)["skipped"] == 2
+    assert main(["--db", other, "--quiet", "import", str(out)]) == 0
+    assert _summary(capsys)["updated"] == 2
+    with PersistenceManager(db_path=other)._conn() as con:
+        row = con.execute("SELECT created_at FROM favorites WHERE id = '1'").fetchone()
+    assert row[0] == "2020-01-01 00:00:00"
+
+
+def test_snapshot_resumes_from_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.setenv("PETFINDER_MOCK_TOTAL", "20000")
+    api = PetFinderAPI(api_key="", secret="", cache=SearchCache(ttl=0))
+    fetch_page = AnimalStream.fetch_page
+
+    def flaky(self, page):
+        if self.params["location"] == "90210" and page == 5:
+            raise RuntimeError("upstream 503")
+        return fetch_page(self, page)
+
+    monkeypatch.setattr(AnimalStream, "fetch_page", flaky)
+    out = tmp_path / "snap"
+    snap = Snapshot(api, str(out), ["10001", "90210"], ["dog"], per_page=50, checkpoint_every=60)
+    first = {p["pair"]: p for p in snap.run()["pairs"]}
+    assert "error" not in first["10001/dog"] and first["90210/dog"]["items"] == 200
+    entry = json.loads((out / "checkpoint.json").read_text())["pairs"]["90210/dog"]
+    assert entry["cursor"] == "5:0" and not entry["done"]
+
+    # ส่วนที่เขียนหลัง checkpoint (เช่นเครื่องดับกลางทาง) ต้องถูกตัดทิ้งตอนทำต่อ
+    with open(out / "90210_dog.ndjson.part", "a") as f:
+        f.write('{"half": ')
+    monkeypatch.setattr(AnimalStream, "fetch_page", fetch_page)
+    second = {p["pair"]: p for p in snap.run()["pairs"]}
+    assert second["10001/dog"].get("skipped") and second["90210/dog"]["resumed_from"] == 200
+
+    lines = (out / "90210_dog.ndjson").read_text(encoding="utf-8").splitlines()
+    expected = api.synthetic.count(animal_type="dog", location="90210")
+    assert len(lines) == expected
+    assert len({json.loads(line)["id"] for line in lines}) == expected
+    assert not os.path.exists(out / "90210_dog.ndjson.part")
+    api.close()
+
+
+def test_snapshot_directory_lock(tmp_path):
+    path = str(tmp_path / ".lock")
+    with locked(path):
+        with pytest.raises(RuntimeError):
+            with locked(path):
+                pass
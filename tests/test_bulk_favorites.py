@@ -0,0 +1,50 @@
+from data.persistance import PersistenceManager
+from models.pet import Pet
+
+
+def test_bulk_add_reports_per_item(tmp_path):
+    pm = PersistenceManager(db_name=str(tmp_path / "b.db"))
+    pm.add_favorite(Pet("1", "Old name"))
+
+    results = pm.add_favorites_many(
+        [Pet("1", "Buddy"), Pet("2", "Luna"), Pet("2", "Luna again"), None, Pet("", "x")]
+    )
+    assert [r["status"] for r in results] == [
+        "updated",
+        "created",
+        "duplicate",
+        "invalid",
+        "invalid",
+    ]
+    names = {r["id"]: r["name"] for r in pm.list_favorites()}
+    assert names == {"1": "Buddy", "2": "Luna"}
+
+    skipped = pm.add_favorites_many([Pet("1", "Ignored")], on_conflict="ignore")
+    assert skipped[0]["status"] == "skipped"
+    assert {r["id"]: r["name"] for r in pm.list_favorites()}["1"] == "Buddy"
+
+
+def test_bulk_delete(tmp_path):
+    pm = PersistenceManager(db_name=str(tmp_path / "b.db"))
+    pm.add_favorites_many([Pet(str(i), f"Pet {i}") for i in range(1200)])
+    results = pm.delete_favorites_many([str(i) for i in range(600)] + ["nope"])
+    assert sum(r["status"] == "deleted" for r in results) == 600
+    assert results[-1] == {"id": "nope", "status": "not_found"}
+    assert len(pm.list_favorites()) == 600
+
+
+def test_bulk_ignore_never_overwrites(tmp_path, monkeypatch):
+    pm = PersistenceManager(db_name=str(tmp_path / "b.db"))
+    pm.add_favorite(Pet("1", "Original"))
+    seen = []
+
+    def stale_lookup(con, ids, chunk=500):
+        # จำลองว่าอีก connection เพิ่ง insert ตัวที่ 1 หลังเราอ่าน → ต้องไม่ทับของเขา
+        seen.append(con.in_transaction)
+        return set()
+
+    monkeypatch.setattr(PersistenceManager, "_existing_favorite_ids", staticmethod(stale_lookup))
+    pm.add_favorites_many([Pet("1", "Clobbered"), Pet("2", "New")], on_conflict="ignore")
+    pm.delete_favorites_many(["2"])
+    assert seen == [True, True]  # อ่าน id ภายใน write transaction แล้ว
+    assert {r["id"]: r["name"] for r in pm.list_favorites()} == {"1": "Original", "2": "New"}
@@ -0,0 +1,52 @@
+from api.cache import SearchCache
+from api.petfinder import PetFinderAPI
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    cache = SearchCache(ttl=60, maxsize=2)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}  # a ใช้ล่าสุด → b จะโดนไล่ออก
+    cache.set("c", {"v": 3})
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+
+    cache.set("d", {"v": 4}, ttl=-1)
+    assert cache.get("d") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_key_is_normalized():
+    k1 = SearchCache.make_key({"type": "Dog ", "location": "10001", "age": None, "page": 1})
+    k2 = SearchCache.make_key({"page": 1, "location": "10001", "type": "dog"})
+    assert k1 == k2
+
+
+def test_shared_backend_across_instances(tmp_path):
+    path = str(tmp_path / "cache.db")
+    w1 = SearchCache(ttl=60, shared_path=path)
+    w2 = SearchCache(ttl=60, shared_path=path)
+    w1.set("k", {"items": [], "page": 1})
+    assert w2.get("k") == {"items": [], "page": 1}
+    assert w2.stats()["shared_hits"] == 1
+
+
+def test_search_animals_uses_cache():
+    api = PetFinderAPI(api_key="k", secret="s", cache=SearchCache(ttl=60))
+    calls = []
+
+    def fake_fetch(params):
+        calls.append(params)
+        return {
+            "items": [{"id": 7, "name": "Rex"}],
+            "page": 1,
+            "total_pages": 3,
+            "per_page": params["limit"],
+        }
+
+    api._fetch_page = fake_fetch
+    first = api.search_animals("dog", "10001", as_dict=True)
+    second = api.search_animals("DOG", "10001", as_dict=True)
+    assert len(calls) == 1
+    assert first["total_pages"] == second["total_pages"] == 3
+    assert second["items"][0].name == "Rex"
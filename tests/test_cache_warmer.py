@@ -0,0 +1,63 @@
+from api.cache import SearchCache
+from api.cache_warmer import CacheWarmer
+from api.petfinder import PetFinderAPI
+from data.persistence import PersistenceManager
+
+
+def _setup(tmp_path, searches):
+    path = str(tmp_path / "pets.db")
+    db = PersistenceManager(db_path=path)
+    for params, n in searches:
+        for _ in range(n):
+            db.add_search_history(dict(params, per_page=24, page=1))
+    pf = PetFinderAPI(api_key="k", secret="s", cache=SearchCache(ttl=300, shared_path=path))
+    calls = []
+
+    def fake_fetch(params):
+        calls.append(params)
+        return {"items": [], "page": 1, "total_pages": 1, "per_page": params["limit"]}
+
+    pf._fetch_page = fake_fetch
+    return path, db, pf, calls
+
+
+def test_plan_follows_history_and_skips_fresh_entries(tmp_path):
+    _, db, pf, calls = _setup(
+        tmp_path,
+        [
+            ({"animal_type": "Cat"}, 1),
+            ({"animal_type": "Dog", "location": "94103", "age": "Baby"}, 3),
+        ],
+    )
+    warmer = CacheWarmer(pf, db, interval=10, budget=5, refresh_ahead=60)
+    plan = warmer.plan()
+    assert [p["animal_type"] for p in plan] == ["dog", "cat"]
+    assert plan[1]["location"] == "10001"  # ค่าเริ่มต้นเดียวกับ /api/search
+
+    assert warmer.run_once()["refreshed"] == 2
+    assert calls[0] == {"page": 1, "limit": 24, "type": "dog", "location": "94103", "age": "baby"}
+
+    # entry ยังเหลืออายุ 300s > refresh_ahead → ไม่ยิงซ้ำ
+    assert warmer.run_once()["fresh"] == 2 and len(calls) == 2
+
+    pf.search_animals(animal_type="dog", location="94103", age="baby", as_json=True)
+    pf.search_animals(animal_type="Bird", as_json=True)  # ไม่อยู่ในแผน → ไม่นับ
+    stats = warmer.stats()
+    assert stats["warm_hits"] == 1 and stats["warm_misses"] == 0
+    assert stats["budget_used"] == 2
+    db.close()
+
+
+def test_budget_and_claims_are_shared_between_workers(tmp_path):
+    path, db, pf, calls = _setup(tmp_path, [({"animal_type": t}, 1) for t in "ABCD"])
+    # refresh_ahead > ttl → ถือว่าทุก entry ใกล้หมดอายุเสมอ
+    first = CacheWarmer(pf, db, interval=3600, budget=3, refresh_ahead=10_000, shared_path=path)
+    second = CacheWarmer(pf, db, interval=3600, budget=3, refresh_ahead=10_000, shared_path=path)
+
+    assert first.run_once()["refreshed"] == 3
+    result = second.run_once()
+    assert result["refreshed"] == 0
+    assert result["claimed_elsewhere"] == 3 and result["budget_exhausted"] == 1
+    assert len(calls) == 3
+    assert second.stats()["budget_history"][0]["used"] == 3
+    db.close()
@@ -0,0 +1,100 @@
+from api.cache import SearchCache
+from api.catalog_sync import CatalogSync, _to_row
+from api.petfinder import PetFinderAPI
+from data.catalog import CatalogStore
+
+
+def _animal(i, **kw):
+    base = {
+        "id": i,
+        "name": f"Pet{i}",
+        "type": "Dog",
+        "breeds": {"primary": "Beagle" if i % 2 else "Poodle"},
+        "age": "Young",
+        "size": "Medium",
+        "gender": "Female",
+        "contact": {"email": "a@b.c"},
+        "description": "Loves long walks on the beach" if i == 3 else "Friendly",
+        "status": "adoptable",
+        "published_at": f"2026-01-0{i}T00:00:00+0000",
+    }
+    base.update(kw)
+    return base
+
+
+def test_incremental_sync_and_mirror_search(tmp_path):
+    store = CatalogStore(str(tmp_path / "pets.db"))
+    api = PetFinderAPI(api_key="k", secret="s", cache=SearchCache(ttl=60), catalog=store)
+    batches = [
+        [_animal(1), _animal(2), _animal(3)],
+        [_animal(4), _animal(2, status="adopted")],
+    ]
+    seen_params = []
+
+    def fake_raw(params):
+        seen_params.append(dict(params))
+        return {"animals": batches.pop(0), "pagination": {"total_pages": 1}}
+
+    api.fetch_raw = fake_raw
+    sync = CatalogSync(api, store, ["10001"], ["dog"])
+    sync.sync_once()
+    sync.sync_once()
+
+    assert "after" not in seen_params[0] and seen_params[0]["status"] == "adoptable,adopted,found"
+    assert seen_params[1]["after"] == "2026-01-03T00:00:00+0000"
+    assert store.count() == 3  # ตัวที่ 2 ถูกรับเลี้ยงแล้ว → ลบออก
+
+    res = api.search_animals("dog", "10001", breed="beagle", as_dict=True, source="mirror")
+    assert sorted(p.pet_id for p in res["items"]) == ["1", "3"]
+
+    res = api.search_animals(location="10001", as_dict=True, text="beach")
+    assert [p.name for p in res["items"]] == ["Pet3"]
+
+
+def test_partial_sync_keeps_watermark_and_skips_prune(tmp_path):
+    store = CatalogStore(str(tmp_path / "pets.db"))
+    api = PetFinderAPI(api_key="k", secret="s", cache=SearchCache(ttl=60), catalog=store)
+    store.upsert([dict(_to_row(_animal(9), "10001"), updated_at=None)])
+    with store._conn() as con:
+        con.execute("UPDATE catalog_animals SET synced_at = 0")
+    api.fetch_raw = lambda params: {
+        "animals": [_animal(params["page"])],
+        "pagination": {"total_pages": 5},
+    }
+
+    sync = CatalogSync(api, store, ["10001"], ["dog"], max_pages=2)
+    assert sync.sync_once(full=True)[0]["complete"] is False
+    # ยังไม่ครบทุกหน้า → ไม่ขยับ watermark และไม่ prune ตัวที่แค่ยังไม่ถูกดึง
+    assert store.get_watermark("10001", "dog") is None
+    assert store.count() == 3
+
+
+def test_upstream_failure_falls_back_to_mirror(tmp_path):
+    store = CatalogStore(str(tmp_path / "pets.db"))
+    store.upsert(
+        [
+            {
+                "id": "9",
+                "name": "Mirror",
+                "type": "Cat",
+                "breed": "Siamese",
+                "age": "Adult",
+                "size": "Small",
+                "gender": "Male",
+                "contact": None,
+                "phone": None,
+                "photo_url": None,
+                "description": None,
+                "location": "10001",
+                "updated_at": None,
+            }
+        ]
+    )
+    api = PetFinderAPI(api_key="k", secret="s", cache=SearchCache(ttl=60), catalog=store)
+
+    def boom(params):
+        raise ConnectionError("petfinder down")
+
+    api._fetch_page = boom
+    res = api.search_animals("cat", "10001", as_dict=True)
+    assert [p.name for p in res["items"]] == ["Mirror"]
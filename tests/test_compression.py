@@ -0,0 +1,108 @@
+import gzip
+
+from flask import Flask, Response, jsonify, render_template_string, request
+
+from app import create_app
+from controllers import assets, compression
+
+
+def _app(tmp_path):
+    static = tmp_path / "static"
+    (static / "css").mkdir(parents=True)
+    (static / "css" / "site.css").write_text("body { color: #333; }\n" * 100)
+    app = Flask(__name__, static_folder=str(static))
+    assets.init_app(app)
+    compression.init_app(app)
+
+    @app.get("/api/items")
+    def items():
+        return jsonify({"items": [{"id": i, "description": "friendly " * 20} for i in range(20)]})
+
+    @app.get("/photo.jpg")
+    def photo():
+        resp = Response(b"\xff\xd8" + b"\0" * 4096, mimetype="image/jpeg")
+        resp.set_etag("photo-1")
+        return resp.make_conditional(request)
+
+    @app.get("/page")
+    def page():
+        return render_template_string("<link href=\"{{ asset_url('css/site.css') }}\">")
+
+    return app
+
+
+def test_negotiate():
+    assert compression.negotiate("gzip, deflate") == "gzip"
+    assert compression.negotiate("gzip;q=0, identity") is None
+    assert compression.negotiate("*") == ("br" if compression.brotli else "gzip")
+    assert compression.negotiate(None) is None
+
+
+def test_api_json_gets_etag_304_and_gzip(tmp_path):
+    client = _app(tmp_path).test_client()
+    plain = client.get("/api/items")
+    etag = plain.headers["ETag"]
+    assert etag.startswith('W/"') and "Content-Encoding" not in plain.headers
+
+    zipped = client.get("/api/items", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert zipped.headers["ETag"] == etag and "Accept-Encoding" in zipped.headers["Vary"]
+    assert gzip.decompress(zipped.data) == plain.data
+
+    again = client.get("/api/items", headers={"If-None-Match": etag, "Accept-Encoding": "gzip"})
+    assert again.status_code == 304 and again.data == b""
+
+
+def test_not_modified_image_keeps_strong_etag_without_vary(tmp_path):
+    client = _app(tmp_path).test_client()
+    resp = client.get("/photo.jpg", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["ETag"] == '"photo-1"' and "Vary" not in resp.headers
+
+    again = client.get(
+        "/photo.jpg", headers={"Accept-Encoding": "gzip", "If-None-Match": '"photo-1"'}
+    )
+    # ไม่บีบอัดรูป → 304 ต้องได้ ETag ตัวเดียวกับ 200 (strong) และไม่เพิ่ม Vary
+    assert again.status_code == 304 and again.headers["ETag"] == '"photo-1"'
+    assert "Vary" not in again.headers
+
+
+def test_templates_reference_immutable_fingerprinted_assets(tmp_path):
+    client = _app(tmp_path).test_client()
+    html = client.get("/page").get_data(as_text=True)
+    url = html.split('"')[1]
+    assert url.startswith("/assets/css/site.") and url.endswith(".css")
+
+    resp = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert resp.status_code == 200 and resp.headers["Content-Encoding"] == "gzip"
+    assert "immutable" in resp.headers["Cache-Control"]
+    assert gzip.decompress(resp.data).startswith(b"body {")
+    assert (
+        client.get(
+            url, headers={"Accept-Encoding": "gzip", "If-None-Match": resp.headers["ETag"]}
+        ).status_code
+        == 304
+    )
+    assert client.get("/assets/css/site.000000000000.css").status_code == 404
+
+
+def test_compressed_versioned_json_gets_a_weak_etag(tmp_path):
+    app = create_app({"PETS_DB_PATH": str(tmp_path / "pets.db")})
+    client = app.test_client()
+    for i in range(10):
+        client.post("/api/favorites", json={"id": str(i), "name": "Rex " * 40, "type": "Dog"})
+
+    plain = client.get("/api/favorites")
+    tag = plain.headers["ETag"]
+    assert tag.startswith('"favorites-') and "Content-Encoding" not in plain.headers
+
+    zipped = client.get("/api/favorites", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert zipped.headers["ETag"] == "W/" + tag  # คนละ bytes → ไม่ใช้ strong ETag ร่วมกัน
+
+    again = client.get(
+        "/api/favorites",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": zipped.headers["ETag"]},
+    )
+    assert again.status_code == 304 and again.headers["ETag"] == zipped.headers["ETag"]
+    assert client.get("/api/favorites", headers={"If-None-Match": tag}).status_code == 304
+    app.extensions["pets"].close()
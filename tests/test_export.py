@@ -0,0 +1,31 @@
+import gzip
+import json
+
+from data.export import csv_chunks, gzip_chunks, ndjson_chunks
+from data.persistance import FAVORITE_COLUMNS, PersistenceManager
+from models.pet import Pet
+
+
+def test_streamed_exports_match_rows(tmp_path):
+    pm = PersistenceManager(db_name=str(tmp_path / "x.db"))
+    for i in range(25):
+        pm.add_favorite(Pet(str(i), f"Pet {i}", "Dog", description='says "woof", a lot'))
+
+    chunks = list(csv_chunks(FAVORITE_COLUMNS, pm.iter_favorite_chunks(chunk_size=10)))
+    assert len(chunks) == 3  # header ไปกับก้อนแรก
+    text = b"".join(chunks).decode()
+    assert text.splitlines()[0] == ",".join(FAVORITE_COLUMNS)
+    assert text == pm.export_csv_bytes().decode()
+
+    raw = gzip.decompress(
+        b"".join(
+            gzip_chunks(ndjson_chunks(FAVORITE_COLUMNS, pm.iter_favorite_chunks(chunk_size=7)))
+        )
+    )
+    rows = [json.loads(line) for line in raw.decode().splitlines()]
+    assert len(rows) == 25 and rows[0]["description"] == 'says "woof", a lot'
+
+
+def test_empty_export_has_header(tmp_path):
+    pm = PersistenceManager(db_name=str(tmp_path / "empty.db"))
+    assert pm.export_csv_bytes().decode().strip() == ",".join(FAVORITE_COLUMNS)
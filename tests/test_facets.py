@@ -0,0 +1,98 @@
+from api.cache import SearchCache
+from api.facets import FacetEngine, FacetIndex
+from api.petfinder import DEFAULT_PHOTO, PetFinderAPI
+from app import create_app
+
+
+def _items():
+    rows = [
+        ("Beagle", "Baby", "Small", "Male", "https://example.org/1.jpg"),
+        ("Beagle", "Adult", "Medium", "Female", DEFAULT_PHOTO),
+        ("Poodle", "Baby", "Small", "Female", "https://example.org/3.jpg"),
+        ("Poodle", "Senior", "Extra Large", "Male", None),
+        ("Mixed", "Young", "Large", "Female", "https://example.org/5.jpg"),
+    ]
+    return [
+        {
+            "id": i,
+            "name": f"Pet {i}",
+            "type": "Dog",
+            "breed": b,
+            "age": a,
+            "size": s,
+            "gender": g,
+            "photo_url": p,
+        }
+        for i, (b, a, s, g, p) in enumerate(rows)
+    ]
+
+
+def test_index_filters_pages_and_disjunctive_counts():
+    index = FacetIndex(_items(), {"animal_type": "Dog", "location": "10001"})
+    base = {"animal_type": "dog", "location": "10001"}
+
+    res = index.page(dict(base, age="baby,young"), page=1, per_page=2)
+    assert [it["id"] for it in res["items"]] == [0, 2]
+    assert (res["total_pages"], res["total_count"]) == (2, 3)
+    assert [it["id"] for it in index.page(dict(base, age="baby,young"), 2, 2)["items"]] == [4]
+    assert [it["id"] for it in index.page(dict(base, size="xlarge"))["items"]] == [3]
+    assert [it["id"] for it in index.page(dict(base, has_photo="1"))["items"]] == [0, 2, 4]
+    assert index.page(dict(base, breed="Husky"))["items"] == []
+
+    counts = index.counts(dict(base, age="baby", gender="female"))
+    # age นับโดยไม่ใช้ age=baby (แต่ยังใช้ gender=female)
+    assert counts["age"] == [
+        {"value": "Adult", "count": 1},
+        {"value": "Baby", "count": 1},
+        {"value": "Young", "count": 1},
+    ]
+    assert counts["breed"] == [{"value": "Poodle", "count": 1}]
+    assert counts["gender"] == [{"value": "Female", "count": 1}, {"value": "Male", "count": 1}]
+
+    assert index.covers(dict(base, age="baby", breed="beagle"))
+    assert not index.covers(dict(base, location="90210"))
+    assert not index.covers({"animal_type": "cat", "location": "10001"})
+    narrow = FacetIndex(_items(), dict(base, age="baby,young"))
+    assert narrow.covers(dict(base, age="young")) and not narrow.covers(dict(base, age="adult"))
+    assert not narrow.covers(base)
+
+
+def test_engine_answers_refinements_without_upstream(monkeypatch):
+    monkeypatch.setenv("PETFINDER_MOCK_TOTAL", "3000")
+    api = PetFinderAPI(api_key="", secret="", cache=SearchCache(ttl=0))
+    engine = FacetEngine(max_items=1000)
+    filters = {"animal_type": "cat", "location": "10001", "age": "baby"}
+    index = engine.ensure(api, filters)
+    assert index.complete and index.filters == {"animal_type": "cat", "location": "10001"}
+    assert len(index) == api.synthetic.count(animal_type="cat", location="10001")
+
+    refined = dict(filters, size="small", gender="female")
+    assert engine.find(refined) is index
+    items = index.page(refined, per_page=500)["items"]
+    assert len(items) == api.synthetic.count(**refined)
+    assert all((it["age"], it["size"], it["gender"]) == ("Baby", "Small", "Female") for it in items)
+    assert engine.find({"animal_type": "dog", "location": "10001"}) is None
+
+    # ชุดฐานใหญ่เกิน max_items → สร้างชุดของ filters เต็มแทน
+    small = FacetEngine(max_items=100)
+    index = small.ensure(api, {"animal_type": "dog", "location": "10001", "age": "senior"})
+    assert index.filters["age"] == "senior" and small.stats()["truncated"] == 1
+    api.close()
+
+
+def test_search_endpoint_returns_facets_and_serves_refinements_locally(tmp_path, monkeypatch):
+    monkeypatch.setenv("PETFINDER_MOCK_TOTAL", "2000")
+    app = create_app({"PETS_DB_PATH": str(tmp_path / "pets.db")})
+    client = app.test_client()
+    body = client.get("/api/search?type=dog&facets=1&per_page=10").get_json()
+    assert body["facets_complete"] is True and body["count"] == 10
+    assert sum(f["count"] for f in body["facets"]["gender"]) > 0
+
+    pf = app.extensions["pets"].pf
+    monkeypatch.setattr(pf, "search_animals", lambda *a, **kw: 1 / 0)
+    body = client.get("/api/search?type=dog&age=adult&gender=male&per_page=10").get_json()
+    assert body["items"] and {(it["age"], it["gender"]) for it in body["items"]} == {
+        ("Adult", "Male")
+    }
+    assert "facets" not in body
+    app.extensions["pets"].close()
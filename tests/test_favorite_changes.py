@@ -0,0 +1,79 @@
+from app import create_app
+from controllers import events
+from data import migrations, persistence
+from data.persistence import PersistenceManager
+from models.pet import Pet
+
+
+def _pet(pid, name="Pet"):
+    return Pet(pet_id=pid, name=name, pet_type="Dog")
+
+
+def test_change_log_collapses_to_latest_state(tmp_path):
+    db = PersistenceManager(db_path=str(tmp_path / "pets.db"))
+    assert db.favorite_changes_version() == 0
+    db.add_favorite(_pet("a"))
+    db.add_favorite(_pet("b"))
+    start = db.favorite_changes_version()
+    db.add_favorite(_pet("a", "Renamed"))
+    db.delete_favorite("b")
+    db.add_favorite(_pet("c"))
+
+    delta = db.favorite_changes(start)
+    assert [(c["op"], c["id"]) for c in delta["changes"]] == [
+        ("upsert", "a"),
+        ("delete", "b"),
+        ("upsert", "c"),
+    ]
+    assert delta["changes"][0]["item"]["name"] == "Renamed"
+    assert delta["version"] == db.favorite_changes_version() and not delta["reset"]
+
+    page = db.favorite_changes(start, limit=2)
+    assert page["more"] and page["version"] == page["changes"][-1]["version"]
+    assert [c["id"] for c in db.favorite_changes(page["version"])["changes"]] == ["c"]
+    assert db.favorite_changes(db.favorite_changes_version())["changes"] == []
+    assert db.favorite_changes(10_000)["reset"]
+    db.close()
+
+
+def test_old_versions_are_pruned_and_force_a_reset(tmp_path, monkeypatch):
+    # trigger ตัดรายการเก่าถูกสร้างโดยขั้น migrate v5 (DDL ตายตัว) → ย่อหน้าต่างที่นั่น
+    monkeypatch.setattr(
+        migrations,
+        "_V5_FAVORITE_CHANGES",
+        migrations._V5_FAVORITE_CHANGES.replace(f"- {persistence.FAVORITE_CHANGES_KEEP};", "- 3;"),
+    )
+    db = PersistenceManager(db_path=str(tmp_path / "pets.db"))
+    db.add_favorites_many([_pet(str(i)) for i in range(6)])
+    assert db.favorite_changes(1)["reset"]
+    assert not db.favorite_changes(3)["reset"]
+    db.close()
+
+
+def test_changes_endpoint_and_event_stream(tmp_path, monkeypatch):
+    app = create_app({"PETS_DB_PATH": str(tmp_path / "pets.db")})
+    client = app.test_client()
+    listing = client.get("/api/favorites?limit=10")
+    since = int(listing.headers["X-Favorites-Version"])
+    client.post("/api/favorites", json={"id": "42", "name": "Rex", "type": "Dog"})
+
+    delta = client.get(f"/api/favorites/changes?since={since}").get_json()
+    assert [(c["op"], c["id"]) for c in delta["changes"]] == [("upsert", "42")]
+    assert client.get("/api/favorites/changes?since=x").status_code == 400
+
+    # sync worker (thread เดียว): ไม่เปิดสตรีม ไม่โฆษณา SSE → หน้าเว็บ poll /changes
+    assert "X-Favorites-Events" not in listing.headers
+    resp = client.get(f"/api/favorites/events?since={since}")
+    assert resp.status_code == 204 and not resp.data
+    assert events.SLOTS.active == 0
+
+    threaded = {"wsgi.multithread": True}
+    listing = client.get("/api/favorites?limit=10", environ_overrides=threaded)
+    assert listing.headers["X-Favorites-Events"] == "sse"
+    monkeypatch.setattr(events, "MAX_SECS", 0.3)
+    monkeypatch.setattr(events.stream, "__defaults__", (0.3, 0.05))
+    resp = client.get(f"/api/favorites/events?since={since}", environ_overrides=threaded)
+    assert resp.mimetype == "text/event-stream"
+    body = resp.get_data(as_text=True)
+    assert "event: upsert" in body and f"id: {delta['version']}" in body
+    app.extensions["pets"].close()
@@ -0,0 +1,87 @@
+import time
+
+from data.history_writer import HistoryWriter
+from data.persistance import PersistenceManager
+
+
+def test_batches_are_group_committed(tmp_path):
+    pm = PersistenceManager(db_name=str(tmp_path / "h.db"))
+    writer = HistoryWriter(pm, batch_size=50, flush_interval=60)
+    for i in range(120):
+        assert writer.submit({"animal_type": "dog", "location": "10001", "page": i + 1})
+    writer.stop()
+
+    stats = writer.stats()
+    assert stats["written"] == 120 and stats["queue_depth"] == 0
+    assert stats["batches"] >= 3  # ไม่เกิน 50 แถวต่อ transaction
+    assert len(pm.list_search_history(500)) == 120
+
+
+def test_overflow_policy_drops_instead_of_blocking(tmp_path):
+    pm = PersistenceManager(db_name=str(tmp_path / "h.db"))
+    writer = HistoryWriter(pm, batch_size=100, flush_interval=60, max_queue=3)
+    results = [writer.submit({"page": i}) for i in range(5)]
+    assert results.count(False) == 2
+    assert writer.stats()["dropped"] == 2
+    writer.flush()
+    assert len(pm.list_search_history()) == 3
+
+
+def test_rollups_and_retention(tmp_path):
+    pm = PersistenceManager(db_name=str(tmp_path / "h.db"))
+    for _ in range(3):
+        pm.add_search_history({"animal_type": "dog", "location": "10001"})
+    pm.add_search_history({"animal_type": "Cat", "location": "10001"})
+    pm.add_search_history(
+        {"animal_type": "dog", "location": "10001", "created_at": "2001-01-01 00:00:00"}
+    )
+
+    top = pm.top_searches(n=5, bucket="day", span=1)
+    assert top[0] == {
+        "animal_type": "dog",
+        "location": "10001",
+        "age": None,
+        "size": None,
+        "gender": None,
+        "breed": None,
+        "count": 3,
+    }
+    assert top[1]["animal_type"] == "cat"
+
+    assert pm.compact_search_history(max_age_days=30, chunk_size=1) == 1
+    assert len(pm.list_search_history()) == 4
+    assert pm.top_searches(bucket="hour", span=1)[0]["count"] == 3  # rollup ไม่ถูกลด
+
+
+def test_max_rows_keeps_rows_tied_with_the_cutoff(tmp_path):
+    pm = PersistenceManager(db_name=str(tmp_path / "h.db"))
+    # writer flush ทั้งก้อนด้วย created_at เดียวกัน (ละเอียดแค่วินาที)
+    for page, created_at in [(9, "2029-01-01 00:00:00")] + [
+        (i, "2030-01-01 00:00:00") for i in range(5)
+    ]:
+        pm.add_search_history({"animal_type": "dog", "page": page, "created_at": created_at})
+
+    assert pm.compact_search_history(max_age_days=0, max_rows=3, chunk_size=2) == 3
+    assert [r["page"] for r in pm.list_search_history()] == [4, 3, 2]
+
+
+def test_sync_mode_still_compacts(tmp_path, monkeypatch):
+    from app import create_app
+
+    monkeypatch.setenv("PETS_HISTORY_ASYNC", "0")
+    monkeypatch.setenv("PETS_HISTORY_COMPACT_SECS", "0.01")
+    app = create_app({"PETS_DB_PATH": str(tmp_path / "pets.db")})
+    services = app.extensions["pets"]
+    services.db.add_search_history({"animal_type": "dog", "created_at": "2001-01-01 00:00:00"})
+    assert services.retention.stats()["runs"] == 0  # รอบแรกนับจากตอนสร้าง
+    time.sleep(0.02)
+
+    client = app.test_client()
+    assert client.get("/api/search?type=dog&per_page=1").status_code == 200
+    deadline = time.monotonic() + 2
+    while services.retention.stats()["runs"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # ไม่มี HistoryWriter → รีเควสค้นหาเป็นตัวกระตุ้น compaction แทน
+    assert services.history is None
+    assert client.get("/api/_diag/history").get_json()["retention"]["compacted"] == 1
+    services.close()
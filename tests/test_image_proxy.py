@@ -0,0 +1,131 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from api.image_proxy import ImageFetchError, ImageProxy
+from app import create_app
+
+PNG_A = b"\x89PNG\r\n\x1a\n" + b"a" * 600
+PNG_B = b"\x89PNG\r\n\x1a\n" + b"b" * 600
+
+
+@pytest.fixture
+def stub():
+    hits = []
+    routes = {
+        "/a.png": (PNG_A, "image/png"),
+        "/a-copy.png": (PNG_A, "image/png"),
+        "/b.png": (PNG_B, "image/png"),
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            body, ctype = routes.get(self.path, (b"<html>", "text/html"))
+            if ctype == "redirect":
+                self.send_response(302)
+                self.send_header("Location", body)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", hits, routes
+    server.shutdown()
+
+
+def _proxy(tmp_path, base, **kw):
+    host = base.split("//", 1)[1]
+    return ImageProxy(str(tmp_path / "img"), allowed_hosts=[host], **kw)
+
+
+def test_fetches_once_and_dedupes_by_content(tmp_path, stub):
+    base, hits, _ = stub
+    proxy = _proxy(tmp_path, base)
+    path, ctype, etag = proxy.get(base + "/a.png")
+    assert ctype == "image/png" and open(path, "rb").read() == PNG_A
+    assert proxy.get(base + "/a.png")[0] == path
+    assert proxy.get(base + "/a-copy.png")[2] == etag  # เนื้อเดียวกัน → ไฟล์เดียวกัน
+    assert hits == ["/a.png", "/a-copy.png"]
+    assert proxy.stats()["files"] == 1
+
+
+def test_rejects_foreign_hosts_and_non_images(tmp_path, stub):
+    base, _, _ = stub
+    proxy = _proxy(tmp_path, base)
+    assert proxy.proxied_url("https://evil.example/x.png") == "https://evil.example/x.png"
+    assert proxy.proxied_url(base + "/a.png").startswith("/api/img?u=http%3A%2F%2F127.0.0.1")
+    with pytest.raises(ImageFetchError):
+        proxy.get("https://evil.example/x.png")
+    named = ImageProxy(str(tmp_path / "named"), allowed_hosts=["photos.example"])
+    assert named.allowed("https://photos.example/x.png")
+    assert named.allowed("https://photos.example:443/x.png")
+    assert not named.allowed("https://photos.example:8443/x.png")  # พอร์ตอื่นบน host เดียวกัน
+    assert not named.allowed("http://photos.example:bad/x.png")
+    with pytest.raises(ImageFetchError):
+        proxy.get(base + "/page.html")
+
+
+def test_redirects_are_checked_against_allowed_hosts(tmp_path, stub):
+    base, hits, routes = stub
+    port = base.rsplit(":", 1)[1]
+    routes["/hop.png"] = ("/a.png", "redirect")
+    routes["/out.png"] = (f"http://localhost:{port}/b.png", "redirect")  # host อื่น
+    routes["/loop.png"] = ("/loop.png", "redirect")
+    proxy = _proxy(tmp_path, base)
+
+    path, ctype, _ = proxy.get(base + "/hop.png")
+    assert open(path, "rb").read() == PNG_A and hits == ["/hop.png", "/a.png"]
+    with pytest.raises(ImageFetchError, match="not allowed"):
+        proxy.get(base + "/out.png")
+    assert "/b.png" not in hits
+    with pytest.raises(ImageFetchError, match="too many redirects"):
+        proxy.get(base + "/loop.png")
+
+
+def test_size_based_lru_eviction(tmp_path, stub):
+    base, _, _ = stub
+    proxy = _proxy(tmp_path, base, max_bytes=len(PNG_A) + 10)
+    a_path = proxy.get(base + "/a.png")[0]
+    b_path = proxy.get(base + "/b.png")[0]
+    stats = proxy.stats()
+    assert stats["evicted"] == 1 and stats["files"] == 1
+    assert open(b_path, "rb").read() == PNG_B
+    with pytest.raises(FileNotFoundError):
+        open(a_path, "rb")
+
+
+def test_thumbnail_generated_on_fetch(tmp_path, stub):
+    pil = pytest.importorskip("PIL.Image")
+    import io
+
+    base, _, routes = stub
+    buf = io.BytesIO()
+    pil.new("RGB", (800, 600), "red").save(buf, "PNG")
+    routes["/big.png"] = (buf.getvalue(), "image/png")
+    proxy = _proxy(tmp_path, base, thumb_widths=[200])
+    proxy.get(base + "/big.png")
+    assert proxy.stats()["thumbs"] == 1  # สร้างไว้ล่วงหน้าตอนดึง
+    path, ctype, _ = proxy.get(base + "/big.png", width=150)
+    assert ctype == "image/jpeg"
+    with pil.open(path) as im:
+        assert im.width == 200
+
+
+def test_search_cards_link_to_thumbnails(tmp_path, monkeypatch):
+    monkeypatch.setenv("PETS_IMAGE_THUMBS", "320,640")
+    app = create_app({"PETS_DB_PATH": str(tmp_path / "pets.db")})
+    items = app.test_client().get("/api/search?type=dog&per_page=5").get_json()["items"]
+    proxied = [it["photo_url"] for it in items if it["photo_url"].startswith("/api/img")]
+    assert proxied and all(url.endswith("&w=320") for url in proxied)
+    app.extensions["pets"].close()
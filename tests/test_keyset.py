@@ -0,0 +1,28 @@
+from data.persistance import PersistenceManager
+from models.pet import Pet
+
+
+def test_keyset_pages_cover_all_rows_once(tmp_path):
+    pm = PersistenceManager(db_name=str(tmp_path / "k.db"))
+    for i in range(23):
+        pm.add_favorite(Pet(f"p{i:02d}", f"Pet {i}"))  # created_at ซ้ำกันได้ → id ตัดสิน
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = pm.list_favorites_page(limit=10, cursor=cursor)
+        seen += [r["id"] for r in rows]
+        pages += 1
+        if cursor is None:
+            break
+    assert pages == 3
+    assert seen == [r["id"] for r in pm.list_favorites()]
+
+
+def test_table_version_changes_on_write(tmp_path):
+    pm = PersistenceManager(db_name=str(tmp_path / "v.db"))
+    v0 = pm.table_version("favorites")
+    pm.add_favorite(Pet("1", "Buddy"))
+    v1 = pm.table_version("favorites")
+    pm.delete_favorite("1")
+    assert v0 < v1 < pm.table_version("favorites")
+    assert pm.table_version("search_history") > 0
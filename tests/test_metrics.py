@@ -0,0 +1,36 @@
+from data.metrics import Metrics
+
+
+def _registry(path):
+    m = Metrics(flush_interval=0)
+    m.configure(shared_path=str(path))
+    m.counter("jobs_total", "Jobs")
+    m.histogram("job_seconds", "Job time", buckets=(0.1, 1))
+    return m
+
+
+def test_workers_aggregate_through_sqlite(tmp_path):
+    path = tmp_path / "m.db"
+    w1, w2 = _registry(path), _registry(path)  # เหมือน gunicorn สอง worker
+    w1.inc("jobs_total", status="ok")
+    w2.inc("jobs_total", 2, status="ok")
+    w1.observe("job_seconds", 0.05)
+    w2.observe("job_seconds", 0.5)
+
+    w2.flush()  # worker อื่น flush ตามรอบของตัวเอง
+    text = w1.render()
+    assert 'jobs_total{status="ok"} 3' in text
+    assert 'job_seconds_bucket{le="0.1"} 1' in text
+    assert 'job_seconds_bucket{le="1"} 2' in text
+    assert 'job_seconds_bucket{le="+Inf"} 2' in text
+    assert "job_seconds_count 2" in text
+    assert "# TYPE job_seconds histogram" in text
+    # flush เป็นส่วนต่าง → scrape ซ้ำไม่นับซ้ำ
+    assert w2.render() == text
+
+
+def test_in_process_only_without_shared_path():
+    m = Metrics(flush_interval=0)
+    m.counter("hits_total", "Hits")
+    m.inc("hits_total", route='/a"b')
+    assert 'hits_total{route="/a\\"b"} 1' in m.render()
@@ -0,0 +1,89 @@
+import sqlite3
+
+from data import migrations
+from data.persistence import PersistenceManager
+from models.pet import Pet
+
+
+def _legacy_db(path):
+    con = sqlite3.connect(path)
+    con.executescript("""
+        CREATE TABLE favorites (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          pet_id TEXT UNIQUE,
+          name TEXT NOT NULL,
+          type TEXT, breed TEXT, age TEXT, contact TEXT, photo_url TEXT,
+          created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        INSERT INTO favorites (pet_id, name, type) VALUES ('p-1', 'Buddy', 'Dog');
+        INSERT INTO favorites (pet_id, name, type) VALUES (NULL, 'Kitty', 'Cat');
+    """)
+    con.commit()
+    con.close()
+
+
+def test_legacy_favorites_are_upgraded_in_place(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    _legacy_db(path)
+    assert migrations.migrate_path(path) == (0, migrations.LATEST)
+
+    db = PersistenceManager(db_path=path)
+    ids = {f[0] for f in db.get_favorites()}
+    assert ids == {"p-1", "2"}
+    db.add_favorite(Pet(pet_id="p-3", name="Rex", pet_type="Dog", gender="Male"))
+    assert len(db.get_favorites()) == 3
+    db.close()
+
+
+def test_migrate_is_idempotent_and_sets_user_version(tmp_path):
+    path = str(tmp_path / "fresh.db")
+    assert migrations.migrate_path(path) == (0, migrations.LATEST)
+    assert migrations.migrate_path(path) == (migrations.LATEST, migrations.LATEST)
+    con = sqlite3.connect(path)
+    assert migrations.is_current(con)
+    tables = {r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert {"favorites", "search_history", "search_cache", "catalog_animals"} <= tables
+    con.close()
+
+
+def test_create_app_builds_services_on_first_request(tmp_path):
+    from app import create_app
+
+    path = tmp_path / "lazy.db"
+    app = create_app({"PETS_DB_PATH": str(path)})
+    services = app.extensions["pets"]
+    assert services.built == [] and not path.exists()
+
+    assert app.test_client().get("/api/favorites").status_code == 200
+    assert "db" in services.built and path.exists()
+    services.close()
+
+
+def test_migrated_schema_matches_live_schema(tmp_path):
+    # ขั้น migrate เป็น DDL ตายตัว → ถ้าแก้ SCHEMA ปัจจุบันโดยไม่เพิ่มขั้นใหม่ เทสต์นี้จะฟ้อง
+    from api import breaker, cache, cache_warmer, rate_limit, token_store
+    from data import catalog, metrics, persistence
+
+    def objects(con):
+        return set(con.execute("SELECT type, name, sql FROM sqlite_master WHERE sql NOT NULL"))
+
+    migrated = str(tmp_path / "migrated.db")
+    migrations.migrate_path(migrated)
+    live = sqlite3.connect(str(tmp_path / "live.db"))
+    for script in (
+        persistence.SCHEMA,
+        persistence.VERSION_SCHEMA,
+        cache.SHARED_SCHEMA,
+        token_store.SHARED_SCHEMA,
+        breaker.SHARED_SCHEMA,
+        rate_limit.SHARED_SCHEMA,
+        metrics.SCHEMA,
+        catalog.SCHEMA,
+        cache_warmer.SHARED_SCHEMA,
+        persistence.CHANGES_SCHEMA,
+    ):
+        live.executescript(script)
+    con = sqlite3.connect(migrated)
+    assert objects(con) == objects(live)
+    con.close()
+    live.close()
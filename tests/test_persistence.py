@@ -1,6 +1,7 @@
 from data.persistance import PersistenceManager
 from models.pet import Pet
 
+
 def test_add_and_get_favorites(tmp_path):
     db_path = tmp_path / "test.db"
     pm = PersistenceManager(db_name=str(db_path))
@@ -11,3 +12,24 @@ def test_add_and_get_favorites(tmp_path):
     favs = pm.get_favorites()
     assert len(favs) == 1
     assert favs[0][2] == "Buddy"
+
+
+def test_connection_is_reused_per_thread(tmp_path):
+    import threading
+
+    pm = PersistenceManager(db_name=str(tmp_path / "reuse.db"))
+    with pm._conn() as c1:
+        pass
+    with pm._conn() as c2:
+        assert c2.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert c1 is c2
+
+    other = []
+    t = threading.Thread(target=lambda: other.append(pm._thread_conn()))
+    t.start()
+    t.join()
+    assert other[0] is not c1
+
+    pm.close()
+    pm.add_favorite(Pet(2, "Luna", "Cat"))  # เปิดใหม่อัตโนมัติหลัง close
+    assert pm.list_favorites()[0]["name"] == "Luna"
@@ -0,0 +1,17 @@
+from api.petfinder import PetFinderAPI
+from models.pet import Pet, to_api_dict
+
+
+def test_pet_roundtrip_and_slots():
+    p = Pet("7", "Rex", "Dog", phone="555")
+    d = p.to_api_dict()
+    assert d["id"] == "7" and d["type"] == "Dog" and d["phone"] == "555"
+    assert Pet.from_api_dict(d) == p
+    assert p.to_dict()["pet_id"] == "7"
+    assert not hasattr(p, "__dict__")
+
+
+def test_to_api_dict_passes_dicts_through():
+    d = PetFinderAPI._map_animal({"id": 1, "name": "Luna", "type": "Cat"})
+    assert to_api_dict(d) is d
+    assert list(d) == list(Pet.from_api_dict(d).to_api_dict())
@@ -0,0 +1,124 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from api.breaker import CircuitBreaker
+from api.cache import SearchCache
+from api.petfinder import PetFinderAPI
+from api.rate_limit import TokenBucket
+from api.token_store import TokenStore
+from benchmarks.stub_petfinder import StubPetfinder
+from models.pet import Pet
+
+pytest.importorskip("aiohttp")
+
+from api.petfinder_async import AsyncPetFinderAPI  # noqa: E402
+
+
+def _api(tmp_path, stub):
+    return PetFinderAPI(
+        "key",
+        "secret",
+        base_url=stub.base_url,
+        token_store=TokenStore(shared_path=str(tmp_path / "t.db")),
+        breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60),
+        limiter=TokenBucket(rate=1000, burst=1000, shared_path=str(tmp_path / "t.db")),
+    )
+
+
+def _run(api, coro_fn):
+    async def main():
+        async with AsyncPetFinderAPI(api) as client:
+            return await coro_fn(client)
+
+    return asyncio.run(main())
+
+
+def test_same_contract_as_sync_client(tmp_path):
+    with StubPetfinder(total=50) as stub:
+        api = _api(tmp_path, stub)
+        res = _run(api, lambda c: c.search_animals("cat", per_page=5, page=2, as_dict=True))
+        assert res["page"] == 2 and res["total_pages"] == 4 and res["count"] == 5
+        assert all(isinstance(p, Pet) and p.pet_type == "Cat" for p in res["items"])
+        # หน้าเดิมจาก sync client → มาจาก cache ที่ async เขียนไว้ ไม่ยิงซ้ำ
+        same = api.search_animals("cat", per_page=5, page=2, as_json=True)
+        assert [it["id"] for it in same["items"]] == [p.pet_id for p in res["items"]]
+        assert stub.counts["animals"] == 1
+        api.close()
+
+
+def test_gather_coalesces_and_pages_run_concurrently(tmp_path):
+    with StubPetfinder(latency=0.2) as stub:
+        api = _api(tmp_path, stub)
+
+        async def work(client):
+            same = [client.search_animals("dog", as_json=True) for _ in range(20)]
+            await asyncio.gather(*same)
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            pages = await client.search_pages(
+                {"animal_type": "dog", "as_json": True}, pages=range(2, 12)
+            )
+            return client.flight_stats(), pages, loop.time() - started
+
+        stats, pages, elapsed = _run(api, work)
+        assert stats["leaders"] == 11 and stats["coalesced"] == 19
+        assert [p["page"] for p in pages] == list(range(2, 12))
+        assert elapsed < 1.0  # 10 หน้า x 0.2s ถ้าทีละหน้าจะเกิน 2s
+        assert stub.counts["animals"] == 11
+        api.close()
+
+
+def test_upstream_errors_fall_back_and_trip_breaker(tmp_path):
+    with StubPetfinder(error_rate=1.0) as stub:
+        api = _api(tmp_path, stub)
+        api.cache.ttl = 0
+
+        async def work(client):
+            return [
+                await client.search_animals("dog", page=p, as_json=True, source="live")
+                for p in (1, 2, 3)
+            ]
+
+        results = _run(api, work)
+        assert all(r["items"] for r in results)  # mock
+        assert api.breaker.snapshot()["state"] == "open"
+        assert stub.counts["animals"] == 2  # หน้า 3 ไม่ยิงเพราะวงจรเปิด
+        api.close()
+
+
+def test_shared_sqlite_writes_do_not_block_the_loop(tmp_path):
+    db = str(tmp_path / "pets.db")
+    with StubPetfinder(latency=0.05) as stub:
+        api = _api(tmp_path, stub)
+        api.cache = SearchCache(ttl=60, shared_path=db)
+        api.breaker = CircuitBreaker(shared_path=db)
+        # อีกโปรเซสถือ write lock ของ pets.db อยู่ → cache.set ต้องรอ
+        holder = sqlite3.connect(db, isolation_level=None, check_same_thread=False)
+        holder.execute("BEGIN IMMEDIATE")
+        threading.Timer(0.5, holder.execute, ("COMMIT",)).start()
+
+        async def work(client):
+            gaps, last = [], asyncio.get_running_loop().time()
+
+            async def ticker():
+                nonlocal last
+                while True:
+                    await asyncio.sleep(0.01)
+                    now = asyncio.get_running_loop().time()
+                    gaps.append(now - last)
+                    last = now
+
+            tick = asyncio.create_task(ticker())
+            res = await client.search_animals("dog", as_json=True)
+            await asyncio.sleep(0.05)  # ให้ ticker บันทึกช่วงที่ค้าง (ถ้ามี) ก่อนหยุด
+            tick.cancel()
+            return res, max(gaps)
+
+        res, worst_gap = _run(api, work)
+        assert res["items"] and api.cache.stats()["sets"] == 1
+        assert worst_gap < 0.2  # ถ้า set รันบน loop จะค้าง ~0.45s
+        holder.close()
+        api.close()
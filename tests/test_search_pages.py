@@ -0,0 +1,44 @@
+import time
+
+from api.cache import SearchCache
+from api.petfinder import PetFinderAPI
+
+
+def _api(delay=0.0):
+    api = PetFinderAPI(api_key="k", secret="s", cache=SearchCache(ttl=60))
+    api.fetched = []
+
+    def fake_fetch(params):
+        time.sleep(delay)
+        api.fetched.append(params["page"])
+        return {
+            "items": [{"id": params["page"], "name": f"p{params['page']}"}],
+            "page": params["page"],
+            "total_pages": 5,
+            "per_page": params["limit"],
+        }
+
+    api._fetch_page = fake_fetch
+    return api
+
+
+def test_search_pages_runs_concurrently_and_keeps_order():
+    api = _api(delay=0.1)
+    started = time.perf_counter()
+    results = api.search_pages({"animal_type": "dog", "location": "10001"}, pages=range(1, 5))
+    elapsed = time.perf_counter() - started
+    assert [r["page"] for r in results] == [1, 2, 3, 4]
+    assert elapsed < 0.3  # 4 หน้า ใช้เวลาใกล้ ๆ รีเควสเดียว
+
+
+def test_prefetch_next_warms_cache():
+    api = _api()
+    first = api.search_animals("dog", "10001", page=1, as_dict=True)
+    assert api.prefetch_next(first, animal_type="dog", location="10001")
+    deadline = time.time() + 2
+    while len(api.cache) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+
+    api.search_animals("dog", "10001", page=2, as_dict=True)
+    assert api.fetched == [1, 2]
+    assert api.cache.stats()["hits"] >= 1
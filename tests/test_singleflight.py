@@ -0,0 +1,58 @@
+import threading
+import time
+
+import pytest
+
+from api.singleflight import SingleFlight
+
+
+def _burst(sf, key, fn, n=6):
+    results, errors = [], []
+    gate = threading.Barrier(n)
+
+    def worker():
+        gate.wait()
+        try:
+            results.append(sf.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_concurrent_calls_share_one_upstream_call():
+    sf = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"page": 1}
+
+    results, errors = _burst(sf, "dog|10001|1", fetch)
+    assert not errors
+    assert len(calls) == 1
+    assert results == [{"page": 1}] * 6
+    stats = sf.stats()
+    assert stats["issued"] == 1 and stats["coalesced"] == 5
+
+
+def test_error_is_shared_with_waiters():
+    sf = SingleFlight()
+
+    def boom():
+        time.sleep(0.1)
+        raise RuntimeError("upstream 503")
+
+    results, errors = _burst(sf, "k", boom, n=4)
+    assert not results
+    assert len(errors) == 4 and all(str(e) == "upstream 503" for e in errors)
+
+    with pytest.raises(RuntimeError):
+        sf.do("k", boom)  # รอบใหม่ยิงใหม่ ไม่ค้างผลเก่า
+    assert sf.stats()["issued"] == 2
@@ -0,0 +1,43 @@
+from api.cache import SearchCache
+from api.petfinder import PetFinderAPI
+
+
+def _api(total_pages=3, per_page=4):
+    api = PetFinderAPI(api_key="k", secret="s", cache=SearchCache(ttl=60))
+    api.fetched = []
+
+    def fake_fetch(params):
+        page = params["page"]
+        api.fetched.append(page)
+        items = [{"id": f"{page}-{i}", "name": f"pet {page}-{i}"} for i in range(per_page)]
+        return {
+            "items": items if page <= total_pages else [],
+            "page": page,
+            "total_pages": total_pages,
+            "per_page": per_page,
+        }
+
+    api._fetch_page = fake_fetch
+    return api
+
+
+def test_iter_animals_walks_all_pages_lazily():
+    api = _api()
+    stream = api.iter_animals("dog", "10001", per_page=4, read_ahead=1)
+    it = iter(stream)
+    assert next(it).pet_id == "1-0"
+    assert max(api.fetched) <= 2  # โหลดล่วงหน้าแค่หน้าเดียว
+    rest = list(it)
+    assert len(rest) == 11
+    assert stream.cursor is None
+
+
+def test_iter_animals_resumes_from_cursor():
+    api = _api()
+    first = api.iter_animals("dog", "10001", per_page=4, max_items=6)
+    ids = [p.pet_id for p in first]
+    assert ids[-1] == "2-1" and first.cursor == "2:2"
+
+    second = api.iter_animals("dog", "10001", per_page=4, cursor=first.cursor)
+    ids += [p.pet_id for p in second]
+    assert len(ids) == len(set(ids)) == 12
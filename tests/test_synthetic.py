@@ -0,0 +1,72 @@
+from api.cache import SearchCache
+from api.petfinder import PetFinderAPI
+from api.synthetic import SyntheticCatalog
+
+
+def _walk(catalog, per_page, **filters):
+    ids, page = [], 1
+    while True:
+        data = catalog.search(page=page, per_page=per_page, **filters)
+        ids += [a["id"] for a in data["items"]]
+        if page >= data["total_pages"]:
+            return ids, data
+        page += 1
+
+
+def test_pages_cover_every_match_once_and_honor_filters():
+    catalog = SyntheticCatalog(total=5000, seed=7)
+    filters = {"animal_type": "dog", "age": "Adult", "gender": "female", "location": "10001"}
+    ids, last = _walk(catalog, 37, **filters)
+    assert len(ids) == len(set(ids)) == catalog.count(**filters) == last["total_count"] > 0
+    assert ids != sorted(ids)  # ลำดับถูกสลับ ไม่ใช่เรียงตาม id
+    for i in ids:
+        a = catalog.animal(i)
+        assert (a["type"], a["age"], a["gender"]) == ("Dog", "Adult", "Female")
+        assert "10001" in a["description"]
+
+    everything, _ = _walk(catalog, 100)
+    assert sorted(everything) == sorted(set(everything)) and len(everything) == 5000
+    assert min(everything) >= 1  # id 0 = "ไม่มี id" ใน controller
+    # seed=1 มี combo 0 ในบล็อกสุดท้าย → ต้องได้ id 1 ไม่ใช่ 0
+    assert min(_walk(SyntheticCatalog(total=10_000, seed=1), 100)[0]) == 1
+    kinds = [catalog.animal(i)["type"] for i in everything]
+    assert kinds.count("Dog") > kinds.count("Cat") > kinds.count("Bird") > 0
+
+    beagles = catalog.search(breed="beagle", per_page=100)["items"]
+    assert beagles and {(a["type"], a["breed"]) for a in beagles} == {("Dog", "Beagle")}
+    assert catalog.count(animal_type="cat", breed="Beagle") == 0
+
+
+def test_comma_separated_filters_union_their_values():
+    catalog = SyntheticCatalog(total=5000, seed=7)
+    adult, senior = catalog.count(age="adult"), catalog.count(age="senior")
+    assert catalog.count(age="Adult, Senior") == adult + senior > 0
+    ids, _ = _walk(catalog, 50, animal_type="dog,cat", age="senior,adult", gender="female")
+    assert len(ids) == catalog.count(animal_type="cat,dog", age="adult,senior", gender="female")
+    assert {(a["type"], a["age"], a["gender"]) for a in map(catalog.animal, ids)} <= {
+        (t, g, "Female") for t in ("Dog", "Cat") for g in ("Adult", "Senior")
+    }
+
+
+def test_same_seed_same_catalog_different_seed_differs():
+    a = SyntheticCatalog(total=100_000, seed=3).search(animal_type="cat", page=4, per_page=10)
+    b = SyntheticCatalog(total=100_000, seed=3).search(animal_type="cat", page=4, per_page=10)
+    c = SyntheticCatalog(total=100_000, seed=4).search(animal_type="cat", page=4, per_page=10)
+    assert a == b
+    assert a["items"] != c["items"]
+
+
+def test_mock_mode_serves_synthetic_pages(tmp_path, monkeypatch):
+    monkeypatch.setenv("PETFINDER_MOCK_TOTAL", "2000")
+    api = PetFinderAPI(api_key="", secret="", cache=SearchCache(ttl=0))
+    assert api.mock_mode
+
+    res = api.search_animals("cat", "10001", page=2, per_page=5, as_json=True)
+    assert set(res) == {"items", "page", "total_pages", "per_page", "count"}
+    assert res["page"] == 2 and res["per_page"] == 5 and res["count"] == 5
+    assert all(a["type"] == "Cat" for a in res["items"])
+
+    pets = list(api.iter_animals("rabbit", "10001", per_page=7))
+    expected = api.synthetic.count(animal_type="rabbit", location="10001")
+    assert len(pets) == expected and all(p.pet_type == "Rabbit" for p in pets)
+    api.close()
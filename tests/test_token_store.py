@@ -0,0 +1,98 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+import requests
+
+from api.token_store import TokenStore
+
+
+def test_refreshes_ahead_of_expiry():
+    store = TokenStore(refresh_skew=60)
+    tokens = iter([("t1", 30), ("t2", 3600)])
+    # t1 เหลืออายุน้อยกว่า skew → ต้องขอใหม่ทันทีในครั้งถัดไป
+    assert store.get("cid", lambda: next(tokens)) == "t1"
+    assert store.get("cid", lambda: next(tokens)) == "t2"
+    assert store.get("cid", lambda: next(tokens)) == "t2"
+    assert store.refreshes == 2
+
+
+def test_single_refresh_under_concurrency_and_shared(tmp_path):
+    path = str(tmp_path / "tok.db")
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return "shared-token", 3600
+
+    w1 = TokenStore(shared_path=path)
+    threads = [threading.Thread(target=w1.get, args=("cid", fetch)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    w2 = TokenStore(shared_path=path)  # worker อีกตัวอ่าน token เดิมจาก SQLite
+    assert w2.get("cid", fetch) == "shared-token"
+    assert len(calls) == 1
+
+    w2.invalidate("cid", "shared-token")
+    assert TokenStore(shared_path=path).get("cid", lambda: ("new", 3600)) == "new"
+
+
+def test_fetch_runs_without_holding_the_write_lock(tmp_path):
+    path = str(tmp_path / "tok.db")
+    store = TokenStore(shared_path=path)
+
+    def fetch():
+        # breaker/rate limiter เขียนไฟล์เดียวกันระหว่างขอ token ต้องไม่ติด lock
+        con = sqlite3.connect(path, timeout=0.2, isolation_level=None)
+        con.execute("BEGIN IMMEDIATE")
+        con.execute("COMMIT")
+        con.close()
+        return "tok", 3600
+
+    assert store.get("cid", fetch) == "tok"
+
+
+def test_other_worker_waits_for_claimed_refresh(tmp_path):
+    path = str(tmp_path / "tok.db")
+    w1, w2 = TokenStore(shared_path=path), TokenStore(shared_path=path)
+    started = threading.Event()
+    calls = []
+
+    def slow_fetch():
+        calls.append("w1")
+        started.set()
+        time.sleep(0.2)
+        return "from-w1", 3600
+
+    t = threading.Thread(target=w1.get, args=("cid", slow_fetch))
+    t.start()
+    started.wait(2)
+    assert w2.get("cid", lambda: calls.append("w2") or ("from-w2", 3600)) == "from-w1"
+    t.join()
+    assert calls == ["w1"]
+
+
+def test_waiter_gives_up_at_caller_deadline(tmp_path):
+    path = str(tmp_path / "tok.db")
+    w1, w2 = TokenStore(shared_path=path), TokenStore(shared_path=path)
+    started, release = threading.Event(), threading.Event()
+
+    def stuck_fetch():
+        started.set()
+        release.wait(2)
+        return "late", 3600
+
+    t = threading.Thread(target=w1.get, args=("cid", stuck_fetch))
+    t.start()
+    started.wait(2)
+    begin = time.monotonic()
+    with pytest.raises(requests.Timeout):
+        w2.get("cid", lambda: ("from-w2", 3600), deadline=begin + 0.1)
+    assert time.monotonic() - begin < 0.5
+    release.set()
+    t.join()